@@ -0,0 +1,83 @@
+"""
+Measure the per-invocation cost of obtaining a gauge adapter.
+
+Before an invocation is executed, the executor needs a gauge adapter for the
+run. This compares three ways of getting one:
+
+ - cold: look up the adapter without any cached state, which corresponds to
+   walking all `rebench.interop` modules or compiling the custom adapter file
+   for every invocation
+ - registry: look up the adapter class in the already built registry and
+   instantiate it
+ - per run: reuse the adapter instance the executor keeps for the run
+
+Run from the root of the repository with:
+
+    python -m benchmarks.adapter_instantiation [num_invocations]
+"""
+
+import sys
+from os.path import dirname, join, realpath
+from timeit import timeit
+
+from rebench.configurator import Configurator
+from rebench.executor import Executor
+from rebench.interop.adapter import _registry, instantiate_adapter
+from rebench.persistence import DataStore
+from rebench.ui import TestDummyUI
+
+_CUSTOM_ADAPTER_DIR = join(
+    dirname(realpath(__file__)), "..", "rebench", "tests", "features"
+)
+
+
+def _create_executor(gauge_adapter):
+    ui = TestDummyUI()
+    config = {
+        "benchmark_suites": {
+            "Suite": {
+                "gauge_adapter": gauge_adapter,
+                "command": "%(benchmark)s",
+                "benchmarks": ["Bench1"],
+            }
+        },
+        "executors": {"Exe": {"executable": "true"}},
+        "experiments": {"Exp": {"suites": ["Suite"], "executions": ["Exe"]}},
+    }
+    cnf = Configurator(config, DataStore(ui), ui, data_file="/dev/null")
+    runs = list(cnf.get_runs())
+    executor = Executor(runs, False, ui, config_dir=_CUSTOM_ADAPTER_DIR)
+    return executor, runs[0]
+
+
+def _measure(name, gauge_adapter, num_invocations):
+    executor, run_id = _create_executor(gauge_adapter)
+
+    def cold():
+        _registry.clear()
+        instantiate_adapter(gauge_adapter, False, executor)
+
+    def registry():
+        instantiate_adapter(gauge_adapter, False, executor)
+
+    def per_run():
+        executor._get_gauge_adapter_instance(run_id)
+
+    print(name)
+    for label, fn in (("cold", cold), ("registry", registry), ("per run", per_run)):
+        seconds = timeit(fn, number=num_invocations)
+        print("  %-10s %10.2f us/invocation" % (label, seconds / num_invocations * 1e6))
+
+
+def main():
+    num_invocations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    _measure("Built-in adapter (RebenchLog)", "RebenchLog", num_invocations)
+    _measure(
+        "Custom adapter (issue_209_adapter.py)",
+        {"MyTestAdapter": "issue_209_adapter.py"},
+        num_invocations,
+    )
+
+
+if __name__ == "__main__":
+    main()
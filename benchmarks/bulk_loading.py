@@ -0,0 +1,130 @@
+"""
+Measure the time to load a large data file, measurement by measurement and
+in bulk with NumPy.
+
+This generates a synthetic data file in the text format with the given number
+of measurements, by default 10 million, spread over 100 runs with 10
+invocations each. Each invocation starts with a detected warmup. The index of
+the data file is created up front, and the summary is removed before each
+load, so that both loaders read all measurements.
+
+Run from the root of the repository with:
+
+    python -m benchmarks.bulk_loading [num_measurements]
+"""
+
+import json
+import os
+import sys
+from tempfile import mkdtemp
+from time import perf_counter
+
+from rebench.bulk_loading import is_available
+from rebench.configurator import Configurator
+from rebench.journal import DataFileIndex, index_path, summary_path, write_index
+from rebench.model.measurement import Measurement
+from rebench.persistence import DataStore
+from rebench.ui import TestDummyUI
+
+_NUM_RUNS = 100
+_NUM_INVOCATIONS = 10
+_WARMUP = 5
+
+_CONFIG = {
+    "benchmark_suites": {
+        "Suite": {
+            "gauge_adapter": "RebenchLog",
+            "command": "%(benchmark)s",
+            "benchmarks": ["Bench%d" % i for i in range(_NUM_RUNS)],
+        }
+    },
+    "executors": {"Exe": {"executable": "true"}},
+    "experiments": {"Exp": {"suites": ["Suite"], "executions": ["Exe"]}},
+}
+
+
+def _to_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=True)
+
+
+def _write_data_file(filename, num_measurements):
+    ui = TestDummyUI()
+    cnf = Configurator(_CONFIG, DataStore(ui), ui, data_file=filename)
+    runs = sorted(cnf.get_runs(), key=lambda run: run.benchmark.name)
+    iterations = max(num_measurements // (len(runs) * _NUM_INVOCATIONS), 1)
+
+    with open(filename, "w", encoding="utf-8") as data_file:
+        data_file.write("\t".join(Measurement.get_column_headers()) + "\n")
+        for run_id_id, run in enumerate(runs):
+            data_file.write(
+                "# benchmark: %d=%s\n" % (run_id_id, _to_json(run.benchmark.as_dict()))
+            )
+            run_dict = run.as_dict(True)
+            run_dict["benchmark_id"] = run_id_id
+            data_file.write("# run_id: %d=%s\n" % (run_id_id, _to_json(run_dict)))
+
+        for run_id_id, run in enumerate(runs):
+            suffix = "\t" + "\t".join(run.as_str_list(run_id_id)) + "\n"
+            for invocation in range(1, _NUM_INVOCATIONS + 1):
+                lines = [
+                    "%d\t1\t%d\titerations\twarmup%s" % (invocation, _WARMUP, suffix)
+                ]
+                lines.extend(
+                    "%d\t%d\t%f\tms\ttotal%s"
+                    % (invocation, iteration, 100.0 + iteration % 17, suffix)
+                    for iteration in range(1, iterations + 1)
+                )
+                data_file.write("".join(lines))
+
+    with open(filename, "rb") as data_file:
+        index = DataFileIndex()
+        index.scan(data_file)
+    write_index(index_path(filename), filename, index)
+    return len(runs) * _NUM_INVOCATIONS * iterations
+
+
+def _load(filename, load_in_bulk):
+    if os.path.exists(summary_path(filename)):
+        os.remove(summary_path(filename))
+    ui = TestDummyUI()
+    data_store = DataStore(ui, load_in_bulk)
+    cnf = Configurator(_CONFIG, data_store, ui, data_file=filename)
+    runs = cnf.get_runs()
+
+    start = perf_counter()
+    data_store.load_data(None, False)
+    seconds = perf_counter() - start
+    return seconds, sum(run.get_number_of_data_points() for run in runs)
+
+
+def main():
+    num_measurements = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    filename = os.path.join(mkdtemp(), "bulk_loading.data")
+    try:
+        num_measurements = _write_data_file(filename, num_measurements)
+        print(
+            "%d measurements, %.1f MB"
+            % (num_measurements, os.path.getsize(filename) / 1e6)
+        )
+
+        loaders = [("data points", False)]
+        if is_available():
+            loaders.append(("bulk", True))
+        else:
+            print("NumPy is not available, the bulk loader is not measured")
+
+        for label, load_in_bulk in loaders:
+            seconds, num_samples = _load(filename, load_in_bulk)
+            print(
+                "  %-12s %8.2f s %12.0f measurements/s  (%d samples)"
+                % (label, seconds, num_measurements / seconds, num_samples)
+            )
+    finally:
+        for path in (filename, summary_path(filename), index_path(filename)):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(os.path.dirname(filename))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,689 @@
+"""
+A binary, columnar format for data files.
+
+Instead of a line of text per measurement, which repeats the details of its
+run, a binary data file stores the measurements in columns. The file starts
+with a magic number, followed by records, which are only ever appended:
+
+- metadata records hold a JSON object with the benchmarks and runs, the
+  criteria and their units, the invocation times, calibrations, and detected
+  warmup, as well as the command, start time, environment, and source details
+  of an execution. The tombstones of discarded runs are metadata as well, and
+  discard the measurements, invocation times, calibrations, and detected
+  warmup of the runs in the preceding records.
+- segment records hold the measurements of one or more data points in
+  columns: the values as float64, the run ids, invocations, and iterations as
+  int32, and the criteria as int16, which index the criteria of the metadata
+
+Each record starts with its type and length. Records and columns are 8-byte
+aligned and little-endian, so that the columns are read directly from the
+memory-mapped file. A record that was not written completely, for instance
+because the execution was interrupted, is recognized by its length and
+discarded.
+
+With `rebench-convert`, data files are converted from the text format to the
+binary format and back.
+"""
+
+import json
+import os
+import struct
+import subprocess
+import sys
+from argparse import ArgumentParser
+from array import array
+from contextlib import contextmanager
+from mmap import ACCESS_READ, mmap
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .model.benchmark import Benchmark
+from .model.measurement import Measurement
+from .model.run_id import RunId
+
+MAGIC = b"RBDATA\x01\n"
+
+METADATA = b"M"
+SEGMENT = b"S"
+
+_RECORD_HEADER = struct.Struct("<c3xI")
+_SEGMENT_HEADER = struct.Struct("<I4x")
+
+# the columns of a segment, in the order they are stored
+_COLUMNS = (
+    ("values", "d"),
+    ("run_ids", "i"),
+    ("invocations", "i"),
+    ("iterations", "i"),
+    ("criteria", "h"),
+)
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+# the number of measurements per segment when converting a data file
+_CONVERSION_SEGMENT_SIZE = 65536
+
+_SEP = "\t"
+
+# a loaded measurement, its run and its invocation, iteration, value, unit, and criterion
+_LoadedMeasurement = Tuple[RunId, Tuple[int, int, float, str, str]]
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+def _record(kind: bytes, payload: Union[bytes, memoryview]) -> bytes:
+    return _RECORD_HEADER.pack(kind, len(payload)) + payload
+
+
+def metadata_record(metadata: dict) -> bytes:
+    payload = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    return _record(METADATA, payload + b" " * _padding(len(payload)))
+
+
+def is_binary_data_file(filename: str) -> bool:
+    try:
+        with open(filename, "rb") as data_file:
+            return data_file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class Segment(object):
+    """Measurements stored in columns, either in arrays to append to,
+    or in views of a memory-mapped file."""
+
+    __slots__ = ("values", "run_ids", "invocations", "iterations", "criteria")
+
+    def __init__(
+        self,
+        values=None,
+        run_ids=None,
+        invocations=None,
+        iterations=None,
+        criteria=None,
+    ):
+        self.values = array("d") if values is None else values
+        self.run_ids = array("i") if run_ids is None else run_ids
+        self.invocations = array("i") if invocations is None else invocations
+        self.iterations = array("i") if iterations is None else iterations
+        self.criteria = array("h") if criteria is None else criteria
+
+    def append(
+        self, run_id: int, invocation: int, iteration: int, criterion: int, value
+    ):
+        self.values.append(value)
+        self.run_ids.append(run_id)
+        self.invocations.append(invocation)
+        self.iterations.append(iteration)
+        self.criteria.append(criterion)
+
+    def __len__(self):
+        return len(self.values)
+
+    def rows(self) -> Iterator[Tuple[int, int, int, int, float]]:
+        return zip(
+            self.run_ids, self.invocations, self.iterations, self.criteria, self.values
+        )
+
+    def without_runs(self, run_ids: Set[int]) -> "Segment":
+        result = Segment()
+        for run_id, invocation, iteration, criterion, value in self.rows():
+            if run_id not in run_ids:
+                result.append(run_id, invocation, iteration, criterion, value)
+        return result
+
+    def to_record(self) -> bytes:
+        payload = [_SEGMENT_HEADER.pack(len(self))]
+        size = _SEGMENT_HEADER.size
+        for name, typecode in _COLUMNS:
+            column = array(typecode, getattr(self, name))
+            if _BIG_ENDIAN:
+                column.byteswap()
+            payload.append(column.tobytes())
+            size += len(payload[-1])
+        payload.append(b"\0" * _padding(size))
+        return _record(SEGMENT, b"".join(payload))
+
+    @classmethod
+    def from_payload(cls, payload: memoryview) -> "Segment":
+        (count,) = _SEGMENT_HEADER.unpack_from(payload)
+        offset = _SEGMENT_HEADER.size
+        columns = []
+        for _, typecode in _COLUMNS:
+            size = count * array(typecode).itemsize
+            column = payload[offset : offset + size].cast(typecode)  # type: ignore[call-overload]
+            if _BIG_ENDIAN:
+                copy = array(typecode, column)
+                copy.byteswap()
+                column.release()
+                column = copy
+            columns.append(column)
+            offset += size
+        return cls(*columns)
+
+    def release(self):
+        """Release the views of the memory-mapped file."""
+        for name, _ in _COLUMNS:
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                column.release()
+
+
+def read_records(buffer) -> Iterator[Tuple[bytes, memoryview, int]]:
+    """Yield the type, payload, and end offset of the complete records."""
+    view = memoryview(buffer)
+    try:
+        if not view:
+            return
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a binary data file")
+        offset = len(MAGIC)
+        while offset + _RECORD_HEADER.size <= len(view):
+            kind, length = _RECORD_HEADER.unpack_from(view, offset)
+            end = offset + _RECORD_HEADER.size + length
+            if end > len(view):
+                return
+            payload = view[offset + _RECORD_HEADER.size : end]
+            try:
+                yield kind, payload, end
+            finally:
+                payload.release()
+            offset = end
+    finally:
+        view.release()
+
+
+@contextmanager
+def mapped_file(filename: str):
+    """Map the file into memory, if it is not empty."""
+    with open(filename, "rb") as data_file:
+        if os.fstat(data_file.fileno()).st_size == 0:
+            yield b""
+            return
+        buffer = mmap(data_file.fileno(), 0, access=ACCESS_READ)
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+
+def discarded_runs_of(buffer) -> Dict[int, int]:
+    """The end of the last tombstone of each discarded run."""
+    tombstones: Dict[int, int] = {}
+    for kind, payload, end in read_records(buffer):
+        # only the metadata with tombstones needs to be parsed
+        if kind == METADATA and b'"discarded"' in bytes(payload):
+            for run_index, _ in json.loads(bytes(payload)).get("discarded", ()):
+                tombstones[run_index] = end
+    return tombstones
+
+
+def discarded_before(tombstones: Dict[int, int], end: int) -> Set[int]:
+    """The runs whose measurements in the record ending at `end` are discarded."""
+    return {run_index for run_index, discarded in tombstones.items() if discarded > end}
+
+
+# the metadata of the runs, which is discarded with their measurements
+_RUN_METADATA = ("invocation_times", "calibrations", "warmups")
+
+
+def has_run_metadata(payload: bytes) -> bool:
+    return any(b'"%s"' % key.encode("ascii") in payload for key in _RUN_METADATA)
+
+
+def without_discarded_metadata(metadata: dict, discarded: Set[int]) -> dict:
+    """Remove the invocation times, calibrations, and detected warmup of the
+    discarded runs from the metadata."""
+    if not discarded:
+        return metadata
+    for key in _RUN_METADATA:
+        if key in metadata:
+            metadata[key] = [
+                entry for entry in metadata[key] if entry[0] not in discarded
+            ]
+            if not metadata[key]:
+                del metadata[key]
+    return metadata
+
+
+class BinaryDataFile(object):
+    """The benchmarks, runs, and criteria of a binary data file,
+    and the records appended to it."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file: Optional[IO[bytes]] = None
+
+        self._benchmarks: Dict[Benchmark, int] = {}
+        self._id_to_benchmark: List[Benchmark] = []
+        self._runs: Dict[RunId, int] = {}
+        self._id_to_run: List[RunId] = []
+        self._criteria: Dict[Tuple[str, str], int] = {}
+        self._id_to_criterion: List[Tuple[str, str]] = []
+
+        # metadata that is written with the next record
+        self._metadata: dict = {}
+
+    def truncate(self):
+        with open(self.filename, "wb"):
+            pass
+
+    def read_start_time(self) -> Optional[str]:
+        try:
+            with mapped_file(self.filename) as buffer:
+                for kind, payload, _ in read_records(buffer):
+                    if kind == METADATA:
+                        return json.loads(bytes(payload)).get("start_time")
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def load(self, data_store, discarded_runs=None) -> Iterator[_LoadedMeasurement]:
+        """
+        Register the benchmarks and runs of the file with the data store, and
+        yield the measurements, each as its run and a tuple of invocation,
+        iteration, value, unit, and criterion. The measurements of the given
+        discarded runs, and those discarded by tombstones, are left out.
+        An incompletely written record is removed from the file.
+        """
+        discarded_ids: Set[int] = set()
+        end = len(MAGIC)
+        with mapped_file(self.filename) as buffer:
+            tombstones = discarded_runs_of(buffer)
+            for kind, payload, end in read_records(buffer):
+                if kind == METADATA:
+                    self.load_metadata(
+                        without_discarded_metadata(
+                            json.loads(bytes(payload)),
+                            discarded_before(tombstones, end),
+                        ),
+                        data_store,
+                        discarded_runs,
+                    )
+                    if discarded_runs:
+                        discarded_ids = {
+                            self._runs[run]
+                            for run in discarded_runs
+                            if run in self._runs
+                        }
+                elif kind == SEGMENT:
+                    segment = Segment.from_payload(payload)
+                    try:
+                        yield from self._measurements(
+                            segment, discarded_ids | discarded_before(tombstones, end)
+                        )
+                    finally:
+                        segment.release()
+            size = len(buffer)
+
+        if end < size:
+            os.truncate(self.filename, end)
+
+    def discard(self, runs, session: str):
+        """
+        Discard the data of the runs loaded from the file by appending a
+        tombstone for each of them, recording the session that discarded it.
+        """
+        discarded = sorted(self._runs[run] for run in runs if run in self._runs)
+        if not discarded:
+            return
+        with open(self.filename, "ab") as data_file:
+            data_file.write(
+                metadata_record(
+                    {"discarded": [[run_index, session] for run_index in discarded]}
+                )
+            )
+
+    def load_metadata(self, metadata: dict, data_store, discarded_runs=None):
+        for bench_id, bench in metadata.get("benchmarks", ()):
+            benchmark = data_store.create_benchmark_from_dict(bench)
+            assert len(self._id_to_benchmark) == bench_id
+            self._benchmarks[benchmark] = bench_id
+            self._id_to_benchmark.append(benchmark)
+
+        for run_index, run in metadata.get("runs", ()):
+            benchmark = self._id_to_benchmark[run["benchmark_id"]]
+            run_id = data_store.create_run_id_from_dict(run, benchmark)
+            assert len(self._id_to_run) == run_index
+            self._runs[run_id] = run_index
+            self._id_to_run.append(run_id)
+
+        for index, criterion, unit in metadata.get("criteria", ()):
+            assert len(self._id_to_criterion) == index
+            self._criteria[(criterion, unit)] = index
+            self._id_to_criterion.append((criterion, unit))
+
+        for run_index, _, seconds in metadata.get("invocation_times", ()):
+            self._id_to_run[run_index].record_invocation_time(seconds)
+        for run_index, kind, value in metadata.get("calibrations", ()):
+            self._id_to_run[run_index].set_calibration(kind, value)
+        for run_index, invocation, num_iterations in metadata.get("warmups", ()):
+            run_id = self._id_to_run[run_index]
+            if not discarded_runs or run_id not in discarded_runs:
+                run_id.record_detected_warmup(invocation, num_iterations)
+
+    def run(self, run_index: int) -> Optional[RunId]:
+        if run_index < len(self._id_to_run):
+            return self._id_to_run[run_index]
+        return None
+
+    def warmup_of(self, run_index: int) -> int:
+        run_id = self.run(run_index)
+        return (run_id.warmup_iterations or 0) if run_id else 0
+
+    def detected_warmup_of(self, run_index: int) -> Dict[int, int]:
+        run_id = self.run(run_index)
+        return run_id.detected_warmups() if run_id else {}
+
+    def unit(self, criterion_index: int) -> str:
+        return self._id_to_criterion[criterion_index][1]
+
+    def _measurements(
+        self, segment: Segment, discarded_ids
+    ) -> Iterator[_LoadedMeasurement]:
+        for run_index, invocation, iteration, criterion_index, value in segment.rows():
+            if run_index in discarded_ids:
+                continue
+            if run_index >= len(self._id_to_run):
+                raise ValueError(
+                    "Possibly corrupted data file. run_id %d not found." % run_index
+                )
+            criterion, unit = self._id_to_criterion[criterion_index]
+            yield self._id_to_run[run_index], (
+                invocation,
+                iteration,
+                value,
+                unit,
+                criterion,
+            )
+
+    @property
+    def is_open(self):
+        return self._file is not None
+
+    def open(self, execution: dict):
+        """Open the file to append to it, and record the details of the execution."""
+        # pylint: disable-next=consider-using-with
+        self._file = open(self.filename, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._metadata.update(execution)
+
+    def _add_metadata(self, key: str, entry: list):
+        self._metadata.setdefault(key, []).append(entry)
+
+    def _benchmark_index(self, benchmark: Benchmark) -> int:
+        if benchmark not in self._benchmarks:
+            self._benchmarks[benchmark] = len(self._id_to_benchmark)
+            self._id_to_benchmark.append(benchmark)
+            self._add_metadata(
+                "benchmarks", [self._benchmarks[benchmark], benchmark.as_dict()]
+            )
+        return self._benchmarks[benchmark]
+
+    def run_index(self, run_id: RunId) -> int:
+        if run_id not in self._runs:
+            run = run_id.as_dict(True)
+            run["benchmark_id"] = self._benchmark_index(run_id.benchmark)
+            self._runs[run_id] = len(self._id_to_run)
+            self._id_to_run.append(run_id)
+            self._add_metadata("runs", [self._runs[run_id], run])
+        return self._runs[run_id]
+
+    def _criterion_index(self, criterion: str, unit: str) -> int:
+        key = (criterion, unit)
+        if key not in self._criteria:
+            self._criteria[key] = len(self._id_to_criterion)
+            self._id_to_criterion.append(key)
+            self._add_metadata("criteria", [self._criteria[key], criterion, unit])
+        return self._criteria[key]
+
+    def invocation_time(self, run_id: RunId, invocation: int, seconds: float):
+        self._add_metadata(
+            "invocation_times", [self.run_index(run_id), invocation, seconds]
+        )
+
+    def calibrated(self, run_id: RunId, kind: str, value):
+        self._add_metadata("calibrations", [self.run_index(run_id), kind, value])
+
+    def detected_warmup(self, run_id: RunId, invocation: int, num_iterations: int):
+        self._add_metadata(
+            "warmups", [self.run_index(run_id), invocation, num_iterations]
+        )
+
+    def append(self, data_points):
+        """Append the measurements of the data points, together with
+        the metadata they need, in a single write."""
+        assert self._file is not None
+        segment = Segment()
+        for data_point in data_points:
+            run_index = self.run_index(data_point.run_id)
+            for criterion, unit, value in data_point.measurements():
+                segment.append(
+                    run_index,
+                    data_point.invocation,
+                    data_point.iteration,
+                    self._criterion_index(criterion, unit),
+                    value,
+                )
+
+        records = []
+        if self._metadata:
+            records.append(metadata_record(self._metadata))
+            self._metadata = {}
+        if segment:
+            records.append(segment.to_record())
+        self._file.write(b"".join(records))
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def execution_details(start_time: str, environment: dict, source: dict) -> dict:
+    return {
+        "command": subprocess.list2cmdline(sys.argv),
+        "start_time": start_time,
+        "environment": environment,
+        "source": source,
+    }
+
+
+_TEXT_METADATA = {
+    "# Execution Start: ": "start_time",
+    "# Environment: ": "environment",
+    "# Source: ": "source",
+    "# benchmark: ": "benchmarks",
+    "# run_id: ": "runs",
+    "# invocation_time: ": "invocation_times",
+    "# calibrated: ": "calibrations",
+    "# warmup: ": "warmups",
+    "# discarded: ": "discarded",
+}
+
+
+class _TextToBinary(object):
+
+    def __init__(self, target: IO[bytes]):
+        self._target = target
+        self._metadata: dict = {}
+        self._segment = Segment()
+        self._criteria: Dict[Tuple[str, str], int] = {}
+
+    def _write_metadata(self):
+        if self._metadata:
+            self._target.write(metadata_record(self._metadata))
+            self._metadata = {}
+
+    def _write_segment(self):
+        if self._segment:
+            self._target.write(self._segment.to_record())
+            self._segment = Segment()
+
+    def comment(self, line: str):
+        # metadata needs to precede the measurements that use it
+        self._write_segment()
+        if line.startswith("#!"):
+            self._write_metadata()
+            self._metadata["command"] = line[2:].strip()
+            return
+
+        prefix = next((p for p in _TEXT_METADATA if line.startswith(p)), None)
+        if prefix is None:
+            return
+        key = _TEXT_METADATA[prefix]
+        rest = line[len(prefix) :].strip()
+        if key == "start_time":
+            self._metadata[key] = rest
+        elif key in ("environment", "source"):
+            self._metadata[key] = json.loads(rest)
+        elif key in ("benchmarks", "runs"):
+            index, value = rest.split("=", 1)
+            self._metadata.setdefault(key, []).append([int(index), json.loads(value)])
+        elif key == "invocation_times":
+            run, invocation, seconds = rest.split()
+            self._metadata.setdefault(key, []).append(
+                [int(run), int(invocation), float(seconds)]
+            )
+        elif key == "warmups":
+            self._metadata.setdefault(key, []).append([int(f) for f in rest.split()])
+        elif key == "discarded":
+            run, session = rest.split(" ", 1)
+            self._metadata.setdefault(key, []).append([int(run), session])
+        else:
+            run, kind, value = rest.split(" ", 2)
+            self._metadata.setdefault(key, []).append(
+                [int(run), kind, json.loads(value)]
+            )
+
+    def measurement(self, line: str):
+        columns = line.rstrip("\n").split(_SEP)
+        criterion = (columns[4], columns[3])
+        if criterion not in self._criteria:
+            self._criteria[criterion] = len(self._criteria)
+            self._metadata.setdefault("criteria", []).append(
+                [self._criteria[criterion], criterion[0], criterion[1]]
+            )
+        self._write_metadata()
+        self._segment.append(
+            int(columns[-1]),
+            int(columns[0]),
+            int(columns[1]),
+            self._criteria[criterion],
+            float(columns[2]),
+        )
+        if len(self._segment) >= _CONVERSION_SEGMENT_SIZE:
+            self._write_segment()
+
+    def close(self):
+        self._write_segment()
+        self._write_metadata()
+
+
+def _text_to_binary(source: IO[str], target: IO[bytes]):
+    header = _SEP.join(Measurement.get_column_headers()) + "\n"
+    target.write(MAGIC)
+    converter = _TextToBinary(target)
+    for line in source:
+        if line.startswith("#"):
+            converter.comment(line)
+        elif line != header and line.strip():
+            converter.measurement(line)
+    converter.close()
+
+
+def _binary_to_text(buffer, target: IO[str]):
+    header_written = False
+    benchmarks: Dict[int, Benchmark] = {}
+    runs: Dict[int, List[str]] = {}
+    criteria: Dict[int, Tuple[str, str]] = {}
+
+    for kind, payload, _ in read_records(buffer):
+        if kind == SEGMENT:
+            segment = Segment.from_payload(payload)
+            try:
+                for run, invocation, iteration, criterion, value in segment.rows():
+                    name, unit = criteria[criterion]
+                    target.write(
+                        _SEP.join(
+                            [str(invocation), str(iteration), "%f" % value, unit, name]
+                            + runs[run]
+                        )
+                        + "\n"
+                    )
+            finally:
+                segment.release()
+            continue
+
+        metadata = json.loads(bytes(payload))
+        if "command" in metadata:
+            target.write("#!%s\n" % metadata["command"])
+        if "start_time" in metadata:
+            target.write("# Execution Start: %s\n" % metadata["start_time"])
+        for key in ("environment", "source"):
+            if key in metadata:
+                target.write("# %s: %s\n" % (key.capitalize(), _to_json(metadata[key])))
+        if "command" in metadata and not header_written:
+            target.write(_SEP.join(Measurement.get_column_headers()) + "\n")
+            header_written = True
+
+        for index, bench in metadata.get("benchmarks", ()):
+            benchmarks[index] = Benchmark.from_dict(bench)
+            target.write("# benchmark: %d=%s\n" % (index, _to_json(bench)))
+        for index, run in metadata.get("runs", ()):
+            run_id = RunId.from_dict(run, benchmarks[run["benchmark_id"]])
+            runs[index] = run_id.as_str_list(index)
+            target.write("# run_id: %d=%s\n" % (index, _to_json(run)))
+        for index, name, unit in metadata.get("criteria", ()):
+            criteria[index] = (name, unit)
+        for run, invocation, seconds in metadata.get("invocation_times", ()):
+            target.write("# invocation_time: %d %d %f\n" % (run, invocation, seconds))
+        for run, kind_, value in metadata.get("calibrations", ()):
+            target.write("# calibrated: %d %s %s\n" % (run, kind_, _to_json(value)))
+        for run, invocation, num_iterations in metadata.get("warmups", ()):
+            target.write("# warmup: %d %d %d\n" % (run, invocation, num_iterations))
+        for run, session in metadata.get("discarded", ()):
+            target.write("# discarded: %d %s\n" % (run, session))
+
+
+def _to_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=True)
+
+
+def convert(source: str, target: str):
+    """Convert a data file in the text format to the binary format, or back."""
+    if is_binary_data_file(source):
+        with mapped_file(source) as buffer:
+            with open(target, "w", encoding="utf-8") as target_file:
+                _binary_to_text(buffer, target_file)
+    else:
+        with open(source, "r", encoding="utf-8") as source_file:
+            with open(target, "wb") as target_file:
+                _text_to_binary(source_file, target_file)
+
+
+def main_func():
+    arg_parser = ArgumentParser(
+        description="Convert a ReBench data file from the text format "
+        "to the binary format, or back."
+    )
+    arg_parser.add_argument("source", help="The data file to convert")
+    arg_parser.add_argument("target", help="The file to write the converted data to")
+    args = arg_parser.parse_args()
+
+    if os.path.exists(args.target):
+        print("The target %s exists already." % args.target, file=sys.stderr)
+        return 1
+    try:
+        convert(args.source, args.target)
+    except (OSError, ValueError, KeyError, IndexError) as err:
+        print("Failed to convert %s: %s" % (args.source, err), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -0,0 +1,150 @@
+"""
+A persistent cache of successful builds.
+
+A build is identified by a hash of its command, its location, its
+environment, and the content of its declared inputs. Inputs are either glob
+patterns, relative to the location of the build, or `git:<path>`, which
+stands for the git tree of the path, including uncommitted changes.
+Builds without declared inputs are never cached, because ReBench cannot know
+whether they are up to date.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from glob import glob
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+from typing import Optional
+
+from .model.build_cmd import BuildCommand
+
+_GIT_PREFIX = "git:"
+_FORMAT_VERSION = 1
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class InputNotHashable(Exception):
+    """Raised when the inputs of a build cannot be determined."""
+
+    def __init__(self, message):
+        super(InputNotHashable, self).__init__()
+        self.message = message
+
+
+def _hash_file(digest, path: str):
+    with open(path, "rb") as input_file:
+        while True:
+            block = input_file.read(_HASH_BLOCK_SIZE)
+            if not block:
+                return
+            digest.update(block)
+
+
+def _hash_git_tree(digest, path: str):
+    def git(*args):
+        try:
+            result = subprocess.run(
+                ["git", "-C", path] + list(args),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=False,
+            )
+        except OSError as err:
+            raise InputNotHashable("git could not be executed: %s" % err) from err
+        if result.returncode != 0:
+            raise InputNotHashable(
+                "git failed for %s: %s"
+                % (path, result.stderr.decode("utf-8", errors="replace").strip())
+            )
+        return result.stdout
+
+    if not os.path.isdir(path):
+        raise InputNotHashable("%s is not a directory" % path)
+
+    digest.update(git("rev-parse", "HEAD:./"))
+    # uncommitted changes of tracked files, and untracked files
+    digest.update(git("diff", "HEAD", "--binary", "--", "."))
+    for untracked in git(
+        "ls-files", "--others", "--exclude-standard", "-z", "--", "."
+    ).split(b"\0"):
+        file_path = os.path.join(path, untracked.decode("utf-8"))
+        if untracked and os.path.isfile(file_path):
+            digest.update(untracked)
+            _hash_file(digest, file_path)
+
+
+def compute_key(build: BuildCommand, env: Optional[dict]) -> Optional[str]:
+    """Compute the cache key of a build, or None if it has no inputs."""
+    if not build.inputs:
+        return None
+
+    location = build.location or os.getcwd()
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps([build.command, location, sorted((env or {}).items())]).encode()
+    )
+
+    for pattern in build.inputs:
+        digest.update(b"\0pattern\0" + pattern.encode("utf-8"))
+        if pattern.startswith(_GIT_PREFIX):
+            path = os.path.join(location, pattern[len(_GIT_PREFIX) :])
+            _hash_git_tree(digest, path)
+            continue
+
+        for path in sorted(glob(os.path.join(location, pattern), recursive=True)):
+            if os.path.isfile(path):
+                digest.update(b"\0file\0" + os.path.relpath(path, location).encode())
+                _hash_file(digest, path)
+
+    return digest.hexdigest()
+
+
+def _identity(build: BuildCommand) -> str:
+    return hashlib.sha256(
+        json.dumps([build.command, build.location]).encode()
+    ).hexdigest()
+
+
+class BuildCache(object):
+    """
+    The keys of the last successful build of each build command, stored in a
+    JSON file. Since only the last key is kept, the cache does not grow with
+    every change to the inputs.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = Lock()
+        self._builds = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self._path, "r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != _FORMAT_VERSION:
+            return {}
+        return data.get("builds", {})
+
+    def _store(self):
+        directory = os.path.dirname(os.path.abspath(self._path))
+        with NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, delete=False, suffix=".tmp"
+        ) as tmp_file:
+            json.dump({"version": _FORMAT_VERSION, "builds": self._builds}, tmp_file)
+        os.replace(tmp_file.name, self._path)
+
+    def is_up_to_date(self, build: BuildCommand, key: str) -> bool:
+        with self._lock:
+            entry = self._builds.get(_identity(build))
+            return entry is not None and entry["key"] == key
+
+    def add(self, build: BuildCommand, key: str, name: str):
+        """Record a successful build. Raises OSError if the cache cannot be written."""
+        with self._lock:
+            self._builds[_identity(build)] = {"key": key, "name": name, "time": time()}
+            self._store()
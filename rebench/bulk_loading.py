@@ -0,0 +1,372 @@
+"""
+Load data files in bulk with NumPy.
+
+Loading a data file measurement by measurement creates a `Measurement` and a
+`DataPoint` for each of them, which dominates the time to load large files.
+Instead, the bulk loader reads the measurements in large chunks, splits them
+into columns, and computes the state of each run, i.e., its invocations,
+unit, statistics of the totals, and the sums of the totals of each
+invocation, with NumPy. Only the metadata, i.e., the benchmarks, runs,
+invocation times, calibrations, and detected warmup, is still processed
+line by line.
+
+Reading a data file does not change the runs. Thus, the data files of an
+execution are read in parallel, and the state of the runs is updated one
+file after another.
+
+NumPy is optional. Without it, and when the data points themselves are
+needed, for instance for profiles or to report them to ReBenchDB, the data
+is loaded measurement by measurement.
+"""
+
+import json
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .binary_data import (
+    MAGIC,
+    METADATA,
+    SEGMENT,
+    Segment,
+    discarded_before,
+    discarded_runs_of,
+    mapped_file,
+    read_records,
+    without_discarded_metadata,
+)
+from .model.measurement import Measurement
+from .statistics import StatisticProperties
+
+try:
+    import numpy
+
+    _HAVE_NUMPY = True
+except ImportError:
+    _HAVE_NUMPY = False
+
+# the number of bytes of a text data file that are parsed at once
+_CHUNK_SIZE = 16 * 1024 * 1024
+
+# the number of tabs in the line of a measurement, which separate its columns
+_NUM_TABS = len(Measurement.get_column_headers()) - 1
+_TAB = ord("\t")
+_NEWLINE = ord("\n")
+_ZERO = ord("0")
+_NINE = ord("9")
+# the most digits of an integer that cannot overflow
+_MAX_DIGITS = 18
+
+
+def is_available() -> bool:
+    return _HAVE_NUMPY
+
+
+# the persisted run id, invocations, unit, statistics, and
+# the sum and number of the measured totals of each invocation of a run
+RunState = Tuple[int, int, object, StatisticProperties, Dict[int, Tuple[float, int]]]
+
+
+class Columns(object):
+    """
+    The measurements of a data file in columns. Only the totals are kept,
+    since they determine the state of the runs.
+    """
+
+    def __init__(self):
+        self._totals: List[tuple] = []
+
+    def add(self, run_ids, invocations, iterations, values, criteria, units, totals):
+        """Add the measurements of which the criteria are among the totals."""
+        is_total = numpy.isin(criteria, totals)
+        self._totals.append(
+            (
+                run_ids[is_total],
+                invocations[is_total],
+                iterations[is_total],
+                values[is_total],
+                units[is_total],
+            )
+        )
+
+    def runs(
+        self,
+        warmup_of: Callable[[int], int],
+        detected_warmup_of: Callable[[int], Dict[int, int]],
+    ) -> Iterator[RunState]:
+        """
+        Yield the state of each run in the data file. The totals of iterations
+        up to the configured warmup, as given by `warmup_of` for the persisted
+        run id, or up to the warmup detected for their invocation, as given by
+        `detected_warmup_of`, are not part of the statistics.
+        """
+        if self._totals:
+            yield from self._runs_with_totals(warmup_of, detected_warmup_of)
+
+    def _runs_with_totals(self, warmup_of, detected_warmup_of) -> Iterator[RunState]:
+        run_ids, invocations, iterations, values, units = (
+            numpy.concatenate(column) for column in zip(*self._totals)
+        )
+        # a stable sort keeps the measurements of a run in the order of the file
+        order = numpy.argsort(run_ids, kind="stable")
+        run_ids = run_ids[order]
+        invocations = invocations[order]
+        iterations = iterations[order]
+        values = values[order]
+        units = units[order]
+
+        ids, starts, counts = numpy.unique(
+            run_ids, return_index=True, return_counts=True
+        )
+        if len(ids) == 0:
+            return
+        max_invocations = numpy.maximum.reduceat(invocations, starts)
+
+        detected = {}
+        for run_id in ids.tolist():
+            detected_of_run = detected_warmup_of(run_id)
+            if detected_of_run:
+                detected[run_id] = detected_of_run
+        warmup = numpy.repeat([warmup_of(int(run_id)) for run_id in ids], counts)
+        warmup = numpy.maximum(
+            warmup, _detected_warmup_of_rows(detected, run_ids, invocations)
+        )
+        measured = iterations > warmup
+        statistics = _statistics(run_ids[measured], values[measured])
+        invocation_totals = _invocation_totals(
+            run_ids[measured], invocations[measured], values[measured]
+        )
+
+        for i, run_id in enumerate(ids.tolist()):
+            yield (
+                run_id,
+                int(max_invocations[i]),
+                units[starts[i]],
+                statistics.get(run_id) or StatisticProperties(),
+                invocation_totals.get(run_id, {}),
+            )
+
+
+def _detected_warmup_of_rows(detected, run_ids, invocations):
+    """The detected warmup of the invocation of each measurement, or 0."""
+    if not detected:
+        return 0
+    warmup = {
+        (run_id << 32) | invocation: num_iterations
+        for run_id, invocations_of_run in detected.items()
+        for invocation, num_iterations in invocations_of_run.items()
+    }
+    keys = numpy.array(sorted(warmup), dtype=numpy.int64)
+    num_iterations = numpy.array([warmup[key] for key in keys.tolist()])
+
+    row_keys = (run_ids.astype(numpy.int64) << 32) | invocations.astype(numpy.int64)
+    index = numpy.searchsorted(keys, row_keys).clip(max=len(keys) - 1)
+    return numpy.where(keys[index] == row_keys, num_iterations[index], 0)
+
+
+def _invocation_totals(run_ids, invocations, values):
+    """The sum and number of the values of each invocation of each run."""
+    row_keys = (run_ids.astype(numpy.int64) << 32) | invocations.astype(numpy.int64)
+    keys, rows_of_keys = numpy.unique(row_keys, return_inverse=True)
+    sums = numpy.bincount(rows_of_keys, weights=values, minlength=len(keys))
+    counts = numpy.bincount(rows_of_keys, minlength=len(keys))
+
+    totals: Dict[int, Dict[int, Tuple[float, int]]] = {}
+    for key, total, count in zip(keys.tolist(), sums.tolist(), counts.tolist()):
+        totals.setdefault(key >> 32, {})[key & 0xFFFFFFFF] = (total, count)
+    return totals
+
+
+def _statistics(run_ids, values) -> Dict[int, StatisticProperties]:
+    """The statistics of the values of each run. The run ids need to be sorted."""
+    ids, starts, counts = numpy.unique(run_ids, return_index=True, return_counts=True)
+    if len(ids) == 0:
+        return {}
+    # like for the statistics of single samples, the product may overflow
+    with numpy.errstate(over="ignore", invalid="ignore"):
+        means = numpy.add.reduceat(values, starts) / counts
+        deviations = values - numpy.repeat(means, counts)
+        variances_times_counts = numpy.add.reduceat(deviations * deviations, starts)
+        products = numpy.multiply.reduceat(values, starts)
+    minima = numpy.minimum.reduceat(values, starts)
+    maxima = numpy.maximum.reduceat(values, starts)
+
+    return {
+        run_id: StatisticProperties.from_aggregates(*aggregates)
+        for run_id, *aggregates in zip(
+            ids.tolist(),
+            counts.tolist(),
+            means.tolist(),
+            variances_times_counts.tolist(),
+            products.tolist(),
+            minima.tolist(),
+            maxima.tolist(),
+        )
+    }
+
+
+class TextData(object):
+    """The comments and the measurements of a data file in the text format."""
+
+    def __init__(self, selected_run_ids: Optional[set]):
+        self.comments: List[str] = []
+        self.columns = Columns()
+        # the persisted ids of the runs that were read, or None for all runs
+        self.selected_run_ids = selected_run_ids
+
+
+def _chunks(data_file: BinaryIO, ranges) -> Iterator[bytes]:
+    """Read the ranges of the file, or all of it, in chunks of complete lines."""
+    for start, end in ranges or [(0, None)]:
+        data_file.seek(start)
+        position = start
+        rest = b""
+        while end is None or position < end:
+            size = _CHUNK_SIZE if end is None else min(_CHUNK_SIZE, end - position)
+            data = data_file.read(size)
+            if not data:
+                break
+            position += len(data)
+            chunk = rest + data
+            complete = chunk.rfind(b"\n") + 1
+            rest = chunk[complete:]
+            yield chunk[:complete]
+        # like the index, ignore an incompletely written last line
+
+
+def _integers(buffer, starts, ends):
+    """Parse the fields of decimal digits from the starts to the ends."""
+    lengths = ends - starts
+    width = int(lengths.max())
+    if lengths.min() < 1 or width > _MAX_DIGITS:
+        raise ValueError("Expected integers of 1 to %d digits" % _MAX_DIGITS)
+
+    # the digits are aligned to the end of the fields
+    positions = numpy.arange(width)
+    indexes = numpy.maximum(ends[:, None] - width + positions, 0)
+    digits = buffer[indexes].astype(numpy.int64) - _ZERO
+    digits[positions < (width - lengths)[:, None]] = 0
+    if ((digits < 0) | (digits > 9)).any():
+        raise ValueError("Expected integers, but found other characters")
+    return digits @ (10 ** positions[::-1])
+
+
+def _strings(buffer, starts, ends):
+    """The fields from the starts to the ends, as array of byte strings."""
+    lengths = ends - starts
+    width = max(int(lengths.max()), 1)
+    positions = numpy.arange(width)
+    indexes = numpy.minimum(starts[:, None] + positions, len(buffer) - 1)
+    chars = buffer[indexes]
+    chars[positions >= lengths[:, None]] = 0
+    return chars.view("S%d" % width).ravel()
+
+
+def _parse_chunk(chunk: bytes, encoding: str, data: "TextData"):
+    """
+    Split the lines of the chunk into columns. Instead of looking at each
+    line, the positions of all tabs and newlines are determined at once, and
+    lines with the number of tabs of a measurement are parsed as such.
+    """
+    buffer = numpy.frombuffer(chunk, dtype=numpy.uint8)
+    line_ends = numpy.flatnonzero(buffer == _NEWLINE)
+    tabs = numpy.flatnonzero(buffer == _TAB)
+    line_starts = numpy.zeros_like(line_ends)
+    line_starts[1:] = line_ends[:-1] + 1
+    first_tabs = numpy.searchsorted(tabs, line_starts)
+    num_tabs = numpy.searchsorted(tabs, line_ends) - first_tabs
+
+    first_chars = buffer[line_starts]
+    is_measurement = (
+        (num_tabs == _NUM_TABS) & (first_chars >= _ZERO) & (first_chars <= _NINE)
+    )
+    others = ~is_measurement
+    for start, end in zip(line_starts[others].tolist(), line_ends[others].tolist()):
+        line = chunk[start : end + 1]
+        if line.startswith(b"#"):
+            data.comments.append(line.decode(encoding))
+        elif not line.startswith(b"invocation\t"):
+            raise ValueError("Found a line that is not a measurement")
+    if not is_measurement.any():
+        return
+
+    starts = line_starts[is_measurement]
+    first_tabs = first_tabs[is_measurement]
+    # the columns are: invocation, iteration, value, unit, criterion, ..., run id
+    column_ends = [tabs[first_tabs + i] for i in range(5)]
+    data.columns.add(
+        _integers(
+            buffer, tabs[first_tabs + _NUM_TABS - 1] + 1, line_ends[is_measurement]
+        ),
+        _integers(buffer, starts, column_ends[0]),
+        _integers(buffer, column_ends[0] + 1, column_ends[1]),
+        _strings(buffer, column_ends[1] + 1, column_ends[2]).astype(numpy.float64),
+        _strings(buffer, column_ends[3] + 1, column_ends[4]),
+        _strings(buffer, column_ends[2] + 1, column_ends[3]),
+        [b"total"],
+    )
+
+
+def read_text(
+    data_file: BinaryIO, ranges, encoding: str, selected_run_ids=None
+) -> TextData:
+    """
+    Read the given ranges of a data file in the text format, or all of it.
+    Raises a ValueError for lines that are neither comments nor measurements,
+    which are left to the regular loader to report.
+    """
+    data = TextData(selected_run_ids)
+    for chunk in _chunks(data_file, ranges):
+        if chunk:
+            _parse_chunk(chunk, encoding, data)
+    return data
+
+
+class BinaryData(object):
+    """The metadata and the measurements of a data file in the binary format."""
+
+    def __init__(self):
+        self.metadata: List[dict] = []
+        self.columns = Columns()
+        # the end of the last complete record, and the size of the file
+        self.end = len(MAGIC)
+        self.size = 0
+
+
+def read_binary(filename: str) -> BinaryData:
+    """
+    Read a data file in the binary format. The units of the totals are the
+    indexes of their criteria. The measurements and the metadata of the runs
+    discarded by tombstones are left out.
+    """
+    data = BinaryData()
+    criteria: List[str] = []
+    with mapped_file(filename) as buffer:
+        tombstones = discarded_runs_of(buffer)
+        for kind, payload, end in read_records(buffer):
+            data.end = end
+            if kind == METADATA:
+                metadata = without_discarded_metadata(
+                    json.loads(bytes(payload)), discarded_before(tombstones, end)
+                )
+                data.metadata.append(metadata)
+                criteria.extend(
+                    criterion for _, criterion, _ in metadata.get("criteria", ())
+                )
+            elif kind == SEGMENT:
+                segment = Segment.from_payload(payload)
+                try:
+                    run_ids = numpy.array(segment.run_ids)
+                    kept = ~numpy.isin(run_ids, list(discarded_before(tombstones, end)))
+                    criterion_indexes = numpy.array(segment.criteria)[kept]
+                    data.columns.add(
+                        run_ids[kept],
+                        numpy.array(segment.invocations)[kept],
+                        numpy.array(segment.iterations)[kept],
+                        numpy.array(segment.values)[kept],
+                        criterion_indexes,
+                        criterion_indexes,
+                        [i for i, name in enumerate(criteria) if name == "total"],
+                    )
+                finally:
+                    segment.release()
+        data.size = len(buffer)
+    return data
@@ -0,0 +1,196 @@
+"""
+Calibrate runs before their first invocation.
+
+Runs configured with `calibrate: iterations` are probed with different numbers
+of iterations, passed to the benchmark as `%(iterations)s`, to find the
+smallest number for which the mean iteration time reaches the run's
+`min_iteration_time`. Starting from the configured iterations, the number is
+halved or doubled until the target is bracketed, and then narrowed down by
+binary search.
+
+For runs configured with `calibrate: input_sizes`, the runs that differ only
+in their input size form a group. The input sizes are assumed to be ordered
+from the smallest to the largest workload, as listed in `input_sizes`.
+A binary search finds the first input size that reaches the target, and only
+the run with this input size is executed.
+
+The result is persisted with the run, so that later executions do not
+calibrate again.
+"""
+
+from typing import Callable, Dict, List
+
+from .ui import escape_braces
+
+_MAX_PROBES = 25
+
+# doubling the iterations needs to increase the iteration time at least by
+# this factor, otherwise the benchmark does not seem to use %(iterations)s
+_MIN_GROWTH = 1.5
+
+# the search stops when the iterations are within 10% of the smallest number
+_PRECISION = 10
+
+
+class _CalibrationFailed(Exception):
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class Calibration(object):
+
+    def __init__(self, probe: Callable, ui):
+        """`probe(run)` executes an invocation of the run with its current
+        calibration, and returns the mean iteration time, or None on failure."""
+        self._probe = probe
+        self.ui = ui
+
+    @staticmethod
+    def _needs_calibration(run) -> bool:
+        return (
+            run.calibration is None
+            and not run.has_loaded_data()
+            and bool(run.min_iteration_time)
+            and run.benchmark.run_details.iterations_override is None
+        )
+
+    def calibrate(self, runs):
+        """Calibrate the runs that were not calibrated before, and have no data."""
+        for run in runs:
+            if run.calibrate == "iterations" and self._needs_calibration(run):
+                self._calibrate_iterations(run)
+
+        for group in _input_size_groups(runs).values():
+            if all(self._needs_calibration(run) for run in group):
+                self._select_input_size(group)
+
+    def _measure(self, run, means: Dict[int, float], iterations: int) -> bool:
+        """Probe the run with the given iterations, and return whether it
+        reaches the target."""
+        if len(means) >= _MAX_PROBES:
+            raise _CalibrationFailed(
+                "No number of iterations found within %d probes" % _MAX_PROBES
+            )
+        run.set_calibration("iterations", iterations)
+        mean = self._probe(run)
+        if mean is None:
+            raise _CalibrationFailed("Executing the benchmark failed")
+
+        self.ui.verbose_output_info(
+            "{ind}Calibration probe with %d iterations: %.1f\n" % (iterations, mean),
+            run,
+        )
+        means[iterations] = mean
+        return mean >= run.min_iteration_time
+
+    def _search_iterations(self, run) -> int:
+        means: Dict[int, float] = {}
+        start = run.iterations or 1
+
+        # bracket the target with a number of iterations below and above it
+        if self._measure(run, means, start):
+            low, high = 0, start
+            while high > 1:
+                if not self._measure(run, means, high // 2):
+                    low = high // 2
+                    break
+                high = high // 2
+        else:
+            low, high = start, 0
+            while not high:
+                if self._measure(run, means, low * 2):
+                    high = low * 2
+                elif means[low * 2] < means[low] * _MIN_GROWTH:
+                    raise _CalibrationFailed(
+                        "The iteration time does not increase with %(iterations)s"
+                    )
+                else:
+                    low = low * 2
+
+        while high - low > max(1, high // _PRECISION):
+            middle = (low + high) // 2
+            if self._measure(run, means, middle):
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def _calibrate_iterations(self, run):
+        try:
+            iterations = self._search_iterations(run)
+        except _CalibrationFailed as err:
+            run.clear_calibration()
+            self.ui.warning(
+                "{ind}Calibration failed: %s.\n" % escape_braces(err.message)
+                + "{ind}{ind}Using the configured %d iterations.\n" % run.iterations,
+                run,
+            )
+            return
+
+        run.calibrated("iterations", iterations)
+        self.ui.verbose_output_info(
+            "{ind}Calibrated to %d iterations\n" % iterations, run
+        )
+
+    def _select_input_size(self, group: List):
+        low, high = 0, len(group) - 1
+        while low < high:
+            middle = (low + high) // 2
+            mean = self._probe(group[middle])
+            if mean is None:
+                self.ui.warning(
+                    "{ind}Calibration failed: Executing the benchmark failed.\n"
+                    + "{ind}{ind}Executing all input sizes.\n",
+                    group[middle],
+                )
+                return
+            self.ui.verbose_output_info(
+                "{ind}Calibration probe with input size %s: %.1f\n"
+                % (escape_braces(group[middle].input_size_as_str), mean),
+                group[middle],
+            )
+            if mean >= group[middle].min_iteration_time:
+                high = middle
+            else:
+                low = middle + 1
+
+        selected = group[low]
+        selected.calibrated("input_sizes", selected.input_size)
+        self.ui.verbose_output_info(
+            "{ind}Calibrated to input size %s\n"
+            % escape_braces(selected.input_size_as_str),
+            selected,
+        )
+
+
+def _input_size_groups(runs) -> Dict[tuple, List]:
+    """Group the runs that are calibrated by input size, ordered by input size."""
+    groups: Dict[tuple, List] = {}
+    for run in runs:
+        if run.calibrate == "input_sizes":
+            key = (run.benchmark, run.cores, run.var_value, run.tag, run.machine)
+            groups.setdefault(key, []).append(run)
+
+    for group in groups.values():
+        group.sort(key=_input_size_index)
+    return groups
+
+
+def _input_size_index(run) -> int:
+    input_sizes = run.benchmark.variables.input_sizes
+    try:
+        return input_sizes.index(run.input_size)
+    except ValueError:
+        return len(input_sizes)
+
+
+def without_unselected_input_sizes(runs) -> List:
+    """Remove the runs for input sizes that were not selected by calibration."""
+    unselected: set = set()
+    for group in _input_size_groups(runs).values():
+        selected = next((run for run in group if run.calibration is not None), None)
+        if selected is not None:
+            unselected.update(run for run in group if run is not selected)
+    return [run for run in runs if run not in unselected]
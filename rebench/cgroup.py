@@ -0,0 +1,273 @@
+"""
+Execute invocations in transient cgroup v2 children.
+
+Each invocation gets its own cgroup below a root cgroup, which ReBench needs
+to be able to write to, for instance because it was delegated to the user.
+The cgroup limits the invocation's CPU and memory use as configured, and
+accounts for the resources used by all of its processes, which makes the
+accounting exact also when runs are executed in parallel. Once the invocation
+completed, all remaining processes are killed via `cgroup.kill`.
+"""
+
+import os
+from itertools import count
+from signal import SIGKILL
+from threading import Lock
+from time import sleep
+from typing import Dict, List, Optional, Tuple
+
+from .output import UIError
+
+# settings of the `cgroup` run detail, with their controller and file
+_SETTINGS = {
+    "cpu_max": ("cpu", "cpu.max"),
+    "cpuset_cpus": ("cpuset", "cpuset.cpus"),
+    "memory_max": ("memory", "memory.max"),
+}
+
+# controllers that are enabled when available, for their accounting
+_ACCOUNTING_CONTROLLERS = {"cpu", "io", "memory"}
+
+_REMOVAL_ATTEMPTS = 50
+_REMOVAL_DELAY = 0.01
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as cgroup_file:
+            return cgroup_file.read()
+    except OSError:
+        return None
+
+
+def _write_file(path: str, value: str):
+    with open(path, "w", encoding="utf-8") as cgroup_file:
+        cgroup_file.write(value)
+
+
+def find_cgroup2_mount(mounts_file="/proc/self/mounts") -> Optional[str]:
+    content = _read_file(mounts_file)
+    if content is None:
+        return None
+    for line in content.splitlines():
+        parts = line.split()
+        if len(parts) > 2 and parts[2] == "cgroup2":
+            return parts[1]
+    return None
+
+
+def own_cgroup(cgroup_file="/proc/self/cgroup") -> Optional[str]:
+    """Return the cgroup v2 path of this process, relative to the mount."""
+    content = _read_file(cgroup_file)
+    if content is None:
+        return None
+    for line in content.splitlines():
+        if line.startswith("0::"):
+            return line[3:]
+    return None
+
+
+def own_cgroup_path() -> Optional[str]:
+    """Return the directory of the cgroup v2 of this process, if any."""
+    mount = find_cgroup2_mount()
+    own = own_cgroup()
+    if mount is None or own is None:
+        return None
+    return os.path.join(mount, own.lstrip("/"))
+
+
+def parse_flat_keyed(content: str) -> Dict[str, int]:
+    """Parse files such as `cpu.stat`, which have a `key value` per line."""
+    result = {}
+    for line in content.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            result[parts[0]] = int(parts[1])
+    return result
+
+
+def parse_io_stat(content: str) -> Dict[str, int]:
+    """Sum up the `key=value` entries of all devices in `io.stat`."""
+    result: Dict[str, int] = {}
+    for line in content.splitlines():
+        for entry in line.split()[1:]:
+            key, _, value = entry.partition("=")
+            if value.isdigit():
+                result[key] = result.get(key, 0) + int(value)
+    return result
+
+
+class Cgroup(object):
+    """The transient cgroup of a single invocation."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def procs_file(self) -> str:
+        return os.path.join(self.path, "cgroup.procs")
+
+    def kill(self):
+        """Kill all processes in the cgroup."""
+        kill_file = os.path.join(self.path, "cgroup.kill")
+        if os.path.exists(kill_file):
+            _write_file(kill_file, "1")
+            return
+
+        # cgroup.kill is only supported since Linux 5.14
+        for pid in (_read_file(self.procs_file) or "").split():
+            try:
+                os.kill(int(pid), SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def read_stats(self) -> List[Tuple[str, float, str]]:
+        """Return the accounted resources as (criterion, value, unit) tuples."""
+        stats = []
+
+        cpu_stat = _read_file(os.path.join(self.path, "cpu.stat"))
+        if cpu_stat is not None:
+            cpu = parse_flat_keyed(cpu_stat)
+            for key, criterion in (
+                ("usage_usec", "cgroup-cpu-usage"),
+                ("user_usec", "cgroup-cpu-user"),
+                ("system_usec", "cgroup-cpu-system"),
+                ("throttled_usec", "cgroup-cpu-throttled"),
+            ):
+                if key in cpu:
+                    stats.append((criterion, cpu[key] / 1000, "ms"))
+
+        memory_peak = _read_file(os.path.join(self.path, "memory.peak"))
+        if memory_peak is not None and memory_peak.strip().isdigit():
+            stats.append(("cgroup-memory-peak", int(memory_peak) / 1024, "kb"))
+
+        io_stat = _read_file(os.path.join(self.path, "io.stat"))
+        if io_stat is not None:
+            io = parse_io_stat(io_stat)
+            stats.append(("cgroup-io-read", io.get("rbytes", 0) / 1024, "kb"))
+            stats.append(("cgroup-io-write", io.get("wbytes", 0) / 1024, "kb"))
+
+        return stats
+
+    def _is_populated(self) -> bool:
+        events = _read_file(os.path.join(self.path, "cgroup.events")) or ""
+        return parse_flat_keyed(events).get("populated", 0) == 1
+
+    def remove(self):
+        """Kill remaining processes, and remove the cgroup."""
+        self.kill()
+        for _ in range(_REMOVAL_ATTEMPTS):
+            if not self._is_populated():
+                try:
+                    os.rmdir(self.path)
+                    return
+                except OSError:
+                    pass
+            sleep(_REMOVAL_DELAY)
+        os.rmdir(self.path)
+
+
+class CgroupSandbox(object):
+    """
+    Creates the cgroups of invocations below a root cgroup.
+
+    By default, the root is the cgroup of ReBench itself. Since cgroup v2
+    does not permit a cgroup with processes to distribute controllers to its
+    children, ReBench then moves itself into a `rebench` leaf cgroup first.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._root: Optional[str] = root
+        self._lock = Lock()
+        self._ids = count()
+        self._enabled_controllers: set = set()
+
+    @staticmethod
+    def _accounting_controllers(root: str) -> set:
+        available = _read_file(os.path.join(root, "cgroup.controllers"))
+        if available is None:
+            return set(_ACCOUNTING_CONTROLLERS)
+        return _ACCOUNTING_CONTROLLERS & set(available.split())
+
+    def _enable_controllers(self, root: str, controllers: set):
+        missing = controllers - self._enabled_controllers
+        if not missing:
+            return
+
+        subtree_control = os.path.join(root, "cgroup.subtree_control")
+        try:
+            _write_file(subtree_control, " ".join("+" + c for c in sorted(missing)))
+        except OSError as err:
+            if not self._move_self_into_leaf(root):
+                raise UIError(
+                    (
+                        "Failed to enable the cgroup controllers %s in %s: %s\n"
+                        + "The root cgroup needs to be delegated to the user "
+                        + "executing ReBench, and must not contain processes.\n"
+                    )
+                    % (", ".join(sorted(missing)), root, err.strerror),
+                    err,
+                ) from err
+            self._enable_controllers(root, controllers)
+            return
+        self._enabled_controllers.update(missing)
+
+    @staticmethod
+    def _move_self_into_leaf(root: str) -> bool:
+        procs = (_read_file(os.path.join(root, "cgroup.procs")) or "").split()
+        if str(os.getpid()) not in procs:
+            return False
+
+        leaf = os.path.join(root, "rebench")
+        os.makedirs(leaf, exist_ok=True)
+        try:
+            _write_file(os.path.join(leaf, "cgroup.procs"), str(os.getpid()))
+        except OSError:
+            return False
+        return True
+
+    def create(self, settings: dict) -> Cgroup:
+        with self._lock:
+            if self._root is None:
+                self._root = own_cgroup_path()
+                if self._root is None:
+                    raise UIError(
+                        "Executing in a cgroup requires cgroup v2, which was not found.\n",
+                        None,
+                    )
+            root = self._root
+
+            unknown = set(settings) - set(_SETTINGS)
+            if unknown:
+                raise UIError(
+                    "Unknown cgroup settings: %s\n" % ", ".join(sorted(unknown)), None
+                )
+            self._enable_controllers(
+                root,
+                self._accounting_controllers(root)
+                | {
+                    _SETTINGS[key][0]
+                    for key, value in settings.items()
+                    if value is not None
+                },
+            )
+
+            path = os.path.join(root, "rebench-%d-%d" % (os.getpid(), next(self._ids)))
+            try:
+                os.mkdir(path)
+            except OSError as err:
+                raise UIError(
+                    "Failed to create the cgroup %s: %s\n" % (path, err.strerror), err
+                ) from err
+
+        cgroup = Cgroup(path)
+        try:
+            for key, value in settings.items():
+                if value is not None:
+                    _write_file(os.path.join(path, _SETTINGS[key][1]), str(value))
+        except OSError as err:
+            cgroup.remove()
+            raise UIError(
+                "Failed to configure the cgroup %s: %s\n" % (path, err.strerror), err
+            ) from err
+        return cgroup
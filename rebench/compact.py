@@ -0,0 +1,155 @@
+"""
+Remove the discarded data from a data file.
+
+Rerunning experiments with `--rerun` does not rewrite the data file, but
+appends a tombstone for each run, which discards the data of the run that
+precedes it. The data stays in the file until it is compacted with
+`rebench-compact DATA_FILE`, which rewrites the file without the discarded
+data and without the tombstones.
+"""
+
+import json
+import os
+import shutil
+import sys
+from argparse import ArgumentParser
+from tempfile import NamedTemporaryFile
+
+from .binary_data import (
+    MAGIC,
+    METADATA,
+    SEGMENT,
+    Segment,
+    discarded_before,
+    discarded_runs_of,
+    has_run_metadata,
+    is_binary_data_file,
+    mapped_file,
+    metadata_record,
+    read_records,
+    without_discarded_metadata,
+)
+from .journal import (
+    DISCARDED,
+    DataFileIndex,
+    index_path,
+    journal_path,
+    read_journal,
+    remove_index,
+    remove_summary,
+    summary_path,
+)
+
+
+def _temporary_file_next_to(filename: str):
+    # pylint: disable-next=consider-using-with
+    return NamedTemporaryFile("wb", delete=False, dir=os.path.dirname(filename) or ".")
+
+
+def _compact_text(filename: str, target) -> bool:
+    with open(filename, "rb") as data_file:
+        index = DataFileIndex()
+        index.scan(data_file)
+        if not index.discarded_since(0):
+            return False
+
+        # the ranges leave out the discarded measurements
+        for start, end in index.ranges(index.run_ids(), 0):
+            data_file.seek(start)
+            while data_file.tell() < end:
+                line = data_file.readline()
+                if not line.startswith(DISCARDED):
+                    target.write(line)
+    return True
+
+
+def _compact_binary(filename: str, target) -> bool:
+    with mapped_file(filename) as buffer:
+        tombstones = discarded_runs_of(buffer)
+        if not tombstones:
+            return False
+
+        target.write(MAGIC)
+        start = len(MAGIC)
+        for kind, payload, end in read_records(buffer):
+            discarded = discarded_before(tombstones, end)
+            if kind == METADATA and (
+                b'"discarded"' in bytes(payload)
+                or (discarded and has_run_metadata(bytes(payload)))
+            ):
+                metadata = without_discarded_metadata(
+                    json.loads(bytes(payload)), discarded
+                )
+                metadata.pop("discarded", None)
+                if metadata:
+                    target.write(metadata_record(metadata))
+            elif kind == SEGMENT and discarded:
+                segment = Segment.from_payload(payload)
+                try:
+                    kept = segment.without_runs(discarded)
+                finally:
+                    segment.release()
+                if kept:
+                    target.write(kept.to_record())
+            else:
+                target.write(buffer[start:end])
+            start = end
+    return True
+
+
+def compact(filename: str) -> bool:
+    """
+    Rewrite the data file without the data discarded by tombstones.
+    Return whether the data file had any tombstones.
+    """
+    size, _ = read_journal(journal_path(filename), filename)
+    if size is not None:
+        raise ValueError(
+            "The data file is in use, or an interrupted execution needs to be "
+            "recovered first by running ReBench again"
+        )
+
+    compact_data = _compact_binary if is_binary_data_file(filename) else _compact_text
+    with _temporary_file_next_to(filename) as target:
+        try:
+            compacted = compact_data(filename, target)
+        except BaseException:
+            target.close()
+            os.unlink(target.name)
+            raise
+
+    if not compacted:
+        os.unlink(target.name)
+        return False
+    shutil.move(target.name, filename)
+    # the offsets in the data file changed
+    remove_summary(summary_path(filename))
+    remove_index(index_path(filename))
+    return True
+
+
+def main_func():
+    arg_parser = ArgumentParser(
+        description="Remove the data discarded by rerunning experiments "
+        "from a ReBench data file."
+    )
+    arg_parser.add_argument("data_file", help="The data file to compact")
+    args = arg_parser.parse_args()
+
+    try:
+        size = os.path.getsize(args.data_file)
+        if compact(args.data_file):
+            print(
+                "Compacted %s from %d to %d bytes."
+                % (args.data_file, size, os.path.getsize(args.data_file))
+            )
+        else:
+            print("%s contains no discarded data." % args.data_file)
+    except (OSError, ValueError, KeyError, IndexError) as err:
+        print("Failed to compact %s: %s" % (args.data_file, err), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
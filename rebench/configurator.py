@@ -192,6 +192,7 @@ class Configurator(object):
         self._raw_config_for_debugging = raw_config  # kept around for debugging only
 
         self.build_log = build_log or raw_config.get('build_log', 'build.log')
+        self.build_cache = raw_config.get('build_cache', 'build-cache.json')
         self.data_file = data_file or raw_config.get('default_data_file', 'rebench.data')
         self._exp_name = exp_name or raw_config.get('default_experiment', 'all')
         self.artifact_review = raw_config.get('artifact_review', False)
@@ -0,0 +1,414 @@
+"""
+Execute runs on remote workers.
+
+With `--worker ADDRESS`, ReBench acts as coordinator. It connects to each of
+the given workers, hands out the runs one at a time, and records the data
+points the workers stream back in its own data file. A worker is a
+`rebench-worker` process, reachable via one of the following addresses:
+
+- `unix:PATH`: a worker listening on a Unix domain socket
+- `tcp:HOST:PORT`: a worker listening on a TCP socket, where an IPv6 host is
+  given in brackets, and an empty host stands for the loopback interface
+- any other address is a shell command, for instance `ssh host rebench-worker`,
+  which starts a worker that talks to the coordinator via its standard input
+  and output
+
+The protocol consists of JSON objects, one per line. The coordinator first
+sends the configuration, its command-line arguments, working directory, and
+whether denoise is to use nice and core shielding, as determined on the
+coordinator:
+
+    {"type": "setup", "version": 1, "config": {...}, "args": ["..."], "cwd": "/dir",
+     "use_nice": false, "use_shielding": false, "token": "..."}
+
+A worker executes the commands of any configuration it is sent. Thus, a worker
+that has a token, given by the `REBENCH_WORKER_TOKEN` environment variable,
+only accepts coordinators that send the same token. Workers listening on TCP
+sockets require a token.
+From these, the worker determines the runs, as ReBench would on the
+coordinator, and responds with `{"type": "ready"}`. The workers are expected
+to have the benchmarks and executors at the same paths as the coordinator.
+
+For each run, the coordinator sends the run and the state of its data so far,
+which allows the worker to continue with the next invocation:
+
+    {"type": "run", "run": {...}, "state": {...}}
+
+While executing the run, the worker responds with the measurements of each
+data point, and the completion of each invocation:
+
+    {"type": "data", "measurements": [{"c": "total", "in": 1, "it": 1, ...}]}
+    {"type": "invocation", "invocation": 1, "time": 1.2}
+    {"type": "completed", "failed": false}
+
+Problems are reported as `{"type": "error", "message": "..."}`.
+The data of an invocation is recorded by the coordinator only once it
+completed. If a worker is lost, its run is handed to another worker, which
+continues with the invocation that was not completed.
+"""
+
+import hmac
+import json
+import os
+import socket
+from collections import deque
+from subprocess import PIPE, Popen, TimeoutExpired
+from threading import Condition, Thread
+from typing import IO, Callable, Deque, List, Optional
+
+from .model.data_point import DataPoint
+from .scheduler import RunScheduler
+from .ui import escape_braces
+
+PROTOCOL_VERSION = 1
+
+# the shared secret with which coordinators authenticate to workers
+TOKEN_ENV_VAR = "REBENCH_WORKER_TOKEN"
+
+_STOP_TIMEOUT = 5
+
+
+class WorkerError(Exception):
+    """The connection to a worker failed, or it did not follow the protocol."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class Connection(object):
+    """A connection that exchanges one JSON object per line over a stream."""
+
+    def __init__(
+        self,
+        reader: IO[bytes],
+        writer: IO[bytes],
+        close: Optional[Callable[[], None]] = None,
+    ):
+        self._reader = reader
+        self._writer = writer
+        self._close = close
+
+    def send(self, message: dict):
+        self._writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        self._writer.flush()
+
+    def receive(self) -> dict:
+        line = self._reader.readline()
+        if not line:
+            raise WorkerError("The connection was closed")
+        try:
+            message = json.loads(line)
+        except ValueError as err:
+            raise WorkerError("Received an invalid message: %s" % err) from err
+        if not isinstance(message, dict) or "type" not in message:
+            raise WorkerError("Received an invalid message: %r" % line)
+        return message
+
+    def close(self):
+        for stream in (self._writer, self._reader):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if self._close is not None:
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def worker_token() -> Optional[str]:
+    return os.environ.get(TOKEN_ENV_VAR) or None
+
+
+def is_valid_token(token: Optional[str], expected: Optional[str]) -> bool:
+    if expected is None:
+        return True
+    if not isinstance(token, str):
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+def _socket_address(address: str):
+    """Return the family and address of a socket for `unix:` and `tcp:`
+    addresses, and None for commands."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:") :]
+    if address.startswith("tcp:"):
+        host, _, port = address[len("tcp:") :].rpartition(":")
+        family = socket.AF_INET
+        if host.startswith("[") and host.endswith("]"):
+            host = host[1:-1]
+            family = socket.AF_INET6
+        elif not host:
+            # only local coordinators can connect, unless a host is given
+            host = "127.0.0.1"
+        try:
+            return family, (host, int(port))
+        except ValueError as err:
+            raise WorkerError("Invalid TCP address: %s" % address) from err
+    return None
+
+
+def format_address(sock: socket.socket) -> str:
+    """The address of a listening socket, in the form accepted by `connect`."""
+    if sock.family == socket.AF_UNIX:
+        return "unix:" + sock.getsockname()
+    host, port = sock.getsockname()[:2]
+    if sock.family == socket.AF_INET6:
+        return "tcp:[%s]:%d" % (host, port)
+    return "tcp:%s:%d" % (host, port)
+
+
+def socket_connection(sock: socket.socket) -> Connection:
+    return Connection(sock.makefile("rb"), sock.makefile("wb"), sock.close)
+
+
+def connect(address: str) -> Connection:
+    """Connect to a worker listening on a socket, or start it with a command."""
+    socket_address = _socket_address(address)
+    if socket_address is not None:
+        family, target = socket_address
+        if family == socket.AF_UNIX:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+        else:
+            sock = socket.create_connection(target)
+        return socket_connection(sock)
+
+    # pylint: disable-next=consider-using-with
+    proc = Popen(address, shell=True, stdin=PIPE, stdout=PIPE)
+    assert proc.stdin is not None and proc.stdout is not None
+
+    def _stop():
+        try:
+            proc.wait(_STOP_TIMEOUT)
+        except TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    return Connection(proc.stdout, proc.stdin, _stop)
+
+
+def listen(address: str) -> socket.socket:
+    """Create the socket on which a worker accepts connections."""
+    socket_address = _socket_address(address)
+    if socket_address is None:
+        raise WorkerError(
+            "Workers can only listen on unix:PATH or tcp:HOST:PORT, but got: %s"
+            % address
+        )
+    family, target = socket_address
+    if family == socket.AF_UNIX:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(target)
+        sock.listen()
+        return sock
+    return socket.create_server(target, family=family)
+
+
+class Workers(object):
+    """The addresses of the workers, and what they need to determine the runs."""
+
+    def __init__(
+        self,
+        addresses: List[str],
+        config: dict,
+        args: List[str],
+        use_nice: bool = False,
+        use_shielding: bool = False,
+    ):
+        self.addresses = addresses
+        self.config = config
+        self.args = args
+        self.use_nice = use_nice
+        self.use_shielding = use_shielding
+
+    def setup_message(self) -> dict:
+        message = {
+            "type": "setup",
+            "version": PROTOCOL_VERSION,
+            "config": self.config,
+            "args": self.args,
+            "cwd": os.getcwd(),
+            "use_nice": self.use_nice,
+            "use_shielding": self.use_shielding,
+        }
+        token = worker_token()
+        if token is not None:
+            message["token"] = token
+        return message
+
+
+class DistributedScheduler(RunScheduler):
+    """Executes each run completely on one of the workers.
+
+    A thread per worker takes the next run from a shared queue. If a worker
+    is lost, its run is put back into the queue for the remaining workers.
+    """
+
+    def __init__(self, executor, ui, print_execution_plan, workers: Workers):
+        RunScheduler.__init__(self, executor, ui, print_execution_plan)
+        self._workers = workers
+        self._queue: Deque = deque()
+        self._num_in_progress = 0
+        self._condition = Condition()
+
+    def _process_remaining_runs(self, runs):
+        if self._print_execution_plan:
+            for run in runs:
+                self._executor.execute_run(run)
+            return
+
+        self._set_min_num_chars_for_run_strings(runs)
+        self._queue = deque(runs)
+        threads = [
+            Thread(target=self._serve, args=(address,), name="Worker " + address)
+            for address in self._workers.addresses
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._queue:
+            self.ui.error(
+                "{ind}No worker was available to execute %d runs.\n" % len(self._queue)
+            )
+
+    def _take_run(self):
+        with self._condition:
+            # runs of lost workers are put back, until all runs are done
+            while not self._queue and self._num_in_progress:
+                self._condition.wait()
+            if not self._queue:
+                return None
+            self._num_in_progress += 1
+            return self._queue.popleft()
+
+    def _run_done(self, run, completed):
+        with self._condition:
+            self._num_in_progress -= 1
+            if not completed:
+                self._queue.appendleft(run)
+            self._condition.notify_all()
+
+    def _serve(self, address):
+        try:
+            connection = connect(address)
+        except (OSError, WorkerError) as err:
+            self._warn_lost(address, err)
+            return
+
+        with connection:
+            try:
+                connection.send(self._workers.setup_message())
+                self._expect_ready(connection)
+            except (OSError, WorkerError) as err:
+                self._warn_lost(address, err)
+                return
+
+            while True:
+                run = self._take_run()
+                if run is None:
+                    return
+                completed = False
+                try:
+                    self._execute_remotely(connection, run)
+                    completed = True
+                except (OSError, WorkerError) as err:
+                    self._warn_lost(address, err)
+                    return
+                finally:
+                    self._run_done(run, completed)
+
+    def _warn_lost(self, address, err):
+        message = err.message if isinstance(err, WorkerError) else str(err)
+        self.ui.warning(
+            "{ind}Worker %s is not available: %s\n"
+            % (escape_braces(address), escape_braces(message))
+        )
+
+    @staticmethod
+    def _expect_ready(connection):
+        message = connection.receive()
+        if message["type"] == "error":
+            raise WorkerError(message.get("message", "unknown error"))
+        if message["type"] != "ready":
+            raise WorkerError("Expected the worker to be ready")
+
+    def _execute_remotely(self, connection, run):
+        connection.send(
+            {"type": "run", "run": run.as_dict(), "state": run.summary_as_dict()}
+        )
+
+        data_points: List[list] = []
+        while True:
+            message = connection.receive()
+            kind = message["type"]
+            if kind == "data":
+                data_points.append(message["measurements"])
+            elif kind == "invocation":
+                self._record_invocation(
+                    run,
+                    message["invocation"],
+                    message.get("time"),
+                    message.get("warmup"),
+                    data_points,
+                )
+                data_points = []
+                with self._condition:
+                    self._indicate_progress(False, run)
+            elif kind == "completed":
+                self._complete_run(run, message.get("failed", True))
+                return
+            elif kind == "error":
+                self.ui.error(
+                    "{ind}The worker failed: %s\n"
+                    % escape_braces(message.get("message", "unknown error")),
+                    run,
+                )
+                self._complete_run(run, True)
+                return
+            else:
+                raise WorkerError("Received an unexpected message: %s" % kind)
+
+    @staticmethod
+    def _record_invocation(run, invocation, invocation_time, warmup, data_points):
+        run.invocation_started(invocation)
+        if warmup is not None:
+            run.record_detected_warmup(invocation, warmup)
+        for measurements in data_points:
+            data_point = DataPoint(run)
+            for measurement in measurements:
+                data_point.add_value(
+                    measurement["in"],
+                    measurement["it"],
+                    measurement["v"],
+                    measurement["u"],
+                    measurement["c"],
+                )
+            run.add_data_point(
+                data_point,
+                run.is_warmup_iteration(data_point.invocation, data_point.iteration),
+            )
+        run.invocation_completed(invocation, invocation_time)
+
+    def _complete_run(self, run, failed):
+        run.get_termination_check(self.ui)
+        if failed:
+            run.fail_immediately()
+        else:
+            run.indicate_successful_execution()
+        run.report_run_completed(run.cmdline())
+        with self._condition:
+            self._executor.completed_runs.add(run)
+            self._indicate_progress(True, run)
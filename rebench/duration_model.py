@@ -0,0 +1,94 @@
+"""
+Predict how long runs take, based on the invocations executed so far.
+
+Runs that recorded invocations predict their own duration. For runs without
+data, the mean invocation time of the other runs of the same suite and
+executor is used, and if these have no data either, the mean of the runs with
+the same executor, and finally the mean of all runs.
+"""
+
+from typing import Optional, Tuple
+
+from .statistics import StatisticProperties
+
+
+class DurationModel(object):
+
+    def __init__(self, runs):
+        self._runs = runs
+        self._by_suite: dict = {}
+        self._by_executor: dict = {}
+        self._overall = StatisticProperties()
+
+    @staticmethod
+    def _suite_key(run):
+        suite = run.benchmark.suite
+        return suite.name, suite.executor.name
+
+    def update(self):
+        """Recompute the fallbacks from the current data of the runs."""
+        by_suite: dict = {}
+        by_executor: dict = {}
+        overall = StatisticProperties()
+
+        for run in self._runs:
+            invocation_time = run.expected_invocation_time()
+            if invocation_time is None:
+                continue
+            by_suite.setdefault(self._suite_key(run), StatisticProperties()).add_sample(
+                invocation_time
+            )
+            by_executor.setdefault(
+                run.benchmark.suite.executor.name, StatisticProperties()
+            ).add_sample(invocation_time)
+            overall.add_sample(invocation_time)
+
+        self._by_suite = by_suite
+        self._by_executor = by_executor
+        self._overall = overall
+
+    def expected_invocation_time(self, run) -> Optional[float]:
+        """The expected wall-clock time of an invocation of the run in seconds."""
+        invocation_time = run.expected_invocation_time()
+        if invocation_time is not None:
+            return invocation_time
+
+        for fallback in (
+            self._by_suite.get(self._suite_key(run)),
+            self._by_executor.get(run.benchmark.suite.executor.name),
+            self._overall,
+        ):
+            if fallback is not None and fallback.num_samples:
+                return fallback.mean
+        return None
+
+    def expected_remaining_time(self, run) -> Optional[float]:
+        invocation_time = self.expected_invocation_time(run)
+        if invocation_time is None:
+            return None
+        return invocation_time * run.remaining_invocations
+
+    def expected_total_time(self, runs) -> Tuple[float, int]:
+        """
+        Return the expected time the runs take in seconds, and the number of
+        runs for which there is no estimate.
+        """
+        total = 0.0
+        num_unknown = 0
+        for run in runs:
+            expected_time = self.expected_remaining_time(run)
+            if expected_time is None:
+                num_unknown += 1
+            else:
+                total += expected_time
+        return total, num_unknown
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return "%.1fs" % seconds
+    minutes, sec = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return "%dh%02dm%02ds" % (hours, minutes, sec)
+    return "%dm%02ds" % (minutes, sec)
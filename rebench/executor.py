@@ -17,22 +17,31 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-from collections import deque
-from math import floor
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from multiprocessing import cpu_count
 import os
-import random
 import subprocess
-from threading import Thread, RLock
+import sys
+from threading import Lock
 from time import time
 from typing import TYPE_CHECKING, Optional
 
 from . import subprocess_with_timeout as subprocess_timeout
+from .build_cache import BuildCache, InputNotHashable, compute_key
+from .calibration import Calibration, without_unselected_input_sizes
+from .cgroup import CgroupSandbox
 from .denoise import paths as denoise_paths
 from .denoise_client import get_number_of_cores
+from .distributed import DistributedScheduler
+from .duration_model import DurationModel, format_duration
+from .fork_server import ForkServers
 from .interop.adapter import ExecutionDeliveredNoResults, instantiate_adapter, OutputNotParseable, \
     ResultsIndicatedAsInvalid
 from .model.build_cmd import BuildCommand
+from .output import UIError
+from .scheduler import BatchScheduler, FailedBuilding, LongestJobFirstScheduler, \
+    ParallelScheduler, RunScheduler, TimeBudgetScheduler, WorkStealingScheduler
+from .statistics import detect_warmup
 from .ui import escape_braces
 
 
@@ -41,267 +50,110 @@ if TYPE_CHECKING:
     from .model.run_id import RunId
 
 
-class FailedBuilding(Exception):
-    """The exception to be raised when building of the executor or suite failed."""
-    def __init__(self, name, build_command):
-        super(FailedBuilding, self).__init__()
-        self._name = name
-        self._build_command = build_command
+_DEFAULT_BUILD_WORKERS = 4
 
 
-class RunScheduler(object):
-
-    def __init__(self, executor, ui, print_execution_plan):
-        self._print_execution_plan = print_execution_plan
-        self._executor = executor
-        self.ui = ui
-        self._runs_completed = 0
-        self._start_time = time()
-        self._total_num_runs = 0
-        self._progress_label = self._get_progress_label("70")
-
-    def _get_progress_label(self, num_chars):
-        return "Running %" + num_chars + "s\t%10.1f%s\tleft: %02d:%02d:%02d"
-
-    def _set_min_num_chars_for_run_strings(self, runs):
-        max_len = 0
-        for run in runs:
-            run_str = self._run_string_for_progress(run)
-            l = len(run_str)
-            max_len = max(l, max_len)
-        self._progress_label = self._get_progress_label(str(max_len))
-
-    @staticmethod
-    def _filter_out_completed_runs(runs, ui):
-        return [run for run in runs if not run.is_completed(ui)]
-
-    @staticmethod
-    def number_of_uncompleted_runs(runs, ui):
-        return len(RunScheduler._filter_out_completed_runs(runs, ui))
-
-    def _process_remaining_runs(self, runs):
-        """Abstract, to be implemented"""
-
-    def _estimate_time_left(self):
-        if self._runs_completed == 0:
-            return 0, 0, 0
-
-        current = time()
-        time_per_invocation = (current - self._start_time) / self._runs_completed
-        etl = time_per_invocation * (self._total_num_runs - self._runs_completed)
-        sec = etl % 60
-        minute = (etl - sec) / 60 % 60
-        hour = (etl - sec - minute) / 60 / 60
-        return floor(hour), floor(minute), floor(sec)
-
-    @staticmethod
-    def _run_string_for_progress(run):
-        return run.as_simple_string().replace(" None", "")
-
-    def _indicate_progress(self, completed_task, run):
-        if not self.ui.spinner_initialized() or self._print_execution_plan:
-            return
-
-        if completed_task:
-            self._runs_completed += 1
-
-        art_mean = run.get_mean_of_totals()
-        art_unit = run.total_unit
-        if art_unit is None:
-            art_unit = ""
-
-        hour, minute, sec = self._estimate_time_left()
-
-        run_details = self._run_string_for_progress(run)
-        label = self._progress_label % (run_details, art_mean, art_unit, hour, minute, sec)
-        self.ui.step_spinner(self._runs_completed, label)
-
-    def indicate_build(self, run_id):
-        exe_name = run_id.benchmark.suite.executor.name
-        suite_name = run_id.benchmark.suite.name
-        self.ui.step_spinner(
-            self._runs_completed, f"Run build for {exe_name} {suite_name}")
-
-    def execute(self):
-        self._total_num_runs = len(self._executor.runs)
-        runs = self._filter_out_completed_runs(self._executor.runs, self.ui)
-        completed_runs = self._total_num_runs - len(runs)
-        self._runs_completed = completed_runs
-
-        with self.ui.init_spinner(self._total_num_runs):
-            if not self._print_execution_plan:
-                self.ui.step_spinner(completed_runs)
-            self._process_remaining_runs(runs)
-
-
-class BatchScheduler(RunScheduler):
-
-    def _process_remaining_runs(self, runs):
-        self._set_min_num_chars_for_run_strings(runs)
-        remaining_runs = list(runs)
-        while len(remaining_runs) > 0:
-            run_id = remaining_runs.pop(0)
-            try:
-                completed = False
-                while not completed:
-                    completed = self._executor.execute_run(run_id)
-                    if run_id.executable_missing:
-                        num_runs = len(remaining_runs)
-                        remaining_runs = self._executor.without_missing_binaries(
-                            run_id, remaining_runs)
-                        self._runs_completed += num_runs - len(remaining_runs)
-                    self._indicate_progress(completed, run_id)
-            except FailedBuilding:
-                pass
-
-
-class RoundRobinScheduler(RunScheduler):
-
-    def _process_remaining_runs(self, runs):
-        self._set_min_num_chars_for_run_strings(runs)
-        task_list = deque(runs)
-        while task_list:
-            try:
-                run = task_list.popleft()
-                completed = self._executor.execute_run(run)
-                if not completed:
-                    task_list.append(run)
-                elif run.executable_missing:
-                    num_runs = len(task_list)
-                    task_list = deque(self._executor.without_missing_binaries(
-                        run, task_list))
-                    self._runs_completed += num_runs - len(task_list)
-                self._indicate_progress(completed, run)
-            except FailedBuilding:
-                pass
-
-
-class RandomScheduler(RunScheduler):
-
-    def _process_remaining_runs(self, runs):
-        self._set_min_num_chars_for_run_strings(runs)
-        task_list = list(runs)
-        while task_list:
-            run = random.choice(task_list)
-            try:
-                completed = self._executor.execute_run(run)
-                if completed:
-                    task_list.remove(run)
-                    if run.executable_missing:
-                        num_runs = len(task_list)
-                        task_list = self._executor.without_missing_binaries(
-                            run, task_list)
-                        self._runs_completed += num_runs - len(task_list)
-                self._indicate_progress(completed, run)
-
-            except FailedBuilding:
-                task_list.remove(run)
+def _resource_usage_measurements(rusage):
+    """The criterion, value, and unit of each resource usage measurement."""
+    # ru_maxrss is reported in bytes on macOS, and in kilobytes elsewhere
+    max_rss_kb = rusage.ru_maxrss / 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return [
+        ("user-time", rusage.ru_utime * 1000, "ms"),
+        ("sys-time", rusage.ru_stime * 1000, "ms"),
+        ("max-rss", max_rss_kb, "kb"),
+        ("minor-faults", rusage.ru_minflt, "count"),
+        ("major-faults", rusage.ru_majflt, "count"),
+        ("voluntary-context-switches", rusage.ru_nvcsw, "count"),
+        ("involuntary-context-switches", rusage.ru_nivcsw, "count")]
 
 
-class BenchmarkThread(Thread):
+class _OutputFeed(object):
+    """Feeds the output of an invocation to the parser of the gauge adapter,
+       while it is produced. The first error indicated by the parser is kept
+       and raised on `finish()`. Since further output is of no use,
+       the process is then aborted. Unexpected exceptions of the parser,
+       for instance on a malformed line, are treated as unparseable output.
+    """
 
-    def __init__(self, par_scheduler, num):
-        Thread.__init__(self, name="BenchmarkThread %d" % num)
-        self._par_scheduler = par_scheduler
-        self._id = num
-        self.exception = None
+    def __init__(self, parser):
+        self._parser = parser
+        self._error = None
 
-    def run(self):
+    def feed_line(self, line):
         try:
-            scheduler = self._par_scheduler.get_local_scheduler()
+            self._parser.feed_line(line)
+        except ExecutionDeliveredNoResults as err:
+            self._error = err
+            raise subprocess_timeout.AbortProcess() from err
+        except Exception as err:  # pylint: disable=broad-except
+            self._error = OutputNotParseable(
+                "Parsing the output failed: %s: %s" % (type(err).__name__, err))
+            raise subprocess_timeout.AbortProcess() from err
 
-            while True:
-                work = self._par_scheduler.acquire_work()
-                if work is None:
-                    return
-                scheduler._process_remaining_runs(work)
-        except BaseException as exp:
-            self.exception = exp
-
-
-class BenchmarkThreadExceptions(Exception):
-
-    def __init__(self, exceptions):
-        super(BenchmarkThreadExceptions, self).__init__()
-        self.exceptions = exceptions
-
-
-class ParallelScheduler(RunScheduler):
-
-    def __init__(self, executor, seq_scheduler_class, ui, print_execution_plan):
-        RunScheduler.__init__(self, executor, ui, print_execution_plan)
-        self._seq_scheduler_class = seq_scheduler_class
-        self._lock = RLock()
-        self._num_worker_threads = self._number_of_threads()
-        self._remaining_work = None
-        self._worker_threads = None
-
-    def _number_of_threads(self):
-        # TODO: read the configuration elements!
-        non_interference_factor = float(2.5)
-        return int(floor(cpu_count() / non_interference_factor))
-
-    @staticmethod
-    def _split_runs(runs):
-        seq_runs = []
-        par_runs = []
-        for run in runs:
-            if run.execute_exclusively:
-                seq_runs.append(run)
-            else:
-                par_runs.append(run)
-        return seq_runs, par_runs
-
-    def _process_sequential_runs(self, runs):
-        seq_runs, par_runs = self._split_runs(runs)
-
-        scheduler = self._seq_scheduler_class(self._executor, self.ui, self._print_execution_plan)
-        scheduler._process_remaining_runs(seq_runs)
-
-        return par_runs
-
-    def _process_remaining_runs(self, runs):
-        self._remaining_work = self._process_sequential_runs(runs)
-
-        self._worker_threads = [BenchmarkThread(self, i)
-                                for i in range(self._num_worker_threads)]
-
-        for thread in self._worker_threads:
-            thread.start()
-
-        exceptions = []
-        for thread in self._worker_threads:
-            thread.join()
-            if thread.exception is not None:
-                exceptions.append(thread.exception)
-
-        if exceptions:
-            if len(exceptions) == 1:
-                raise exceptions[0]
-            raise BenchmarkThreadExceptions(exceptions)
-
-    def _determine_num_work_items_to_take(self):
-        # use a simple and naive scheduling strategy that still allows for
-        # different running times, without causing too much scheduling overhead
-        k = len(self._remaining_work)
-        per_thread = int(floor(float(k) / float(self._num_worker_threads)))
-        per_thread = max(1, per_thread)  # take at least 1 run
-        return per_thread
-
-    def get_local_scheduler(self):
-        return self._seq_scheduler_class(self._executor, self.ui, self._print_execution_plan)
-
-    def acquire_work(self):
+    @property
+    def indicated_error(self):
+        return self._error is not None
+
+    def finish(self):
+        if self._error is not None:
+            raise self._error
+        return self._parser.finish()
+
+
+class _BuildTask(object):
+    """A build command together with the runs that need it, and the builds
+       that need to succeed before it can be executed.
+    """
+
+    def __init__(self, build_command: BuildCommand, name: str, location: Optional[str]):
+        self.build_command = build_command
+        self.name = name
+        self.location = location
+        self.run_ids: list["RunId"] = []
+        self.dependencies: list["_BuildTask"] = []
+
+    def add_dependency(self, task):
+        if task not in self.dependencies:
+            self.dependencies.append(task)
+
+    def is_ready(self):
+        return all(task.build_command.is_built for task in self.dependencies)
+
+    def failed_dependency(self):
+        for task in self.dependencies:
+            if task.build_command.build_failed:
+                return task
+        return None
+
+
+class _BuildLog(object):
+    """Writes the output of build commands to the build log, line by line
+       as it is produced. Each line is prefixed by the name of the build
+       and the output stream, so that concurrent builds can be told apart.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._file = None
+        self._lock = Lock()
+
+    def line_consumer(self, name, stream):
+        prefix = name + "|" + stream + ":"
+
+        def _write_line(line):
+            with self._lock:
+                if self._file is None:
+                    # pylint: disable-next=consider-using-with
+                    self._file = open(self._path, "a", encoding="utf-8")
+                self._file.write(prefix + line + "\n")
+                self._file.flush()
+        return _write_line
+
+    def close(self):
         with self._lock:
-            if not self._remaining_work:
-                return None
-
-            num = self._determine_num_work_items_to_take()
-            assert num <= len(self._remaining_work)
-            work = []
-            for _ in range(num):
-                work.append(self._remaining_work.pop())
-            return work
+            if self._file is not None:
+                self._file.close()
+                self._file = None
 
 
 class Executor(object):
@@ -310,9 +162,24 @@ class Executor(object):
                  debug=False, scheduler=BatchScheduler, build_log=None,
                  artifact_review=False, use_nice=False, use_shielding=False,
                  print_execution_plan=False, config_dir=None,
-                 use_denoise=True):
+                 use_denoise=True, num_parallel_workers=None, time_budget=None,
+                 output_limit=subprocess_timeout.DEFAULT_OUTPUT_LIMIT, cgroup_root=None,
+                 num_build_workers=None, build_cache=None, force_build=False,
+                 workers=None, calibrate=True):
         self.use_denoise = use_denoise
         self._runs = runs
+        self._completed_runs = set()
+        self._duration_model = DurationModel(runs)
+        self._num_parallel_workers = num_parallel_workers
+        self._time_budget = time_budget
+        self._output_limit = output_limit
+        # determines its root lazily, only when a run uses a cgroup
+        self._cgroup_sandbox = CgroupSandbox(cgroup_root)
+        # started on first use, and stopped once all runs completed
+        self._fork_servers = ForkServers()
+        # with workers, the runs are built and executed remotely
+        self._workers = workers
+        self._calibrate = calibrate
 
         self._use_nice = use_nice
         self._use_shielding = use_shielding
@@ -326,14 +193,25 @@ class Executor(object):
         self.debug = debug
         self._scheduler = self._create_scheduler(scheduler, print_execution_plan)
         self.build_log = build_log
+        self._build_log = _BuildLog(build_log) if build_log else None
+        self._num_build_workers = num_build_workers or min(_DEFAULT_BUILD_WORKERS, cpu_count())
+        self._build_cache = BuildCache(build_cache) if build_cache else None
+        self._force_build = force_build
         self._artifact_review = artifact_review
         self.config_dir = config_dir
+        self._gauge_adapters = {}
 
         num_runs = RunScheduler.number_of_uncompleted_runs(runs, ui)
         for run in runs:
             run.set_total_number_of_runs(num_runs)
 
     def _create_scheduler(self, scheduler, print_execution_plan):
+        if self._workers:
+            return DistributedScheduler(self, self.ui, print_execution_plan, self._workers)
+
+        if self._time_budget:
+            return TimeBudgetScheduler(self, self.ui, print_execution_plan, self._time_budget)
+
         # figure out whether to use parallel scheduler
         if cpu_count() > 1:
             i = 0
@@ -341,7 +219,12 @@ class Executor(object):
                 if not run.execute_exclusively:
                     i += 1
             if i > 1:
-                return ParallelScheduler(self, scheduler, self.ui, print_execution_plan)
+                if issubclass(scheduler, LongestJobFirstScheduler):
+                    par_scheduler = WorkStealingScheduler
+                else:
+                    par_scheduler = ParallelScheduler
+                return par_scheduler(self, scheduler, self.ui, print_execution_plan,
+                                     self._num_parallel_workers)
 
         return scheduler(self, self.ui, print_execution_plan)
 
@@ -386,10 +269,125 @@ class Executor(object):
         if build.build_failed:
             run_id.fail_immediately()
             raise FailedBuilding(name, build)
-        self._execute_build_cmd(build, location, name, run_id)
+
+        self._scheduler.indicate_build(run_id)
+        if not self._build_unless_up_to_date(build, location, name, [run_id]):
+            raise FailedBuilding(name, build)
+
+    def _collect_build_tasks(self):
+        """Determine the builds needed by the uncompleted runs. Build commands
+           are deduplicated by the configurator, so that each is executed once.
+           The build of a suite depends on the build of its executor."""
+        tasks = {}
+
+        def task_for(build, name, location):
+            if build is None or build.is_built or build.build_failed:
+                return None
+            if build not in tasks:
+                tasks[build] = _BuildTask(build, name, location)
+            return tasks[build]
+
+        for run_id in self._runs:
+            if run_id.is_completed(self.ui):
+                continue
+            suite = run_id.benchmark.suite
+            executor_task = task_for(
+                suite.executor.build, "E:" + suite.executor.name, suite.executor.path)
+            suite_task = task_for(suite.build, "S:" + suite.name, suite.location)
+
+            for task in (executor_task, suite_task):
+                if task is not None:
+                    task.run_ids.append(run_id)
+            if executor_task is not None and suite_task is not None:
+                suite_task.add_dependency(executor_task)
+        return list(tasks.values())
+
+    def _build_all(self):
+        """Execute the builds of all runs before any benchmark is executed.
+           Independent builds are executed concurrently. When a build fails,
+           the builds depending on it are skipped, and the runs needing any of
+           them fail right away."""
+        tasks = self._collect_build_tasks()
+        if not tasks:
+            return
+
+        pending = list(tasks)
+        running = {}
+        num_completed = 0
+
+        pool = ThreadPoolExecutor(max_workers=self._num_build_workers,
+                                  thread_name_prefix="rebench-build")
+        try:
+            with self.ui.init_spinner(len(tasks)):
+                while pending or running:
+                    for task in list(pending):
+                        failed = task.failed_dependency()
+                        if failed is not None:
+                            pending.remove(task)
+                            self._skip_build(task, failed)
+                            num_completed += 1
+                        elif task.is_ready():
+                            pending.remove(task)
+                            future = pool.submit(
+                                self._build_unless_up_to_date, task.build_command,
+                                task.location, task.name, task.run_ids)
+                            running[future] = task
+
+                    if not running:
+                        break
+                    self.ui.step_spinner(num_completed, "Building %d of %d" % (
+                        num_completed + 1, len(tasks)))
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del running[future]
+                        future.result()
+                        num_completed += 1
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _build_unless_up_to_date(self, build_command: BuildCommand, location: Optional[str],
+                                 name: str, run_ids: list["RunId"]):
+        """Execute the build, unless the build cache indicates that its inputs
+           did not change since it last succeeded."""
+        key = None
+        if self._build_cache is not None:
+            try:
+                key = compute_key(build_command, run_ids[0].env)
+            except (InputNotHashable, OSError) as err:
+                reason = err.message if isinstance(err, InputNotHashable) else str(err)
+                self.ui.warning(
+                    "{ind}Could not determine the inputs of the build of %s.\n"
+                    "{ind}{ind}%s\n" % (name, escape_braces(reason)),
+                    None, build_command.command, location)
+
+        if (key is not None and not self._force_build
+                and self._build_cache.is_up_to_date(build_command, key)):
+            self.ui.verbose_output_info(
+                "{ind}Build of %s is up to date.\n" % name, None, build_command.command, location)
+            build_command.mark_succeeded()
+            return True
+
+        if not self._execute_build_cmd(build_command, location, name, run_ids):
+            return False
+
+        if key is not None:
+            try:
+                self._build_cache.add(build_command, key, name)
+            except OSError as err:
+                self.ui.warning("{ind}Could not update the build cache: %s\n" % escape_braces(
+                    str(err)))
+        return True
+
+    def _skip_build(self, task: _BuildTask, failed: _BuildTask):
+        task.build_command.mark_failed()
+        for run_id in task.run_ids:
+            run_id.fail_immediately()
+        self.ui.error("{ind}Build of %s skipped, because build of %s failed.\n" % (
+            task.name, failed.name), None, task.build_command.command, task.location)
 
     def _execute_build_cmd(self, build_command: BuildCommand, location: Optional[str],
-                           name: str, run_id: "RunId"):
+                           name: str, run_ids: list["RunId"]):
         assert build_command.location == location,\
             "The location of the BuildCommand is only used for equality. "\
             "And should always be equal to the one coming from the suite or executor"
@@ -399,24 +397,33 @@ class Executor(object):
             path = os.getcwd()
 
         script = build_command.command
+        run_id = run_ids[0]
 
-        self._scheduler.indicate_build(run_id)
         self.ui.debug_output_info("Start build\n", None, script, path)
 
         def _keep_alive(seconds):
             self.ui.warning(
                 "Keep alive, current job runs for %dmin\n" % (seconds / 60), run_id, script, path)
 
+        if self._build_log:
+            stdout_consumer = self._build_log.line_consumer(name, "STD")
+            stderr_consumer = self._build_log.line_consumer(name, "ERR")
+        else:
+            stdout_consumer = stderr_consumer = None
+
         try:
             return_code, stdout_result, stderr_result = subprocess_timeout.run(
                 '/bin/sh', run_id.env, path, False, True,
                 stdin_input=str.encode(script),
-                keep_alive_output=_keep_alive)
+                keep_alive_output=_keep_alive,
+                stdout_line_consumer=stdout_consumer,
+                stderr_line_consumer=stderr_consumer)
         except OSError as err:
             build_command.mark_failed()
-            run_id.fail_immediately()
-            run_id.report_run_failed(
-                script, err.errno, "Build of " + name + " failed.")
+            for failed_run in run_ids:
+                failed_run.fail_immediately()
+                failed_run.report_run_failed(
+                    script, err.errno, "Build of " + name + " failed.")
 
             if err.errno == 2:
                 msg = ("{ind}Build of %s failed.\n"
@@ -425,16 +432,14 @@ class Executor(object):
             else:
                 msg = str(err)
             self.ui.error(msg, run_id, script, path)
-            return
-
-        if self.build_log:
-            self.process_output(name, stdout_result, stderr_result)
+            return False
 
         if return_code != 0:
             build_command.mark_failed()
-            run_id.fail_immediately()
-            run_id.report_run_failed(
-                script, return_code, "Build of " + name + " failed.")
+            for failed_run in run_ids:
+                failed_run.fail_immediately()
+                failed_run.report_run_failed(
+                    script, return_code, "Build of " + name + " failed.")
             self.ui.error("{ind}Build of " + name + " failed.\n", None, script, path)
             if stdout_result and stdout_result.strip():
                 lines = escape_braces(stdout_result).split('\n')
@@ -444,18 +449,10 @@ class Executor(object):
                 lines = escape_braces(stderr_result).split('\n')
                 self.ui.error("{ind}stderr:\n\n{ind}{ind}"
                                + "\n{ind}{ind}".join(lines) + "\n")
-            raise FailedBuilding(name, build_command)
+            return False
 
         build_command.mark_succeeded()
-
-    def process_output(self, name, stdout_result, stderr_result):
-        with open(self.build_log, "a", encoding="utf-8") as log_file:
-            if stdout_result:
-                log_file.write(name + "|STD:")
-                log_file.write(stdout_result)
-            if stderr_result:
-                log_file.write(name + "|ERR:")
-                log_file.write(stderr_result)
+        return True
 
     def without_missing_binaries(self, run_exe_missing, runs):
         is_first = True
@@ -465,6 +462,7 @@ class Executor(object):
                 run.fail_immediately()
                 run.report_run_failed(None, None, None)
                 run.report_run_completed(None)
+                self._completed_runs.add(run)
                 if is_first:
                     self.ui.warning("{ind}Aborting remaining benchmarks using %s." % run.executable)
                     is_first = False
@@ -472,7 +470,7 @@ class Executor(object):
                 remaining_runs.append(run)
         return remaining_runs
 
-    def execute_run(self, run_id):
+    def execute_run(self, run_id, cpu_set=None):
         gauge_adapter = self._get_gauge_adapter_instance(run_id)
         if gauge_adapter is None:
             return True
@@ -480,6 +478,11 @@ class Executor(object):
         cmdline = self._construct_cmdline(run_id, gauge_adapter)
 
         if self._print_execution_plan:
+            self._print_expected_time(run_id)
+            if run_id.calibration:
+                print("# calibrated: %s %s" % run_id.calibration)
+            if self._uses_fork_server(run_id):
+                print("# forked from: " + run_id.benchmark.suite.executor.fork_server)
             if run_id.location:
                 print("cd " + run_id.location)
             print(cmdline)
@@ -496,10 +499,11 @@ class Executor(object):
         # now start the actual execution
         if not terminate:
             terminate = self._generate_data_point(cmdline, gauge_adapter,
-                                                  run_id, termination_check)
+                                                  run_id, termination_check, cpu_set)
 
         mean_of_totals = run_id.get_mean_of_totals()
         if terminate:
+            self._completed_runs.add(run_id)
             run_id.report_run_completed(cmdline)
             if (not run_id.is_failed
                     and not run_id.is_profiling()
@@ -513,11 +517,91 @@ class Executor(object):
 
         return terminate
 
+    def _print_expected_time(self, run_id):
+        invocation_time = self._duration_model.expected_invocation_time(run_id)
+        if invocation_time is None:
+            print("# expected: %d invocations, time unknown" % run_id.remaining_invocations)
+        else:
+            print("# expected: %d invocations of %s, %s" % (
+                run_id.remaining_invocations, format_duration(invocation_time),
+                format_duration(invocation_time * run_id.remaining_invocations)))
+
+    def _print_expected_total_time(self):
+        total, num_unknown = self._duration_model.expected_total_time(
+            [run for run in self._runs if not run.is_completed(self.ui)])
+        msg = "# expected in total: %s" % format_duration(total)
+        if num_unknown:
+            msg += ", and %d runs of unknown time" % num_unknown
+        print(msg)
+
+    def expected_remaining_time(self):
+        """The expected time in seconds for the runs that did not complete yet,
+           and the number of them without any estimate."""
+        self._duration_model.update()
+        return self._duration_model.expected_total_time(
+            [run for run in self._runs if run not in self._completed_runs])
+
+    def execute_probe(self, run_id):
+        """Execute an invocation of the run to calibrate it. Its data is not
+           recorded. Returns the mean of the totals, or None if it failed."""
+        gauge_adapter = self._get_gauge_adapter_instance(run_id)
+        if gauge_adapter is None:
+            return None
+
+        cmdline = self._construct_cmdline(run_id, gauge_adapter)
+        output_feed = _OutputFeed(gauge_adapter.create_parser(run_id, 0))
+        location = run_id.location
+        if location:
+            location = os.path.expanduser(location)
+        self.ui.debug_output_info("{ind}Starting calibration probe\n", run_id, cmdline)
+        try:
+            (return_code, output_capture, _) = subprocess_timeout.run(
+                cmdline, env=run_id.env, cwd=location, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, shell=True, verbose=self.debug,
+                timeout=run_id.max_invocation_time, uses_sudo=self.use_denoise,
+                stdout_line_consumer=output_feed.feed_line,
+                output_limit=self._output_limit, as_output_capture=True)
+        except OSError:
+            return None
+        output_capture.close()
+
+        if return_code != 0:
+            return None
+        try:
+            totals = [data_point.get_total_value() for data_point in output_feed.finish()]
+        except ExecutionDeliveredNoResults:
+            return None
+        # the iterations after the configured warmup, if there are any
+        totals = totals[run_id.warmup_iterations or 0:] or totals
+        return sum(totals) / len(totals) if totals else None
+
+    def _calibrate_runs(self):
+        # with workers, the benchmarks are not built here, and cannot be probed,
+        # thus, only the calibrations recorded earlier are used
+        if not self._print_execution_plan and not self._workers:
+            Calibration(self.execute_probe, self.ui).calibrate(self._runs)
+        runs = without_unselected_input_sizes(self._runs)
+        if len(runs) < len(self._runs):
+            self._runs = runs
+            self._duration_model = DurationModel(runs)
+
+    def _uses_fork_server(self, run_id):
+        """Invocations are only forked when they do not need to be started in a
+           particular way, i.e., with denoise, in a cgroup, or with a profiler."""
+        return (run_id.benchmark.suite.executor.fork_server is not None
+                and not self.use_denoise
+                and run_id.cgroup is None
+                and not run_id.is_profiling())
+
     def _get_gauge_adapter_instance(self, run_id):
-        adapter_cfg = run_id.get_gauge_adapter()
-        adapter = instantiate_adapter(adapter_cfg,
-                                      self._include_faulty,
-                                      self)
+        if run_id in self._gauge_adapters:
+            adapter = self._gauge_adapters[run_id]
+        else:
+            adapter_cfg = run_id.get_gauge_adapter()
+            adapter = instantiate_adapter(adapter_cfg,
+                                          self._include_faulty,
+                                          self)
+            self._gauge_adapters[run_id] = adapter
 
         if adapter is None:
             run_id.fail_immediately()
@@ -526,17 +610,45 @@ class Executor(object):
 
         return adapter
 
+    def _create_cgroup(self, run_id):
+        if run_id.cgroup is None:
+            return None
+        return self._cgroup_sandbox.create(run_id.cgroup)
+
+    def _release_cgroup(self, cgroup, run_id):
+        if cgroup is None:
+            return None
+        try:
+            return cgroup.read_stats()
+        finally:
+            try:
+                cgroup.remove()
+            except OSError as err:
+                self.ui.warning("{ind}Failed to remove cgroup %s: %s\n" % (
+                    escape_braces(cgroup.path), err.strerror), run_id)
+
     def _generate_data_point(self, cmdline, gauge_adapter, run_id,
-                             termination_check):
+                             termination_check, cpu_set=None):
         assert not self._print_execution_plan
-        output = ""
+        invocation = run_id.completed_invocations + 1
+        output_feed = _OutputFeed(gauge_adapter.create_parser(run_id, invocation))
+        resource_usage = []
+        location = run_id.location
+        if location:
+            location = os.path.expanduser(location)
+        env = run_id.env
 
         try:
-            location = run_id.location
-            if location:
-                location = os.path.expanduser(location)
-            env = run_id.env
+            cgroup = self._create_cgroup(run_id)
+        except UIError as err:
+            run_id.fail_immediately()
+            self.ui.error("{ind}" + escape_braces(err.message), run_id, cmdline, location, env)
+            run_id.report_run_failed(cmdline, 0, "")
+            return True
 
+        run_id.invocation_started(invocation)
+        start_time = time()
+        try:
             self.ui.debug_output_info("{ind}Starting run\n", run_id, cmdline, location, env)
 
             def _keep_alive(seconds):
@@ -544,15 +656,31 @@ class Executor(object):
                     "Keep alive, current job runs for %dmin\n" % (seconds / 60),
                     run_id, cmdline, location, env)
 
-            (return_code, output, _) = subprocess_timeout.run(
-                cmdline, env=env,
-                cwd=location, stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT, shell=True, verbose=self.debug,
-                timeout=run_id.max_invocation_time,
-                keep_alive_output=_keep_alive,
-                uses_sudo=self.use_denoise
-            )
+            if self._uses_fork_server(run_id):
+                (return_code, output_capture, _) = subprocess_timeout.run_forked(
+                    self._fork_servers.get(run_id.benchmark.suite.executor),
+                    cmdline, env=env, cwd=location, verbose=self.debug,
+                    timeout=run_id.max_invocation_time,
+                    keep_alive_output=_keep_alive,
+                    stdout_line_consumer=output_feed.feed_line,
+                    output_limit=self._output_limit, cpu_set=cpu_set)
+            else:
+                (return_code, output_capture, _) = subprocess_timeout.run(
+                    cmdline, env=env,
+                    cwd=location, stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, shell=True, verbose=self.debug,
+                    timeout=run_id.max_invocation_time,
+                    keep_alive_output=_keep_alive,
+                    uses_sudo=self.use_denoise,
+                    stdout_line_consumer=output_feed.feed_line,
+                    output_limit=self._output_limit,
+                    as_output_capture=True,
+                    resource_usage_consumer=resource_usage.append,
+                    cgroup=cgroup,
+                    cpu_set=cpu_set
+                )
         except OSError as err:
+            run_id.invocation_completed(invocation)
             run_id.fail_immediately()
             if err.errno == 2:
                 msg = ("{ind}Failed executing run\n"
@@ -561,10 +689,33 @@ class Executor(object):
             else:
                 msg = str(err)
             self.ui.error(msg, run_id, cmdline, location, env)
-            run_id.report_run_failed(cmdline, 0, output)
+            run_id.report_run_failed(cmdline, 0, "")
             return True
+        finally:
+            cgroup_stats = self._release_cgroup(cgroup, run_id)
 
-        if return_code == 127:
+        try:
+            executable_missing = self._evaluate_invocation(
+                cmdline, run_id, return_code, output_capture, output_feed, invocation,
+                resource_usage, cgroup_stats, location, env)
+        finally:
+            output_capture.close()
+        run_id.invocation_completed(invocation, time() - start_time)
+
+        if executable_missing:
+            return True
+        return self._check_termination_condition(run_id, termination_check, cmdline)
+
+    def _evaluate_invocation(self, cmdline, run_id, return_code, output_capture, output_feed,
+                             invocation, resource_usage, cgroup_stats, location, env):
+        # only failures need the output, and at most the in-memory part of it
+        if output_feed.indicated_error:
+            self.ui.verbose_output_info(
+                "{ind}Stopped run after the output indicated an error.\n", run_id, cmdline)
+            self._eval_output(
+                output_capture, run_id, output_feed, invocation, None, None, cmdline)
+        elif return_code == 127:
+            output = output_capture.text(self._output_limit)
             run_id.fail_immediately()
             msg = ("{ind}Error: Could not execute %s.\n"
                    + "{ind}{ind}The command was not found.\n"
@@ -577,6 +728,7 @@ class Executor(object):
             return True
         elif return_code != 0 and not self._include_faulty and not (
                 return_code == subprocess_timeout.E_TIMEOUT and run_id.ignore_timeouts):
+            output = output_capture.text(self._output_limit)
             run_id.indicate_failed_execution()
             run_id.report_run_failed(cmdline, return_code, output)
             if return_code == 126:
@@ -601,15 +753,21 @@ class Executor(object):
                 self.ui.error("{ind}Output:\n\n{ind}{ind}"
                                + "\n{ind}{ind}".join(lines) + "\n")
         else:
-            self._eval_output(output, run_id, gauge_adapter, cmdline)
-
-        return self._check_termination_condition(run_id, termination_check, cmdline)
+            rusage = resource_usage[0] if resource_usage else None
+            self._eval_output(
+                output_capture, run_id, output_feed, invocation, rusage, cgroup_stats, cmdline)
+        return False
 
-    def _eval_output(self, output, run_id, gauge_adapter, cmdline):
+    def _eval_output(self, output_capture, run_id, output_feed, invocation, rusage,
+                     cgroup_stats, cmdline):
         try:
-            data_points = gauge_adapter.parse_data(output, run_id, run_id.completed_invocations + 1)
+            data_points = output_feed.finish()
 
-            warmup = run_id.warmup_iterations
+            if run_id.detect_warmup and not run_id.is_profiling() and data_points:
+                self._detect_warmup(run_id, invocation, data_points, cmdline)
+
+            if not run_id.is_profiling() and data_points:
+                self._record_resource_usage(run_id, data_points[-1], rusage, cgroup_stats)
 
             num_points_to_show = 20
             num_points = len(data_points)
@@ -622,8 +780,7 @@ class Executor(object):
             for data_point in data_points:
                 if run_id.is_profiling():
                     run_id.add_data_point(data_point, False)
-                elif warmup is not None and warmup > 0:
-                    warmup -= 1
+                elif run_id.is_warmup_iteration(invocation, i + 1):
                     run_id.add_data_point(data_point, True)
                 else:
                     run_id.add_data_point(data_point, False)
@@ -643,7 +800,26 @@ class Executor(object):
             else:
                 self.ui.error("{ind}" + e.get_message() + "\n", run_id, cmdline)
             run_id.indicate_failed_execution()
-            run_id.report_run_failed(cmdline, 0, output)
+            run_id.report_run_failed(cmdline, 0, output_capture.text(self._output_limit))
+
+    @staticmethod
+    def _record_resource_usage(run_id, last_point, rusage, cgroup_stats):
+        # record the resource usage with the last iteration of the invocation
+        measurements = []
+        if rusage is not None and run_id.record_resource_usage:
+            measurements += _resource_usage_measurements(rusage)
+        if cgroup_stats:
+            measurements += cgroup_stats
+
+        for criterion, value, unit in reversed(measurements):
+            last_point.prepend_value(value, unit, criterion)
+
+    def _detect_warmup(self, run_id, invocation, data_points, cmdline):
+        num_warmup = detect_warmup([dp.get_total_value() for dp in data_points])
+        # it is persisted with the invocation, as its metadata
+        run_id.record_detected_warmup(invocation, num_warmup)
+        self.ui.verbose_output_info(
+            "{ind}Detected warmup: %d iterations\n" % num_warmup, run_id, cmdline)
 
     @staticmethod
     def _check_termination_condition(run_id, termination_check, cmd):
@@ -652,8 +828,14 @@ class Executor(object):
 
     def execute(self):
         try:
+            if self._do_builds and not self._print_execution_plan and not self._workers:
+                self._build_all()
+            if self._calibrate:
+                self._calibrate_runs()
+            self._duration_model.update()
             self._scheduler.execute()
             if self._print_execution_plan:
+                self._print_expected_total_time()
                 return True
 
             successful = True
@@ -663,9 +845,20 @@ class Executor(object):
                     successful = False
             return successful or self._include_faulty
         finally:
+            if self._build_log:
+                self._build_log.close()
+            self._fork_servers.stop_all()
             for run in self._runs:
                 run.close_files()
 
     @property
     def runs(self):
         return self._runs
+
+    @property
+    def completed_runs(self):
+        return self._completed_runs
+
+    @property
+    def duration_model(self):
+        return self._duration_model
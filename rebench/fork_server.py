@@ -0,0 +1,320 @@
+"""
+Execute invocations by forking them from a pre-initialized template process.
+
+For executors with a `fork_server` command, ReBench starts the command once,
+and asks it to fork a child for each invocation. Thus, the startup of the
+executor, for instance loading a language runtime and its standard library,
+is not part of every invocation.
+
+The protocol consists of JSON objects, one per line. ReBench writes requests
+to the standard input of the fork server:
+
+    {"id": 1, "argv": ["..."], "cwd": "/dir", "env": {}, "output": "/tmp/output",
+     "cpu_set": [2, 3]}
+
+The server forks a child, which starts a new session, restricts itself to the
+CPUs in `cpu_set` unless it is null, opens the named pipe
+`output` as its standard output and standard error, changes to `cwd`, replaces
+its environment with `env`, and executes `argv`, which is the command line
+that would have been executed without fork server, split into arguments.
+The server responds on its standard output with
+
+    {"id": 1, "pid": 1234}
+
+once the child was forked, and with
+
+    {"id": 1, "exit": 0}
+
+once the child terminated, where `exit` is the exit code, or the negated
+signal number if the child was killed by a signal. If no child could be forked,
+the server responds with `{"id": 1, "error": "message"}` instead.
+Responses to different requests may be interleaved. The server terminates
+when its standard input is closed.
+
+`rebench/zygote.py` implements such a server for Python.
+"""
+
+import asyncio
+import json
+import os
+import shlex
+from subprocess import PIPE, STDOUT, Popen, TimeoutExpired
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import Dict, List, Optional, Union
+
+from .subprocess_engine import DEFAULT_OUTPUT_LIMIT, Invocation, get_event_loop
+from .subprocess_kill import E_TIMEOUT, kill_process
+
+_STOP_TIMEOUT = 5
+
+
+class ForkServerError(OSError):
+    """The fork server could not fork the invocation, or terminated unexpectedly."""
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+class _Request(object):
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.started = loop.create_future()
+        self.exited = loop.create_future()
+
+    def fail(self, error: ForkServerError):
+        # only one of the futures is awaited at a time
+        future = self.exited if self.started.done() else self.started
+        if not future.done():
+            future.set_exception(error)
+
+
+class ForkServer(object):
+    """
+    A fork server process of an executor. Requests are made, and responses are
+    read, on the event loop of the subprocess engine.
+    """
+
+    def __init__(
+        self, name: str, command: str, cwd: Optional[str], env: Optional[dict]
+    ):
+        self.name = name
+        self._command = command
+        self._cwd = cwd
+        self._env = env
+        self._proc: Optional[Popen] = None
+        self._requests: Dict[int, _Request] = {}
+        self._next_id = 1
+        # the protocol of the pipe only references the stream weakly
+        self._responses: Optional[asyncio.StreamReader] = None
+        self.is_running = False
+
+    def start(self):
+        # in its own session, the server can be killed with its children
+        # pylint: disable-next=consider-using-with
+        self._proc = Popen(
+            self._command,
+            shell=True,
+            cwd=self._cwd,
+            env=self._env,
+            stdin=PIPE,
+            stdout=PIPE,
+            start_new_session=True,
+        )
+        self.is_running = True
+        asyncio.run_coroutine_threadsafe(self._read_responses(), get_event_loop())
+
+    def request(
+        self, argv: List[str], cwd: str, env: dict, output: str, cpu_set=None
+    ) -> _Request:
+        """
+        Ask the server to fork a child, which is pinned to the `cpu_set`, if any,
+        before it executes the command. Needs to be called on the event loop.
+        """
+        if not self.is_running or self._proc is None or self._proc.stdin is None:
+            raise ForkServerError("The fork server of %s is not running" % self.name)
+
+        request_id = self._next_id
+        self._next_id += 1
+        request = _Request(asyncio.get_running_loop())
+        self._requests[request_id] = request
+
+        line = json.dumps(
+            {
+                "id": request_id,
+                "argv": argv,
+                "cwd": cwd,
+                "env": env,
+                "output": output,
+                "cpu_set": sorted(cpu_set) if cpu_set else None,
+            }
+        )
+        try:
+            self._proc.stdin.write(line.encode("utf-8") + b"\n")
+            self._proc.stdin.flush()
+        except OSError as err:
+            del self._requests[request_id]
+            raise ForkServerError(
+                "The fork server of %s does not accept requests: %s" % (self.name, err)
+            ) from err
+        return request
+
+    async def _read_responses(self):
+        assert self._proc is not None and self._proc.stdout is not None
+        loop = asyncio.get_running_loop()
+        stream = asyncio.StreamReader()
+        self._responses = stream
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(stream), self._proc.stdout
+        )
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            try:
+                response = json.loads(line)
+                request = self._requests.get(response["id"])
+            except (ValueError, KeyError, TypeError):
+                # the server wrote something else than a response to its output
+                continue
+            if request is not None:
+                self._dispatch(response, response["id"], request)
+
+        self.is_running = False
+        error = ForkServerError("The fork server of %s terminated" % self.name)
+        for request in self._requests.values():
+            request.fail(error)
+        self._requests.clear()
+
+    def _dispatch(self, response: dict, request_id: int, request: _Request):
+        if "pid" in response:
+            _set_result(request.started, response["pid"])
+        elif "exit" in response:
+            del self._requests[request_id]
+            _set_result(request.exited, response["exit"])
+        elif "error" in response:
+            del self._requests[request_id]
+            request.fail(
+                ForkServerError(
+                    "The fork server of %s failed: %s" % (self.name, response["error"])
+                )
+            )
+
+    def stop(self):
+        """Close the connection, and kill the server if it does not terminate."""
+        if self._proc is None:
+            return
+        try:
+            if self._proc.stdin is not None:
+                self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(_STOP_TIMEOUT)
+        except TimeoutExpired:
+            kill_process(self._proc.pid, True, None, None)
+            self._proc.wait()
+
+
+class ForkServers(object):
+    """The fork servers of the executors, which are started on first use."""
+
+    def __init__(self):
+        self._servers: Dict[str, ForkServer] = {}
+        self._lock = Lock()
+
+    def get(self, executor) -> ForkServer:
+        with self._lock:
+            server = self._servers.get(executor.name)
+            if server is None or not server.is_running:
+                if server is not None:
+                    # restart a server that terminated unexpectedly
+                    server.stop()
+                cwd = os.path.expanduser(executor.path) if executor.path else None
+                server = ForkServer(
+                    executor.name, executor.fork_server, cwd, executor.run_details.env
+                )
+                server.start()
+                self._servers[executor.name] = server
+            return server
+
+    def stop_all(self):
+        with self._lock:
+            for server in self._servers.values():
+                server.stop()
+            self._servers = {}
+
+
+class _ForkedProcess(object):
+    """The part of the `Popen` interface needed to wait for and kill the child."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode: Optional[int] = None
+
+
+class ForkedInvocation(Invocation):
+    """
+    An invocation that is forked by a fork server instead of being started
+    as a new process. The standard output and standard error of the child
+    are combined, and read from a named pipe. The resource usage of the child
+    is not available.
+    """
+
+    def __init__(
+        self,
+        server: ForkServer,
+        args: Union[str, List[str]],
+        env,
+        cwd=None,
+        timeout=None,
+        verbose=False,
+        keep_alive_output=None,
+        stdout_line_consumer=None,
+        output_limit: int = DEFAULT_OUTPUT_LIMIT,
+        cpu_set=None,
+    ):
+        super().__init__(
+            shlex.split(args) if isinstance(args, str) else args,
+            env,
+            cwd,
+            timeout=timeout,
+            verbose=verbose,
+            stdout=PIPE,
+            stderr=STDOUT,
+            keep_alive_output=keep_alive_output,
+            stdout_line_consumer=stdout_line_consumer,
+            output_limit=output_limit,
+            as_output_capture=True,
+            cpu_set=cpu_set,
+        )
+        self._server = server
+        self._request: Optional[_Request] = None
+
+    async def _execute(self):
+        with TemporaryDirectory(prefix="rebench-fork-") as directory:
+            path = os.path.join(directory, "output")
+            os.mkfifo(path)
+            output = os.fdopen(
+                os.open(path, os.O_RDONLY | os.O_NONBLOCK), "rb", buffering=0
+            )
+            # keeping the pipe open for writing until the child terminated
+            # ensures that reading does not end before the child opened it
+            writer = os.open(path, os.O_WRONLY)
+            try:
+                self._request = self._server.request(
+                    self._argv,
+                    os.path.abspath(self._cwd or os.getcwd()),
+                    self._env or {},
+                    path,
+                    self._cpu_set,
+                )
+                self._proc = _ForkedProcess(await self._request.started)
+            except BaseException:
+                output.close()
+                os.close(writer)
+                raise
+
+            if self._interrupted:
+                await self._kill()
+
+            reading = asyncio.ensure_future(self._read(output, self._stdout_tee))
+            try:
+                await self._wait_with_timeout()
+            except BaseException:
+                await self._kill()
+                raise
+            finally:
+                os.close(writer)
+                await reading
+        self._raise_consumer_error()
+
+        stdout_result = self._result(PIPE, self._stdout_tee.capture)
+        if self._killed:
+            return E_TIMEOUT, stdout_result, None
+        return self._proc.returncode, stdout_result, None
+
+    async def _wait_for_exit(self):
+        self._proc.returncode = await self._request.exited
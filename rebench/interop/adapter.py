@@ -20,7 +20,11 @@
 import re
 import pkgutil
 import sys
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from importlib.metadata import entry_points
 from os.path import join
+from threading import RLock
 
 
 class GaugeAdapter(object):
@@ -43,7 +47,27 @@ class GaugeAdapter(object):
         return run_id.cmdline_for_next_invocation()
 
     def parse_data(self, data, run_id, invocation):
-        raise NotImplementedError()
+        """Parse the complete output of an invocation at once.
+
+           Adapters that implement `create_parser` get this method for free,
+           others have to override it.
+        """
+        if type(self).create_parser is GaugeAdapter.create_parser:
+            raise NotImplementedError()
+
+        parser = self.create_parser(run_id, invocation)
+        for line in data.split("\n"):
+            parser.feed_line(line)
+        return parser.finish()
+
+    def create_parser(self, run_id, invocation):
+        """Create an `OutputParser` to which the output of the invocation is
+           fed line by line, while the benchmark is still running.
+
+           Adapters that only implement `parse_data` get a parser that
+           buffers the output and calls `parse_data` on `finish()`.
+        """
+        return _BufferingParser(self, run_id, invocation)
 
     def check_for_error(self, line):
         """Check whether the output line contains one of the common error
@@ -67,6 +91,60 @@ class GaugeAdapter(object):
         return False
 
 
+# number of output lines kept to report unparseable output
+_OUTPUT_TAIL_LINES = 50
+
+
+class OutputParser(object, metaclass=ABCMeta):
+    """An OutputParser is fed the output of a single invocation line by line.
+
+       `feed_line` may raise `ExecutionDeliveredNoResults` as soon as the
+       output indicates an error. `finish` returns the list of data points.
+    """
+
+    def __init__(self, adapter, run_id, invocation):
+        self._adapter = adapter
+        self._run_id = run_id
+        self._invocation = invocation
+        self._iteration = 1
+        self._data_points = []
+        self._output_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+
+    def feed_line(self, line):
+        self._output_tail.append(line)
+        if self._adapter.check_for_error(line):
+            raise ResultsIndicatedAsInvalid(
+                "Output of bench program indicated error.")
+        self._parse_line(line)
+
+    @abstractmethod
+    def _parse_line(self, line):
+        pass
+
+    def finish(self):
+        if not self._data_points:
+            raise OutputNotParseable("\n".join(self._output_tail))
+        return self._data_points
+
+
+class _BufferingParser(OutputParser):
+    """Collects the output for adapters that only implement `parse_data`."""
+
+    def __init__(self, adapter, run_id, invocation):
+        super(_BufferingParser, self).__init__(adapter, run_id, invocation)
+        self._lines = []
+
+    def feed_line(self, line):
+        self._parse_line(line)
+
+    def _parse_line(self, line):
+        self._lines.append(line)
+
+    def finish(self):
+        return self._adapter.parse_data(
+            "\n".join(self._lines), self._run_id, self._invocation)
+
+
 class ExecutionDeliveredNoResults(Exception):
     """The exception to be raised when no results were obtained from the given
        data string."""
@@ -86,29 +164,77 @@ class ResultsIndicatedAsInvalid(ExecutionDeliveredNoResults):
     pass
 
 
-def instantiate_adapter(adapter_cfg, include_faulty, executor):
-    if isinstance(adapter_cfg, str):
-        return _search_in_rebench_modules(adapter_cfg, include_faulty, executor)
-    return _load_directly(adapter_cfg, include_faulty, executor)
+class _AdapterRegistry(object):
+    """Index of the available gauge adapter classes.
+
+       The built-in adapters of `rebench.interop` and the adapters registered
+       via the `rebench.gauge_adapters` entry point group are indexed once,
+       on first use. Custom adapters are compiled once per file.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._adapters = None
+        self._custom_modules = {}
+
+    def clear(self):
+        with self._lock:
+            self._adapters = None
+            self._custom_modules = {}
+
+    def get_adapter_class(self, name):
+        with self._lock:
+            if self._adapters is None:
+                self._adapters = self._index_adapters()
+            return self._adapters.get((name + "Adapter").lower())
+
+    def get_custom_adapter_class(self, name, full_path):
+        with self._lock:
+            key = (name, full_path)
+            if key not in self._custom_modules:
+                self._custom_modules[key] = _compile_adapter_module(name, full_path)
+            return _get_adapter_case_insensitively_from_module(
+                self._custom_modules[key], name)
 
+    @staticmethod
+    def _index_adapters():
+        adapters = {}
+        root = sys.modules["rebench.interop"].__path__
 
-def _search_in_rebench_modules(name, include_faulty, executor):
-    adapter_name = name + "Adapter"
-    root = sys.modules["rebench.interop"].__path__
+        for _, module_name, _ in pkgutil.walk_packages(root):
+            # depending on how ReBench was executed, name might one of the two
+            try:
+                mod = __import__("rebench.interop." + module_name, fromlist=["*"])
+            except ImportError:
+                try:
+                    mod = __import__("interop." + module_name, fromlist=["*"])
+                except ImportError:
+                    continue
+            for key in dir(mod):
+                if key.lower().endswith("adapter"):
+                    adapters.setdefault(key.lower(), getattr(mod, key))
 
-    for _, module_name, _ in pkgutil.walk_packages(root):
-        # depending on how ReBench was executed, name might one of the two
-        try:
-            mod = __import__("rebench.interop." + module_name, fromlist=adapter_name)
-        except ImportError:
+        for entry_point in entry_points(group="rebench.gauge_adapters"):
             try:
-                mod = __import__("interop." + module_name, fromlist=adapter_name)
+                adapters.setdefault((entry_point.name + "Adapter").lower(), entry_point.load())
             except ImportError:
-                mod = None
-        adapter_cls = _get_adapter_case_insensitively_from_module(mod, adapter_name)
-        if adapter_cls is not None:
-            return adapter_cls(include_faulty, executor)
+                pass
+        return adapters
+
+
+_registry = _AdapterRegistry()
+
 
+def instantiate_adapter(adapter_cfg, include_faulty, executor):
+    if isinstance(adapter_cfg, str):
+        adapter_cls = _registry.get_adapter_class(adapter_cfg)
+    else:
+        name, path = next(iter(adapter_cfg.items()))
+        adapter_cls = _registry.get_custom_adapter_class(
+            name, join(executor.config_dir, path))
+
+    if adapter_cls is not None:
+        return adapter_cls(include_faulty, executor)
     return None
 
 
@@ -121,17 +247,11 @@ def _get_adapter_case_insensitively_from_module(mod, adapter_name):
     return None
 
 
-def _load_directly(adapter_cfg, include_faulty, executor):
-    name, path = next(iter(adapter_cfg.items()))
-    full_path = join(executor.config_dir, path)
+def _compile_adapter_module(name, full_path):
     with open(full_path, "r") as adapter_file:  # pylint: disable=unspecified-encoding
         file_content = adapter_file.read()
 
     module_globals = {"__name__": name}
     code = compile(file_content, full_path, "exec")
     exec(code, module_globals)  # pylint: disable=exec-used
-
-    cls = _get_adapter_case_insensitively_from_module(module_globals, name)
-    if cls is not None:
-        return cls(include_faulty, executor)
-    return None
+    return module_globals
@@ -19,11 +19,9 @@
 # THE SOFTWARE.
 import re
 
-from .adapter         import GaugeAdapter, OutputNotParseable,\
-    ResultsIndicatedAsInvalid
+from .adapter         import GaugeAdapter, OutputParser
 
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class JMHAdapter(GaugeAdapter):
@@ -36,45 +34,52 @@ class JMHAdapter(GaugeAdapter):
     re_bench = re.compile(r"^# Benchmark: (.+)")
     re_complete = re.compile("Run complete")
 
-    def parse_data(self, data, run_id, invocation):
-        iteration = 1
-        data_points = []
+    def create_parser(self, run_id, invocation):
+        return _JMHParser(self, run_id, invocation)
 
-        for line in data.split("\n"):
-            # Early exit for completed runs. JMH will print out some info after 'Run complete'
-            # that include an error column, which will be considered as an error
-            # by check_for_error() heuristics.
-            if self.re_complete.search(line):
-                return data_points
 
-            if self.check_for_error(line):
-                raise ResultsIndicatedAsInvalid(
-                    "Output of bench program indicated error.")
+class _JMHParser(OutputParser):
 
-            ## TODO: make sure that we support JMH in a way that we get the results
-            ## for the correct benchmarks...
+    def __init__(self, adapter, run_id, invocation):
+        super(_JMHParser, self).__init__(adapter, run_id, invocation)
+        self._completed = False
 
-            # # first, make sure we parse for a one benchmark, otherwise skip
-            # # through all the lines
-            # if self.re_bench.match(line):
-            #     current = DataPoint(run_id)
-            #     continue
-            # if current is None:
-            #     continue
+    def feed_line(self, line):
+        # Ignore everything after 'Run complete'. JMH will print out some info after it
+        # that include an error column, which will be considered as an error
+        # by check_for_error() heuristics.
+        if self._completed:
+            return
+        if JMHAdapter.re_complete.search(line):
+            self._completed = True
+            return
+        super(_JMHParser, self).feed_line(line)
 
-            # now we are sure that we parse for a benchmark and can collect data
-            match = self.re_result_line.match(line)
-            if match:
-                value = float(match.group(3))
-                unit = match.group(4)
-                criterion = "total"
+    def _parse_line(self, line):
+        ## TODO: make sure that we support JMH in a way that we get the results
+        ## for the correct benchmarks...
 
-                point = DataPoint(run_id)
-                point.add_measurement(Measurement(invocation, iteration,
-                                                  value, unit, run_id, criterion))
-                data_points.append(point)
-                iteration += 1
+        # # first, make sure we parse for a one benchmark, otherwise skip
+        # # through all the lines
+        # if self.re_bench.match(line):
+        #     current = DataPoint(run_id)
+        #     continue
+        # if current is None:
+        #     continue
 
-        if not data_points:
-            raise OutputNotParseable(data)
-        return data_points
+        # now we are sure that we parse for a benchmark and can collect data
+        match = JMHAdapter.re_result_line.match(line)
+        if match:
+            value = float(match.group(3))
+            unit = match.group(4)
+            criterion = "total"
+
+            point = DataPoint(self._run_id)
+            point.add_value(self._invocation, self._iteration, value, unit, criterion)
+            self._data_points.append(point)
+            self._iteration += 1
+
+    def finish(self):
+        if self._completed:
+            return self._data_points
+        return super(_JMHParser, self).finish()
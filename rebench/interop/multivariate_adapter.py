@@ -18,10 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import re
-from .adapter         import GaugeAdapter, OutputNotParseable,\
-    ResultsIndicatedAsInvalid
+from .adapter         import GaugeAdapter, OutputParser
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class MultivariateAdapter(GaugeAdapter):
@@ -44,44 +42,40 @@ class MultivariateAdapter(GaugeAdapter):
         super(MultivariateAdapter, self).__init__(include_faulty, executor)
         self._other_error_definitions = [re.compile("FAILED")]
 
-    def parse_data(self, data, run_id, invocation):
-        iteration = 1
-        data_points = []
-        current = DataPoint(run_id)
-
-        for line in data.split("\n"):
-            if self.check_for_error(line):
-                raise ResultsIndicatedAsInvalid(
-                    "Output of bench program indicated error.")
-
-            match = self.variable_re.match(line)
-            if match:
-                (cnt, variable, unit, value_thing, floatpart) = match.groups()
-
-                # check for possible data point carry over
-                if cnt is not None:
-                    counter = int(cnt)
-                    while counter >= len(data_points):
-                        data_points.append(DataPoint(run_id))
-                    current = data_points[counter]
-
-                # determine value type
-                if floatpart is None:
-                    value = int(value_thing)
-                else:
-                    value = float(value_thing)
-
-                measure = Measurement(invocation, iteration, value,
-                                      unit if unit is not None else 'ms',
-                                      run_id, variable)
-                current.add_measurement(measure)
-
-                if cnt is None and measure.is_total():
-                    data_points.append(current)
-                    current = DataPoint(run_id)
-                    iteration += 1
-
-        if not data_points:
-            raise OutputNotParseable(data)
-
-        return data_points
+    def create_parser(self, run_id, invocation):
+        return _MultivariateParser(self, run_id, invocation)
+
+
+class _MultivariateParser(OutputParser):
+
+    def __init__(self, adapter, run_id, invocation):
+        super(_MultivariateParser, self).__init__(adapter, run_id, invocation)
+        self._current = DataPoint(run_id)
+
+    def _parse_line(self, line):
+        match = MultivariateAdapter.variable_re.match(line)
+        if not match:
+            return
+
+        (cnt, variable, unit, value_thing, floatpart) = match.groups()
+
+        # check for possible data point carry over
+        if cnt is not None:
+            counter = int(cnt)
+            while counter >= len(self._data_points):
+                self._data_points.append(DataPoint(self._run_id))
+            self._current = self._data_points[counter]
+
+        # determine value type
+        if floatpart is None:
+            value = int(value_thing)
+        else:
+            value = float(value_thing)
+
+        self._current.add_value(self._invocation, self._iteration, value,
+                                unit if unit is not None else 'ms', variable)
+
+        if cnt is None and variable == "total":
+            self._data_points.append(self._current)
+            self._current = DataPoint(self._run_id)
+            self._iteration += 1
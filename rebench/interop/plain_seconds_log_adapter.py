@@ -19,11 +19,9 @@
 # THE SOFTWARE.
 import re
 
-from .adapter         import GaugeAdapter, OutputNotParseable,\
-    ResultsIndicatedAsInvalid
+from .adapter         import GaugeAdapter, OutputParser
 
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class PlainSecondsLogAdapter(GaugeAdapter):
@@ -41,28 +39,19 @@ class PlainSecondsLogAdapter(GaugeAdapter):
                                          self.re_NPB_invalid, self.re_incorrect,
                                          self.re_err]
 
-    def parse_data(self, data, run_id, invocation):
-        iteration = 1
-        data_points = []
-        current = DataPoint(run_id)
+    def create_parser(self, run_id, invocation):
+        return _PlainSecondsLogParser(self, run_id, invocation)
 
-        for line in data.split("\n"):
-            if self.check_for_error(line):
-                raise ResultsIndicatedAsInvalid(
-                    "Output of bench program indicated error.")
 
-            try:
-                time = float(line) * 1000
-                measure = Measurement(invocation, iteration, time, "ms", run_id, "total")
-                current.add_measurement(measure)
+class _PlainSecondsLogParser(OutputParser):
 
-                data_points.append(current)
-                current = DataPoint(run_id)
-                iteration += 1
-            except ValueError:
-                pass  # ignore that line
+    def _parse_line(self, line):
+        try:
+            time = float(line) * 1000
+        except ValueError:
+            return  # ignore that line
 
-        if not data_points:
-            raise OutputNotParseable(data)
-
-        return data_points
+        point = DataPoint(self._run_id)
+        point.add_value(self._invocation, self._iteration, time, "ms")
+        self._data_points.append(point)
+        self._iteration += 1
@@ -19,11 +19,9 @@
 # THE SOFTWARE.
 import re
 
-from .adapter         import GaugeAdapter, OutputNotParseable,\
-    ResultsIndicatedAsInvalid
+from .adapter         import GaugeAdapter, OutputParser
 
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class RebenchLogAdapter(GaugeAdapter):
@@ -51,44 +49,37 @@ class RebenchLogAdapter(GaugeAdapter):
         self._other_error_definitions = [self.re_NPB_partial_invalid,
                                          self.re_NPB_invalid, self.re_incorrect]
 
-    def parse_data(self, data, run_id, invocation):
-        iteration = 1
-        data_points = []
-        current = DataPoint(run_id)
+    def create_parser(self, run_id, invocation):
+        return _RebenchLogParser(self, run_id, invocation)
 
-        for line in data.split("\n"):
-            if self.check_for_error(line):
-                raise ResultsIndicatedAsInvalid(
-                    "Output of bench program indicated error.")
 
-            measure = None
-            match = self.re_log_line.match(line)
-            if match:
-                time = float(match.group("runtime"))
-                if match.group("unit") == "u":
-                    time /= 1000
-                criterion = (match.group(2) or "total").strip()
-
-                measure = Measurement(invocation, iteration, time, "ms", run_id, criterion)
+class _RebenchLogParser(OutputParser):
 
-            else:
-                match = self.re_extra_criterion_log_line.match(line)
-                if match:
-                    value = float(match.group("value"))
-                    criterion = match.group("criterion")
-                    unit = match.group("unit")
+    def __init__(self, adapter, run_id, invocation):
+        super(_RebenchLogParser, self).__init__(adapter, run_id, invocation)
+        self._current = DataPoint(run_id)
 
-                    measure = Measurement(invocation, iteration, value, unit, run_id, criterion)
+    def _parse_line(self, line):
+        criterion = unit = value = None
+        match = RebenchLogAdapter.re_log_line.match(line)
+        if match:
+            value = float(match.group("runtime"))
+            if match.group("unit") == "u":
+                value /= 1000
+            criterion = (match.group(2) or "total").strip()
+            unit = "ms"
 
-            if measure:
-                current.add_measurement(measure)
-
-                if measure.is_total():
-                    data_points.append(current)
-                    current = DataPoint(run_id)
-                    iteration += 1
+        else:
+            match = RebenchLogAdapter.re_extra_criterion_log_line.match(line)
+            if match:
+                value = float(match.group("value"))
+                criterion = match.group("criterion")
+                unit = match.group("unit")
 
-        if not data_points:
-            raise OutputNotParseable(data)
+        if criterion:
+            self._current.add_value(self._invocation, self._iteration, value, unit, criterion)
 
-        return data_points
+            if criterion == "total":
+                self._data_points.append(self._current)
+                self._current = DataPoint(self._run_id)
+                self._iteration += 1
@@ -22,7 +22,6 @@ import re
 from .adapter import GaugeAdapter, OutputNotParseable
 
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class SavinaLogAdapter(GaugeAdapter):
@@ -38,9 +37,8 @@ class SavinaLogAdapter(GaugeAdapter):
             match = self.re_log_line.match(line)
             if match:
                 time = float(match.group(2))
-                measure = Measurement(invocation, iteration, time, "ms", run_id, "total")
                 current = DataPoint(run_id)
-                current.add_measurement(measure)
+                current.add_value(invocation, iteration, time, "ms")
                 data_points.append(current)
                 iteration += 1
 
@@ -19,7 +19,6 @@
 # THE SOFTWARE.
 from .adapter            import GaugeAdapter
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class TestAdapter(GaugeAdapter):
@@ -35,7 +34,6 @@ class TestAdapter(GaugeAdapter):
 
     def parse_data(self, data, run_id, _invocation):
         point = DataPoint(run_id)
-        point.add_measurement(Measurement(1, 1, self.test_data[self.index], "ms",
-                                          run_id))
+        point.add_value(1, 1, self.test_data[self.index], "ms")
         self.index = (self.index + 1) % len(self.test_data)
         return [point]
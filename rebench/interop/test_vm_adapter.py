@@ -18,10 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import re
-from .adapter         import GaugeAdapter, OutputNotParseable,\
-    ResultsIndicatedAsInvalid
+from .adapter         import GaugeAdapter, OutputParser
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class TestExecutorAdapter(GaugeAdapter):
@@ -36,29 +34,23 @@ class TestExecutorAdapter(GaugeAdapter):
         super(TestExecutorAdapter, self).__init__(include_faulty, executor)
         self._other_error_definitions = [re.compile("FAILED")]
 
-    def parse_data(self, data, run_id, invocation):
-        iteration = 1
-        data_points = []
-        current = DataPoint(run_id)
+    def create_parser(self, run_id, invocation):
+        return _TestExecutorParser(self, run_id, invocation)
 
-        for line in data.split("\n"):
-            if self.check_for_error(line):
-                raise ResultsIndicatedAsInvalid(
-                    "Output of bench program indicated error.")
 
-            match = TestExecutorAdapter.re_time.match(line)
-            if match:
-                measure = Measurement(invocation, iteration,
-                                      float(match.group(2)), 'ms', run_id,
-                                      match.group(1))
-                current.add_measurement(measure)
+class _TestExecutorParser(OutputParser):
 
-                if measure.is_total():
-                    data_points.append(current)
-                    current = DataPoint(run_id)
-                    iteration += 1
+    def __init__(self, adapter, run_id, invocation):
+        super(_TestExecutorParser, self).__init__(adapter, run_id, invocation)
+        self._current = DataPoint(run_id)
 
-        if not data_points:
-            raise OutputNotParseable(data)
+    def _parse_line(self, line):
+        match = TestExecutorAdapter.re_time.match(line)
+        if match:
+            self._current.add_value(self._invocation, self._iteration,
+                                    float(match.group(2)), 'ms', match.group(1))
 
-        return data_points
+            if match.group(1) == "total":
+                self._data_points.append(self._current)
+                self._current = DataPoint(self._run_id)
+                self._iteration += 1
@@ -19,9 +19,8 @@
 # THE SOFTWARE.
 import re
 import subprocess
-from .adapter            import GaugeAdapter, OutputNotParseable, ResultsIndicatedAsInvalid
+from .adapter            import GaugeAdapter, OutputParser
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class TimeAdapter(GaugeAdapter):
@@ -85,61 +84,61 @@ class TimeAdapter(GaugeAdapter):
         TimeAdapter._time_bin = time_bin
         TimeAdapter._completed_time_availability_check = True
 
-    def parse_data(self, data, run_id, invocation):
-        iteration = 1
-        data_points = []
-        current = DataPoint(run_id)
-        total_measure = None
-
-        for line in data.split("\n"):
-            if self.check_for_error(line):
-                raise ResultsIndicatedAsInvalid(
-                    "Output of bench program indicated error.")
-
-            if self._use_formatted_time:
-                match1 = self.re_formatted_rss.match(line)
-                match2 = self.re_formatted_time.match(line)
-                if match1:
-                    mem_kb = float(match1.group(1))
-                    measure = Measurement(invocation, iteration, mem_kb, "kb", run_id, "MaxRSS")
-                    current.add_measurement(measure)
-                elif match2:
-                    time = float(match2.group(1)) * 1000
-                    measure = Measurement(invocation, iteration, time, "ms", run_id, "total")
-                    current.add_measurement(measure)
-                    data_points.append(current)
-                    current = DataPoint(run_id)
-                    iteration += 1
+    def create_parser(self, run_id, invocation):
+        return _TimeParser(self, run_id, invocation)
+
+
+class _TimeParser(OutputParser):
+
+    def __init__(self, adapter, run_id, invocation):
+        super(_TimeParser, self).__init__(adapter, run_id, invocation)
+        self._current = DataPoint(run_id)
+        self._total_time = None
+
+    def _parse_line(self, line):
+        if self._adapter._use_formatted_time:  # pylint: disable=protected-access
+            self._parse_formatted_line(line)
+        else:
+            self._parse_posix_line(line)
+
+    def _complete_data_point(self):
+        self._data_points.append(self._current)
+        self._current = DataPoint(self._run_id)
+        self._iteration += 1
+
+    def _parse_formatted_line(self, line):
+        match1 = TimeAdapter.re_formatted_rss.match(line)
+        match2 = TimeAdapter.re_formatted_time.match(line)
+        if match1:
+            mem_kb = float(match1.group(1))
+            self._current.add_value(self._invocation, self._iteration, mem_kb, "kb",
+                                    "MaxRSS")
+        elif match2:
+            time = float(match2.group(1)) * 1000
+            self._current.add_value(self._invocation, self._iteration, time, "ms")
+            self._complete_data_point()
+
+    def _parse_posix_line(self, line):
+        match = TimeAdapter.re_time.match(line) or TimeAdapter.re_time2.match(line)
+        if match:
+            criterion = 'total' if match.group(1) == 'real' else match.group(1)
+            time = (float(match.group(2).strip() or 0) * 60 +
+                    float(match.group(3))) * 1000
+            if criterion == 'total':
+                self._total_time = time
             else:
-                match1 = self.re_time.match(line)
-                match2 = self.re_time2.match(line)
-                if match1 or match2:
-                    match = match1 or match2
-                    criterion = 'total' if match.group(1) == 'real' else match.group(1)
-                    time = (float(match.group(2).strip() or 0) * 60 +
-                            float(match.group(3))) * 1000
-                    measure = Measurement(invocation, iteration, time, 'ms', run_id, criterion)
-                    if measure.is_total():
-                        total_measure = measure
-                    else:
-                        current.add_measurement(measure)
-                else:
-                    measure = None
-
-                if current.number_of_measurements() == 3 and \
-                        current.get_total_value() is not None:
-                    data_points.append(current)
-                    current = DataPoint(run_id)
-                    iteration += 1
-
-        if total_measure:
-            current.add_measurement(total_measure)
-            data_points.append(current)
-
-        if not data_points:
-            raise OutputNotParseable(data)
-
-        return data_points
+                self._current.add_value(self._invocation, self._iteration, time, 'ms',
+                                        criterion)
+
+        if self._current.number_of_measurements() == 3 and \
+                self._current.get_total_value() is not None:
+            self._complete_data_point()
+
+    def finish(self):
+        if self._total_time is not None:
+            self._current.add_value(self._invocation, self._iteration, self._total_time, 'ms')
+            self._data_points.append(self._current)
+        return super(_TimeParser, self).finish()
 
 
 class TimeManualAdapter(TimeAdapter):
@@ -23,7 +23,6 @@ from .adapter         import GaugeAdapter, OutputNotParseable,\
     ResultsIndicatedAsInvalid
 
 from ..model.data_point  import DataPoint
-from ..model.measurement import Measurement
 
 
 class ValidationLogAdapter(GaugeAdapter):
@@ -63,31 +62,24 @@ class ValidationLogAdapter(GaugeAdapter):
                 if match.group(5) == "u":
                     time /= 1000
                 criterion = (match.group(2) or 'total').strip()
-                success_measure = Measurement(invocation, iteration,
-                                              match.group(6) == "true", 'bool', run_id, 'Success')
-                measure = Measurement(invocation, iteration, time, 'ms', run_id, criterion)
-                current.add_measurement(success_measure)
-                current.add_measurement(measure)
+                current.add_value(invocation, iteration,
+                                  match.group(6) == "true", 'bool', 'Success')
+                current.add_value(invocation, iteration, time, 'ms', criterion)
 
-                if measure.is_total():
+                if criterion == "total":
                     data_points.append(current)
                     current = DataPoint(run_id)
                     iteration += 1
             else:
                 match = self.re_actors.match(line)
                 if match:
-                    measure1 = Measurement(invocation, iteration,
-                                           int(match.group(1)), 'count', run_id, 'Actors')
-                    measure2 = Measurement(invocation, iteration,
-                                           int(match.group(2)), 'count', run_id, 'Messages')
-                    measure3 = Measurement(invocation, iteration,
-                                           int(match.group(3)), 'count', run_id, 'Promises')
-                    measure4 = Measurement(invocation, iteration,
-                                           0, 'ms', run_id, 'total')
-                    current.add_measurement(measure1)
-                    current.add_measurement(measure2)
-                    current.add_measurement(measure3)
-                    current.add_measurement(measure4)
+                    current.add_value(invocation, iteration,
+                                      int(match.group(1)), 'count', 'Actors')
+                    current.add_value(invocation, iteration,
+                                      int(match.group(2)), 'count', 'Messages')
+                    current.add_value(invocation, iteration,
+                                      int(match.group(3)), 'count', 'Promises')
+                    current.add_value(invocation, iteration, 0, 'ms', 'total')
                     data_points.append(current)
                     current = DataPoint(run_id)
                     iteration += 1
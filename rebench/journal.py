@@ -0,0 +1,356 @@
+"""
+The invocation journal and the summary of a data file.
+
+The data of an invocation is appended to the data file only once the
+invocation completed. The journal records when an invocation started, and
+when all its data was written, together with the size of the data file at
+that point, and a fingerprint of the data before it. When ReBench was
+interrupted, the data file is truncated to the size recorded last, which
+discards data that was only partially written, and the invocations that
+started but did not complete are executed again. A journal that does not
+match the data file, for instance because the data file was replaced,
+is ignored.
+
+The summary records the state of all runs up to an offset in the data file,
+so that loading the data file only needs to parse the data after it.
+
+The index records the byte ranges of the data file that hold the
+measurements of each run, and those holding metadata, so that loading
+the data of a few runs only needs to read their ranges.
+
+Discarding the data of a run appends a tombstone to the data file instead
+of rewriting it. The index records where the last tombstone of each run
+ends, and its ranges leave out the measurements of the run before it,
+together with its invocation times, calibrations, and detected warmup.
+"""
+
+import hashlib
+import json
+import os
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+_OPEN = "open"
+_START = "start"
+_COMMIT = "commit"
+_WRITE = "write"
+
+_SUMMARY_VERSION = 2
+_INDEX_VERSION = 4
+_FINGERPRINT_SIZE = 4096
+_EMPTY_FINGERPRINT = hashlib.sha256(b"").hexdigest()
+
+
+def journal_path(data_file: str) -> str:
+    return data_file + ".journal"
+
+
+def summary_path(data_file: str) -> str:
+    return data_file + ".summary"
+
+
+def index_path(data_file: str) -> str:
+    return data_file + ".index"
+
+
+def read_journal(path: str, data_file: str) -> Tuple[Optional[int], int]:
+    """
+    Return the size of the data file recorded last, or None if there is none,
+    and the number of invocations that started but did not complete.
+    A journal that does not match the data file up to that size is ignored.
+    """
+    size = None
+    fingerprint = None
+    started = set()
+    try:
+        with open(path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                # the last record may be incomplete
+                if not line.endswith("\n"):
+                    break
+                parts = line.rstrip("\n").split(" ", 3)
+                try:
+                    kind, offset, record_fingerprint = parts[0], int(parts[1]), parts[2]
+                    # invocations are identified by their number and run
+                    invocation = parts[3] if kind in (_START, _COMMIT) else None
+                except (IndexError, ValueError):
+                    break
+                if kind == _START:
+                    started.add(invocation)
+                elif kind == _COMMIT:
+                    started.discard(invocation)
+                size = offset
+                fingerprint = record_fingerprint
+    except FileNotFoundError:
+        pass
+
+    if size is not None and fingerprint != _fingerprint_if_present(data_file, size):
+        return None, 0
+    return size, len(started)
+
+
+class InvocationJournal(object):
+    """
+    Appends records to the journal of a data file. Each record is flushed
+    immediately, after the data it refers to was flushed to the data file.
+    """
+
+    def __init__(self, path: str, data_file: str):
+        self.path = path
+        self._data_file = data_file
+        self._file: Optional[TextIO] = None
+
+    def _append(self, kind: str, offset: int, invocation=None, run=None):
+        if self._file is None:
+            # pylint: disable-next=consider-using-with
+            self._file = open(self.path, "a", encoding="utf-8")
+        record = "%s %d %s" % (
+            kind,
+            offset,
+            _fingerprint_if_present(self._data_file, offset) or "-",
+        )
+        if invocation is not None:
+            record += " %d %s" % (invocation, json.dumps(run))
+        self._file.write(record + "\n")
+        self._file.flush()
+
+    def opened(self, offset: int):
+        """The data file is opened to append data, and has the given size."""
+        self._append(_OPEN, offset)
+
+    def started(self, offset: int, run: str, invocation: int):
+        self._append(_START, offset, invocation, run)
+
+    def committed(self, offset: int, run: str, invocation: int):
+        """All data of the invocation was written, up to the given offset."""
+        self._append(_COMMIT, offset, invocation, run)
+
+    def written(self, offset: int):
+        """Data outside of an invocation was written, up to the given offset."""
+        self._append(_WRITE, offset)
+
+    def clear(self):
+        """Remove the journal, because it does not refer to any pending data."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _fingerprint(data_file: str, offset: int) -> str:
+    with open(data_file, "rb") as data:
+        start = max(0, offset - _FINGERPRINT_SIZE)
+        data.seek(start)
+        return hashlib.sha256(data.read(offset - start)).hexdigest()
+
+
+def _fingerprint_if_present(data_file: str, offset: int) -> Optional[str]:
+    """The fingerprint of the data file up to the offset, if it is that large."""
+    try:
+        if os.path.getsize(data_file) < offset:
+            return None
+        return _fingerprint(data_file, offset)
+    except FileNotFoundError:
+        return _EMPTY_FINGERPRINT if offset == 0 else None
+
+
+def _write_atomically(path: str, content: dict):
+    directory = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, delete=False, suffix=".tmp"
+    ) as tmp_file:
+        json.dump(content, tmp_file, separators=(",", ":"))
+    os.replace(tmp_file.name, path)
+
+
+def _read_matching(path: str, data_file: str, version: int) -> Optional[dict]:
+    """Read the sidecar file, if it matches the data file up to its offset."""
+    try:
+        with open(path, "r", encoding="utf-8") as sidecar_file:
+            content = json.load(sidecar_file)
+        if (
+            not isinstance(content, dict)
+            or content.get("version") != version
+            or content["offset"] > os.path.getsize(data_file)
+            or content["fingerprint"] != _fingerprint(data_file, content["offset"])
+        ):
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return content
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_summary(path: str, data_file: str, offset: int, benchmarks: list, runs: list):
+    """
+    Store the summary of the data file up to the offset atomically.
+    A fingerprint of the data before the offset identifies the data file.
+    """
+    _write_atomically(
+        path,
+        {
+            "version": _SUMMARY_VERSION,
+            "offset": offset,
+            "fingerprint": _fingerprint(data_file, offset),
+            "benchmarks": benchmarks,
+            "runs": runs,
+        },
+    )
+
+
+def read_summary(path: str, data_file: str) -> Optional[dict]:
+    """Return the summary, or None if it does not match the data file."""
+    return _read_matching(path, data_file, _SUMMARY_VERSION)
+
+
+def remove_summary(path: str):
+    _remove(path)
+
+
+# the start of a tombstone, which discards the preceding measurements of a run
+DISCARDED = b"# discarded: "
+# the start of the metadata of a run, which is part of the data of the run
+INVOCATION_TIME = b"# invocation_time: "
+CALIBRATED = b"# calibrated: "
+WARMUP = b"# warmup: "
+_RUN_METADATA = (INVOCATION_TIME, CALIBRATED, WARMUP)
+
+
+def _run_id_of_line(line: bytes) -> Optional[int]:
+    """The persisted run id of a measurement or metadata of a run, or None for other lines."""
+    if line.startswith(_RUN_METADATA):
+        fields = line.split(b" ", 3)
+        run_id = fields[2] if len(fields) > 2 else b""
+    elif line.startswith(b"#"):
+        return None
+    else:
+        _, _, run_id = line.rpartition(b"\t")
+    try:
+        return int(run_id)
+    except ValueError:
+        return None
+
+
+def _discarded_run_of_line(line: bytes) -> Optional[int]:
+    """The persisted run id of a tombstone, or None for other lines."""
+    if not line.startswith(DISCARDED):
+        return None
+    try:
+        return int(line[len(DISCARDED) :].split(None, 1)[0])
+    except (ValueError, IndexError):
+        return None
+
+
+class DataFileIndex(object):
+    """
+    The byte ranges of the data file that hold the measurements and the metadata
+    of each run, identified by its persisted id, and the ranges of all other lines,
+    identified by None. Consecutive lines of a run form a single range.
+    """
+
+    def __init__(self, offset=0, ranges=None, discarded=None):
+        # the end of the indexed data
+        self.offset = offset
+        self._ranges: Dict[Optional[int], List[List[int]]] = ranges or {}
+        # the end of the last tombstone of each discarded run
+        self._discarded: Dict[int, int] = discarded or {}
+
+    def add(self, run_id: Optional[int], size: int):
+        """Index a line of the given size, appended at the end of the indexed data."""
+        ranges = self._ranges.setdefault(run_id, [])
+        if ranges and ranges[-1][1] == self.offset:
+            ranges[-1][1] += size
+        else:
+            ranges.append([self.offset, self.offset + size])
+        self.offset += size
+
+    def scan(self, data_file: BinaryIO):
+        """Index the complete lines after the indexed data."""
+        data_file.seek(self.offset)
+        for line in data_file:
+            if not line.endswith(b"\n"):
+                break
+            self.add(_run_id_of_line(line), len(line))
+            discarded = _discarded_run_of_line(line)
+            if discarded is not None:
+                self._discarded[discarded] = self.offset
+
+    def entries(self) -> list:
+        return list(self._ranges.items())
+
+    def discarded_entries(self) -> list:
+        return list(self._discarded.items())
+
+    def run_ids(self) -> Set[Optional[int]]:
+        """The ids of the runs with lines in the data file, and None for the other lines."""
+        return set(self._ranges)
+
+    def discarded_since(self, offset: int) -> Set[int]:
+        """The ids of the runs with a tombstone after the offset."""
+        return {run_id for run_id, end in self._discarded.items() if end > offset}
+
+    def ranges(self, run_ids: Iterable[Optional[int]], offset: int) -> List[List[int]]:
+        """
+        The ranges with the lines of the runs after the offset, in file order.
+        The measurements of a run before its last tombstone are left out.
+        """
+        selected: List[List[int]] = []
+        for run_id in run_ids:
+            start = offset
+            if run_id is not None:
+                start = max(offset, self._discarded.get(run_id, 0))
+            selected.extend(
+                [max(r[0], start), r[1]]
+                for r in self._ranges.get(run_id, ())
+                if r[1] > start
+            )
+        selected.sort()
+        merged: List[List[int]] = []
+        for start, end in selected:
+            if merged and merged[-1][1] == start:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        return merged
+
+
+def write_index(path: str, data_file: str, index: DataFileIndex):
+    _write_atomically(
+        path,
+        {
+            "version": _INDEX_VERSION,
+            "offset": index.offset,
+            "fingerprint": _fingerprint(data_file, index.offset),
+            "ranges": index.entries(),
+            "discarded": index.discarded_entries(),
+        },
+    )
+
+
+def read_index(path: str, data_file: str) -> Optional[DataFileIndex]:
+    """Return the index, or None if it does not match the data file."""
+    content = _read_matching(path, data_file, _INDEX_VERSION)
+    if content is None:
+        return None
+    try:
+        return DataFileIndex(
+            content["offset"], dict(content["ranges"]), dict(content["discarded"])
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def remove_index(path: str):
+    _remove(path)
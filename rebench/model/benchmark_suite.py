@@ -36,7 +36,8 @@ class BenchmarkSuite(object):
         location = suite.get("location", executor.path)
         if location and not location.startswith("~"):
             location = os.path.abspath(location)
-        build = BuildCommand.create(suite.get("build"), location, deduplicated_build_commands)
+        build = BuildCommand.create(suite.get("build"), location, deduplicated_build_commands,
+                                    suite.get("build_inputs"))
         benchmarks_config = suite.get("benchmarks")
 
         description = suite.get("description")
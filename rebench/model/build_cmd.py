@@ -24,8 +24,8 @@ class BuildCommand(object):
 
     @classmethod
     def create(cls, commands: Optional[list[str]], location: Optional[str],
-               deduplicated_build_commands: dict["BuildCommand", "BuildCommand"]
-               ) -> Optional["BuildCommand"]:
+               deduplicated_build_commands: dict["BuildCommand", "BuildCommand"],
+               inputs: Optional[list[str]] = None) -> Optional["BuildCommand"]:
         if not commands:
             return None
 
@@ -33,14 +33,20 @@ class BuildCommand(object):
 
         build_command = BuildCommand(command, location)
         if build_command in deduplicated_build_commands:
-            return deduplicated_build_commands[build_command]
-
-        deduplicated_build_commands[build_command] = build_command
+            build_command = deduplicated_build_commands[build_command]
+        else:
+            deduplicated_build_commands[build_command] = build_command
+
+        # the same build command may have been given different inputs
+        for build_input in inputs or []:
+            if build_input not in build_command.inputs:
+                build_command.inputs.append(build_input)
         return build_command
 
     def __init__(self, cmd: str, location: Optional[str]):
         self.command = cmd
         self.location = location
+        self.inputs: list[str] = []
         self.is_built = False
         self.build_failed = False
 
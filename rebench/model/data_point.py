@@ -17,101 +17,191 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
-from typing import TYPE_CHECKING, Optional
+from array import array
+from threading import Lock
+from typing import TYPE_CHECKING, Iterator, Tuple
 
 from ..output import UIError
+from .measurement import Measurement, value_as_str
 
 if TYPE_CHECKING:
-    from ..model.measurement import Measurement
     from ..model.run_id import RunId
 
 
+# the criteria and their units, identified by the same index in all data points
+_criteria: list[Tuple[str, str]] = []
+_criterion_indexes: dict[Tuple[str, str], int] = {}
+_criteria_lock = Lock()
+
+
+def criterion_index(criterion: str, unit: str) -> int:
+    key = (criterion, unit)
+    index = _criterion_indexes.get(key)
+    if index is None:
+        with _criteria_lock:
+            index = _criterion_indexes.get(key)
+            if index is None:
+                index = len(_criteria)
+                _criteria.append(key)
+                _criterion_indexes[key] = index
+    return index
+
+
+def criterion_of(index: int) -> Tuple[str, str]:
+    """The criterion and unit identified by the index."""
+    return _criteria[index]
+
+
 class DataPoint(object):
+    """
+    The measurements of one iteration of an invocation. Instead of a
+    Measurement object per measurement, the data point stores the index of
+    the criterion and unit, and the value, of its measurements in arrays.
+    Measurement objects are only created on request by get_measurements().
+    """
+
+    __slots__ = ("run_id", "invocation", "iteration",
+                 "_criteria", "_values", "_integers", "_total")
+
     def __init__(self, run_id: "RunId"):
         self.run_id: "RunId" = run_id
-        self._measurements: list["Measurement"] = []
-        self._total: Optional["Measurement"] = None
         self.invocation = -1
+        self.iteration = -1
+        self._criteria = array("i")
+        self._values = array("d")
+        # bit i is set if value i is an integer, which is persisted as such
+        self._integers = 0
+        # the index of the total measurement, or -1
+        self._total = -1
 
     def number_of_measurements(self):
-        return len(self._measurements)
+        return len(self._values)
 
-    def add_measurement(self, measurement: "Measurement"):
+    def _check_iteration(self, invocation, iteration):
         if self.invocation == -1:
-            self.invocation = measurement.invocation
-        elif self.invocation != measurement.invocation:
+            self.invocation = invocation
+            self.iteration = iteration
+        elif self.invocation != invocation:
             raise UIError("A data point is expected to represent a single invocation " +
-                          "but we got invocation " + str(measurement.invocation) +
+                          "but we got invocation " + str(invocation) +
                           " and " + str(self.invocation) + "\n", None)
-
-        self._measurements.append(measurement)
-        if measurement.is_total():
-            if self._total is not None:
+        elif self.iteration != iteration:
+            raise UIError("A data point is expected to represent a single iteration " +
+                          "but we got iteration " + str(iteration) +
+                          " and " + str(self.iteration) + "\n", None)
+
+    def add_value(self, invocation, iteration, value, unit, criterion="total"):
+        """Add a measurement, without creating a Measurement object for it."""
+        assert unit is not None
+        self._check_iteration(invocation, iteration)
+        if criterion == "total":
+            if self._total != -1:
                 raise ValueError("A data point should only include one " +
                                  "'total' measurement.")
-            self._total = measurement
+            self._total = len(self._values)
+        if isinstance(value, int):
+            self._integers |= 1 << len(self._values)
+        self._criteria.append(criterion_index(criterion, unit))
+        self._values.append(value)
+
+    def add_measurement(self, measurement: Measurement):
+        self.add_value(measurement.invocation, measurement.iteration, measurement.value,
+                       measurement.unit, measurement.criterion)
+
+    def prepend_value(self, value, unit, criterion):
+        """Add a measurement before all others, so that it is read before
+           the total measurement, which completes a data point when loading."""
+        assert self.invocation != -1 and criterion != "total"
+        self._integers <<= 1
+        if isinstance(value, int):
+            self._integers |= 1
+        if self._total != -1:
+            self._total += 1
+        self._criteria.insert(0, criterion_index(criterion, unit))
+        self._values.insert(0, value)
+
+    def prepend_measurement(self, measurement: Measurement):
+        assert self.invocation == measurement.invocation
+        self.prepend_value(measurement.value, measurement.unit, measurement.criterion)
+
+    def _value(self, i):
+        value = self._values[i]
+        return int(value) if self._integers >> i & 1 else value
+
+    def measurements(self) -> Iterator[Tuple[str, str, float]]:
+        """The criterion, unit, and value of each measurement."""
+        for i, index in enumerate(self._criteria):
+            criterion, unit = _criteria[index]
+            yield criterion, unit, self._value(i)
+
+    @property
+    def criterion_indexes(self):
+        """The criteria and units of the measurements, as indexes for criterion_of()."""
+        return self._criteria
+
+    @property
+    def values(self):
+        """The values of the measurements as floats."""
+        return self._values
 
     def get_measurements(self):
-        return self._measurements
+        return [Measurement(self.invocation, self.iteration, value, unit, self.run_id,
+                            criterion)
+                for criterion, unit, value in self.measurements()]
 
     def get_total_value(self):
-        return self._total.value if self._total else None
+        return self._value(self._total) if self._total != -1 else None
 
     def get_total_unit(self):
-        return self._total.unit
+        return criterion_of(self._criteria[self._total])[1] if self._total != -1 else None
+
+    def as_str_lists(self, persisted_run_id: int):
+        """The columns of each measurement, as persisted in a data file."""
+        run = self.run_id.as_str_list(persisted_run_id)
+        invocation = str(self.invocation)
+        iteration = str(self.iteration)
+        return [[invocation, iteration, value_as_str(value), unit, criterion] + run
+                for criterion, unit, value in self.measurements()]
+
+    def measurement_dicts(self):
+        return [{"c": criterion, "in": self.invocation, "it": self.iteration,
+                 "u": unit, "v": value}
+                for criterion, unit, value in self.measurements()]
 
     def measurements_as_dict(self, criteria):
         data = []
-        iteration = -1
-        invocation = -1
-        for m in self._measurements:
-            if iteration == -1:
-                iteration = m.iteration
-                invocation = m.invocation
-            else:
-                assert iteration == m.iteration
-                assert invocation == m.invocation
-            criterion = (m.criterion, m.unit)
+        for i, index in enumerate(self._criteria):
+            criterion = _criteria[index]
             if criterion not in criteria:
                 criteria[criterion] = len(criteria)
-            data.append({"v": m.value, "c": criteria[criterion]})
-        assert self.invocation == invocation
+            data.append({"v": self._value(i), "c": criteria[criterion]})
 
         return {
-            'in': invocation,
-            'it': iteration,
+            'in': self.invocation,
+            'it': self.iteration,
             'm': data
         }
 
     def add_measurements_api_v20(self, criteria, data):
-        num_measurements = 0
-        iteration = -1
-        invocation = -1
-
         # data contains a list of hashes
         # with {in: n, m: [[], [], ...]}
         # where m is a list of values for each criterion
+        if not self._values:
+            return 0
 
         ms = None
+        for d in data:
+            if d["in"] == self.invocation:
+                ms = d["m"]
+                break
+        if ms is None:
+            ms = []
+            data.append({"in": self.invocation, "m": ms})
+            for _ in criteria:
+                ms.append([])
 
-        for m in self._measurements:
-            if iteration == -1:
-                iteration = m.iteration
-                invocation = m.invocation
-                for d in data:
-                    if d["in"] == invocation:
-                        ms = d["m"]
-                        break
-                if ms is None:
-                    ms = []
-                    data.append({"in": invocation, "m": ms})
-                    for _ in criteria:
-                        ms.append([])
-            else:
-                assert iteration == m.iteration
-                assert invocation == m.invocation
-                assert ms is not None
-            criterion = (m.criterion, m.unit)
+        for i, index in enumerate(self._criteria):
+            criterion = _criteria[index]
             if criterion not in criteria:
                 criteria[criterion] = len(criteria)
 
@@ -119,13 +209,11 @@ class DataPoint(object):
             if len(ms) <= c_idx:
                 ms.append([])
 
-            while len(ms[c_idx]) + 1 < iteration:
+            while len(ms[c_idx]) + 1 < self.iteration:
                 ms[c_idx].append(None)
-            ms[c_idx].append(m.value)
-            num_measurements += 1
+            ms[c_idx].append(self._value(i))
 
-        assert self.invocation == invocation
-        return num_measurements
+        return len(self._values)
 
     def __repr__(self):
-        return "DataPoint(" + str(self.run_id) + ", " + str(self._measurements) + ")"
+        return "DataPoint(" + str(self.run_id) + ", " + str(self.get_measurements()) + ")"
@@ -39,11 +39,13 @@ class Executor(object):
         executable = executor.get("executable")
         args = executor.get("args")
 
-        build = BuildCommand.create(executor.get("build"), path, deduplicated_build_commands)
+        build = BuildCommand.create(executor.get("build"), path, deduplicated_build_commands,
+                                    executor.get("build_inputs"))
 
         description = executor.get("description")
         desc = executor.get("desc")
         env = executor.get("env")
+        fork_server = executor.get("fork_server")
 
         profiler = Profiler.compile(executor.get("profiler"))
 
@@ -55,11 +57,11 @@ class Executor(object):
                                      + "but no profiler details are given.")
 
         return Executor(executor_name, path, executable, args, build, description or desc,
-                        profiler, run_details, variables, action, env)
+                        profiler, run_details, variables, action, env, fork_server)
 
     def __init__(self, name, path, executable, args, build: Optional[BuildCommand], description,
                  profiler: Optional[list[Profiler]], run_details: ExpRunDetails,
-                 variables: ExpVariables, action, env):
+                 variables: ExpVariables, action, env, fork_server: Optional[str] = None):
         """Specializing the executor details in the run definitions with the settings from
            the executor definitions
         """
@@ -75,6 +77,8 @@ class Executor(object):
         self.run_details = run_details
         self.variables = variables
         self.env = env
+        # the command starting the template process from which invocations are forked
+        self.fork_server = fork_server
 
         self.action = action
 
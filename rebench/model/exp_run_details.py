@@ -37,6 +37,13 @@ def _lt_of_env_dict(a: dict, b: dict):
     # This case should never be reached, because we already checked for equality
     assert False, "Unexpected case reached in _lt_of_env_dict"
 
+def _lt_of_optional(a, b):
+    if a is None:
+        return True
+    if b is None:
+        return False
+    return a < b
+
 class ExpRunDetails(object):
 
     @classmethod
@@ -59,27 +66,52 @@ class ExpRunDetails(object):
 
         retries_after_failure = none_or_int(config.get('retries_after_failure',
                                                        defaults.retries_after_failure))
+
+        target_relative_ci = none_or_float(config.get('target_relative_ci',
+                                                      defaults.target_relative_ci))
+        min_invocations = none_or_int(config.get('min_invocations', defaults.min_invocations))
+        max_invocations = none_or_int(config.get('max_invocations', defaults.max_invocations))
+
+        detect_warmup = none_or_bool(config.get('detect_warmup', defaults.detect_warmup))
+        shrink_iterations = none_or_bool(config.get('shrink_iterations',
+                                                    defaults.shrink_iterations))
+        calibrate = config.get('calibrate', defaults.calibrate)
+        record_resource_usage = none_or_bool(config.get('record_resource_usage',
+                                                        defaults.record_resource_usage))
+        cgroup = none_or_dict(config.get('cgroup', defaults.cgroup))
+        if cgroup:
+            cgroup = {key: str(value) for key, value in cgroup.items()}
+
         env = none_or_dict(config.get('env', defaults.env))
 
         return ExpRunDetails(invocations, iterations, warmup, min_iteration_time,
                              max_invocation_time, ignore_timeouts, parallel_interference_factor,
-                             execute_exclusively, retries_after_failure, env,
-                             defaults.invocations_override, defaults.iterations_override)
+                             execute_exclusively, retries_after_failure,
+                             target_relative_ci, min_invocations, max_invocations,
+                             detect_warmup, shrink_iterations, calibrate, record_resource_usage,
+                             cgroup, env, defaults.invocations_override,
+                             defaults.iterations_override)
 
     @classmethod
     def empty(cls):
         return ExpRunDetails(None, None, None, None, None, None, None, None, None,
-                             None, None, None)
+                             None, None, None, None, None, None, None, None, None, None, None)
 
     @classmethod
     def default(cls, invocations_override, iterations_override):
-        return ExpRunDetails(1, 1, None, 50, -1, None, None, True, 0, {},
-                             invocations_override, iterations_override)
+        return ExpRunDetails(1, 1, None, 50, -1, None, None, True, 0, None, None, None,
+                             None, None, None, None, None, {}, invocations_override,
+                             iterations_override)
 
     def __init__(self, invocations: Optional[int], iterations: Optional[int], warmup: Optional[int],
                  min_iteration_time: Optional[int],
                  max_invocation_time: Optional[int], ignore_timeouts, parallel_interference_factor,
-                 execute_exclusively, retries_after_failure, env: Optional[Mapping],
+                 execute_exclusively, retries_after_failure,
+                 target_relative_ci: Optional[float], min_invocations: Optional[int],
+                 max_invocations: Optional[int], detect_warmup: Optional[bool],
+                 shrink_iterations: Optional[bool], calibrate: Optional[str],
+                 record_resource_usage: Optional[bool],
+                 cgroup: Optional[Mapping], env: Optional[Mapping],
                  invocations_override: Optional[int], iterations_override: Optional[int]):
         self.invocations = invocations
         self.iterations = iterations
@@ -91,6 +123,14 @@ class ExpRunDetails(object):
         self.parallel_interference_factor = parallel_interference_factor
         self.execute_exclusively = execute_exclusively
         self.retries_after_failure = retries_after_failure
+        self.target_relative_ci = target_relative_ci
+        self.min_invocations = min_invocations
+        self.max_invocations = max_invocations
+        self.detect_warmup = detect_warmup
+        self.shrink_iterations = shrink_iterations
+        self.calibrate = calibrate
+        self.record_resource_usage = record_resource_usage
+        self.cgroup = cgroup
         self.env = env
 
         self.invocations_override = invocations_override
@@ -109,6 +149,14 @@ class ExpRunDetails(object):
             self.parallel_interference_factor == other.parallel_interference_factor and
             self.execute_exclusively == other.execute_exclusively and
             self.retries_after_failure == other.retries_after_failure and
+            self.target_relative_ci == other.target_relative_ci and
+            self.min_invocations == other.min_invocations and
+            self.max_invocations == other.max_invocations and
+            self.detect_warmup == other.detect_warmup and
+            self.shrink_iterations == other.shrink_iterations and
+            self.calibrate == other.calibrate and
+            self.record_resource_usage == other.record_resource_usage and
+            self.cgroup == other.cgroup and
             self.env == other.env and
 
             self.invocations_override == other.invocations_override and
@@ -146,6 +194,32 @@ class ExpRunDetails(object):
         if self.retries_after_failure != other.retries_after_failure:
             return self.retries_after_failure < other.retries_after_failure
 
+        if self.target_relative_ci != other.target_relative_ci:
+            return _lt_of_optional(self.target_relative_ci, other.target_relative_ci)
+
+        if self.min_invocations != other.min_invocations:
+            return _lt_of_optional(self.min_invocations, other.min_invocations)
+
+        if self.max_invocations != other.max_invocations:
+            return _lt_of_optional(self.max_invocations, other.max_invocations)
+
+        if self.detect_warmup != other.detect_warmup:
+            return _lt_of_optional(self.detect_warmup, other.detect_warmup)
+
+        if self.shrink_iterations != other.shrink_iterations:
+            return _lt_of_optional(self.shrink_iterations, other.shrink_iterations)
+
+        if self.calibrate != other.calibrate:
+            return _lt_of_optional(self.calibrate, other.calibrate)
+
+        if self.record_resource_usage != other.record_resource_usage:
+            return _lt_of_optional(self.record_resource_usage, other.record_resource_usage)
+
+        if self.cgroup != other.cgroup:
+            if self.cgroup is None or other.cgroup is None:
+                return self.cgroup is None
+            return _lt_of_env_dict(self.cgroup, other.cgroup)
+
         if self.env != other.env:
             return _lt_of_env_dict(self.env, other.env)
 
@@ -159,6 +233,10 @@ class ExpRunDetails(object):
                      self.min_iteration_time, self.max_invocation_time,
                      self.ignore_timeouts, self.parallel_interference_factor,
                      self.execute_exclusively, self.retries_after_failure,
+                     self.target_relative_ci, self.min_invocations, self.max_invocations,
+                     self.detect_warmup, self.shrink_iterations, self.calibrate,
+                     self.record_resource_usage,
+                     tuple(sorted(self.cgroup.items())) if self.cgroup is not None else None,
                      tuple(sorted(self.env.items())) if self.env else None,
                      self.invocations_override, self.iterations_override))
 
@@ -166,6 +244,8 @@ class ExpRunDetails(object):
         # resolve overrides
         if self.invocations_override is not None:
             self.invocations = self.invocations_override
+            # an explicit number of invocations disables adaptive termination
+            self.target_relative_ci = None
 
         if self.iterations_override is not None:
             self.iterations = self.iterations_override
@@ -186,6 +266,14 @@ class ExpRunDetails(object):
                              data.get("parallel_interference_factor", None),
                              data.get("execute_exclusively", None),
                              data.get("retries_after_failure", None),
+                             data.get("target_relative_ci", None),
+                             data.get("min_invocations", None),
+                             data.get("max_invocations", None),
+                             data.get("detect_warmup", None),
+                             data.get("shrink_iterations", None),
+                             data.get("calibrate", None),
+                             data.get("record_resource_usage", None),
+                             data.get("cgroup", None),
                              data.get("env", None),
                              data.get("invocations_override", None),
                              data.get("iterations_override", None))
@@ -220,6 +308,30 @@ class ExpRunDetails(object):
         if self.retries_after_failure is not None:
             result["retries_after_failure"] = self.retries_after_failure
 
+        if self.target_relative_ci is not None:
+            result["target_relative_ci"] = self.target_relative_ci
+
+        if self.min_invocations is not None:
+            result["min_invocations"] = self.min_invocations
+
+        if self.max_invocations is not None:
+            result["max_invocations"] = self.max_invocations
+
+        if self.detect_warmup is not None:
+            result["detect_warmup"] = self.detect_warmup
+
+        if self.shrink_iterations is not None:
+            result["shrink_iterations"] = self.shrink_iterations
+
+        if self.calibrate is not None:
+            result["calibrate"] = self.calibrate
+
+        if self.record_resource_usage is not None:
+            result["record_resource_usage"] = self.record_resource_usage
+
+        if self.cgroup is not None:
+            result["cgroup"] = self.cgroup
+
         if self.env is not None:
             result["env"] = self.env
 
@@ -36,6 +36,7 @@ class Experiment(object):
             data_file = exp.get("data_file") or configurator.data_file + ".profiles"
         else:
             data_file = exp.get("data_file") or configurator.data_file
+        data_format = exp.get("data_format", "tsv")
 
         reporting = Reporting.compile(exp.get('reporting', {}), configurator.reporting,
                                       configurator.options, configurator.ui)
@@ -48,11 +49,11 @@ class Experiment(object):
 
         env = exp.get("env")
 
-        return Experiment(name, description or desc, action, env, data_file, reporting,
-                          run_details, variables, configurator, executions, suites)
+        return Experiment(name, description or desc, action, env, data_file, data_format,
+                          reporting, run_details, variables, configurator, executions, suites)
 
-    def __init__(self, name, description, action, env, data_file, reporting, run_details,
-                 variables, configurator, executions, suites):
+    def __init__(self, name, description, action, env, data_file, data_format, reporting,
+                 run_details, variables, configurator, executions, suites):
         self.name = name
         self._description = description
         self._action = action
@@ -63,7 +64,8 @@ class Experiment(object):
         self._reporting = reporting
 
         self._data_store = configurator.data_store
-        self._persistence = self._data_store.get(data_file, configurator, action)
+        self._persistence = self._data_store.get(
+            data_file, configurator, action, data_format)
 
         self._suites = self._compile_executors_and_benchmark_suites(
             executions, suites, configurator)
@@ -20,7 +20,16 @@
 from .run_id import RunId
 
 
+def value_as_str(value):
+    if isinstance(value, float):
+        return "%f" % value
+    return "%s" % value
+
+
 class Measurement(object):
+    __slots__ = ("invocation", "iteration", "value", "unit", "run_id", "criterion",
+                 "line_number", "filename")
+
     def __init__(self, invocation, iteration, value, unit,
                  run_id: RunId, criterion='total', line_number=None, filename=None):
         self.invocation = invocation
@@ -37,13 +46,8 @@ class Measurement(object):
         return self.criterion == "total"
 
     def as_str_list(self, persisted_run_id: int):
-        if isinstance(self.value, float):
-            val = "%f" % self.value
-        else:
-            val = "%s" % self.value
-
         return [str(self.invocation), str(self.iteration),
-                val,
+                value_as_str(self.value),
                 self.unit,
                 self.criterion] + self.run_id.as_str_list(persisted_run_id)
 
@@ -83,6 +83,12 @@ class RunId(object):
         else:
             self.statistics = StatisticProperties()
         self.total_unit = None
+        # the sum and number of the measured totals of each invocation
+        self._invocation_totals: dict[int, list] = {}
+        # the statistics of the means of the invocations restored from a summary
+        self._summarized_invocations = StatisticProperties()
+        # wall-clock time of invocations, in seconds
+        self._invocation_times = StatisticProperties()
 
         self._termination_check = None
         self._cmdline = None
@@ -93,6 +99,14 @@ class RunId(object):
         self._max_invocation = 0
         self._expandend_env = None
 
+        self._detected_warmup: dict[int, int] = {}
+        self._shrunk_iterations: Optional[int] = None
+        self._shrunk_cmdline = None
+        # the kind and value chosen by calibrating the run, if any
+        self.calibration: Optional[tuple[str, Any]] = None
+        self._calibrated_iterations: Optional[int] = None
+        self._calibrated_cmdline = None
+
         self._hash = None
 
     def has_same_executable(self, other):
@@ -126,6 +140,46 @@ class RunId(object):
     def invocations(self):
         return self.benchmark.run_details.invocations
 
+    @property
+    def target_relative_ci(self):
+        return self.benchmark.run_details.target_relative_ci
+
+    @property
+    def min_invocations(self):
+        return self.benchmark.run_details.min_invocations
+
+    @property
+    def max_invocations(self):
+        return self.benchmark.run_details.max_invocations
+
+    @property
+    def detect_warmup(self):
+        return self.benchmark.run_details.detect_warmup
+
+    @property
+    def shrink_iterations(self):
+        return self.benchmark.run_details.shrink_iterations
+
+    @property
+    def calibrate(self):
+        return self.benchmark.run_details.calibrate
+
+    @property
+    def record_resource_usage(self):
+        return self.benchmark.run_details.record_resource_usage
+
+    @property
+    def cgroup(self):
+        return self.benchmark.run_details.cgroup
+
+    @property
+    def iterations_for_next_invocation(self):
+        if self._shrunk_iterations is not None:
+            return self._shrunk_iterations
+        if self._calibrated_iterations is not None:
+            return self._calibrated_iterations
+        return self.iterations
+
     @property
     def env(self):
         if self._expandend_env is not None:
@@ -140,6 +194,10 @@ class RunId(object):
     def completed_invocations(self):
         return self._max_invocation
 
+    @property
+    def parallel_interference_factor(self):
+        return self.benchmark.run_details.parallel_interference_factor
+
     @property
     def execute_exclusively(self):
         return self.benchmark.run_details.execute_exclusively
@@ -202,6 +260,59 @@ class RunId(object):
     def requires_warmup(self):
         return self.benchmark.run_details.warmup > 0
 
+    def is_warmup_iteration(self, invocation, iteration):
+        """The configured warmup is the minimum, and may be extended by
+           the warmup detected for the invocation."""
+        warmup = max(self.warmup_iterations or 0, self._detected_warmup.get(invocation, 0))
+        return iteration <= warmup
+
+    def record_detected_warmup(self, invocation, num_iterations):
+        self._detected_warmup[invocation] = num_iterations
+        if self.shrink_iterations:
+            self._shrink_iterations()
+
+    def detected_warmup(self, invocation):
+        """The number of warmup iterations detected for the invocation, if any."""
+        return self._detected_warmup.get(invocation)
+
+    def detected_warmups(self):
+        """The number of warmup iterations detected for each invocation."""
+        return self._detected_warmup
+
+    _MIN_INVOCATIONS_TO_SHRINK_ITERATIONS = 3
+
+    def _shrink_iterations(self):
+        """Once a few invocations reached the steady state early, execute fewer
+           iterations, but at least twice the longest warmup seen so far,
+           and at least half of the configured iterations."""
+        if len(self._detected_warmup) < self._MIN_INVOCATIONS_TO_SHRINK_ITERATIONS:
+            return
+
+        configured = self._calibrated_iterations or self.iterations
+        shrunk = max(2 * max(self._detected_warmup.values()), configured // 2, 1)
+        if shrunk < configured and shrunk != self._shrunk_iterations:
+            self._shrunk_iterations = shrunk
+            self._shrunk_cmdline = self._compose_cmdline(shrunk)
+
+    def set_calibration(self, kind, value):
+        """Use the number of iterations, or the input size, chosen by calibration."""
+        self.calibration = (kind, value)
+        # iterations given on the command line take precedence
+        if kind == "iterations" and self.benchmark.run_details.iterations_override is None:
+            self._calibrated_iterations = value
+            self._calibrated_cmdline = self._compose_cmdline(value)
+
+    def clear_calibration(self):
+        self.calibration = None
+        self._calibrated_iterations = None
+        self._calibrated_cmdline = None
+
+    def calibrated(self, kind, value):
+        """Record the result of calibrating the run, so that it is not repeated."""
+        self.set_calibration(kind, value)
+        for persistence in self._persistence:
+            persistence.run_calibrated(self, kind, value)
+
     def fail_immediately(self):
         self._termination_check.fail_immediately()
 
@@ -246,6 +357,21 @@ class RunId(object):
     def add_persistence(self, persistence):
         self._persistence.add(persistence)
 
+    def is_persisted_only_by(self, persistence):
+        return self._persistence <= {persistence}
+
+    def invocation_started(self, invocation):
+        for persistence in self._persistence:
+            persistence.invocation_started(self, invocation)
+
+    def invocation_completed(self, invocation, invocation_time=None):
+        """Indicate the completion of the invocation, which took the given
+           wall-clock time in seconds, if it was executed."""
+        if invocation_time is not None:
+            self.record_invocation_time(invocation_time)
+        for persistence in self._persistence:
+            persistence.invocation_completed(self, invocation, invocation_time)
+
     def close_files(self):
         for persistence in self._persistence:
             persistence.close()
@@ -255,7 +381,28 @@ class RunId(object):
         if self.total_unit is None:
             self.total_unit = data_point.get_total_unit()
         if not warmup:
-            self.statistics.add_sample(data_point.get_total_value())
+            total = data_point.get_total_value()
+            self.statistics.add_sample(total)
+            if not self.is_profiling():
+                self._add_invocation_total(data_point.invocation, total, 1)
+
+    def _add_invocation_total(self, invocation, total, count):
+        totals = self._invocation_totals.get(invocation)
+        if totals is None:
+            self._invocation_totals[invocation] = [total, count]
+        else:
+            totals[0] += total
+            totals[1] += count
+
+    def invocation_statistics(self):
+        """The statistics of the means of the measured totals of each invocation.
+           Unlike the iterations of an invocation, which share its state,
+           the invocations are independent samples."""
+        statistics = StatisticProperties.from_aggregates(
+            *self._summarized_invocations.aggregates())
+        for total, count in self._invocation_totals.values():
+            statistics.add_sample(total / count)
+        return statistics
 
     def loaded_data_point(self, data_point, warmup):
         for persistence in self._persistence:
@@ -268,12 +415,109 @@ class RunId(object):
         for persistence in self._persistence:
             persistence.persist_data_point(data_point)
 
+    def loaded_in_bulk(self, invocations, unit, statistics, invocation_totals):
+        """Add the data of a data file that was loaded without data points.
+           The detected warmup is part of the metadata, which is loaded before."""
+        self._max_invocation = max(self._max_invocation, invocations)
+        if self.total_unit is None:
+            self.total_unit = unit
+        self.statistics.merge(statistics)
+        if not self.is_profiling():
+            for invocation, (total, count) in invocation_totals.items():
+                self._add_invocation_total(invocation, total, count)
+
+    def discard_loaded_data(self):
+        """Forget the data loaded for the run, which was discarded in the data file."""
+        self._max_invocation = 0
+        self._detected_warmup = {}
+        self._invocation_totals = {}
+        self._summarized_invocations = StatisticProperties()
+        self._shrunk_iterations = None
+        self._shrunk_cmdline = None
+        self.total_unit = None
+        if self.is_profiling():
+            self.statistics = SampleCounter()
+        else:
+            self.statistics = StatisticProperties()
+
+    def has_loaded_data(self):
+        return self._max_invocation > 0 or self.get_number_of_data_points() > 0
+
+    def summary_as_dict(self):
+        """The state derived from the data points, to restore it without them.
+           Statistics are kept as their aggregates, and empty parts are left out."""
+        summary = {
+            'invocations': self._max_invocation,
+            'statistics': self.statistics.aggregates(),
+        }
+        if self.total_unit is not None:
+            summary['unit'] = self.total_unit
+        if self._detected_warmup:
+            summary['warmup'] = self._detected_warmup
+        invocations = self.invocation_statistics()
+        if invocations.num_samples:
+            summary['invocation_means'] = invocations.aggregates()
+        if self._invocation_times.num_samples:
+            summary['invocation_times'] = self._invocation_times.aggregates()
+        if self.calibration:
+            summary['calibration'] = self.calibration
+        return summary
+
+    def load_summary(self, summary):
+        self._max_invocation = summary['invocations']
+        self._detected_warmup = {
+            int(invocation): num_iterations
+            for invocation, num_iterations in summary.get('warmup', {}).items()}
+        self.total_unit = summary.get('unit')
+        if self.is_profiling():
+            self.statistics = SampleCounter.from_aggregates(*summary['statistics'])
+        else:
+            self.statistics = StatisticProperties.from_aggregates(*summary['statistics'])
+        # the summary covers only completed invocations
+        self._invocation_totals = {}
+        if 'invocation_means' in summary:
+            self._summarized_invocations = StatisticProperties.from_aggregates(
+                *summary['invocation_means'])
+        if 'invocation_times' in summary:
+            self._invocation_times = StatisticProperties.from_aggregates(
+                *summary['invocation_times'])
+        if summary.get('calibration'):
+            self.set_calibration(*summary['calibration'])
+        if self.shrink_iterations:
+            self._shrink_iterations()
+
     def get_number_of_data_points(self):
         return self.statistics.num_samples
 
     def get_mean_of_totals(self):
         return self.statistics.mean
 
+    def record_invocation_time(self, seconds):
+        self._invocation_times.add_sample(seconds)
+
+    def expected_invocation_time(self):
+        """Estimate the wall-clock time of an invocation in seconds, based on the
+           data of previous invocations. Returns None if there is no data yet."""
+        if self._invocation_times.num_samples:
+            return self._invocation_times.mean
+
+        # without recorded invocation times, assume totals in milliseconds
+        if not self.statistics.num_samples or not self.get_mean_of_totals():
+            return None
+        return self.get_mean_of_totals() * self.iterations_for_next_invocation / 1000.0
+
+    @property
+    def remaining_invocations(self):
+        return max(0, self.invocations - self.completed_invocations)
+
+    def expected_remaining_time(self):
+        """Estimate the time the remaining invocations take, in seconds, based on
+           the data of previous invocations. Returns None if there is no data yet."""
+        invocation_time = self.expected_invocation_time()
+        if invocation_time is None:
+            return None
+        return invocation_time * self.remaining_invocations
+
     def get_termination_check(self, ui):
         if self._termination_check is None:
             self._termination_check = TerminationCheck(self, ui)
@@ -300,13 +544,13 @@ class RunId(object):
             self.benchmark.as_simple_string(),
             self.cores, self.input_size, self.var_value, self.tag)
 
-    def _expand_vars(self, string):
+    def _expand_vars(self, string, iterations=None):
         try:
             return string % {'benchmark': self.benchmark.command,
                              'cores': self.cores_as_str,
                              'executor': self.benchmark.suite.executor.name,
                              'input': self.input_size_as_str,
-                             'iterations': self.iterations,
+                             'iterations': iterations or self.iterations,
 
                              # the invocation number needs to be set right before execution
                              # we don't know it here, and it would change the RunId identity
@@ -336,11 +580,18 @@ class RunId(object):
 
     def cmdline_for_next_invocation(self):
         """Replace the invocation number in the command line"""
-        cmdline = self.cmdline() % {"invocation": self.completed_invocations + 1}
+        cmdline = self._shrunk_cmdline or self._calibrated_cmdline or self.cmdline()
+        cmdline = cmdline % {"invocation": self.completed_invocations + 1}
         cmdline = expand_user(cmdline, True)
         return cmdline
 
     def _construct_cmdline(self):
+        cmdline = self._compose_cmdline()
+        self._cmdline = cmdline
+        self.executable = cmdline.split(" ")[0]
+        return self._cmdline
+
+    def _compose_cmdline(self, iterations=None):
         cmdline = ""
         if self.benchmark.suite.executor.path:
             cmdline = self.benchmark.suite.executor.path + "/"
@@ -355,11 +606,7 @@ class RunId(object):
         if self.benchmark.extra_args:
             cmdline += " " + str(self.benchmark.extra_args)
 
-        cmdline = self._expand_vars(cmdline)
-
-        self._cmdline = cmdline.strip()
-        self.executable = cmdline.split(" ")[0]
-        return self._cmdline
+        return self._expand_vars(cmdline, iterations).strip()
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
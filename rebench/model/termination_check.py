@@ -24,6 +24,11 @@ if TYPE_CHECKING:
     from ..ui import UI
 
 
+# without min_invocations, the variation between invocations
+# is not known well enough before this number of invocations
+_DEFAULT_MIN_INVOCATIONS = 3
+
+
 class TerminationCheck(object):
     def __init__(self, run_id: "RunId", ui: "UI"):
         self._run_id = run_id
@@ -31,6 +36,34 @@ class TerminationCheck(object):
         self._consecutive_erroneous_executions = 0
         self._failed_execution_count = 0
         self._fail_immediately = False
+        self._invocation_limit = None
+
+    def set_invocation_limit(self, limit):
+        """Override the number of invocations configured for the run.
+           Setting the limit to None restores the configured number."""
+        self._invocation_limit = limit
+
+    def _max_invocations(self):
+        if self._invocation_limit is not None:
+            return self._invocation_limit
+        if self._run_id.target_relative_ci and self._run_id.max_invocations:
+            return self._run_id.max_invocations
+        return self._run_id.invocations
+
+    def has_converged(self):
+        """Check whether the confidence interval of the mean is narrow enough
+           to satisfy the target_relative_ci of the run. The interval is based
+           on the means of the invocations, since the iterations of an invocation
+           are not independent of each other."""
+        target = self._run_id.target_relative_ci
+        if not target:
+            return False
+        min_invocations = self._run_id.min_invocations or _DEFAULT_MIN_INVOCATIONS
+        if self._run_id.completed_invocations < min_invocations:
+            return False
+
+        relative_ci = self._run_id.invocation_statistics().relative_ci_half_width()
+        return relative_ci is not None and relative_ci <= target
 
     def fail_immediately(self):
         self._fail_immediately = True
@@ -67,7 +100,12 @@ class TerminationCheck(object):
             self.ui.warning(
                 "{ind}Many runs are failing, benchmark is aborted.\n", self._run_id, cmd)
             return True
-        elif self._run_id.completed_invocations >= self._run_id.invocations:
+        elif self._run_id.completed_invocations >= self._max_invocations():
+            return True
+        elif self.has_converged():
+            self.ui.verbose_output_info(
+                "{ind}Confidence interval reached target_relative_ci after %d invocations.\n"
+                % self._run_id.completed_invocations, self._run_id, cmd)
             return True
         else:
             return False
@@ -17,18 +17,27 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
+# pylint: disable=too-many-lines
+import io
 import json
+import locale
 import os
 import shutil
 import subprocess
 import sys
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import NamedTemporaryFile
 from threading import Lock
 from time import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
+from . import bulk_loading
+from .binary_data import BinaryDataFile, execution_details, is_binary_data_file
 from .environment import determine_environment, determine_source_details
+from .journal import (CALIBRATED, DataFileIndex, INVOCATION_TIME, InvocationJournal, index_path,
+                      journal_path, read_index, read_journal, read_summary, remove_index,
+                      remove_summary, summary_path, WARMUP, write_index, write_summary)
 from .model.benchmark import Benchmark
 from .model.data_point  import DataPoint
 from .model.measurement import Measurement
@@ -36,27 +45,43 @@ from .model.profile_data import ProfileData
 from .model.run_id      import RunId
 from .output            import UIError
 from .rebenchdb         import get_current_time
+from .ui                import escape_braces
 
 if TYPE_CHECKING:
     from .ui import UI
 
 _START_TIME_LINE = "# Execution Start: "
 
+# minimal number of seconds between updates of the summary of a data file
+_SUMMARY_INTERVAL = 60
+
+# maximal number of data files that are read in parallel
+_MAX_PARALLEL_READS = 8
+
 
 class DataStore(object):
 
-    def __init__(self, ui: "UI"):
+    def __init__(self, ui: "UI", load_in_bulk=True):
         self._files: dict[str, "AbstractPersistence"] = {}
+        self._formats: dict[str, str] = {}
         self._run_ids: dict[RunId, RunId] = {}
         self._benchmarks: dict[Benchmark, Benchmark] = {}
         self.ui = ui
+        # whether data files are loaded in bulk, if NumPy is available
+        self.load_in_bulk = load_in_bulk and bulk_loading.is_available()
 
     def load_data(self, runs, discard_run_data):
-        for persistence in list(self._files.values()):
+        persistences = list(self._files.values())
+        if self.load_in_bulk and len(persistences) > 1:
+            # read the data files in parallel, but update the runs one file after another
+            with ThreadPoolExecutor(min(len(persistences), _MAX_PARALLEL_READS)) as pool:
+                list(pool.map(lambda p: p.read_data(runs, discard_run_data), persistences))
+        for persistence in persistences:
             persistence.load_data(runs, discard_run_data)
 
-    def get(self, filename, configurator, action):
+    def get(self, filename, configurator, action, data_format="tsv"):
         if filename not in self._files:
+            _check_data_format(filename, action, data_format)
             source = determine_source_details(configurator)
             if configurator.use_rebench_db and source['commitId'] is None:
                 raise UIError("Reporting to ReBenchDB is enabled, "
@@ -71,6 +96,8 @@ class DataStore(object):
 
             if action == "profile":
                 p = _ProfileFilePersistence(filename, self, configurator, self.ui)
+            elif data_format == "binary":
+                p = _BinaryFilePersistence(filename, self, configurator, self.ui)
             else:
                 p = _FilePersistence(filename, self, configurator, self.ui)
             self.ui.debug_output_info("ReBenchDB enabled: {e}\n", e=configurator.use_rebench_db)
@@ -83,6 +110,10 @@ class DataStore(object):
                 p = _CompositePersistence(p, db)
 
             self._files[filename] = p
+            self._formats[filename] = data_format
+        elif self._formats[filename] != data_format:
+            raise UIError("The data file %s is used with the %s and the %s format.\n" % (
+                filename, self._formats[filename], data_format), None)
         return self._files[filename]
 
     def create_run_id(self, benchmark: Benchmark, cores, input_size, var_value, tag, machine):
@@ -121,8 +152,25 @@ class DataStore(object):
         return benchmark
 
 
+def _check_data_format(filename, action, data_format):
+    if data_format == "binary" and action == "profile":
+        raise UIError("Profiles cannot be stored in the binary data format.\n", None)
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return
+    if is_binary_data_file(filename) != (data_format == "binary"):
+        raise UIError(("The data file %s is not in the %s format of the experiment. "
+                       + "It can be converted with rebench-convert.\n") % (
+                           filename, data_format), None)
+
+
 class AbstractPersistence(object):
 
+    def read_data(self, runs, discard_run_data):
+        """
+        Read the data file, without changing the runs, so that data files
+        can be read in parallel. The data is loaded by load_data().
+        """
+
     def load_data(self, runs, discard_run_data):
         """
         Needs to be implemented by subclass.
@@ -136,6 +184,15 @@ class AbstractPersistence(object):
     def persist_data_point(self, data_point):
         """Needs to be implemented by subclass"""
 
+    def invocation_started(self, run_id, invocation):
+        """Data points of the invocation are persisted until it completed."""
+
+    def invocation_completed(self, run_id, invocation, invocation_time):
+        """All data points of the invocation were persisted."""
+
+    def run_calibrated(self, run_id, kind, value):
+        """The run was calibrated to the given number of iterations or input size."""
+
     def run_completed(self):
         """Needs to be implemented by subclass"""
 
@@ -147,7 +204,7 @@ class _ConcretePersistence(AbstractPersistence):
 
     def __init__(self, data_store: DataStore, ui):
         self._data_store = data_store
-        self._start_time = None
+        self._start_time: Optional[str] = None
         self.ui = ui
 
 
@@ -158,6 +215,9 @@ class _CompositePersistence(AbstractPersistence):
         self._rebench_db = rebench_db
         self._closed = False
 
+    def read_data(self, runs, discard_run_data):
+        self._file.read_data(runs, discard_run_data)
+
     def load_data(self, runs, discard_run_data):
         start_time = self._file.load_data(runs, discard_run_data)
         # TODO: if load data into ReBenchDB
@@ -173,6 +233,15 @@ class _CompositePersistence(AbstractPersistence):
         self._file.persist_data_point(data_point)
         self._rebench_db.persist_data_point(data_point)
 
+    def invocation_started(self, run_id, invocation):
+        self._file.invocation_started(run_id, invocation)
+
+    def invocation_completed(self, run_id, invocation, invocation_time):
+        self._file.invocation_completed(run_id, invocation, invocation_time)
+
+    def run_calibrated(self, run_id, kind, value):
+        self._file.run_calibrated(run_id, kind, value)
+
     def run_completed(self):
         self._rebench_db.send_data()
 
@@ -186,11 +255,41 @@ class _CompositePersistence(AbstractPersistence):
 def _to_json(data):
     return json.dumps(data, separators=(",", ":"), ensure_ascii=True)
 
+def _load_measurement(data_point, previous_run_id, run_id, measurement):
+    """
+    Add the measurement, a tuple of invocation, iteration, value, unit, and
+    criterion, to the data point of its run. The total measurement is the
+    last one of a data point, which completes it.
+    """
+    invocation, iteration, value, unit, criterion = measurement
+    if (previous_run_id is not run_id or data_point.invocation not in (-1, invocation)
+            or data_point.iteration not in (-1, iteration)):
+        # a data point without total measurement is incomplete, and is dropped
+        data_point = DataPoint(run_id)
+        previous_run_id = run_id
+
+    data_point.add_value(invocation, iteration, value, unit, criterion)
+
+    if criterion == "total":
+        run_id.loaded_data_point(
+            data_point, run_id.is_warmup_iteration(invocation, iteration))
+        data_point = DataPoint(run_id)
+    return data_point, previous_run_id
+
 _METADATA_RUN_ID = "# run_id: "
 _METADATA_BENCHMARK = "# benchmark: "
+_METADATA_INVOCATION_TIME = INVOCATION_TIME.decode("ascii")
+_METADATA_CALIBRATION = CALIBRATED.decode("ascii")
+_METADATA_WARMUP = WARMUP.decode("ascii")
+_METADATA_DISCARDED = "# discarded: "
 
 class _FilePersistence(_ConcretePersistence):
 
+    # whether the index of the data file is used to load only the selected runs
+    _USES_INDEX = True
+    # whether the data can be loaded in bulk, without data points
+    _LOADS_IN_BULK = True
+
     def __init__(self, data_filename, data_store: DataStore, configurator, ui):
         super(_FilePersistence, self).__init__(data_store, ui)
         if not data_filename:
@@ -199,6 +298,15 @@ class _FilePersistence(_ConcretePersistence):
 
         self._data_filename = data_filename
         self._file = None
+        self._journal = InvocationJournal(journal_path(data_filename), data_filename)
+        self._summary_filename = summary_path(data_filename)
+        self._index_filename = index_path(data_filename)
+        self._index = None
+        # whether the data of runs that were not selected was not loaded
+        self._loaded_selectively = False
+        # whether read_data() was done for the next load_data()
+        self._read = False
+        self._bulk_data: Optional[bulk_loading.TextData] = None
         if configurator.discard_old_data:
             self._discard_old_data()
         self._lock = Lock()
@@ -214,8 +322,17 @@ class _FilePersistence(_ConcretePersistence):
         self._benchmarks_in_file: dict[Benchmark, int] = {}
         self._id_to_benchmark: list[Benchmark] = []
 
+        # data points of invocations that did not complete yet
+        self._pending_data_points: dict[RunId, list[DataPoint]] = {}
+        self._summary_is_outdated = False
+        self._summary_time = time()
+        self._index_time = time()
+
     def _discard_old_data(self):
         self._truncate_file(self._data_filename)
+        self._journal.clear()
+        remove_summary(self._summary_filename)
+        remove_index(self._index_filename)
 
     @staticmethod
     def _truncate_file(filename):
@@ -241,32 +358,306 @@ class _FilePersistence(_ConcretePersistence):
                 return line[len(_START_TIME_LINE) :].strip()
         return None
 
-    def load_data(self, runs, discard_run_data):
+    def read_data(self, runs, discard_run_data):
         """
-        Loads the data from the configured data file
+        Recover from an interrupted execution, update the index, discard the
+        data of the runs to be rerun, and read the data in bulk, if possible.
         """
+        if self._read:
+            return
+        self._read = True
+        self._recover_from_interruption()
+        current_runs = self._runs_to_discard(runs, discard_run_data)
+        if current_runs and not self._USES_INDEX:
+            return
+        self._update_index()
+        if current_runs:
+            self._append_tombstones(current_runs)
+        if self._loads_in_bulk():
+            try:
+                self._bulk_data = self._read_in_bulk(runs)
+            except IOError:
+                pass
+            except (ValueError, IndexError, KeyError) as err:
+                self.ui.debug_error_info(
+                    "{ind}Data file %s is not loaded in bulk: %s\n" % (
+                        escape_braces(self._data_filename), escape_braces(str(err))))
+
+    def _runs_to_discard(self, runs, discard_run_data):
         if discard_run_data:
-            current_runs = {run for run in runs if run.is_persisted_by(self)}
-        else:
-            current_runs = None
+            return {run for run in runs if run.is_persisted_by(self)}
+        return None
 
+    def _append_tombstones(self, runs):
+        """
+        Discard the data of the runs by appending a tombstone for each of them,
+        recording the session that discarded it, instead of rewriting the
+        data file. `rebench-compact` removes the discarded data from the file.
+        """
+        assert self._index is not None
+        if self._index.offset == 0:
+            return
+        run_ids = self._selected_run_ids(runs, self._lines_in(self._index.ranges([None], 0)))
+        if not run_ids:
+            return
+        session = get_current_time()
+        # a line that was not written completely is not continued
+        tombstones = "\n" if self._data_file_size() > self._index.offset else ""
+        tombstones += "".join("%s%d %s\n" % (_METADATA_DISCARDED, run_id_id, session)
+                              for run_id_id in sorted(run_ids))
+        # pylint: disable-next=unspecified-encoding
+        with open(self._data_filename, "a") as data_file:
+            data_file.write(tombstones)
+        self._update_index()
+
+    def _loads_in_bulk(self):
+        return (self._LOADS_IN_BULK and self._data_store.load_in_bulk
+                and not self._configurator.use_rebench_db
+                and read_summary(self._summary_filename, self._data_filename) is None)
+
+    def load_data(self, runs, discard_run_data):
+        """
+        Loads the data from the configured data file
+        """
+        current_runs = self._runs_to_discard(runs, discard_run_data)
+        self.read_data(runs, discard_run_data)
+        self._read = False
         try:
-            if current_runs:
+            if current_runs and not self._USES_INDEX:
                 with NamedTemporaryFile("w", delete=False) as target:
                     # pylint: disable-next=unspecified-encoding
                     with open(self._data_filename, "r") as data_file:
                         self._process_lines(data_file, current_runs, target)
                     os.unlink(self._data_filename)
                     shutil.move(target.name, self._data_filename)
+                remove_index(self._index_filename)
+                self._update_index()
+            elif self._bulk_data is not None:
+                self._load_in_bulk()
             else:
                 # pylint: disable-next=unspecified-encoding
                 with open(self._data_filename, "r") as data_file:
-                    self._process_lines(data_file, current_runs, None)
+                    if not self._load_summary(data_file, runs):
+                        self._load_lines(data_file, runs, 0)
         except IOError:
             self.ui.debug_error_info("No data loaded, since %s does not exist.\n"
                                       % self._data_filename)
+
+        with self._lock:
+            self._summary_is_outdated = True
+            self._write_summary()
+            self._write_index()
         return self._start_time
 
+    def _update_index(self):
+        """
+        Read the index of the data file, and index the data appended since.
+        If the index does not match the data file, it is rebuilt.
+        """
+        if not self._USES_INDEX:
+            return
+        index = read_index(self._index_filename, self._data_filename) or DataFileIndex()
+        try:
+            with open(self._data_filename, "rb") as data_file:
+                index.scan(data_file)
+        except FileNotFoundError:
+            pass
+        self._index = index
+
+    def _write_index(self):
+        """Store the index, if it covers all data written. The lock needs to be held."""
+        if self._index is None or self._index.offset != self._data_file_size():
+            return
+        self._index_time = time()
+        try:
+            write_index(self._index_filename, self._data_filename, self._index)
+        except OSError as err:
+            self.ui.debug_error_info("{ind}Failed to write the index %s: %s\n" % (
+                escape_braces(self._index_filename), err))
+
+    def _load_lines(self, data_file, runs, offset):
+        """
+        Load the data after the offset. With an index, only the metadata and
+        the measurements of the given runs are read.
+        """
+        if self._index is None or (runs is None
+                                   and not self._index.discarded_since(offset)):
+            data_file.seek(offset)
+            self._process_lines(data_file, None, None)
+            return
+
+        # the metadata defines the ids of the runs in the data file
+        self._process_lines(self._lines_in(self._index.ranges([None], offset)), None, None)
+        if runs is None:
+            # the ranges leave out the discarded data
+            run_ids = self._index.run_ids() - {None}
+        else:
+            run_ids = {self._run_ids_in_file[run] for run in runs if run in self._run_ids_in_file}
+            if len(run_ids) < len(self._id_to_run_id):
+                self._loaded_selectively = True
+        self._process_lines(self._lines_in(self._index.ranges(run_ids, offset)), None, None)
+
+    def _read_in_bulk(self, runs):
+        """Read the metadata and the data of the given runs, or all data, in bulk."""
+        ranges = None
+        selected_run_ids = None
+        if runs is not None and self._index is not None:
+            selected_run_ids = self._selected_run_ids(
+                set(runs), self._lines_in(self._index.ranges([None], 0)))
+            ranges = self._index.ranges(selected_run_ids | {None}, 0)
+        elif self._index is not None and self._index.discarded_since(0):
+            # the ranges leave out the discarded data
+            ranges = self._index.ranges(self._index.run_ids(), 0)
+        with open(self._data_filename, "rb") as data_file:
+            return bulk_loading.read_text(data_file, ranges,
+                                          locale.getpreferredencoding(False),
+                                          selected_run_ids)
+
+    @staticmethod
+    def _selected_run_ids(runs, metadata_lines):
+        """The persisted ids of the runs, without registering the runs of the data file."""
+        benchmarks = {}
+        run_ids = set()
+        for line in metadata_lines:
+            if line.startswith(_METADATA_BENCHMARK):
+                bench_id, bench_json = line[len(_METADATA_BENCHMARK):].split("=", 1)
+                benchmarks[int(bench_id)] = Benchmark.from_dict(json.loads(bench_json))
+            elif line.startswith(_METADATA_RUN_ID):
+                run_id_id, run_json = line[len(_METADATA_RUN_ID):].split("=", 1)
+                run_dict = json.loads(run_json)
+                benchmark = benchmarks[int(run_dict["benchmark_id"])]
+                if RunId.from_dict(run_dict, benchmark) in runs:
+                    run_ids.add(int(run_id_id))
+        return run_ids
+
+    def _load_in_bulk(self):
+        data = self._bulk_data
+        self._bulk_data = None
+        assert data is not None
+        self._process_lines(data.comments, None, None)
+
+        def warmup_of(run_id_id):
+            if run_id_id < len(self._id_to_run_id):
+                return self._id_to_run_id[run_id_id].warmup_iterations or 0
+            return 0
+
+        def detected_warmup_of(run_id_id):
+            if run_id_id < len(self._id_to_run_id):
+                return self._id_to_run_id[run_id_id].detected_warmups()
+            return {}
+
+        for run_id_id, invocations, unit, statistics, invocation_totals in \
+                data.columns.runs(warmup_of, detected_warmup_of):
+            if run_id_id >= len(self._id_to_run_id):
+                self.ui.debug_error_info(
+                    "{ind}Possibly corrupted data file %s. run_id %d not found.\n" % (
+                        escape_braces(self._data_filename), run_id_id))
+                continue
+            self._id_to_run_id[run_id_id].loaded_in_bulk(
+                invocations,
+                None if unit is None else unit.decode(locale.getpreferredencoding(False)),
+                statistics, invocation_totals)
+
+        if (data.selected_run_ids is not None
+                and len(data.selected_run_ids) < len(self._id_to_run_id)):
+            self._loaded_selectively = True
+
+    def _lines_in(self, ranges):
+        encoding = locale.getpreferredencoding(False)
+        with open(self._data_filename, "rb") as data_file:
+            for start, end in ranges:
+                data_file.seek(start)
+                yield from io.StringIO(data_file.read(end - start).decode(encoding))
+
+    def _recover_from_interruption(self):
+        """
+        Discard data that an interrupted execution did not write completely,
+        according to the journal, so that the incomplete invocations are executed again.
+        """
+        size, num_incomplete = read_journal(self._journal.path, self._data_filename)
+        if size is not None and os.path.exists(self._data_filename):
+            if os.path.getsize(self._data_filename) > size:
+                os.truncate(self._data_filename, size)
+
+        if num_incomplete:
+            self.ui.warning(
+                ("Recovered %d incomplete invocations from the interrupted execution"
+                 + " recorded in %s. They will be executed again.\n") % (
+                     num_incomplete, escape_braces(self._data_filename)))
+        self._journal.clear()
+
+    def _load_summary(self, data_file, selected_runs):
+        """
+        Restore the runs from the summary of the data file, and load only the
+        data after it. The summary is not used when the data points need to be
+        loaded, or when a run already loaded data from another file.
+        """
+        if self._configurator.use_rebench_db:
+            return False
+        summary = read_summary(self._summary_filename, self._data_filename)
+        if summary is None:
+            return False
+
+        benchmarks = [self._data_store.create_benchmark_from_dict(bench)
+                      for bench in summary["benchmarks"]]
+        runs = [(self._data_store.create_run_id_from_dict(
+                    run["run"], benchmarks[run["run"]["benchmark_id"]]), run["state"])
+                for run in summary["runs"]]
+        if any(run_id.has_loaded_data() for run_id, _ in runs):
+            return False
+
+        for bench_id, benchmark in enumerate(benchmarks):
+            self._benchmarks_in_file[benchmark] = bench_id
+            self._id_to_benchmark.append(benchmark)
+        discarded = set()
+        if self._index is not None:
+            discarded = self._index.discarded_since(summary["offset"])
+        for run_id_id, (run_id, state) in enumerate(runs):
+            self._run_ids_in_file[run_id] = run_id_id
+            self._id_to_run_id.append(run_id)
+            run_id.load_summary(state)
+            if run_id_id in discarded:
+                # the data summarized for the run was discarded after the summary
+                run_id.discard_loaded_data()
+
+        self._load_lines(data_file, selected_runs, summary["offset"])
+        return True
+
+    def _write_summary(self):
+        """
+        Write the summary of the data file, unless an invocation is in progress,
+        a run also persists its data elsewhere, or not all data was loaded.
+        The lock needs to be held.
+        """
+        if (not self._summary_is_outdated or self._pending_data_points
+                or self._loaded_selectively
+                or not os.path.exists(self._data_filename)):
+            return
+
+        if not all(run_id.is_persisted_only_by(self) for run_id in self._id_to_run_id):
+            remove_summary(self._summary_filename)
+            return
+
+        runs = []
+        for run_id in self._id_to_run_id:
+            run = run_id.as_dict(True)
+            run["benchmark_id"] = self._benchmarks_in_file[run_id.benchmark]
+            runs.append({"run": run, "state": run_id.summary_as_dict()})
+
+        offset = self._data_file_size()
+        try:
+            write_summary(self._summary_filename, self._data_filename, offset,
+                          [bench.as_dict() for bench in self._id_to_benchmark], runs)
+        except OSError as err:
+            self.ui.debug_error_info("{ind}Failed to write the summary %s: %s\n" % (
+                escape_braces(self._summary_filename), err))
+            return
+
+        # all data is covered by the summary
+        self._journal.clear()
+        self._summary_is_outdated = False
+        self._summary_time = time()
+
     def _process_lines(self, data_file, runs, filtered_data_file):
         """
          The most important assumptions we make here is that the total
@@ -281,31 +672,13 @@ class _FilePersistence(_ConcretePersistence):
         for line in data_file:
             if line.startswith("#"):  # skip comments, and shebang lines, but read run_ids
                 line_number += 1
+                if filtered_data_file and runs and self._run_of_metadata_line(line) in runs:
+                    # the metadata of the run is discarded with its data
+                    continue
                 if filtered_data_file:
                     filtered_data_file.write(line)
 
-                if line.startswith(_METADATA_BENCHMARK):
-                    rest_line = line[len(_METADATA_BENCHMARK):]
-                    bench_id, bench_json = rest_line.split("=", 1)
-                    bench_dict = json.loads(bench_json)
-                    benchmark = self._data_store.create_benchmark_from_dict(bench_dict)
-                    assert benchmark not in self._benchmarks_in_file
-                    self._benchmarks_in_file[benchmark] = int(bench_id)
-                    assert len(self._id_to_benchmark) == int(bench_id)
-                    self._id_to_benchmark.append(benchmark)
-
-                elif line.startswith(_METADATA_RUN_ID):
-                    rest_line = line[len(_METADATA_RUN_ID):]
-                    run_id_id, run_json = rest_line.split("=", 1)
-                    run_dict = json.loads(run_json)
-                    assert "benchmark_id" in run_dict
-                    benchmark_id = int(run_dict["benchmark_id"])
-                    benchmark = self._id_to_benchmark[benchmark_id]
-
-                    run_id = self._data_store.create_run_id_from_dict(run_dict, benchmark)
-                    self._run_ids_in_file[run_id] = int(run_id_id)
-                    assert len(self._id_to_run_id) == int(run_id_id)
-                    self._id_to_run_id.append(run_id)
+                self._process_metadata_line(line)
                 continue
 
             if line == csv_header:
@@ -324,13 +697,58 @@ class _FilePersistence(_ConcretePersistence):
                     self.ui.debug_error_info("{ind}" + msg + "\n")
                     errors.add(msg)
 
-    def _parse_data_line(
-            self, data_point, line, line_number, runs, filtered_data_file, previous_run_id):
-        measurement = Measurement.from_str_list(
-            self._id_to_run_id, line.rstrip('\n').split(self._SEP),
-            line_number, self._data_filename)
+    def _process_metadata_line(self, line):
+        """Process a `# key:` line, which defines benchmarks and runs, or holds
+           the metadata of a run."""
+        if line.startswith(_METADATA_BENCHMARK):
+            rest_line = line[len(_METADATA_BENCHMARK):]
+            bench_id, bench_json = rest_line.split("=", 1)
+            bench_dict = json.loads(bench_json)
+            benchmark = self._data_store.create_benchmark_from_dict(bench_dict)
+            assert benchmark not in self._benchmarks_in_file
+            self._benchmarks_in_file[benchmark] = int(bench_id)
+            assert len(self._id_to_benchmark) == int(bench_id)
+            self._id_to_benchmark.append(benchmark)
+
+        elif line.startswith(_METADATA_RUN_ID):
+            rest_line = line[len(_METADATA_RUN_ID):]
+            run_id_id, run_json = rest_line.split("=", 1)
+            run_dict = json.loads(run_json)
+            assert "benchmark_id" in run_dict
+            benchmark_id = int(run_dict["benchmark_id"])
+            benchmark = self._id_to_benchmark[benchmark_id]
+
+            run_id = self._data_store.create_run_id_from_dict(run_dict, benchmark)
+            self._run_ids_in_file[run_id] = int(run_id_id)
+            assert len(self._id_to_run_id) == int(run_id_id)
+            self._id_to_run_id.append(run_id)
+
+        elif line.startswith(_METADATA_INVOCATION_TIME):
+            run_id_id, _, seconds = line[len(_METADATA_INVOCATION_TIME):].split()
+            self._id_to_run_id[int(run_id_id)].record_invocation_time(float(seconds))
+
+        elif line.startswith(_METADATA_CALIBRATION):
+            run_id_id, kind, value = line[len(_METADATA_CALIBRATION):].split(" ", 2)
+            self._id_to_run_id[int(run_id_id)].set_calibration(kind, json.loads(value))
+
+        elif line.startswith(_METADATA_WARMUP):
+            run_id_id, invocation, num_iterations = line[len(_METADATA_WARMUP):].split()
+            self._id_to_run_id[int(run_id_id)].record_detected_warmup(
+                int(invocation), int(num_iterations))
+
+    def _run_of_metadata_line(self, line):
+        """The run of an invocation time, calibration, or detected warmup, or None."""
+        for prefix in (_METADATA_INVOCATION_TIME, _METADATA_CALIBRATION, _METADATA_WARMUP):
+            if line.startswith(prefix):
+                return self._id_to_run_id[int(line[len(prefix):].split(" ", 1)[0])]
+        return None
 
-        run_id = measurement.run_id
+    def _parse_data_line(  # pylint: disable=unused-argument
+            self, data_point, line, line_number, runs, filtered_data_file, previous_run_id):
+        str_list = line.rstrip('\n').split(self._SEP)
+        measurement = (int(str_list[0]), int(str_list[1]), float(str_list[2]),
+                       str_list[3], str_list[4])
+        run_id = RunId.from_str_list(self._id_to_run_id, str_list[5:])
         if filtered_data_file and runs and run_id in runs:
             return data_point, previous_run_id
 
@@ -338,18 +756,7 @@ class _FilePersistence(_ConcretePersistence):
         if filtered_data_file:
             filtered_data_file.write(line)
 
-        if previous_run_id is not run_id:
-            data_point = DataPoint(run_id)
-            previous_run_id = run_id
-
-        data_point.add_measurement(measurement)
-
-        if measurement.is_total():
-            run_id.loaded_data_point(data_point,
-                                     (measurement.iteration <= run_id.warmup_iterations
-                                      if run_id.warmup_iterations else False))
-            data_point = DataPoint(run_id)
-        return data_point, previous_run_id
+        return _load_measurement(data_point, previous_run_id, run_id, measurement)
 
     _SEP = "\t"  # separator between serialized parts of a measurement
 
@@ -374,9 +781,14 @@ class _FilePersistence(_ConcretePersistence):
             # pylint: disable-next=unspecified-encoding,consider-using-with
             data_file = open(self._data_filename, "a+")
             is_empty = data_file.tell() == 0
-            data_file.write(shebang_with_metadata)
+            self._journal.opened(data_file.tell())
+            if self._index is not None and self._index.offset != data_file.tell():
+                # the data file was changed by someone else
+                self._index = None
             if is_empty:
-                data_file.write(csv_header)
+                shebang_with_metadata += csv_header
+            data_file.write(shebang_with_metadata)
+            self._index_written(shebang_with_metadata, None, data_file.encoding)
             data_file.flush()
             return data_file
         except Exception as err:  # pylint: disable=broad-except
@@ -389,8 +801,9 @@ class _FilePersistence(_ConcretePersistence):
         if benchmark not in self._benchmarks_in_file:
             bench_id = len(self._benchmarks_in_file)
             line = _METADATA_BENCHMARK + str(bench_id) + "=" + _to_json(benchmark.as_dict()) + "\n"
-            self._file.write(line) # type: ignore
+            self._write(line)
             self._benchmarks_in_file[benchmark] = bench_id
+            self._id_to_benchmark.append(benchmark)
         return self._benchmarks_in_file[benchmark]
 
     def _ensure_run_id_is_persisted(self, run_id: RunId) -> int:
@@ -403,15 +816,24 @@ class _FilePersistence(_ConcretePersistence):
             assert "benchmark" not in run
 
             line = _METADATA_RUN_ID + str(run_id_id) + "=" + _to_json(run) + "\n"
-            self._file.write(line) # type: ignore
+            self._write(line)
             self._run_ids_in_file[run_id] = run_id_id
+            self._id_to_run_id.append(run_id)
         return self._run_ids_in_file[run_id]
 
+    def _write(self, text, run_id_id=None):
+        self._file.write(text) # type: ignore
+        self._index_written(text, run_id_id, self._file.encoding) # type: ignore
+
+    def _index_written(self, text, run_id_id, encoding):
+        """Add the written lines to the index, each line of a measurement has its run id."""
+        if self._index is not None:
+            self._index.add(run_id_id, len(text.encode(encoding)))
+
     def _persists_data_point_in_open_file(self, data_point: DataPoint):
         run_id_id = self._ensure_run_id_is_persisted(data_point.run_id)
-        for measurement in data_point.get_measurements():
-            line = self._SEP.join(measurement.as_str_list(run_id_id))
-            self._file.write(line + "\n") # type: ignore
+        for columns in data_point.as_str_lists(run_id_id):
+            self._write(self._SEP.join(columns) + "\n", run_id_id)
 
     def persist_data_point(self, data_point: DataPoint):
         """
@@ -419,30 +841,105 @@ class _FilePersistence(_ConcretePersistence):
         in the data file.
         """
         with self._lock:
+            pending = self._pending_data_points.get(data_point.run_id)
+            if pending is not None:
+                pending.append(data_point)
+                return
+
             self._open_file_to_add_new_data()
             self._persists_data_point_in_open_file(data_point)
             self._file.flush() # type: ignore
+            self._journal.written(self._file.tell()) # type: ignore
+            self._summary_is_outdated = True
+
+    def invocation_started(self, run_id, invocation):
+        """
+        Record the start of the invocation in the journal. Its data points
+        are written to the data file only once it completed.
+        """
+        with self._lock:
+            self._pending_data_points[run_id] = []
+            self._journal.started(self._data_file_size(), run_id.as_simple_string(), invocation)
+
+    def invocation_completed(self, run_id, invocation, invocation_time):
+        with self._lock:
+            data_points = self._pending_data_points.pop(run_id, None)
+            if data_points is None:
+                return
+            if data_points:
+                self._open_file_to_add_new_data()
+                run_id_id = self._ensure_run_id_is_persisted(run_id)
+                # like the measurements, the metadata is discarded with the data of the run
+                if invocation_time is not None:
+                    self._write("%s%d %d %f\n" % (
+                        _METADATA_INVOCATION_TIME, run_id_id, invocation, invocation_time),
+                        run_id_id)
+                warmup = run_id.detected_warmup(invocation)
+                if warmup is not None:
+                    self._write("%s%d %d %d\n" % (
+                        _METADATA_WARMUP, run_id_id, invocation, warmup), run_id_id)
+                for data_point in data_points:
+                    self._persists_data_point_in_open_file(data_point)
+                self._file.flush() # type: ignore
+            self._journal.committed(
+                self._data_file_size(), run_id.as_simple_string(), invocation)
+            self._summary_is_outdated = True
+
+    def run_calibrated(self, run_id, kind, value):
+        with self._lock:
+            self._open_file_to_add_new_data()
+            run_id_id = self._ensure_run_id_is_persisted(run_id)
+            self._write("%s%d %s %s\n" % (
+                _METADATA_CALIBRATION, run_id_id, kind, _to_json(value)), run_id_id)
+            self._file.flush() # type: ignore
+            self._journal.written(self._file.tell()) # type: ignore
+            self._summary_is_outdated = True
+
+    def _data_file_size(self):
+        if self._file:
+            # the journal fingerprints the data up to the size
+            self._file.flush()
+            return self._file.tell()
+        try:
+            return os.path.getsize(self._data_filename)
+        except OSError:
+            return 0
 
     def run_completed(self):
-        """Nothing to be done."""
+        with self._lock:
+            if time() - self._summary_time >= _SUMMARY_INTERVAL:
+                self._write_summary()
+            if time() - self._index_time >= _SUMMARY_INTERVAL:
+                self._write_index()
 
     def _open_file_to_add_new_data(self):
         if not self._file:
             self._file = self._open_file_and_append_execution_comment()
 
     def close(self):
-        if self._file:
-            self._file.close()
-            self._file = None
+        with self._lock:
+            self._write_summary()
+            if self._file:
+                self._file.close()
+                self._file = None
+            self._write_index()
+            if self._pending_data_points:
+                # keep the journal to report the incomplete invocations
+                self._journal.close()
+            else:
+                self._journal.clear()
 
 
 class _ProfileFilePersistence(_FilePersistence):
+    _USES_INDEX = False
+    _LOADS_IN_BULK = False
+
     def _persists_data_point_in_open_file(self, data_point):
         run_id_id = self._ensure_run_id_is_persisted(data_point.run_id)
         assert isinstance(data_point, ProfileData)
         line = self._SEP.join(data_point.as_str_list(run_id_id))
         assert "\n" not in line, "The newline character is now allowed in a data line"
-        self._file.write(line + "\n")
+        self._write(line + "\n", run_id_id)
 
     def _parse_data_line(
             self, data_point, line, line_number, runs, filtered_data_file, previous_run_id):
@@ -463,6 +960,135 @@ class _ProfileFilePersistence(_FilePersistence):
         return data_point, run_id
 
 
+class _BinaryFilePersistence(_ConcretePersistence):
+    """
+    Persists the data in the binary format of `binary_data.py`. The data
+    points of an invocation are appended together, once it completed.
+    """
+
+    def __init__(self, data_filename, data_store: DataStore, configurator, ui):
+        super(_BinaryFilePersistence, self).__init__(data_store, ui)
+        self._data = BinaryDataFile(data_filename)
+        self._configurator = configurator
+        if configurator.discard_old_data:
+            self._data.truncate()
+        self._lock = Lock()
+        self._start_time = self._data.read_start_time() or get_current_time()
+
+        # data points of invocations that did not complete yet
+        self._pending_data_points: dict[RunId, list[DataPoint]] = {}
+        self._bulk_data: Optional[bulk_loading.BinaryData] = None
+
+    def read_data(self, runs, discard_run_data):
+        if (discard_run_data or self._bulk_data is not None or self._configurator.use_rebench_db
+                or not self._data_store.load_in_bulk):
+            return
+        try:
+            self._bulk_data = bulk_loading.read_binary(self._data.filename)
+        except IOError:
+            pass
+        except (ValueError, IndexError, KeyError) as err:
+            self.ui.debug_error_info(
+                "{ind}Data file %s is not loaded in bulk: %s\n" % (
+                    escape_braces(self._data.filename), escape_braces(str(err))))
+
+    def load_data(self, runs, discard_run_data):
+        if discard_run_data:
+            current_runs = {run for run in runs if run.is_persisted_by(self)}
+        else:
+            current_runs = None
+
+        self.read_data(runs, discard_run_data)
+        data_point = None
+        previous_run_id = None
+        try:
+            if self._bulk_data is not None:
+                self._load_in_bulk()
+                return self._start_time
+            for run_id, measurement in self._data.load(self._data_store, current_runs):
+                data_point, previous_run_id = _load_measurement(
+                    data_point, previous_run_id, run_id, measurement)
+            if current_runs:
+                self._data.discard(current_runs, get_current_time())
+        except IOError:
+            self.ui.debug_error_info("No data loaded, since %s does not exist.\n"
+                                      % self._data.filename)
+        except (ValueError, IndexError, KeyError) as err:
+            self.ui.debug_error_info("Failed loading data from data file: "
+                                      + self._data.filename + "\n{ind}"
+                                      + escape_braces(str(err)) + "\n")
+        return self._start_time
+
+    def _load_in_bulk(self):
+        data = self._bulk_data
+        self._bulk_data = None
+        assert data is not None
+        if data.end < data.size:
+            os.truncate(self._data.filename, data.end)
+        for metadata in data.metadata:
+            self._data.load_metadata(metadata, self._data_store)
+
+        for run_index, invocations, unit, statistics, invocation_totals in \
+                data.columns.runs(self._data.warmup_of, self._data.detected_warmup_of):
+            run_id = self._data.run(run_index)
+            if run_id is None:
+                self.ui.debug_error_info(
+                    "{ind}Possibly corrupted data file %s. run_id %d not found.\n" % (
+                        escape_braces(self._data.filename), run_index))
+                continue
+            run_id.loaded_in_bulk(
+                invocations, None if unit is None else self._data.unit(unit),
+                statistics, invocation_totals)
+
+    def _open_file_to_add_new_data(self):
+        if not self._data.is_open:
+            try:
+                self._data.open(execution_details(
+                    self._start_time, determine_environment(),
+                    determine_source_details(self._configurator)))
+            except OSError as err:
+                raise UIError(
+                    "Error: Was not able to open data file for writing.\n{ind}%s\n%s\n" % (
+                        os.getcwd(), err),
+                    err)
+
+    def persist_data_point(self, data_point):
+        with self._lock:
+            pending = self._pending_data_points.get(data_point.run_id)
+            if pending is not None:
+                pending.append(data_point)
+                return
+            self._open_file_to_add_new_data()
+            self._data.append([data_point])
+
+    def invocation_started(self, run_id, invocation):
+        with self._lock:
+            self._pending_data_points[run_id] = []
+
+    def invocation_completed(self, run_id, invocation, invocation_time):
+        with self._lock:
+            data_points = self._pending_data_points.pop(run_id, None)
+            if not data_points:
+                return
+            self._open_file_to_add_new_data()
+            if invocation_time is not None:
+                self._data.invocation_time(run_id, invocation, invocation_time)
+            warmup = run_id.detected_warmup(invocation)
+            if warmup is not None:
+                self._data.detected_warmup(run_id, invocation, warmup)
+            self._data.append(data_points)
+
+    def run_calibrated(self, run_id, kind, value):
+        with self._lock:
+            self._open_file_to_add_new_data()
+            self._data.calibrated(run_id, kind, value)
+            self._data.append([])
+
+    def close(self):
+        with self._lock:
+            self._data.close()
+
+
 class _ReBenchDB(_ConcretePersistence):
 
     def __init__(self, configurator, data_store, ui):
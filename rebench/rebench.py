@@ -29,11 +29,15 @@
 # IN THE SOFTWARE.
 import sys
 
-from argparse import ArgumentParser, RawDescriptionHelpFormatter, SUPPRESS
+from argparse import ArgumentParser, ArgumentTypeError, RawDescriptionHelpFormatter, SUPPRESS
+
+from humanfriendly import InvalidSize, InvalidTimespan, parse_size, parse_timespan
 
 from . import __version__ as rebench_version
-from .executor import Executor, BatchScheduler, RoundRobinScheduler, \
-    RandomScheduler, BenchmarkThreadExceptions
+from .distributed import Workers
+from .executor import Executor
+from .scheduler import BatchScheduler, RoundRobinScheduler, RandomScheduler, \
+    LongestJobFirstScheduler, BenchmarkThreadExceptions
 from .denoise_client import minimize_noise, restore_noise
 from .environment import init_environment
 from .persistence    import DataStore
@@ -42,15 +46,42 @@ from .reporter       import CliReporter
 from .configurator   import Configurator, load_config
 from .configuration_error import ConfigurationError
 from .output import UIError
+from .subprocess_engine import DEFAULT_OUTPUT_LIMIT
 from .ui import UI
 
 
+def _time_span(value):
+    try:
+        return parse_timespan(value)
+    except InvalidTimespan as err:
+        raise ArgumentTypeError(str(err)) from err
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError as err:
+        raise ArgumentTypeError(str(err)) from err
+    if number < 1:
+        raise ArgumentTypeError("%s is not a positive number" % value)
+    return number
+
+
+def _size(value):
+    try:
+        return parse_size(value, binary=True)
+    except InvalidSize as err:
+        raise ArgumentTypeError(str(err)) from err
+
+
 class ReBench(object):
 
     def __init__(self):
         self.version = rebench_version
         self.options = None
         self._config = None
+        self._raw_config = None
+        self._args = None
         self.ui = UI()
 
     def shell_options(self):
@@ -115,13 +146,53 @@ Argument:
             '-B', '--without-building', action='store_false', dest='do_builds',
             help='Disables execution of build commands for executors and suites.',
             default=True)
+        execution.add_argument(
+            '--force-build', action='store_true', dest='force_build', default=False,
+            help='Execute all build commands, even if their inputs did not change '
+                 'since their last successful execution.')
+        execution.add_argument(
+            '--build-workers', action='store', dest='build_workers', default=None, type=int,
+            help='The maximum number of build commands executed concurrently. '
+                 'Builds of executors and suites that do not depend on each other '
+                 'are executed in parallel before any benchmark. '
+                 '[default: 4, or the number of cores if fewer]')
         execution.add_argument('-m', '--machine', action='store', dest='machine',
                                default=None, help='Name of the machine configuration to be used.')
         execution.add_argument(
             '-s', '--scheduler', action='store', dest='scheduler',
-            default='batch',
+            default=None,
             help='execution order of benchmarks: '
-                 'batch, round-robin, random [default: %(default)s]')
+                 'batch, round-robin, random, longest-first [default: batch]')
+        execution.add_argument(
+            '--parallel-workers', action='store', dest='parallel_workers',
+            default=None, type=_positive_int,
+            help='The number of worker threads to execute runs in parallel, '
+                 'for runs that are not configured to execute exclusively. '
+                 'This overrides the configured parallel_interference_factor.')
+        execution.add_argument(
+            '--time-budget', action='store', dest='time_budget',
+            default=None, type=_time_span,
+            help='Execute the experiment within the given wall-clock time, '
+                 'for instance 90m or 2h. Instead of the configured invocations, '
+                 'runs get more or fewer invocations depending on how noisy they are. '
+                 'Runs are executed one after another, thus, it cannot be combined '
+                 'with --scheduler or --parallel-workers.')
+        execution.add_argument(
+            '--output-memory-limit', action='store', dest='output_limit',
+            default=DEFAULT_OUTPUT_LIMIT, type=_size,
+            help='The amount of benchmark output kept in memory, for instance 64MB. '
+                 'Beyond it, output is spilled into a temporary file. '
+                 '[default: 16MB]')
+        execution.add_argument(
+            '--cgroup-root', action='store', dest='cgroup_root', default=None,
+            help='The cgroup v2 directory below which runs with cgroup settings '
+                 'are executed. It needs to be writable by the user. '
+                 '[default: the cgroup of ReBench]')
+        execution.add_argument(
+            '--worker', action='append', dest='workers', default=[], metavar='ADDRESS',
+            help='Execute the runs on the rebench-worker at the given address, '
+                 'i.e., unix:PATH, tcp:HOST:PORT, or a command such as '
+                 '"ssh host rebench-worker". Can be given multiple times.')
         execution.add_argument(
             '-E', '--no-execution', action='store_true', dest='no_execution',
             default=False,
@@ -247,6 +318,16 @@ Argument:
             # no execution, so no need to report data
             args.use_data_reporting = False
 
+        if args.workers and args.time_budget:
+            raise UIError("Options --worker and --time-budget are mutually exclusive.\n")
+
+        if args.time_budget and args.scheduler:
+            raise UIError("Options --scheduler and --time-budget are mutually exclusive.\n")
+
+        if args.time_budget and args.parallel_workers:
+            raise UIError(
+                "Options --parallel-workers and --time-budget are mutually exclusive.\n")
+
         if args.no_execution and args.execution_plan:
             raise UIError("Options --no-execution and --execution-plan are mutually exclusive.\n")
 
@@ -258,6 +339,7 @@ Argument:
         opt_parser = self.shell_options()
         args = opt_parser.parse_args(argv[1:])
         self._make_args_consistent(args)
+        self._args = argv[1:]
 
         cli_reporter = CliReporter(args.verbose, self.ui)
 
@@ -265,6 +347,7 @@ Argument:
 
         try:
             config = load_config(args.config[0])
+            self._raw_config = config
             self._config = Configurator(config, data_store, self.ui, args,
                                         cli_reporter, exp_name, args.data_file,
                                         args.build_log, exp_filter, args.machine)
@@ -278,6 +361,8 @@ Argument:
 
         runs = self._config.get_runs()
         does_profiling = any(r.is_profiling() for r in runs)
+        if does_profiling and args.workers:
+            raise UIError("Profiling is not supported with --worker.\n", None)
         if not self._config.options.use_denoise:
             return self.load_data_and_execute_experiments(runs, data_store, False, False, None)
         else:
@@ -299,12 +384,20 @@ Argument:
         data_store.load_data(runs, self._config.options.do_rerun)
         return self.execute_experiment(runs, use_nice, use_shielding)
 
+    def _workers(self, use_nice, use_shielding):
+        if not self._config.options.workers:
+            return None
+        return Workers(self._config.options.workers, self._raw_config, self._args,
+                       use_nice, use_shielding)
+
     def execute_experiment(self, runs, use_nice, use_shielding):
         self.ui.verbose_output_info("Execute experiment: " + self._config.experiment_name + "\n")
 
-        scheduler_class = {'batch':       BatchScheduler,
-                           'round-robin': RoundRobinScheduler,
-                           'random':      RandomScheduler}.get(self._config.options.scheduler)
+        scheduler_class = {'batch':         BatchScheduler,
+                           'round-robin':   RoundRobinScheduler,
+                           'random':        RandomScheduler,
+                           'longest-first': LongestJobFirstScheduler}.get(
+                               self._config.options.scheduler or 'batch')
 
         executor = Executor(runs, self._config.do_builds,
                             self.ui,
@@ -313,7 +406,15 @@ Argument:
                             scheduler_class,
                             self._config.build_log, self._config.artifact_review,
                             use_nice, use_shielding, self._config.options.execution_plan,
-                            self._config.config_dir)
+                            self._config.config_dir,
+                            num_parallel_workers=self._config.options.parallel_workers,
+                            time_budget=self._config.options.time_budget,
+                            output_limit=self._config.options.output_limit,
+                            cgroup_root=self._config.options.cgroup_root,
+                            num_build_workers=self._config.options.build_workers,
+                            build_cache=self._config.build_cache,
+                            force_build=self._config.options.force_build,
+                            workers=self._workers(use_nice, use_shielding))
 
         if self._config.options.no_execution:
             return True
@@ -0,0 +1,527 @@
+# Copyright (c) 2009-2014 Stefan Marr <http://www.stefan-marr.de/>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from collections import deque
+from math import floor, sqrt
+from multiprocessing import cpu_count
+import os
+import random
+from threading import Thread, RLock
+from time import time
+
+from .duration_model import DurationModel
+from .statistics import StatisticProperties
+
+
+_DEFAULT_INTERFERENCE_FACTOR = 2.5
+
+# seconds after which the estimated time left is recomputed from the duration model
+_TIME_LEFT_UPDATE_INTERVAL = 5
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(cpu_count()))
+
+
+class FailedBuilding(Exception):
+    """The exception to be raised when building of the executor or suite failed."""
+    def __init__(self, name, build_command):
+        super(FailedBuilding, self).__init__()
+        self._name = name
+        self._build_command = build_command
+
+
+class RunScheduler(object):
+
+    def __init__(self, executor, ui, print_execution_plan):
+        self._print_execution_plan = print_execution_plan
+        self._executor = executor
+        self.ui = ui
+        self._runs_completed = 0
+        self._start_time = time()
+        self._total_num_runs = 0
+        self._progress_label = self._get_progress_label("70")
+        self._time_left = None
+        self._time_left_time = None
+        # the CPUs the benchmarks are restricted to, None for all
+        self.cpu_set = None
+
+    def _get_progress_label(self, num_chars):
+        return "Running %" + num_chars + "s\t%10.1f%s\tleft: %02d:%02d:%02d"
+
+    def _set_min_num_chars_for_run_strings(self, runs):
+        max_len = 0
+        for run in runs:
+            run_str = self._run_string_for_progress(run)
+            l = len(run_str)
+            max_len = max(l, max_len)
+        self._progress_label = self._get_progress_label(str(max_len))
+
+    @staticmethod
+    def _filter_out_completed_runs(runs, ui):
+        return [run for run in runs if not run.is_completed(ui)]
+
+    @staticmethod
+    def number_of_uncompleted_runs(runs, ui):
+        return len(RunScheduler._filter_out_completed_runs(runs, ui))
+
+    def _process_remaining_runs(self, runs):
+        """Abstract, to be implemented"""
+
+    def _estimate_time_left(self):
+        current = time()
+        if (self._time_left is None
+                or current - self._time_left_time >= _TIME_LEFT_UPDATE_INTERVAL):
+            self._time_left = self._expected_time_left()
+            self._time_left_time = current
+        etl = max(0, self._time_left - (current - self._time_left_time))
+        return self._as_hours_minutes_seconds(etl)
+
+    def _expected_time_left(self):
+        """Based on the expected duration of the remaining runs. Runs without any
+           estimate are assumed to take the average time of the completed runs."""
+        expected_time, num_unknown = self._executor.expected_remaining_time()
+        if num_unknown and self._runs_completed:
+            time_per_run = (time() - self._start_time) / self._runs_completed
+            expected_time += time_per_run * num_unknown
+        return expected_time
+
+    @staticmethod
+    def _as_hours_minutes_seconds(etl):
+        sec = etl % 60
+        minute = (etl - sec) / 60 % 60
+        hour = (etl - sec - minute) / 60 / 60
+        return floor(hour), floor(minute), floor(sec)
+
+    @staticmethod
+    def _run_string_for_progress(run):
+        return run.as_simple_string().replace(" None", "")
+
+    def _indicate_progress(self, completed_task, run):
+        if not self.ui.spinner_initialized() or self._print_execution_plan:
+            return
+
+        if completed_task:
+            self._runs_completed += 1
+
+        art_mean = run.get_mean_of_totals()
+        art_unit = run.total_unit
+        if art_unit is None:
+            art_unit = ""
+
+        hour, minute, sec = self._estimate_time_left()
+
+        run_details = self._run_string_for_progress(run)
+        label = self._progress_label % (run_details, art_mean, art_unit, hour, minute, sec)
+        self.ui.step_spinner(self._runs_completed, label)
+
+    def indicate_build(self, run_id):
+        exe_name = run_id.benchmark.suite.executor.name
+        suite_name = run_id.benchmark.suite.name
+        self.ui.step_spinner(
+            self._runs_completed, f"Run build for {exe_name} {suite_name}")
+
+    def execute(self):
+        self._total_num_runs = len(self._executor.runs)
+        runs = self._filter_out_completed_runs(self._executor.runs, self.ui)
+        self._executor.completed_runs.update(set(self._executor.runs) - set(runs))
+        completed_runs = self._total_num_runs - len(runs)
+        self._runs_completed = completed_runs
+
+        with self.ui.init_spinner(self._total_num_runs):
+            if not self._print_execution_plan:
+                self.ui.step_spinner(completed_runs)
+            self._process_remaining_runs(runs)
+
+
+class BatchScheduler(RunScheduler):
+
+    def _process_remaining_runs(self, runs):
+        self._set_min_num_chars_for_run_strings(runs)
+        remaining_runs = list(runs)
+        while len(remaining_runs) > 0:
+            run_id = remaining_runs.pop(0)
+            try:
+                completed = False
+                while not completed:
+                    completed = self._executor.execute_run(run_id, self.cpu_set)
+                    if run_id.executable_missing:
+                        num_runs = len(remaining_runs)
+                        remaining_runs = self._executor.without_missing_binaries(
+                            run_id, remaining_runs)
+                        self._runs_completed += num_runs - len(remaining_runs)
+                    self._indicate_progress(completed, run_id)
+            except FailedBuilding:
+                pass
+
+
+def sort_by_expected_duration(runs, model=None):
+    """Sort the runs so that the ones with the longest expected remaining execution
+       time come first. Runs without any data from previous invocations come first,
+       which gives us data for them early on. Their time is estimated based on
+       similar runs by the duration model, or assumed to be the longest."""
+    if model is None:
+        model = DurationModel(runs)
+    model.update()
+
+    def expected_time(run):
+        time_left = model.expected_remaining_time(run)
+        return (run.expected_remaining_time() is None,
+                float("inf") if time_left is None else time_left)
+
+    return sorted(runs, key=expected_time, reverse=True)
+
+
+class LongestJobFirstScheduler(BatchScheduler):
+    """Executes the runs in the order of their expected duration, longest first.
+       For runs that are executed in parallel, the WorkStealingScheduler is used."""
+
+    def _process_remaining_runs(self, runs):
+        BatchScheduler._process_remaining_runs(
+            self, sort_by_expected_duration(runs, self._executor.duration_model))
+
+
+class RoundRobinScheduler(RunScheduler):
+
+    def _process_remaining_runs(self, runs):
+        self._set_min_num_chars_for_run_strings(runs)
+        task_list = deque(runs)
+        while task_list:
+            try:
+                run = task_list.popleft()
+                completed = self._executor.execute_run(run, self.cpu_set)
+                if not completed:
+                    task_list.append(run)
+                elif run.executable_missing:
+                    num_runs = len(task_list)
+                    task_list = deque(self._executor.without_missing_binaries(
+                        run, task_list))
+                    self._runs_completed += num_runs - len(task_list)
+                self._indicate_progress(completed, run)
+            except FailedBuilding:
+                pass
+
+
+class RandomScheduler(RunScheduler):
+
+    def _process_remaining_runs(self, runs):
+        self._set_min_num_chars_for_run_strings(runs)
+        task_list = list(runs)
+        while task_list:
+            run = random.choice(task_list)
+            try:
+                completed = self._executor.execute_run(run, self.cpu_set)
+                if completed:
+                    task_list.remove(run)
+                    if run.executable_missing:
+                        num_runs = len(task_list)
+                        task_list = self._executor.without_missing_binaries(
+                            run, task_list)
+                        self._runs_completed += num_runs - len(task_list)
+                self._indicate_progress(completed, run)
+
+            except FailedBuilding:
+                task_list.remove(run)
+
+
+class TimeBudgetScheduler(RunScheduler):
+    """Distributes a wall-clock time budget over the invocations of all runs.
+
+       Each run first gets a minimal number of invocations to estimate its noise.
+       Afterwards, the next invocation goes to the run where it is expected to reduce
+       the relative confidence interval the most per second of execution time.
+       Thus, noisy runs get more invocations, and stable ones fewer."""
+
+    MIN_INVOCATIONS = 2
+
+    def __init__(self, executor, ui, print_execution_plan, time_budget):
+        RunScheduler.__init__(self, executor, ui, print_execution_plan)
+        self._time_budget = time_budget
+        self._invocation_times = {}
+
+        # the budget, and not the configured invocations, limits the runs
+        for run in executor.runs:
+            run.get_termination_check(ui).set_invocation_limit(
+                run.max_invocations or float("inf"))
+
+    def _estimate_time_left(self):
+        return self._as_hours_minutes_seconds(
+            max(0, self._start_time + self._time_budget - time()))
+
+    def _expected_invocation_time(self, run):
+        times = self._invocation_times.get(run)
+        if times is None or times.num_samples == 0:
+            return None
+        return times.mean
+
+    def _expected_gain_per_second(self, run):
+        # like the termination check, consider the invocations as the samples,
+        # since the iterations of an invocation are not independent
+        statistics = run.invocation_statistics()
+        rel_ci = statistics.relative_ci_half_width()
+        if rel_ci is None:
+            return 0.0
+
+        # the confidence interval narrows with the square root of the number of samples
+        num_samples = statistics.num_samples
+        gain = rel_ci * (1 - sqrt(num_samples / (num_samples + 1)))
+        return gain / max(self._expected_invocation_time(run), 1e-6)
+
+    def _select_run(self, runs, time_left):
+        needs_data = [run for run in runs
+                      if (run.completed_invocations < self.MIN_INVOCATIONS
+                          or self._expected_invocation_time(run) is None)]
+        if needs_data:
+            return min(needs_data, key=lambda run: run.completed_invocations)
+
+        affordable = [run for run in runs
+                      if self._expected_invocation_time(run) <= time_left]
+        if not affordable:
+            return None
+
+        run = max(affordable, key=self._expected_gain_per_second)
+        if self._expected_gain_per_second(run) <= 0:
+            return None
+        return run
+
+    def _execute_invocation(self, run):
+        start = time()
+        completed = self._executor.execute_run(run, self.cpu_set)
+        if run not in self._invocation_times:
+            self._invocation_times[run] = StatisticProperties()
+        self._invocation_times[run].add_sample(time() - start)
+        return completed
+
+    def _complete_run(self, run):
+        # with the limit reached, the executor reports the run as completed
+        run.get_termination_check(self.ui).set_invocation_limit(run.completed_invocations)
+        self._executor.execute_run(run, self.cpu_set)
+        self._indicate_progress(True, run)
+
+    def _process_remaining_runs(self, runs):
+        self._set_min_num_chars_for_run_strings(runs)
+        if self._print_execution_plan:
+            for run in runs:
+                self._executor.execute_run(run, self.cpu_set)
+            return
+
+        deadline = self._start_time + self._time_budget
+        remaining_runs = list(runs)
+
+        while remaining_runs and time() < deadline:
+            run = self._select_run(remaining_runs, deadline - time())
+            if run is None:
+                break
+            try:
+                completed = self._execute_invocation(run)
+                if completed:
+                    remaining_runs.remove(run)
+                    if run.executable_missing:
+                        num_runs = len(remaining_runs)
+                        remaining_runs = self._executor.without_missing_binaries(
+                            run, remaining_runs)
+                        self._runs_completed += num_runs - len(remaining_runs)
+                self._indicate_progress(completed, run)
+            except FailedBuilding:
+                remaining_runs.remove(run)
+
+        for run in remaining_runs:
+            self._complete_run(run)
+
+
+class BenchmarkThread(Thread):
+
+    def __init__(self, par_scheduler, num, cpu_set):
+        Thread.__init__(self, name="BenchmarkThread %d" % num)
+        self._par_scheduler = par_scheduler
+        self._id = num
+        self.cpu_set = cpu_set
+        self.exception = None
+
+    def run(self):
+        try:
+            scheduler = self._par_scheduler.get_local_scheduler(self.cpu_set)
+
+            while True:
+                work = self._par_scheduler.acquire_work(self._id)
+                if work is None:
+                    return
+                scheduler._process_remaining_runs(work)
+        except BaseException as exp:
+            self.exception = exp
+
+
+class BenchmarkThreadExceptions(Exception):
+
+    def __init__(self, exceptions):
+        super(BenchmarkThreadExceptions, self).__init__()
+        self.exceptions = exceptions
+
+
+class ParallelScheduler(RunScheduler):
+
+    def __init__(self, executor, seq_scheduler_class, ui, print_execution_plan,
+                 num_worker_threads=None):
+        RunScheduler.__init__(self, executor, ui, print_execution_plan)
+        self._seq_scheduler_class = seq_scheduler_class
+        self._lock = RLock()
+        self._available_cpus = _available_cpus()
+        self._num_worker_threads = num_worker_threads or self._number_of_threads()
+        self._remaining_work = None
+        self._worker_threads = None
+
+    def _number_of_threads(self):
+        # the most conservative factor of all runs that may execute in parallel
+        factors = [run.parallel_interference_factor for run in self._executor.runs
+                   if not run.execute_exclusively and run.parallel_interference_factor]
+        non_interference_factor = max(factors, default=_DEFAULT_INTERFERENCE_FACTOR)
+        return max(1, int(floor(len(self._available_cpus) / non_interference_factor)))
+
+    def _cpu_sets_for_worker_threads(self):
+        """Split the available cores into disjoint sets, one per worker thread.
+           The benchmarks a worker executes are restricted to its set.
+           If there are fewer cores than worker threads, or the system does not support
+           setting the CPU affinity, the benchmarks are not pinned."""
+        cores_per_worker = len(self._available_cpus) // self._num_worker_threads
+        if cores_per_worker == 0 or not hasattr(os, "sched_setaffinity"):
+            return [None] * self._num_worker_threads
+
+        return [set(self._available_cpus[i * cores_per_worker:(i + 1) * cores_per_worker])
+                for i in range(self._num_worker_threads)]
+
+    @staticmethod
+    def _split_runs(runs):
+        seq_runs = []
+        par_runs = []
+        for run in runs:
+            if run.execute_exclusively:
+                seq_runs.append(run)
+            else:
+                par_runs.append(run)
+        return seq_runs, par_runs
+
+    def _process_sequential_runs(self, runs):
+        seq_runs, par_runs = self._split_runs(runs)
+
+        scheduler = self._seq_scheduler_class(self._executor, self.ui, self._print_execution_plan)
+        scheduler._process_remaining_runs(seq_runs)
+
+        return par_runs
+
+    def _set_parallel_work(self, runs):
+        self._remaining_work = runs
+
+    def _process_remaining_runs(self, runs):
+        self._set_parallel_work(self._process_sequential_runs(runs))
+
+        cpu_sets = self._cpu_sets_for_worker_threads()
+        self._worker_threads = [BenchmarkThread(self, i, cpu_sets[i])
+                                for i in range(self._num_worker_threads)]
+
+        for thread in self._worker_threads:
+            thread.start()
+
+        exceptions = []
+        for thread in self._worker_threads:
+            thread.join()
+            if thread.exception is not None:
+                exceptions.append(thread.exception)
+
+        if exceptions:
+            if len(exceptions) == 1:
+                raise exceptions[0]
+            raise BenchmarkThreadExceptions(exceptions)
+
+    def _determine_num_work_items_to_take(self):
+        # use a simple and naive scheduling strategy that still allows for
+        # different running times, without causing too much scheduling overhead
+        k = len(self._remaining_work)
+        per_thread = int(floor(float(k) / float(self._num_worker_threads)))
+        per_thread = max(1, per_thread)  # take at least 1 run
+        return per_thread
+
+    def get_local_scheduler(self, cpu_set=None):
+        scheduler = self._seq_scheduler_class(self._executor, self.ui, self._print_execution_plan)
+        scheduler.cpu_set = cpu_set
+        return scheduler
+
+    def acquire_work(self, _worker_id):
+        with self._lock:
+            if not self._remaining_work:
+                return None
+
+            num = self._determine_num_work_items_to_take()
+            assert num <= len(self._remaining_work)
+            work = []
+            for _ in range(num):
+                work.append(self._remaining_work.pop())
+            return work
+
+
+class WorkStealingScheduler(ParallelScheduler):
+    """Distributes the runs over the worker threads, longest expected duration first.
+
+       Each worker has its own deque of runs, and takes the next run from its front.
+       A worker that runs out of work steals a run from the back of the deque
+       of the worker with the most expected work left."""
+
+    def __init__(self, executor, seq_scheduler_class, ui, print_execution_plan,
+                 num_worker_threads=None):
+        ParallelScheduler.__init__(self, executor, seq_scheduler_class, ui,
+                                   print_execution_plan, num_worker_threads)
+        self._work_queues = None
+        self._expected_work = None
+
+    def _set_parallel_work(self, runs):
+        self._work_queues = [deque() for _ in range(self._num_worker_threads)]
+        self._expected_work = [0.0] * self._num_worker_threads
+
+        model = self._executor.duration_model
+        runs = sort_by_expected_duration(runs, model)
+        known = [model.expected_remaining_time(run) for run in runs]
+        known = [t for t in known if t is not None]
+        # for runs without any estimate, assume the longest duration we know of
+        unknown_time = max(known, default=1.0)
+
+        for run in runs:
+            expected_time = model.expected_remaining_time(run)
+            if expected_time is None:
+                expected_time = unknown_time
+
+            # assign the run to the worker with the least work so far
+            worker_id = self._expected_work.index(min(self._expected_work))
+            self._work_queues[worker_id].append((run, expected_time))
+            self._expected_work[worker_id] += expected_time
+
+    def acquire_work(self, worker_id):
+        with self._lock:
+            queue = self._work_queues[worker_id]
+            if queue:
+                run, expected_time = queue.popleft()
+            else:
+                victims = [i for i, q in enumerate(self._work_queues) if q]
+                if not victims:
+                    return None
+                worker_id = max(victims, key=lambda i: self._expected_work[i])
+                run, expected_time = self._work_queues[worker_id].pop()
+
+            self._expected_work[worker_id] -= expected_time
+            return [run]
@@ -19,11 +19,80 @@
 # IN THE SOFTWARE.
 import math
 
+# two-sided 95% quantiles of Student's t-distribution for 1 to 30 degrees of freedom
+_T_VALUES_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+_Z_95 = 1.959964
+
+
+def t_value_95(degrees_of_freedom):
+    """The two-sided 95% quantile of Student's t-distribution.
+       Beyond the table, the Cornish-Fisher expansion is precise to three decimals."""
+    assert degrees_of_freedom >= 1
+    if degrees_of_freedom <= len(_T_VALUES_95):
+        return _T_VALUES_95[degrees_of_freedom - 1]
+    z = _Z_95
+    df = float(degrees_of_freedom)
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2))
+
+
+# with fewer samples, the steady state cannot be distinguished from noise
+_MIN_SAMPLES_FOR_WARMUP_DETECTION = 5
+
+
+def detect_warmup(samples):
+    """Determine the number of initial samples that are warmup, i.e.,
+       not yet part of the steady state, with the Marginal Standard Error Rule (MSER).
+       It discards the prefix that minimizes the standard error of the mean
+       of the remaining samples. At most the first half of the samples is discarded."""
+    num_samples = len(samples)
+    if num_samples < _MIN_SAMPLES_FOR_WARMUP_DETECTION:
+        return 0
+
+    best_truncation = 0
+    best_mser = None
+    suffix_sum = 0.0
+    suffix_sum_of_squares = 0.0
+
+    # accumulate the sums of the remaining samples from the end,
+    # and prefer the shorter warmup if two are equally good
+    for truncation in range(num_samples - 1, -1, -1):
+        sample = float(samples[truncation])
+        suffix_sum += sample
+        suffix_sum_of_squares += sample * sample
+
+        if truncation > num_samples // 2:
+            continue
+
+        remaining = num_samples - truncation
+        sum_of_squared_deviations = suffix_sum_of_squares - suffix_sum * suffix_sum / remaining
+        mser = sum_of_squared_deviations / (remaining * remaining)
+        if best_mser is None or mser <= best_mser:
+            best_mser = mser
+            best_truncation = truncation
+    return best_truncation
+
 
 class WithSamples(object):
     def add_sample(self, _sample):
         pass
 
+    def relative_ci_half_width(self):
+        """The half width of the 95% confidence interval relative to the mean,
+           or None if it cannot be determined."""
+        return None
+
+    def state_as_dict(self):
+        """The state of the statistics, from which they can be restored
+           without the samples."""
+        return dict(vars(self))
+
+    def restore_state(self, state):
+        vars(self).update(state)
+
 
 class SampleCounter(WithSamples):
 
@@ -34,6 +103,16 @@ class SampleCounter(WithSamples):
     def add_sample(self, _sample):
         self.num_samples += 1
 
+    @classmethod
+    def from_aggregates(cls, num_samples):
+        result = cls()
+        result.num_samples = num_samples
+        return result
+
+    def aggregates(self):
+        """The arguments of `from_aggregates` to restore the counter."""
+        return [self.num_samples]
+
 
 class StatisticProperties(WithSamples):
     """
@@ -84,6 +163,67 @@ class StatisticProperties(WithSamples):
             self.min = min(self.min, sample)
             self.max = max(self.max, sample)
 
+    @classmethod
+    def from_aggregates(cls, num_samples, mean, variance_times_num_samples,
+                        product_of_samples, minimum, maximum):
+        """Create the statistics of samples that were aggregated elsewhere."""
+        result = cls()
+        if num_samples == 0:
+            return result
+        result.num_samples = num_samples
+        result.mean = mean
+        result._product_of_samples = product_of_samples
+        result.geom_mean = product_of_samples ** (1/float(num_samples))
+        result._variance_times_num_samples = variance_times_num_samples
+        result.std_dev = math.sqrt(variance_times_num_samples / num_samples)
+        result.min = minimum
+        result.max = maximum
+        return result
+
+    def aggregates(self):
+        """The arguments of `from_aggregates` to restore the statistics,
+           the other properties are derived from them."""
+        return [self.num_samples, self.mean, self._variance_times_num_samples,
+                self._product_of_samples, self.min, self.max]
+
+    def merge(self, other):
+        """Add the samples of the other statistics, combining the variances
+           as for parallel computations (Chan et al.)."""
+        if other.num_samples == 0:
+            return
+        if self.num_samples == 0:
+            self.restore_state(other.state_as_dict())
+            return
+
+        num_samples = self.num_samples + other.num_samples
+        delta = other.mean - self.mean
+        self.mean += delta * other.num_samples / num_samples
+        self._variance_times_num_samples += (
+            other._variance_times_num_samples
+            + delta * delta * self.num_samples * other.num_samples / num_samples)
+        self.num_samples = num_samples
+        self.std_dev = math.sqrt(self._variance_times_num_samples / num_samples)
+
+        self._product_of_samples *= other._product_of_samples
+        self.geom_mean = self._product_of_samples ** (1/float(num_samples))
+
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def ci_half_width(self):
+        """The half width of the 95% confidence interval of the mean,
+           or None if there are fewer than two samples."""
+        if self.num_samples < 2:
+            return None
+        sample_std_dev = math.sqrt(self._variance_times_num_samples / (self.num_samples - 1))
+        return t_value_95(self.num_samples - 1) * sample_std_dev / math.sqrt(self.num_samples)
+
+    def relative_ci_half_width(self):
+        half_width = self.ci_half_width()
+        if half_width is None or self.mean == 0:
+            return None
+        return half_width / abs(self.mean)
+
     def as_tuple(self):
         return (self.mean,
                 self.geom_mean,
@@ -0,0 +1,497 @@
+"""
+Execute child processes on a single asyncio event loop.
+
+All invocations, independent of the thread they are started from, are driven
+by one event loop that runs in a daemon thread. The loop waits for the
+processes, collects their output, and enforces timeouts. This avoids needing
+a helper thread per invocation, which matters for parallel execution.
+
+Processes are reaped with `os.wait4()` to obtain their resource usage.
+Thus, they are not started with asyncio's subprocess support, whose child
+watchers reap processes themselves.
+"""
+
+import asyncio
+import codecs
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from subprocess import PIPE, STDOUT, Popen
+from threading import Lock, Thread
+from time import monotonic
+from typing import IO, AbstractSet, Any, Callable, List, Optional, Tuple, Union
+
+from .subprocess_kill import E_TIMEOUT, kill_process
+
+_KEEP_ALIVE_INTERVAL = 10 * 60
+_READ_CHUNK_SIZE = 64 * 1024
+_MAX_EXIT_POLL_INTERVAL = 0.1
+
+# output beyond this number of bytes is spilled into a temporary file
+DEFAULT_OUTPUT_LIMIT = 16 * 1024 * 1024
+
+# lines are truncated to this number of bytes before they are parsed
+MAX_LINE_LENGTH = 1024 * 1024
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop, starting its thread on first use."""
+    global _loop, _loop_pid  # pylint: disable=global-statement
+    with _loop_lock:
+        # after a fork, the loop thread does not exist in the child
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            thread = Thread(
+                target=_run_loop, args=(_loop,), name="Subprocess Engine", daemon=True
+            )
+            thread.start()
+        return _loop
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+@contextmanager
+def _cpu_affinity(cpu_set: Optional[AbstractSet[int]]):
+    """
+    Restrict the current thread to the given CPUs. A process started by the
+    thread inherits its affinity, before executing any code of its own.
+    """
+    if not cpu_set:
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpu_set)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+def _set_done(future: asyncio.Future):
+    # the reader may be called again before the waiting task resumes
+    if not future.done():
+        future.set_result(None)
+
+
+class AbortProcess(Exception):
+    """
+    Raised by a line consumer to indicate that the process tree is to be
+    killed right away, because its further output is of no use.
+    """
+
+
+class OutputCapture(object):
+    """
+    The captured output of a stream.
+
+    Up to `limit` bytes, the output is kept in memory as a list of chunks.
+    Beyond it, all output is spilled into a temporary file. The capture needs
+    to be closed to release the file.
+    """
+
+    def __init__(self, limit: int = DEFAULT_OUTPUT_LIMIT) -> None:
+        self._limit = limit
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def write(self, chunk: bytes):
+        self._size += len(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+            return
+
+        self._chunks.append(chunk)
+        if self._size > self._limit:
+            # pylint: disable-next=consider-using-with
+            self._file = tempfile.TemporaryFile(prefix="rebench-output-")
+            self._file.writelines(self._chunks)
+            self._chunks = []
+
+    def _read(self, start: int) -> bytes:
+        if self._file is None:
+            return b"".join(self._chunks)[start:]
+        self._file.seek(start)
+        data = self._file.read()
+        self._file.seek(0, os.SEEK_END)
+        return data
+
+    def text(self, max_bytes: Optional[int] = None) -> str:
+        """
+        Return the output as string. With `max_bytes`, only the last bytes
+        of a larger output are returned, indicating how much was omitted.
+        """
+        if max_bytes is None or self._size <= max_bytes:
+            return self._read(0).decode("utf-8", errors="replace")
+
+        omitted = self._size - max_bytes
+        tail = self._read(omitted).decode("utf-8", errors="replace")
+        return "[... %d bytes of output omitted ...]\n%s" % (omitted, tail)
+
+    def close(self):
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            self._file: Optional[IO[bytes]] = None
+
+    def __str__(self):
+        return self.text()
+
+
+class _Tee(object):
+    """
+    Capture the chunks of one output stream, and echo them if requested.
+
+    If a line consumer is given, it is called with each complete line, without
+    its line terminator, as soon as the line was read. Lines longer than
+    `line_limit` bytes are truncated, to bound the memory used for output
+    without line breaks. Once the consumer raised `AbortProcess`, it is not
+    called anymore. Any other exception raised by the consumer is kept in
+    `error`, and aborts the process as well, so that its output continues
+    to be drained.
+    """
+
+    def __init__(
+        self,
+        capture: OutputCapture,
+        echo_to,
+        line_consumer=None,
+        line_limit: int = MAX_LINE_LENGTH,
+    ) -> None:
+        self.capture = capture
+        self._echo_to = echo_to
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._line_consumer = line_consumer
+        self._line_limit = line_limit
+        self._partial_line = bytearray()
+        self.aborted = False
+        self.error: Optional[Exception] = None
+
+    def append(self, chunk: bytes):
+        self.capture.write(chunk)
+        if self._echo_to is not None:
+            self._echo_to.write(self._decoder.decode(chunk))
+            self._echo_to.flush()
+        if self._line_consumer is not None:
+            self._feed_lines(chunk)
+
+    def _feed_lines(self, chunk: bytes):
+        # only the new chunk is searched, so that long lines are not copied repeatedly
+        view = memoryview(chunk)
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            if self._partial_line:
+                self._append_to_partial_line(view[start:end])
+                self._consume(self._partial_line)
+                self._partial_line.clear()
+            else:
+                self._consume(view[start : min(end, start + self._line_limit)])
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        self._append_to_partial_line(view[start:])
+
+    def _append_to_partial_line(self, part: memoryview):
+        room = self._line_limit - len(self._partial_line)
+        if room > 0:
+            self._partial_line += part[:room]
+
+    def _consume(self, line):
+        if self.aborted:
+            return
+        try:
+            self._line_consumer(str(line, "utf-8", "replace"))
+        except AbortProcess:
+            self.aborted = True
+        except Exception as err:  # pylint: disable=broad-except
+            self.error = err
+            self.aborted = True
+
+    def close(self):
+        if self._line_consumer is not None and self._partial_line:
+            self._consume(self._partial_line)
+            self._partial_line.clear()
+
+
+class Invocation(object):
+    """
+    A single execution of a command, which is run on the shared event loop.
+
+    The interface mirrors `subprocess_with_timeout.run`, which is a thin
+    wrapper around it. With `as_output_capture`, the output is returned as
+    `OutputCapture` objects, which the caller needs to close, instead of
+    strings. With a `cgroup`, the process is executed in it, and killed via
+    `cgroup.kill`. With a `cpu_set`, the process and its children are
+    restricted to the given CPUs.
+    """
+
+    def __init__(
+        self,
+        args: Union[str, List[str]],
+        env,
+        cwd=None,
+        shell=False,
+        kill_tree=True,
+        timeout=None,
+        verbose=False,
+        stdout=PIPE,
+        stderr=PIPE,
+        stdin_input: Optional[bytes] = None,
+        keep_alive_output: Optional[Callable[[float], None]] = None,
+        sudo_kill_delivery_fn=None,
+        stdout_line_consumer: Optional[Callable[[str], None]] = None,
+        output_limit: int = DEFAULT_OUTPUT_LIMIT,
+        as_output_capture: bool = False,
+        cgroup=None,
+        stderr_line_consumer: Optional[Callable[[str], None]] = None,
+        cpu_set: Optional[AbstractSet[int]] = None,
+    ):
+        if shell:
+            self._argv = ["/bin/sh", "-c", args]
+        elif isinstance(args, str):
+            self._argv = [args]
+        else:
+            self._argv = list(args)
+
+        if cgroup is not None:
+            # the process moves itself into the cgroup before executing the command
+            self._argv = [
+                "/bin/sh",
+                "-c",
+                'echo $$ > "$0" && exec "$@"',
+                cgroup.procs_file,
+            ] + self._argv
+
+        self._env = env
+        self._cwd = cwd
+        self._kill_tree = kill_tree
+        self._timeout = None if timeout is None or timeout < 0 else timeout
+        self._stdout = stdout
+        self._stderr = stderr
+        self._stdin_input = stdin_input
+        self._keep_alive_output = keep_alive_output
+        self._sudo_kill_delivery_fn = sudo_kill_delivery_fn
+        self._as_output_capture = as_output_capture
+        self._cgroup = cgroup
+        self._cpu_set = cpu_set
+
+        tee = verbose and stdout == PIPE and stderr in (PIPE, STDOUT)
+        self._stdout_tee = _Tee(
+            OutputCapture(output_limit),
+            sys.stdout if tee else None,
+            stdout_line_consumer,
+        )
+        self._stderr_tee = _Tee(
+            OutputCapture(output_limit),
+            sys.stderr if tee else None,
+            stderr_line_consumer,
+        )
+
+        self._proc: Optional[Popen] = None
+        self.rusage: Optional[Any] = None
+        self._killed = False
+        self._interrupted = False
+        self._done: Optional[asyncio.Event] = None
+
+    async def execute(self) -> Tuple[int, Any, Any]:
+        self._done = asyncio.Event()
+        try:
+            return await self._execute()
+        finally:
+            self._done.set()
+
+    async def _execute(self):
+        stdin = PIPE if self._stdin_input else None
+        # in its own session, the process tree can be killed as a process group
+        with _cpu_affinity(self._cpu_set):
+            # pylint: disable-next=consider-using-with
+            self._proc = Popen(
+                self._argv,
+                cwd=self._cwd,
+                env=self._env,
+                stdin=stdin,
+                stdout=self._stdout,
+                stderr=self._stderr,
+                start_new_session=self._kill_tree,
+            )
+        if self._interrupted:
+            await self._kill()
+
+        readers = []
+        if self._proc.stdout is not None:
+            readers.append(self._read(self._proc.stdout, self._stdout_tee))
+        if self._proc.stderr is not None:
+            readers.append(self._read(self._proc.stderr, self._stderr_tee))
+        if self._proc.stdin is not None:
+            readers.append(self._write_stdin(self._proc.stdin))
+
+        reading = asyncio.gather(*readers)
+        await self._wait_with_timeout()
+        await reading
+        self._raise_consumer_error()
+
+        stdout_result = self._result(self._stdout, self._stdout_tee.capture)
+        stderr_result = self._result(self._stderr, self._stderr_tee.capture)
+
+        if self._killed:
+            return E_TIMEOUT, stdout_result, stderr_result
+        return self._proc.returncode, stdout_result, stderr_result
+
+    def _raise_consumer_error(self):
+        """Raise the first exception of a line consumer, after the process was reaped."""
+        for tee in (self._stdout_tee, self._stderr_tee):
+            if tee.error is not None:
+                self._stdout_tee.capture.close()
+                self._stderr_tee.capture.close()
+                raise tee.error
+
+    def _result(self, stream, capture: OutputCapture):
+        if stream != PIPE:
+            return None
+        if self._as_output_capture:
+            return capture
+        result = capture.text()
+        capture.close()
+        return result
+
+    async def _write_stdin(self, pipe):
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, pipe
+        )
+        writer = asyncio.StreamWriter(transport, protocol, None, loop)
+        try:
+            writer.write(self._stdin_input)
+            await writer.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # the process terminated without reading all its input
+            pass
+        finally:
+            writer.close()
+
+    async def _read(self, pipe, tee: _Tee):
+        loop = asyncio.get_running_loop()
+        stream = asyncio.StreamReader(limit=_READ_CHUNK_SIZE)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream), pipe)
+        while True:
+            chunk = await stream.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                tee.close()
+                return
+            tee.append(chunk)
+            if tee.aborted:
+                await self._kill()
+
+    async def _wait_with_timeout(self):
+        start = monotonic()
+        waiting = asyncio.ensure_future(self._wait_for_exit())
+
+        while True:
+            elapsed = monotonic() - start
+            slice_time = _KEEP_ALIVE_INTERVAL
+            if self._timeout is not None:
+                slice_time = min(slice_time, self._timeout - elapsed)
+                if slice_time <= 0:
+                    await self._kill()
+                    break
+
+            done, _ = await asyncio.wait({waiting}, timeout=slice_time)
+            if done:
+                break
+
+            elapsed = monotonic() - start
+            keep_alive_due = self._timeout is None or elapsed < self._timeout
+            if self._keep_alive_output and keep_alive_due:
+                self._keep_alive_output(elapsed)
+
+        await waiting
+
+    async def _wait_for_exit(self):
+        """Wait until the process terminated, and reap it with `os.wait4()`."""
+        pid = self._proc.pid
+        try:
+            pidfd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            pidfd = None
+
+        if pidfd is not None:
+            loop = asyncio.get_running_loop()
+            exited = loop.create_future()
+            loop.add_reader(pidfd, _set_done, exited)
+            try:
+                await exited
+            finally:
+                loop.remove_reader(pidfd)
+                os.close(pidfd)
+            _, status, rusage = os.wait4(pid, 0)
+        else:
+            poll_interval = 0.001
+            while True:
+                reaped_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+                if reaped_pid != 0:
+                    break
+                await asyncio.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, _MAX_EXIT_POLL_INTERVAL)
+
+        self.rusage = rusage
+        # setting the return code tells Popen that the process has been reaped
+        self._proc.returncode = os.waitstatus_to_exitcode(status)
+
+    async def _kill(self):
+        if self._killed or self._proc.returncode is not None:
+            return
+        self._killed = True
+        if self._cgroup is not None:
+            self._cgroup.kill()
+            return
+
+        # scanning for descendants and delivering the signal via sudo may block
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            kill_process,
+            self._proc.pid,
+            self._kill_tree,
+            None,
+            self._sudo_kill_delivery_fn,
+        )
+
+    async def interrupt(self):
+        """Kill the process tree, and wait until `execute()` completed."""
+        self._interrupted = True
+        if self._proc is not None:
+            await self._kill()
+        if self._done is not None:
+            await self._done.wait()
+
+
+def run_invocation(invocation: Invocation):
+    """
+    Execute the invocation on the shared event loop and wait for its result.
+
+    On KeyboardInterrupt, the process tree is killed before the exception
+    is propagated.
+    """
+    loop = get_event_loop()
+    future = asyncio.run_coroutine_threadsafe(invocation.execute(), loop)
+    try:
+        return future.result()
+    except KeyboardInterrupt:
+        asyncio.run_coroutine_threadsafe(invocation.interrupt(), loop).result()
+        raise
@@ -1,4 +1,4 @@
-from os         import kill
+from os         import kill, killpg, listdir
 from signal     import SIGKILL
 from subprocess import PIPE, Popen
 from typing     import Optional, Tuple
@@ -7,27 +7,37 @@ from typing     import Optional, Tuple
 E_TIMEOUT = -9
 
 
-def _kill(proc_id, sudo_kill_delivery_fn):
-    if sudo_kill_delivery_fn:
-        sudo_kill_delivery_fn(proc_id)
-        return
-
+def _kill(proc_id):
     try:
         kill(proc_id, SIGKILL)
-    except ProcessLookupError:  # pylint: disable=undefined-variable
+    except (ProcessLookupError, PermissionError):
         # there's a race condition, the process may have already terminated on its own
-        # so let's simply ignore it
+        # so let's simply ignore it. We may also not be permitted to kill processes
+        # that escalated their privileges.
         pass
 
 
 def kill_process(pid, recursively, thread, sudo_kill_delivery_fn
                  ) -> Tuple[int, Optional[str], Optional[str]]:
-    pids = [pid]
-    if recursively:
-        pids.extend(_get_process_children(pid))
+    """Kill the process, and if `recursively` is set, all its descendants.
 
-    for proc_id in pids:
-        _kill(proc_id, sudo_kill_delivery_fn)
+       Processes started by ReBench lead their own session and process group,
+       which is killed with a single signal. Descendants that left the group,
+       for instance by starting their own session, are found with a single scan
+       of the process table taken before the group is killed.
+       When the processes run as root, the kill is delegated to
+       `sudo_kill_delivery_fn`, which does the same with the necessary rights.
+    """
+    if sudo_kill_delivery_fn:
+        sudo_kill_delivery_fn(pid)
+    elif recursively:
+        descendants = _get_descendants(pid)
+        _kill_group(pid)
+        _kill(pid)
+        for proc_id in descendants:
+            _kill(proc_id)
+    else:
+        _kill(pid)
 
     if thread:
         thread.join()
@@ -35,11 +45,59 @@ def kill_process(pid, recursively, thread, sudo_kill_delivery_fn
     return E_TIMEOUT, None, None
 
 
-def _get_process_children(pid):
+def _kill_group(pgid):
+    try:
+        killpg(pgid, SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        # the process may not lead a group, or the group may be gone already
+        pass
+
+
+def _get_descendants(pid):
+    children = {}
+    for proc_id, parent_id in _get_parent_ids():
+        children.setdefault(parent_id, []).append(proc_id)
+
+    result = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            result.append(child)
+            pending.append(child)
+    return result
+
+
+def _get_parent_ids():
+    try:
+        return _get_parent_ids_from_proc()
+    except OSError:
+        return _get_parent_ids_from_ps()
+
+
+def _get_parent_ids_from_proc():
+    result = []
+    for entry in listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat" % entry, "rb") as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            # the process terminated in the meantime
+            continue
+        # the command name may contain spaces and parentheses, the ppid follows the state
+        fields = stat[stat.rindex(b")") + 2:].split()
+        result.append((int(entry), int(fields[1])))
+    return result
+
+
+def _get_parent_ids_from_ps():
     # pylint: disable-next=consider-using-with
-    proc = Popen("pgrep -P %d" % pid, shell=True, stdout=PIPE, stderr=PIPE)
+    proc = Popen(["ps", "-A", "-o", "pid=", "-o", "ppid="], stdout=PIPE, stderr=PIPE)
     stdout, _stderr = proc.communicate()
-    result = [int(p) for p in stdout.split()]
-    for child in result[:]:
-        result.extend(_get_process_children(child))
+    result = []
+    for line in stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            result.append((int(parts[0]), int(parts[1])))
     return result
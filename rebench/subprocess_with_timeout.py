@@ -1,18 +1,13 @@
-from select     import select
-from subprocess import PIPE, STDOUT, Popen
-from threading  import Thread, Condition, current_thread, main_thread
-from time       import time
+from subprocess import PIPE
+from threading  import current_thread, main_thread
 
-import sys
 import signal
 
 from .denoise_client import deliver_kill_signal
-from .output import output_as_str
-from .subprocess_kill import kill_process
-
-
-# Indicate timeout with standard exit code
-E_TIMEOUT = -9
+from .fork_server import ForkedInvocation
+from .subprocess_engine import (  # pylint: disable=unused-import
+    AbortProcess, DEFAULT_OUTPUT_LIMIT, Invocation, run_invocation)
+from .subprocess_kill import E_TIMEOUT  # pylint: disable=unused-import
 
 
 _signals_setup = False
@@ -32,167 +27,62 @@ def _setup_signal_handling_if_needed():
         signal.signal(signal.SIGTERM, keyboard_interrupt_on_sigterm)
 
 
-class _SubprocessThread(Thread):
-
-    def __init__(self, executable_name, args, env,
-                 shell, cwd, verbose, stdout, stderr, stdin_input):
-        Thread.__init__(self, name="Subprocess %s" % executable_name)
-        self._args = args
-        self._shell = shell
-        self._cwd = cwd
-        self._verbose = verbose
-        self._stdout = stdout
-        self._stderr = stderr
-        self._stdin_input = stdin_input
-        self._env = env
-
-        self._pid = None
-        self._started_cv = Condition()
-
-        self.stdout_result = None
-        self.stderr_result = None
-        self.returncode = None
-        self._exception = None
-
-    @property
-    def exception(self):
-        return self._exception
-
-    def run(self):
-        try:
-            self._started_cv.acquire()
-            stdin = PIPE if self._stdin_input else None
-
-            # pylint: disable-next=consider-using-with
-            proc = Popen(self._args, shell=self._shell, cwd=self._cwd,
-                         stdin=stdin, stdout=self._stdout, stderr=self._stderr, env=self._env)
-            self._pid = proc.pid
-            self._started_cv.notify()
-            self._started_cv.release()
-
-            if self._stdin_input:
-                proc.stdin.write(self._stdin_input)
-                proc.stdin.flush()
-
-            self.process_output(proc)
-            self.returncode = proc.returncode
-        except Exception as err:  # pylint: disable=broad-except
-            self._exception = err
-
-    def get_pid(self):
-        self._started_cv.acquire()
-        while self._pid is None:
-            self._started_cv.wait()
-        self._started_cv.release()
-        return self._pid
-
-    def process_output(self, proc):
-        if self._verbose and self._stdout == PIPE and self._stderr in (PIPE, STDOUT):
-            self.stdout_result = ""
-            self.stderr_result = ""
-
-            stdout_eof = False
-            stderr_eof = False
-
-            while True:
-                reads = []
-
-                if proc.stdout and not proc.stdout.closed and not stdout_eof:
-                    reads.append(proc.stdout.fileno())
-                if (self._stderr == PIPE and
-                        proc.stderr and
-                        not proc.stderr.closed and
-                        not stderr_eof):
-                    reads.append(proc.stderr.fileno())
-
-                if not reads:
-                    proc.wait()
-                    break
-
-                ret = select(reads, [], [], 0.1)
-                for file_no in ret[0]:
-                    if file_no == proc.stdout.fileno():
-                        read = output_as_str(proc.stdout.readline())
-                        if read == "":
-                            stdout_eof = True
-                        else:
-                            sys.stdout.write(read)
-                            self.stdout_result += read
-                    if self._stderr == PIPE and file_no == proc.stderr.fileno():
-                        read = output_as_str(proc.stderr.readline())
-                        if read == "":
-                            stderr_eof = True
-                        else:
-                            sys.stderr.write(read)
-                            self.stderr_result += read
-        else:
-            stdout_r, stderr_r = proc.communicate()
-            self.stdout_result = output_as_str(stdout_r)
-            self.stderr_result = output_as_str(stderr_r)
-
-
 def _print_keep_alive(seconds_since_start):
     print("Keep alive, current job runs for %dmin\n" % (seconds_since_start / 60))
 
 
 def run(args, env, cwd=None, shell=False, kill_tree=True, timeout=-1,
         verbose=False, stdout=PIPE, stderr=PIPE, stdin_input=None,
-        keep_alive_output=_print_keep_alive, uses_sudo=False):
+        keep_alive_output=_print_keep_alive, uses_sudo=False,
+        stdout_line_consumer=None, output_limit=DEFAULT_OUTPUT_LIMIT,
+        as_output_capture=False, resource_usage_consumer=None, cgroup=None,
+        stderr_line_consumer=None, cpu_set=None):
     """
     Run a command with a timeout after which it will be forcibly
     killed.
+
+    The command is executed on the shared event loop of the subprocess engine.
+    If given, `stdout_line_consumer` is called with each line of the standard
+    output as soon as it is read. The consumer can raise `AbortProcess` to have
+    the process tree killed right away, which is then indicated by `E_TIMEOUT`.
+    `stderr_line_consumer` does the same for the standard error output.
+
+    Output beyond `output_limit` bytes is spilled into a temporary file.
+    With `as_output_capture`, the output is returned as `OutputCapture`
+    objects instead of strings, which avoids materializing it in memory.
+    Such captures need to be closed by the caller.
+
+    If given, `resource_usage_consumer` is called with the `resource.struct_rusage`
+    of the process, as reported by `os.wait4()`, once it terminated.
+
+    With a `cgroup.Cgroup`, the process and its children are executed in it,
+    and killed via the cgroup instead of walking the process tree.
+
+    With a `cpu_set`, the process and its children are restricted to the given CPUs.
+    """
+    _setup_signal_handling_if_needed()
+    invocation = Invocation(args, env, cwd, shell, kill_tree, timeout, verbose,
+                            stdout, stderr, stdin_input, keep_alive_output,
+                            deliver_kill_signal if uses_sudo else None,
+                            stdout_line_consumer, output_limit, as_output_capture,
+                            cgroup, stderr_line_consumer, cpu_set)
+    result = run_invocation(invocation)
+    if resource_usage_consumer and invocation.rusage is not None:
+        resource_usage_consumer(invocation.rusage)
+    return result
+
+
+def run_forked(fork_server, args, env, cwd=None, timeout=-1, verbose=False,
+               keep_alive_output=_print_keep_alive, stdout_line_consumer=None,
+               output_limit=DEFAULT_OUTPUT_LIMIT, cpu_set=None):
+    """
+    Like `run` with `as_output_capture`, but the command is forked by the
+    given `fork_server.ForkServer` instead of being started as a new process.
+    The standard error output is combined with the standard output, and
+    the resource usage is not available.
     """
     _setup_signal_handling_if_needed()
-    executable_name = args.split(" ", 1)[0]
-
-    thread = _SubprocessThread(executable_name, args, env, shell, cwd, verbose, stdout,
-                               stderr, stdin_input)
-    thread.start()
-
-    was_interrupted = False
-
-    try:
-        _join_with_keep_alive(keep_alive_output, thread, timeout)
-    except KeyboardInterrupt:
-        was_interrupted = True
-
-    if (timeout != -1 or was_interrupted) and thread.is_alive():
-        assert thread.get_pid() is not None
-        result = kill_process(thread.get_pid(), kill_tree, thread,
-                              deliver_kill_signal if uses_sudo else None)
-        if was_interrupted:
-            raise KeyboardInterrupt()
-        return result
-
-    if was_interrupted:
-        raise KeyboardInterrupt()
-
-    if not thread.is_alive():
-        exp = thread.exception
-        if exp:
-            raise exp  # pylint: disable=raising-bad-type
-
-    return thread.returncode, thread.stdout_result, thread.stderr_result
-
-
-def _join_with_keep_alive(keep_alive_output, thread, timeout):
-    if timeout == -1:
-        thread.join()
-    else:
-        t10min = 10 * 60
-        if timeout < t10min:
-            thread.join(timeout)
-        else:
-            start = time()
-            diff = 0
-            while diff < timeout:
-                if t10min < timeout - diff:
-                    max_10min_timeout = t10min
-                else:
-                    max_10min_timeout = timeout - diff
-                thread.join(max_10min_timeout)
-                if not thread.is_alive():
-                    break
-                diff = time() - start
-                if diff < timeout:
-                    keep_alive_output(diff)
+    invocation = ForkedInvocation(fork_server, args, env, cwd, timeout, verbose,
+                                  keep_alive_output, stdout_line_consumer, output_limit,
+                                  cpu_set)
+    return run_invocation(invocation)
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import unittest
+from tempfile import TemporaryDirectory
+
+from ..build_cache import BuildCache, InputNotHashable, compute_key
+from ..model.build_cmd import BuildCommand
+
+
+def _write(path, content):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def _build(location, inputs):
+    build = BuildCommand("make", location)
+    build.inputs = inputs
+    return build
+
+
+class ComputeKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self._location = self._dir.name
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _git(self, *args):
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-C", self._location]
+            + list(args),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def test_build_without_inputs_has_no_key(self):
+        self.assertIsNone(compute_key(_build(self._location, []), {}))
+
+    def test_key_depends_on_content_of_inputs(self):
+        _write(os.path.join(self._location, "a.c"), "int a;")
+        build = _build(self._location, ["*.c"])
+
+        key = compute_key(build, {})
+        self.assertEqual(key, compute_key(build, {}))
+
+        _write(os.path.join(self._location, "a.c"), "int b;")
+        self.assertNotEqual(key, compute_key(build, {}))
+
+    def test_key_depends_on_matched_files_and_env(self):
+        _write(os.path.join(self._location, "a.c"), "int a;")
+        build = _build(self._location, ["**/*.c"])
+        key = compute_key(build, {})
+
+        self.assertNotEqual(key, compute_key(build, {"CC": "clang"}))
+
+        os.mkdir(os.path.join(self._location, "sub"))
+        _write(os.path.join(self._location, "sub", "b.c"), "")
+        self.assertNotEqual(key, compute_key(build, {}))
+
+    def test_key_of_git_tree_includes_uncommitted_changes(self):
+        self._git("init", "-q")
+        _write(os.path.join(self._location, "a.c"), "int a;")
+        self._git("add", "a.c")
+        self._git("commit", "-q", "-m", "initial")
+        build = _build(self._location, ["git:."])
+
+        key = compute_key(build, {})
+        self.assertEqual(key, compute_key(build, {}))
+
+        _write(os.path.join(self._location, "a.c"), "int b;")
+        modified_key = compute_key(build, {})
+        self.assertNotEqual(key, modified_key)
+
+        _write(os.path.join(self._location, "b.c"), "")
+        self.assertNotEqual(modified_key, compute_key(build, {}))
+
+    def test_git_input_outside_of_repository_is_not_hashable(self):
+        with self.assertRaises(InputNotHashable):
+            compute_key(_build(self._location, ["git:."]), {})
+
+
+class BuildCacheTest(unittest.TestCase):
+
+    def test_successful_build_is_persisted(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            build = _build(tmp, ["*"])
+            BuildCache(path).add(build, "key1", "E:vm")
+
+            cache = BuildCache(path)
+            self.assertTrue(cache.is_up_to_date(build, "key1"))
+            self.assertFalse(cache.is_up_to_date(build, "key2"))
+            self.assertFalse(cache.is_up_to_date(BuildCommand("other", tmp), "key1"))
+
+    def test_unreadable_cache_is_ignored(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            _write(path, "{ not json")
+            build = _build(tmp, ["*"])
+
+            cache = BuildCache(path)
+            self.assertFalse(cache.is_up_to_date(build, "key1"))
+            cache.add(build, "key1", "E:vm")
+            self.assertTrue(BuildCache(path).is_up_to_date(build, "key1"))
@@ -0,0 +1,180 @@
+import os
+import subprocess
+import unittest
+from tempfile import TemporaryDirectory
+from time import time
+
+from .. import subprocess_with_timeout as sub
+from ..cgroup import (
+    Cgroup,
+    CgroupSandbox,
+    find_cgroup2_mount,
+    own_cgroup,
+    own_cgroup_path,
+    parse_flat_keyed,
+    parse_io_stat,
+)
+from ..output import UIError
+
+
+def _write(path, content):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def is_cgroup_writable():
+    root = own_cgroup_path()
+    return root is not None and os.access(root, os.W_OK)
+
+
+class CgroupFilesTest(unittest.TestCase):
+
+    def test_parse_flat_keyed(self):
+        self.assertEqual(
+            {"usage_usec": 1200, "user_usec": 1000, "system_usec": 200},
+            parse_flat_keyed("usage_usec 1200\nuser_usec 1000\nsystem_usec 200\n"),
+        )
+
+    def test_parse_io_stat_sums_devices(self):
+        content = (
+            "8:0 rbytes=1024 wbytes=2048 rios=1 wios=2 dbytes=0 dios=0\n"
+            "8:16 rbytes=1024 wbytes=0 rios=1 wios=0 dbytes=0 dios=0\n"
+        )
+        stats = parse_io_stat(content)
+        self.assertEqual(2048, stats["rbytes"])
+        self.assertEqual(2048, stats["wbytes"])
+        self.assertEqual(2, stats["rios"])
+
+    def test_find_mount_and_own_cgroup(self):
+        with TemporaryDirectory() as tmp:
+            mounts = os.path.join(tmp, "mounts")
+            _write(
+                mounts,
+                "proc /proc proc rw 0 0\n"
+                "cgroup2 /sys/fs/cgroup cgroup2 rw,nosuid 0 0\n",
+            )
+            cgroup = os.path.join(tmp, "cgroup")
+            _write(cgroup, "0::/user.slice/rebench\n")
+
+            self.assertEqual("/sys/fs/cgroup", find_cgroup2_mount(mounts))
+            self.assertEqual("/user.slice/rebench", own_cgroup(cgroup))
+            self.assertIsNone(find_cgroup2_mount(os.path.join(tmp, "missing")))
+
+    def test_read_stats(self):
+        with TemporaryDirectory() as tmp:
+            _write(
+                os.path.join(tmp, "cpu.stat"),
+                "usage_usec 3000\nuser_usec 2000\nsystem_usec 1000\n"
+                "nr_periods 0\nnr_throttled 0\nthrottled_usec 500\n",
+            )
+            _write(os.path.join(tmp, "memory.peak"), "2097152\n")
+            _write(os.path.join(tmp, "io.stat"), "8:0 rbytes=4096 wbytes=8192\n")
+
+            stats = {
+                criterion: (value, unit)
+                for criterion, value, unit in Cgroup(tmp).read_stats()
+            }
+
+        self.assertEqual((3.0, "ms"), stats["cgroup-cpu-usage"])
+        self.assertEqual((2.0, "ms"), stats["cgroup-cpu-user"])
+        self.assertEqual((1.0, "ms"), stats["cgroup-cpu-system"])
+        self.assertEqual((0.5, "ms"), stats["cgroup-cpu-throttled"])
+        self.assertEqual((2048.0, "kb"), stats["cgroup-memory-peak"])
+        self.assertEqual((4.0, "kb"), stats["cgroup-io-read"])
+        self.assertEqual((8.0, "kb"), stats["cgroup-io-write"])
+
+    def test_read_stats_skips_missing_files(self):
+        with TemporaryDirectory() as tmp:
+            self.assertEqual([], Cgroup(tmp).read_stats())
+
+    def test_create_enables_controllers_and_sets_limits(self):
+        with TemporaryDirectory() as tmp:
+            sandbox = CgroupSandbox(tmp)
+            cgroup = sandbox.create(
+                {"cpu_max": "50000 100000", "memory_max": "1G", "cpuset_cpus": None}
+            )
+
+            self.assertEqual(tmp, os.path.dirname(cgroup.path))
+            self.assertEqual(
+                "+cpu +io +memory",
+                _read(os.path.join(tmp, "cgroup.subtree_control")),
+            )
+            self.assertEqual(
+                "50000 100000", _read(os.path.join(cgroup.path, "cpu.max"))
+            )
+            self.assertEqual("1G", _read(os.path.join(cgroup.path, "memory.max")))
+            self.assertFalse(os.path.exists(os.path.join(cgroup.path, "cpuset.cpus")))
+
+            second = sandbox.create({})
+            self.assertNotEqual(cgroup.path, second.path)
+
+    def test_create_enables_available_accounting_controllers(self):
+        with TemporaryDirectory() as tmp:
+            _write(os.path.join(tmp, "cgroup.controllers"), "cpuset cpu memory pids")
+            CgroupSandbox(tmp).create({"cpuset_cpus": "0"})
+            self.assertEqual(
+                "+cpu +cpuset +memory",
+                _read(os.path.join(tmp, "cgroup.subtree_control")),
+            )
+
+    def test_create_rejects_unknown_settings(self):
+        with TemporaryDirectory() as tmp:
+            with self.assertRaises(UIError) as context:
+                CgroupSandbox(tmp).create({"io_max": "8:0 rbps=1"})
+            self.assertIn("io_max", context.exception.message)
+
+    def test_create_fails_without_root(self):
+        with TemporaryDirectory() as tmp:
+            with self.assertRaises(UIError):
+                CgroupSandbox(os.path.join(tmp, "missing")).create({})
+
+
+@unittest.skipUnless(is_cgroup_writable(), "Requires a writable cgroup v2 hierarchy")
+class CgroupExecutionTest(unittest.TestCase):
+
+    def setUp(self):
+        self._sandbox = CgroupSandbox()
+
+    def test_accounts_cpu_usage(self):
+        cgroup = self._sandbox.create({})
+        try:
+            return_code, output, _ = sub.run(
+                ["/bin/sh", "-c", "echo started"],
+                {},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cgroup=cgroup,
+            )
+            stats = [criterion for criterion, _, _ in cgroup.read_stats()]
+        finally:
+            cgroup.remove()
+
+        self.assertEqual(0, return_code)
+        self.assertEqual("started\n", output)
+        self.assertIn("cgroup-cpu-usage", stats)
+        self.assertFalse(os.path.exists(cgroup.path))
+
+    def test_timeout_kills_all_processes_of_cgroup(self):
+        cgroup = self._sandbox.create({})
+        try:
+            start = time()
+            return_code, _, _ = sub.run(
+                ["/bin/sh", "-c", "sleep 100 & sleep 100 & wait"],
+                {},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=1,
+                cgroup=cgroup,
+            )
+            elapsed = time() - start
+        finally:
+            cgroup.remove()
+
+        self.assertEqual(sub.E_TIMEOUT, return_code)
+        self.assertLess(elapsed, 5)
+        self.assertFalse(os.path.exists(cgroup.path))
@@ -19,16 +19,27 @@
 # IN THE SOFTWARE.
 import unittest
 import os
+from contextlib import redirect_stdout
+from io import StringIO
 
+from .cgroup_test import is_cgroup_writable
 from .persistence import TestPersistence
 from .rebench_test_case import ReBenchTestCase
 from ..rebench           import ReBench
-from ..executor          import Executor, BatchScheduler, RandomScheduler, RoundRobinScheduler
+from ..cgroup            import own_cgroup_path
+from ..executor          import Executor, _OutputFeed
+from ..scheduler         import BatchScheduler, RandomScheduler, RoundRobinScheduler, \
+    ParallelScheduler, LongestJobFirstScheduler, WorkStealingScheduler, TimeBudgetScheduler, \
+    sort_by_expected_duration
 from ..configurator      import Configurator, load_config
+from ..interop.adapter   import OutputNotParseable
+from ..duration_model    import DurationModel
 from ..model.measurement import Measurement
 from ..output            import UIError
 from ..persistence       import DataStore
 from ..reporter          import Reporter
+from ..statistics        import StatisticProperties
+from ..subprocess_engine import AbortProcess
 
 
 
@@ -38,10 +49,16 @@ class ExecutorTest(ReBenchTestCase):
         super(ExecutorTest, self).setUp()
         os.chdir(self._path + "/../")
 
+    def _load_test_config(self):
+        yaml = load_config(self._path + '/test.conf')
+        # the Test experiment has its own data file, which is not to be left behind
+        yaml['experiments']['Test']['data_file'] = self._tmp_file
+        return yaml
+
     def test_setup_and_run_benchmark(self):
         options = ReBench().shell_options().parse_args(["dummy"])
 
-        cnf = Configurator(load_config(self._path + '/test.conf'), DataStore(self.ui),
+        cnf = Configurator(self._load_test_config(), DataStore(self.ui),
                            self.ui, options,
                            None, 'Test', data_file=self._tmp_file)
 
@@ -60,7 +77,7 @@ class ExecutorTest(ReBenchTestCase):
         self.assertIsInstance(err.exception.source_exception, ValueError)
 
     def _remove_executors_with_missing_exe(self, scheduler):
-        yaml = load_config(self._path + "/test.conf")
+        yaml = self._load_test_config()
 
         # change config to use executable that doesn't exist
         self.assertEqual(yaml["executors"]["TestRunner1"]["executable"], "test-vm1.py %(cores)s")
@@ -174,6 +191,352 @@ class ExecutorTest(ReBenchTestCase):
 
         self.assertEqual(2, run.get_number_of_data_points())
 
+    def test_gauge_adapter_is_reused_for_all_invocations_of_a_run(self):
+        cnf = Configurator(load_config(self._path + '/small.conf'),
+                           DataStore(self.ui), self.ui, None,
+                           data_file=self._tmp_file)
+        runs = sorted(cnf.get_runs())
+        ex = Executor(runs, False, self.ui)
+
+        adapter = ex._get_gauge_adapter_instance(runs[0])
+        self.assertIsNotNone(adapter)
+        self.assertIs(adapter, ex._get_gauge_adapter_instance(runs[0]))
+        self.assertIsNot(adapter, ex._get_gauge_adapter_instance(runs[1]))
+
+    def _parallel_scheduler(self, interference_factor, num_cpus, num_worker_threads=None):
+        yaml = load_config(self._path + "/test.conf")
+        yaml["runs"]["parallel_interference_factor"] = interference_factor
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui,
+                           exp_name='Test', data_file=self._tmp_file)
+        ex = Executor(cnf.get_runs(), False, self.ui)
+
+        scheduler = ParallelScheduler(ex, BatchScheduler, self.ui, False,
+                                      num_worker_threads)
+        scheduler._available_cpus = list(range(num_cpus))
+        if num_worker_threads is None:
+            scheduler._num_worker_threads = scheduler._number_of_threads()
+        return scheduler
+
+    def test_output_feed_treats_parser_exceptions_as_unparseable_output(self):
+        class _FloatParser(object):
+            def feed_line(self, line):
+                float(line)
+
+        feed = _OutputFeed(_FloatParser())
+        feed.feed_line("1.5")
+        with self.assertRaises(AbortProcess):
+            feed.feed_line("not a number")
+        self.assertTrue(feed.indicated_error)
+        with self.assertRaises(OutputNotParseable):
+            feed.finish()
+
+    def test_parallel_workers_determined_by_interference_factor(self):
+        self.assertEqual(4, self._parallel_scheduler(2.5, 10)._num_worker_threads)
+        self.assertEqual(2, self._parallel_scheduler(5, 10)._num_worker_threads)
+
+    def test_parallel_workers_at_least_one(self):
+        self.assertEqual(1, self._parallel_scheduler(2.5, 2)._num_worker_threads)
+
+    def test_parallel_workers_set_explicitly(self):
+        self.assertEqual(3, self._parallel_scheduler(2.5, 10, 3)._num_worker_threads)
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"),
+                         "setting the CPU affinity is not supported on this platform")
+    def test_parallel_workers_get_disjoint_cpu_sets(self):
+        cpu_sets = self._parallel_scheduler(2.5, 10)._cpu_sets_for_worker_threads()
+        self.assertEqual([{0, 1}, {2, 3}, {4, 5}, {6, 7}], cpu_sets)
+
+    def test_local_schedulers_execute_runs_on_cpu_set_of_worker(self):
+        scheduler = self._parallel_scheduler(2.5, 10).get_local_scheduler({2, 3})
+        self.assertEqual({2, 3}, scheduler.cpu_set)
+
+    def test_shell_options_reject_non_positive_parallel_workers(self):
+        option_parser = ReBench().shell_options()
+        self.assertEqual(
+            3, option_parser.parse_args(['--parallel-workers', '3', 'some.conf']).parallel_workers)
+        for value in ['0', '-1', 'many']:
+            with self.assertRaises(SystemExit):
+                option_parser.parse_args(['--parallel-workers', value, 'some.conf'])
+
+    def test_parallel_workers_not_pinned_with_too_few_cpus(self):
+        cpu_sets = self._parallel_scheduler(2.5, 2, 3)._cpu_sets_for_worker_threads()
+        self.assertEqual([None, None, None], cpu_sets)
+
+    def _runs_with_expected_times(self, times):
+        cnf = Configurator(load_config(self._path + '/small.conf'),
+                           DataStore(self.ui), self.ui, None,
+                           data_file=self._tmp_file)
+        runs = sorted(cnf.get_runs())
+        for run, time in zip(runs, times):
+            if time is not None:
+                run.statistics.add_sample(time)
+        return runs
+
+    def test_sort_by_expected_duration(self):
+        runs = self._runs_with_expected_times([1, 5, None, 3])
+        self.assertEqual([runs[2], runs[1], runs[3], runs[0]],
+                         sort_by_expected_duration(runs[:4]))
+
+    def test_duration_model_falls_back_to_similar_runs(self):
+        yaml = load_config(self._path + '/small.conf')
+        yaml['benchmark_suites']['Suite2'] = yaml['benchmark_suites']['Suite']
+        yaml['experiments']['Test']['suites'].append('Suite2')
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui, None, data_file=self._tmp_file)
+        runs = sorted(cnf.get_runs())
+
+        def runs_of(suite, executor):
+            return [run for run in runs if run.benchmark.suite.name == suite
+                    and run.benchmark.suite.executor.name == executor]
+
+        measured, same_suite = runs_of('Suite', 'TestRunner1')[:2]
+        other_suite = runs_of('Suite2', 'TestRunner1')[0]
+        other_executor = runs_of('Suite', 'TestRunner2')[0]
+
+        model = DurationModel(runs)
+        model.update()
+        self.assertIsNone(model.expected_invocation_time(measured))
+
+        measured.record_invocation_time(2.0)
+        measured.record_invocation_time(4.0)
+        same_suite.statistics.add_sample(500)  # ms for its single iteration
+        model.update()
+
+        self.assertEqual(3.0, model.expected_invocation_time(measured))
+        self.assertEqual(30.0, model.expected_remaining_time(measured))
+        self.assertEqual(0.5, model.expected_invocation_time(same_suite))
+        self.assertEqual(1.75, model.expected_invocation_time(runs_of('Suite', 'TestRunner1')[2]))
+        self.assertEqual(1.75, model.expected_invocation_time(other_suite))
+        self.assertEqual(1.75, model.expected_invocation_time(other_executor))
+
+        runs_of('Suite2', 'TestRunner1')[1].record_invocation_time(10.0)
+        runs_of('Suite', 'TestRunner2')[1].record_invocation_time(20.0)
+        model.update()
+        self.assertEqual(10.0, model.expected_invocation_time(other_suite))
+        self.assertEqual(20.0, model.expected_invocation_time(other_executor))
+        self.assertEqual(20.0, model.expected_invocation_time(runs_of('Suite2', 'TestRunner2')[0]))
+
+    def test_execution_plan_prints_expected_time(self):
+        runs = self._runs_with_expected_times([2000, None])[:2]
+        ex = Executor(runs, False, self.ui, print_execution_plan=True)
+
+        output = StringIO()
+        with redirect_stdout(output):
+            ex.execute()
+        lines = output.getvalue().splitlines()
+
+        self.assertIn("# expected: 10 invocations of 2.0s, 20.0s", lines)
+        self.assertIn("# expected in total: 40.0s", lines)
+
+    def test_work_stealing_distributes_longest_first(self):
+        runs = self._runs_with_expected_times([1, 5, 4, 3, 2])[:5]
+        ex = Executor(runs, False, self.ui)
+        scheduler = WorkStealingScheduler(ex, LongestJobFirstScheduler, self.ui, False, 2)
+        scheduler._set_parallel_work(runs)
+
+        self.assertEqual([runs[1]], scheduler.acquire_work(0))
+        self.assertEqual([runs[2]], scheduler.acquire_work(1))
+        self.assertEqual([runs[3]], scheduler.acquire_work(1))
+        self.assertEqual([runs[4]], scheduler.acquire_work(0))
+        self.assertEqual([runs[0]], scheduler.acquire_work(1))
+
+    def test_work_stealing_idle_worker_steals(self):
+        runs = self._runs_with_expected_times([1, 50, 4, 3, 2])[:5]
+        ex = Executor(runs, False, self.ui)
+        scheduler = WorkStealingScheduler(ex, LongestJobFirstScheduler, self.ui, False, 2)
+        scheduler._set_parallel_work(runs)
+
+        # worker 0 is busy with the long run, worker 1 processes all others
+        self.assertEqual([runs[1]], scheduler.acquire_work(0))
+        self.assertEqual([runs[2]], scheduler.acquire_work(1))
+        self.assertEqual([runs[3]], scheduler.acquire_work(1))
+        self.assertEqual([runs[4]], scheduler.acquire_work(1))
+        self.assertEqual([runs[0]], scheduler.acquire_work(1))
+        self.assertIsNone(scheduler.acquire_work(1))
+        self.assertIsNone(scheduler.acquire_work(0))
+
+    def test_work_stealing_executes_all_runs(self):
+        yaml = load_config(self._path + '/small.conf')
+        yaml["executors"]["TestRunner1"]["execute_exclusively"] = False
+        yaml["executors"]["TestRunner2"]["execute_exclusively"] = False
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui, None,
+                           data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        ex = Executor(runs, False, self.ui, scheduler=LongestJobFirstScheduler)
+        WorkStealingScheduler(ex, LongestJobFirstScheduler, self.ui, False, 3).execute()
+
+        for run in runs:
+            self.assertTrue(run.is_completed(self.ui))
+
+    def test_time_budget_gives_noisy_run_more_invocations(self):
+        runs = self._runs_with_expected_times([])[:2]
+        stable, noisy = runs
+        # the iterations of the stable run are noisy, but the means of its invocations not
+        stable.statistics.add([50, 150, 40, 160, 60, 140, 45, 155])
+        for invocation, (stable_mean, noisy_mean) in enumerate(
+                [(100, 100), (101, 150), (100, 50), (101, 120)], 1):
+            stable._add_invocation_total(invocation, stable_mean, 1)
+            noisy._add_invocation_total(invocation, noisy_mean, 1)
+
+        ex = Executor(runs, False, self.ui)
+        scheduler = TimeBudgetScheduler(ex, self.ui, False, 60)
+        for run in runs:
+            run._max_invocation = 4
+            scheduler._invocation_times[run] = StatisticProperties()
+            scheduler._invocation_times[run].add_sample(1)
+
+        self.assertIs(noisy, scheduler._select_run(runs, 60))
+        self.assertIsNone(scheduler._select_run(runs, 0.5))
+
+    def test_time_budget_first_gives_each_run_minimal_invocations(self):
+        runs = self._runs_with_expected_times([])[:2]
+        ex = Executor(runs, False, self.ui)
+        scheduler = TimeBudgetScheduler(ex, self.ui, False, 60)
+
+        runs[0]._max_invocation = TimeBudgetScheduler.MIN_INVOCATIONS
+        scheduler._invocation_times[runs[0]] = StatisticProperties()
+        scheduler._invocation_times[runs[0]].add_sample(1)
+
+        self.assertIs(runs[1], scheduler._select_run(runs, 60))
+
+    def test_time_budget_execution_ignores_configured_invocations(self):
+        cnf = Configurator(load_config(self._path + '/small.conf'),
+                           DataStore(self.ui), self.ui, None,
+                           data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        ex = Executor(runs, False, self.ui, time_budget=5)
+        self.assertIsInstance(ex._scheduler, TimeBudgetScheduler)
+        ex.execute()
+
+        for run in runs:
+            self.assertTrue(run.is_completed(self.ui))
+            self.assertGreaterEqual(run.completed_invocations,
+                                    TimeBudgetScheduler.MIN_INVOCATIONS)
+
+    def _execute_with_target_relative_ci(self, target, cli_options=None, min_invocations=3):
+        yaml = load_config(self._path + '/small.conf')
+        yaml["runs"]["target_relative_ci"] = target
+        if min_invocations is not None:
+            yaml["runs"]["min_invocations"] = min_invocations
+        yaml["runs"]["max_invocations"] = 5
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui, cli_options,
+                           data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        Executor(runs, False, self.ui).execute()
+        return runs
+
+    def test_target_relative_ci_stops_when_converged(self):
+        # the test executors produce totals between 700 and 850,
+        # so that 3 invocations always give a confidence interval below 30%
+        for run in self._execute_with_target_relative_ci(0.9):
+            self.assertEqual(3, run.completed_invocations)
+
+    def test_target_relative_ci_requires_three_invocations_by_default(self):
+        for run in self._execute_with_target_relative_ci(0.9, min_invocations=None):
+            self.assertEqual(3, run.completed_invocations)
+
+    def test_target_relative_ci_stops_at_max_invocations(self):
+        for run in self._execute_with_target_relative_ci(0.000001):
+            self.assertEqual(5, run.completed_invocations)
+
+    def test_target_relative_ci_ignored_with_explicit_invocations(self):
+        options = ReBench().shell_options().parse_args(["-in=4", "small.conf"])
+        for run in self._execute_with_target_relative_ci(0.9, options):
+            self.assertEqual(4, run.completed_invocations)
+
+    def test_shell_options_with_time_budget(self):
+        options = ReBench().shell_options().parse_args(['--time-budget', '2h', 'some.conf'])
+        self.assertEqual(7200, options.time_budget)
+
+    def test_time_budget_rejects_other_schedulers(self):
+        for other in (['--scheduler', 'batch'], ['--parallel-workers', '2']):
+            options = ReBench().shell_options().parse_args(
+                ['--time-budget', '2h'] + other + ['some.conf'])
+            with self.assertRaises(UIError):
+                ReBench._make_args_consistent(options)  # pylint: disable=protected-access
+
+        options = ReBench().shell_options().parse_args(['--time-budget', '2h', 'some.conf'])
+        ReBench._make_args_consistent(options)  # pylint: disable=protected-access
+        self.assertIsNone(options.scheduler)
+
+    def test_execution_records_resource_usage(self):
+        yaml = load_config(self._path + '/small.conf')
+        yaml['runs']['invocations'] = 2
+        yaml['runs']['record_resource_usage'] = True
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui, data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        persistence = TestPersistence()
+        persistence.use_on(runs)
+
+        Executor(runs, False, self.ui).execute()
+        for run in runs:
+            data_points = persistence.get_data_points(run)
+            self.assertEqual(2, len(data_points))
+            for data_point in data_points:
+                measurements = {m.criterion: m for m in data_point.get_measurements()}
+                self.assertLessEqual(
+                    {'user-time', 'sys-time', 'max-rss', 'minor-faults', 'major-faults',
+                     'voluntary-context-switches', 'involuntary-context-switches'},
+                    set(measurements))
+                self.assertGreater(measurements['max-rss'].value, 0)
+                self.assertEqual('kb', measurements['max-rss'].unit)
+                self.assertTrue(data_point.get_measurements()[-1].is_total())
+
+    def test_execution_with_missing_cgroup_root_fails_runs(self):
+        yaml = load_config(self._path + '/small.conf')
+        yaml['runs']['cgroup'] = {'cpuset_cpus': 0}
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui, data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        persistence = TestPersistence()
+        persistence.use_on(runs)
+
+        missing_root = os.path.join(os.path.dirname(self._tmp_file), 'missing-cgroup')
+        Executor(runs, False, self.ui, cgroup_root=missing_root).execute()
+        for run in runs:
+            self.assertTrue(run.is_failed)
+            self.assertEqual(0, len(persistence.get_data_points(run)))
+
+    @unittest.skipUnless(is_cgroup_writable(), "Requires a writable cgroup v2 hierarchy")
+    def test_execution_in_cgroup_records_cgroup_usage(self):
+        yaml = load_config(self._path + '/small.conf')
+        yaml['runs']['invocations'] = 2
+        yaml['runs']['cgroup'] = {}
+        cnf = Configurator(yaml, DataStore(self.ui), self.ui, data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        persistence = TestPersistence()
+        persistence.use_on(runs)
+
+        with open(os.path.join(own_cgroup_path(), 'cgroup.controllers'),
+                  encoding='utf-8') as controllers_file:
+            controllers = controllers_file.read().split()
+        expected = {'cgroup-cpu-usage'}
+        if 'memory' in controllers:
+            expected.add('cgroup-memory-peak')
+        if 'io' in controllers:
+            expected.update({'cgroup-io-read', 'cgroup-io-write'})
+
+        Executor(runs, False, self.ui).execute()
+        for run in runs:
+            data_points = persistence.get_data_points(run)
+            self.assertEqual(2, len(data_points))
+            criteria = {m.criterion for m in data_points[-1].get_measurements()}
+            self.assertLessEqual(expected, criteria)
+            self.assertTrue(data_points[-1].get_measurements()[-1].is_total())
+
+    def test_shell_options_with_output_memory_limit(self):
+        options = ReBench().shell_options().parse_args(
+            ['--output-memory-limit', '64MB', 'some.conf'])
+        self.assertEqual(64 * 1024 * 1024, options.output_limit)
+
+    def test_execution_with_small_output_memory_limit(self):
+        cnf = Configurator(load_config(self._path + '/small.conf'), DataStore(self.ui),
+                           self.ui, data_file=self._tmp_file)
+        runs = cnf.get_runs()
+        ex = Executor(runs, False, self.ui, output_limit=16)
+        self.assertTrue(ex.execute())
+        for run in runs:
+            self.assertFalse(run.is_failed)
+            self.assertGreater(run.get_number_of_data_points(), 0)
+
     def test_shell_options_without_filters(self):
         option_parser = ReBench().shell_options()
         args = option_parser.parse_args(["-d", "-v", "some.conf"])
@@ -0,0 +1,210 @@
+import os
+from tempfile import mkstemp
+
+from ...binary_data import MAGIC, convert, is_binary_data_file
+from ...compact import compact
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...journal import index_path, summary_path
+from ...model.data_point import DataPoint
+from ...model.measurement import Measurement
+from ...output import UIError
+from ...persistence import DataStore
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+class BinaryDataTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(BinaryDataTest, self).setUp()
+        self._set_path(__file__)
+        self._converted = []
+
+    def tearDown(self):
+        for filename in self._converted:
+            for path in (filename, summary_path(filename), index_path(filename)):
+                if os.path.exists(path):
+                    os.remove(path)
+        super(BinaryDataTest, self).tearDown()
+
+    def _create_runs(self, exp_name, data_file=None, discard_run_data=False):
+        data_store = DataStore(self.ui)
+        cnf = Configurator(
+            load_config(self._path + "/binary_data.conf"),
+            data_store,
+            self.ui,
+            data_file=data_file or self._tmp_file,
+            exp_name=exp_name,
+        )
+        runs = list(cnf.get_runs())
+        data_store.load_data(runs, discard_run_data)
+        return sorted(runs, key=lambda run: run.benchmark.name)
+
+    def _execute(self, exp_name):
+        runs = self._create_runs(exp_name)
+        self.assertTrue(Executor(runs, False, self.ui).execute())
+        return runs
+
+    def _converted_file(self):
+        filename = mkstemp()[1]
+        os.remove(filename)
+        self._converted.append(filename)
+        return filename
+
+    def _assert_same_data(self, expected, runs):
+        self.assertEqual(len(expected), len(runs))
+        for expected_run, run in zip(expected, runs):
+            self.assertEqual(6, run.get_number_of_data_points())
+            self.assertEqual(expected_run.summary_as_dict(), run.summary_as_dict())
+
+    def test_binary_data_is_loaded(self):
+        executed = self._execute("Binary")
+        self.assertTrue(is_binary_data_file(self._tmp_file))
+
+        runs = self._create_runs("Binary")
+        self._assert_same_data(executed, runs)
+        self.assertAlmostEqual(3.0, runs[0].get_mean_of_totals())
+        self.assertAlmostEqual(14.5, runs[1].get_mean_of_totals())
+        self.assertIsNotNone(runs[0].expected_invocation_time())
+
+    def test_data_is_appended_by_later_executions(self):
+        runs = self._create_runs("Binary")
+        self.assertTrue(Executor(runs[:1], False, self.ui).execute())
+
+        runs = self._create_runs("Binary")
+        self.assertEqual(6, runs[0].get_number_of_data_points())
+        self.assertEqual(0, runs[1].get_number_of_data_points())
+        Executor(runs, False, self.ui).execute()
+
+        for run in self._create_runs("Binary"):
+            self.assertEqual(2, run.completed_invocations)
+            self.assertEqual(6, run.get_number_of_data_points())
+
+    def test_conversion_round_trip(self):
+        self._execute("Text")
+        # the expected data is loaded from the text, not from the summary
+        os.remove(summary_path(self._tmp_file))
+        expected = self._create_runs("Text")
+
+        binary = self._converted_file()
+        convert(self._tmp_file, binary)
+        self.assertTrue(is_binary_data_file(binary))
+        self.assertLess(os.path.getsize(binary), os.path.getsize(self._tmp_file))
+        self._assert_same_data(expected, self._create_runs("Binary", binary))
+
+        text = self._converted_file()
+        convert(binary, text)
+        self.assertFalse(is_binary_data_file(text))
+        self._assert_same_data(expected, self._create_runs("Text", text))
+
+    def test_incompletely_written_record_is_discarded(self):
+        executed = self._execute("Binary")
+        size = os.path.getsize(self._tmp_file)
+        with open(self._tmp_file, "ab") as data_file:
+            data_file.write(b"S\0\0\0\xff\0\0\0partial")
+
+        self._assert_same_data(executed, self._create_runs("Binary"))
+        self.assertEqual(size, os.path.getsize(self._tmp_file))
+
+    def test_data_of_rerun_is_discarded(self):
+        self._execute("Binary")
+        for run in self._create_runs("Binary", discard_run_data=True):
+            self.assertEqual(0, run.get_number_of_data_points())
+
+        with open(self._tmp_file, "rb") as data_file:
+            self.assertEqual(MAGIC, data_file.read(len(MAGIC)))
+        for run in self._create_runs("Binary"):
+            self.assertEqual(0, run.get_number_of_data_points())
+
+    def test_rerun_appends_tombstones_instead_of_rewriting(self):
+        self._execute("Binary")
+        with open(self._tmp_file, "rb") as data_file:
+            data = data_file.read()
+
+        runs = self._create_runs("Binary", discard_run_data=True)
+        with open(self._tmp_file, "rb") as data_file:
+            self.assertTrue(data_file.read().startswith(data))
+        self.assertTrue(Executor(runs, False, self.ui).execute())
+
+        for run in self._create_runs("Binary"):
+            self.assertEqual(6, run.get_number_of_data_points())
+
+    def test_compaction_removes_discarded_data(self):
+        self._execute("Binary")
+        runs = self._create_runs("Binary", discard_run_data=True)
+        Executor(runs[1:], False, self.ui).execute()
+        size = os.path.getsize(self._tmp_file)
+
+        self.assertTrue(compact(self._tmp_file))
+        self.assertLess(os.path.getsize(self._tmp_file), size)
+        runs = self._create_runs("Binary")
+        self.assertEqual(0, runs[0].get_number_of_data_points())
+        self.assertEqual(6, runs[1].get_number_of_data_points())
+        self.assertEqual(2, runs[1].completed_invocations)
+        self.assertFalse(compact(self._tmp_file))
+
+    def test_tombstones_are_converted(self):
+        self._execute("Binary")
+        self._create_runs("Binary", discard_run_data=True)
+
+        text = self._converted_file()
+        convert(self._tmp_file, text)
+        for run in self._create_runs("Text", text):
+            self.assertEqual(0, run.get_number_of_data_points())
+
+        binary = self._converted_file()
+        convert(text, binary)
+        for run in self._create_runs("Binary", binary):
+            self.assertEqual(0, run.get_number_of_data_points())
+
+    def _record_with_detected_warmup(self, run):
+        for invocation in (1, 2):
+            run.invocation_started(invocation)
+            run.record_detected_warmup(invocation, invocation)
+            for iteration in (1, 2, 3):
+                data_point = DataPoint(run)
+                data_point.add_measurement(
+                    Measurement(invocation, iteration, 1.0, "ms", run, "total")
+                )
+                run.add_data_point(
+                    data_point, run.is_warmup_iteration(invocation, iteration)
+                )
+            run.invocation_completed(invocation)
+        run.close_files()
+
+    def test_detected_warmup_is_metadata_of_invocations(self):
+        self._record_with_detected_warmup(self._create_runs("Binary")[0])
+
+        run = self._create_runs("Binary")[0]
+        self.assertEqual({1: 1, 2: 2}, run.detected_warmups())
+        # the detected warmup is not part of the data points
+        self.assertEqual(3, run.get_number_of_data_points())
+
+        text = self._converted_file()
+        convert(self._tmp_file, text)
+        run = self._create_runs("Text", text)[0]
+        self.assertEqual({1: 1, 2: 2}, run.detected_warmups())
+
+        self._create_runs("Binary", discard_run_data=True)
+        self.assertEqual({}, self._create_runs("Binary")[0].detected_warmups())
+
+    def test_metadata_of_run_is_discarded_with_its_data(self):
+        runs = self._execute("Binary")
+        runs[0].calibrated("iterations", 5)
+        runs[0].close_files()
+
+        self._create_runs("Binary", discard_run_data=True)
+        run = self._create_runs("Binary")[0]
+        self.assertIsNone(run.calibration)
+        self.assertIsNone(run.expected_invocation_time())
+
+        self.assertTrue(compact(self._tmp_file))
+        run = self._create_runs("Binary")[0]
+        self.assertIsNone(run.calibration)
+        self.assertIsNone(run.expected_invocation_time())
+
+    def test_data_file_in_other_format_is_rejected(self):
+        self._execute("Text")
+        with self.assertRaises(UIError):
+            self._create_runs("Binary")
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# simple script emulating an executor with multiple criteria per data point
+import sys
+
+OFFSET = 1.5 if sys.argv[1] == "Bench1" else 7.25
+
+for i in range(1, 4):
+    print("RESULT-compile:ms: %f" % (i / 3.0))
+    print("RESULT-memory:kbyte: %d" % (1000 * i))
+    print("RESULT-total: %f" % (OFFSET * i))
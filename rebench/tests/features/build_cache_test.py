@@ -0,0 +1,90 @@
+# Copyright (c) 2009-2014 Stefan Marr <http://www.stefan-marr.de/>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import os
+
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...persistence import DataStore
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+class BuildCacheTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(BuildCacheTest, self).setUp()
+        self._set_path(__file__)
+        self._cleanup()
+        self._write_input("version 1")
+
+    def tearDown(self):
+        super(BuildCacheTest, self).tearDown()
+        self._cleanup()
+
+    def _cleanup(self):
+        for name in ["build_cache.log", "build_cache.json", "build_cache_a.input"]:
+            if os.path.isfile(self._path + "/" + name):
+                os.remove(self._path + "/" + name)
+
+    def _write_input(self, content):
+        with open(
+            self._path + "/build_cache_a.input", "w", encoding="utf-8"
+        ) as input_file:
+            input_file.write(content)
+
+    def _execute(self, force_build=False):
+        cnf = Configurator(
+            load_config(self._path + "/build_cache.conf"),
+            DataStore(self.ui),
+            self.ui,
+            data_file=self._tmp_file,
+        )
+        runs = list(cnf.get_runs())
+        ex = Executor(
+            runs,
+            True,
+            self.ui,
+            build_log=cnf.build_log,
+            build_cache=cnf.build_cache,
+            force_build=force_build,
+        )
+        self.assertTrue(ex.execute())
+
+    def _number_of_builds(self):
+        if not os.path.isfile(self._path + "/build_cache.log"):
+            return 0
+        with open(self._path + "/build_cache.log", "r", encoding="utf-8") as log:
+            return log.read().count("E:Cached|STD:built")
+
+    def test_unchanged_build_is_skipped(self):
+        self._execute()
+        self._execute()
+        self.assertEqual(1, self._number_of_builds())
+
+    def test_changed_input_causes_rebuild(self):
+        self._execute()
+        self._write_input("version 2")
+        self._execute()
+        self.assertEqual(2, self._number_of_builds())
+
+    def test_force_build_ignores_cache(self):
+        self._execute()
+        self._execute(force_build=True)
+        self.assertEqual(2, self._number_of_builds())
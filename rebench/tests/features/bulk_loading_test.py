@@ -0,0 +1,132 @@
+import os
+import unittest
+from tempfile import mkstemp
+
+from ...bulk_loading import is_available
+from ...configurator import Configurator, load_config
+from ...journal import index_path, summary_path
+from ...model.data_point import DataPoint
+from ...model.measurement import Measurement
+from ...persistence import DataStore
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+@unittest.skipUnless(is_available(), "bulk loading requires NumPy")
+class BulkLoadingTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(BulkLoadingTest, self).setUp()
+        self._set_path(__file__)
+        self._binary_file = mkstemp()[1]
+
+    def tearDown(self):
+        for path in (
+            self._binary_file,
+            summary_path(self._binary_file),
+            index_path(self._binary_file),
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+        super(BulkLoadingTest, self).tearDown()
+
+    def _create_runs(self, load_in_bulk=True, selected=None):
+        config = load_config(self._path + "/bulk_loading.conf")
+        config["experiments"]["Binary"]["data_file"] = self._binary_file
+        data_store = DataStore(self.ui, load_in_bulk)
+        cnf = Configurator(config, data_store, self.ui, data_file=self._tmp_file)
+        runs = sorted(cnf.get_runs(), key=lambda run: run.benchmark.name)
+        data_store.load_data(
+            None if selected is None else [runs[i] for i in selected], False
+        )
+        return runs
+
+    def _record(self, invocations):
+        runs = self._create_runs()
+        for run in runs:
+            for invocation in invocations:
+                run.invocation_started(invocation)
+                for iteration in range(1, 6):
+                    data_point = DataPoint(run)
+                    if invocation == 2 and iteration == 1:
+                        run.record_detected_warmup(invocation, 2)
+                    data_point.add_measurement(
+                        Measurement(invocation, iteration, 1.5, "ms", run, "compile")
+                    )
+                    data_point.add_measurement(
+                        Measurement(
+                            invocation,
+                            iteration,
+                            10.0 * invocation + iteration * iteration,
+                            "ms",
+                            run,
+                            "total",
+                        )
+                    )
+                    run.add_data_point(
+                        data_point, run.is_warmup_iteration(invocation, iteration)
+                    )
+                run.invocation_completed(invocation, 0.5 * invocation)
+            run.close_files()
+
+    def _load(self, load_in_bulk, selected=None):
+        # the data is loaded from the data file, not from the summary
+        if os.path.exists(summary_path(self._tmp_file)):
+            os.remove(summary_path(self._tmp_file))
+        return self._create_runs(load_in_bulk, selected)
+
+    def _assert_same_state(self, expected, runs):
+        for expected_run, run in zip(expected, runs):
+            expected_state = expected_run.summary_as_dict()
+            state = run.summary_as_dict()
+            for key in ("statistics", "invocation_means"):
+                expected_aggregates = expected_state.pop(key, [])
+                aggregates = state.pop(key, [])
+                self.assertEqual(len(expected_aggregates), len(aggregates), key)
+                for expected_value, value in zip(expected_aggregates, aggregates):
+                    self.assertAlmostEqual(expected_value, value, msg=key)
+            self.assertEqual(expected_state, state)
+
+    def test_bulk_loading_matches_loading_data_points(self):
+        self._record([1, 2, 3])
+        expected = self._load(False)
+        runs = self._load(True)
+
+        self._assert_same_state(expected, runs)
+        bench1, _, bench3 = runs
+        # Bench1 has a configured warmup of 1 iteration, and invocation 2
+        # a detected warmup of 2 iterations for both
+        self.assertEqual(4 + 3 + 4, bench1.get_number_of_data_points())
+        self.assertEqual(5 + 3 + 5, bench3.get_number_of_data_points())
+        self.assertEqual(3, bench3.completed_invocations)
+        self.assertEqual({2: 2}, bench3.summary_as_dict()["warmup"])
+        self.assertEqual("ms", bench3.total_unit)
+        # the means of the invocations, without the detected warmup of invocation 2
+        self.assertEqual(3, bench3.invocation_statistics().num_samples)
+        self.assertAlmostEqual(
+            (21 + 110 / 3.0 + 41) / 3, bench3.invocation_statistics().mean
+        )
+
+    def test_executions_continue_after_bulk_loading(self):
+        self._record([1, 2])
+        self.assertEqual(2, self._load(True)[0].completed_invocations)
+        self._record([3])
+
+        self._assert_same_state(self._load(False), self._load(True))
+
+    def test_only_selected_runs_are_loaded(self):
+        self._record([1, 2, 3])
+        os.remove(summary_path(self._tmp_file))
+        bench1, bench2, _ = self._load(True, selected=[0])
+
+        self.assertEqual(11, bench1.get_number_of_data_points())
+        self.assertEqual(0, bench2.get_number_of_data_points())
+        # the summary would not cover the data of the runs that were not loaded
+        self.assertFalse(os.path.exists(summary_path(self._tmp_file)))
+
+    def test_unparsable_lines_are_loaded_as_data_points(self):
+        self._record([1, 2, 3])
+        with open(self._tmp_file, "a", encoding="utf-8") as data_file:
+            data_file.write("1\tnot a measurement\n")
+
+        self._assert_same_state(self._load(False), self._load(True))
@@ -0,0 +1,91 @@
+import os
+from unittest.mock import Mock, patch
+
+from ...calibration import without_unselected_input_sizes
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...journal import summary_path
+from ...persistence import DataStore
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+class CalibrationTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(CalibrationTest, self).setUp()
+        self._set_path(__file__)
+
+    def _create_runs(self, exp_name):
+        data_store = DataStore(self.ui)
+        cnf = Configurator(
+            load_config(self._path + "/calibration.conf"),
+            data_store,
+            self.ui,
+            data_file=self._tmp_file,
+            exp_name=exp_name,
+        )
+        data_store.load_data(None, False)
+        return list(cnf.get_runs())
+
+    def _run(self, runs, benchmark):
+        return next(run for run in runs if run.benchmark.name == benchmark)
+
+    def test_iterations_are_calibrated(self):
+        runs = [self._run(self._create_runs("Iterations"), "Scaling")]
+        self.assertTrue(Executor(runs, False, self.ui).execute())
+
+        kind, iterations = runs[0].calibration
+        self.assertEqual("iterations", kind)
+        # within 10% of the 25 iterations needed to reach 50ms per iteration
+        self.assertGreaterEqual(iterations, 25)
+        self.assertLessEqual(iterations, 28)
+        self.assertEqual(2 * iterations, runs[0].get_number_of_data_points())
+
+    def test_iterations_without_effect_are_not_calibrated(self):
+        runs = [self._run(self._create_runs("Iterations"), "Flat")]
+        self.assertTrue(Executor(runs, False, self.ui).execute())
+
+        self.assertIsNone(runs[0].calibration)
+        self.assertEqual(2, runs[0].get_number_of_data_points())
+
+    def test_first_input_size_reaching_target_is_selected(self):
+        runs = self._create_runs("InputSizes")
+        self.assertEqual(4, len(runs))
+        self.assertTrue(Executor(runs, False, self.ui).execute())
+
+        executed = [run for run in runs if run.get_number_of_data_points()]
+        self.assertEqual(1, len(executed))
+        self.assertEqual(30, executed[0].input_size)
+        self.assertEqual(("input_sizes", 30), executed[0].calibration)
+
+    def test_runs_are_not_probed_with_workers(self):
+        runs = self._create_runs("InputSizes")
+        executor = Executor(runs, False, self.ui, workers=Mock())
+        with patch.object(executor, "execute_probe") as probe:
+            executor._calibrate_runs()  # pylint: disable=protected-access
+
+        probe.assert_not_called()
+        self.assertEqual(4, len(executor.runs))
+        self.assertEqual([None] * 4, [run.calibration for run in runs])
+
+    def _assert_calibration_is_restored(self):
+        runs = self._create_runs("Iterations")
+        self.assertEqual("iterations", self._run(runs, "Scaling").calibration[0])
+        self.assertIsNone(self._run(runs, "Flat").calibration)
+
+        selected = without_unselected_input_sizes(self._create_runs("InputSizes"))
+        self.assertEqual([("input_sizes", 30)], [run.calibration for run in selected])
+
+    def test_calibration_is_persisted(self):
+        Executor(self._create_runs("Iterations"), False, self.ui).execute()
+        Executor(self._create_runs("InputSizes"), False, self.ui).execute()
+
+        self._assert_calibration_is_restored()
+        summary = summary_path(self._tmp_file)
+        with open(summary, "r", encoding="utf-8") as summary_file:
+            self.assertIn("calibration", summary_file.read())
+
+        # without summary, the calibration is read from the data file
+        os.remove(summary)
+        self._assert_calibration_is_restored()
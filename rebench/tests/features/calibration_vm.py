@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# simple script emulating an executor, whose iteration time grows with the
+# work of an iteration, given as number of iterations and as input size
+import sys
+
+benchmark = sys.argv[1]
+iterations = int(sys.argv[2])
+input_size = int(sys.argv[3])
+
+for _ in range(iterations):
+    if benchmark == "Scaling":
+        print("RESULT-total: ", 2.0 * iterations * input_size)
+    else:
+        print("RESULT-total: ", 10.0)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# a worker that is lost after completing the first invocation of its run
+import json
+import sys
+
+
+def send(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+sys.stdin.readline()
+send({"type": "ready"})
+sys.stdin.readline()
+for i in range(1, 4):
+    total = {"c": "total", "in": 1, "it": i, "u": "ms", "v": 10.0 * i}
+    send({"type": "data", "measurements": [total]})
+send({"type": "invocation", "invocation": 1, "time": 0.1})
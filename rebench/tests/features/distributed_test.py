@@ -0,0 +1,197 @@
+import os
+import socket
+import sys
+from subprocess import PIPE, Popen
+from tempfile import mkdtemp
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+from ...configurator import Configurator, load_config
+from ...distributed import (
+    TOKEN_ENV_VAR,
+    DistributedScheduler,
+    Workers,
+    format_address,
+    listen,
+)
+from ...executor import Executor
+from ...persistence import DataStore
+from ...ui import TestDummyUI
+from ...worker import _Session
+
+from ..rebench_test_case import ReBenchTestCase
+
+_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+)
+_WORKER = "PYTHONPATH=%s %s -m rebench.worker" % (_ROOT, sys.executable)
+_TOKEN = "secret"
+
+
+def _ipv6_is_available():
+    try:
+        with socket.create_server(("::1", 0), family=socket.AF_INET6):
+            return True
+    except OSError:
+        return False
+
+
+class DistributedTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(DistributedTest, self).setUp()
+        self._set_path(__file__)
+        self._servers = []
+
+    def tearDown(self):
+        for server in self._servers:
+            server.kill()
+            server.wait()
+            server.stderr.close()
+        super(DistributedTest, self).tearDown()
+
+    def _create_runs(self):
+        config = load_config(self._path + "/distributed.conf")
+        data_store = DataStore(self.ui)
+        cnf = Configurator(config, data_store, self.ui, data_file=self._tmp_file)
+        data_store.load_data(None, False)
+        return config, list(cnf.get_runs())
+
+    def _execute(self, addresses, with_failing=True):
+        config, runs = self._create_runs()
+        if not with_failing:
+            runs = [run for run in runs if run.benchmark.name != "Failing"]
+        workers = Workers(addresses, config, [self._path + "/distributed.conf"])
+        Executor(runs, False, self.ui, workers=workers).execute()
+        return runs
+
+    def _start_worker(self, address, token=_TOKEN):
+        env = dict(os.environ)
+        env.pop(TOKEN_ENV_VAR, None)
+        if token is not None:
+            env[TOKEN_ENV_VAR] = token
+        # pylint: disable-next=consider-using-with
+        server = Popen(
+            [sys.executable, "-m", "rebench.worker", "--listen", address],
+            cwd=_ROOT,
+            env=env,
+            stderr=PIPE,
+            text=True,
+        )
+        self._servers.append(server)
+        # the worker reports its address once it accepts connections
+        line = server.stderr.readline()
+        self.assertTrue(line.startswith("Listening on "), line)
+        return line[len("Listening on ") :].strip()
+
+    def _assert_runs_completed(self, runs):
+        for run in runs:
+            if run.benchmark.name == "Failing":
+                self.assertTrue(run.is_failed)
+                self.assertEqual(0, run.get_number_of_data_points())
+            else:
+                self.assertFalse(run.is_failed, run.benchmark.name)
+                self.assertEqual(3, run.completed_invocations)
+                self.assertEqual(9, run.get_number_of_data_points())
+
+    def _assert_data_is_persisted(self):
+        _, runs = self._create_runs()
+        for run in runs:
+            if run.benchmark.name != "Failing":
+                self.assertEqual(9, run.get_number_of_data_points())
+
+    def test_detected_warmup_is_received_with_invocation(self):
+        _, runs = self._create_runs()
+        run = runs[0]
+        data_points = [
+            [{"in": 1, "it": iteration, "v": 1.0, "u": "ms", "c": "total"}]
+            for iteration in (1, 2, 3)
+        ]
+        # pylint: disable-next=protected-access
+        DistributedScheduler._record_invocation(run, 1, 0.5, 2, data_points)
+        self.assertEqual({1: 2}, run.detected_warmups())
+        self.assertEqual(1, run.get_number_of_data_points())
+
+    def test_denoise_settings_are_forwarded_to_workers(self):
+        config, runs = self._create_runs()
+        workers = Workers([], config, [self._path + "/distributed.conf"], True, False)
+        session = _Session(Mock(), TestDummyUI())
+        session._setup(workers.setup_message())  # pylint: disable=protected-access
+
+        run = runs[0]
+        with patch("rebench.worker.Executor") as executor:
+            # pylint: disable-next=protected-access
+            session._execute({"run": run.as_dict(), "state": run.summary_as_dict()})
+        _, kwargs = executor.call_args
+        self.assertTrue(kwargs["use_nice"])
+        self.assertFalse(kwargs["use_shielding"])
+
+    def test_workers_started_by_command(self):
+        runs = self._execute([_WORKER, _WORKER])
+        self._assert_runs_completed(runs)
+        self._assert_data_is_persisted()
+
+    def test_workers_on_sockets(self):
+        unix_address = self._start_worker("unix:" + mkdtemp() + "/worker.sock", None)
+        tcp_address = self._start_worker("tcp:127.0.0.1:0")
+        self.assertTrue(tcp_address.startswith("tcp:127.0.0.1:"))
+
+        with patch.dict(os.environ, {TOKEN_ENV_VAR: _TOKEN}):
+            runs = self._execute([unix_address, tcp_address])
+        self._assert_runs_completed(runs)
+        self._assert_data_is_persisted()
+
+    @skipUnless(_ipv6_is_available(), "IPv6 is not available")
+    def test_worker_on_ipv6_socket(self):
+        address = self._start_worker("tcp:[::1]:0")
+        self.assertTrue(address.startswith("tcp:[::1]:"))
+
+        with patch.dict(os.environ, {TOKEN_ENV_VAR: _TOKEN}):
+            runs = self._execute([address])
+        self._assert_runs_completed(runs)
+
+    def test_worker_without_host_listens_on_loopback(self):
+        with listen("tcp::0") as sock:
+            self.assertTrue(format_address(sock).startswith("tcp:127.0.0.1:"))
+
+    def test_tcp_worker_requires_token(self):
+        env = dict(os.environ)
+        env.pop(TOKEN_ENV_VAR, None)
+        # pylint: disable-next=consider-using-with
+        server = Popen(
+            [sys.executable, "-m", "rebench.worker", "--listen", "tcp:127.0.0.1:0"],
+            cwd=_ROOT,
+            env=env,
+            stdout=PIPE,
+            stderr=PIPE,
+            text=True,
+        )
+        self._servers.append(server)
+        output, _ = server.communicate()
+        self.assertEqual(1, server.returncode)
+        self.assertIn(TOKEN_ENV_VAR, output)
+
+    def test_coordinator_with_wrong_token_is_rejected(self):
+        address = self._start_worker("tcp:127.0.0.1:0")
+
+        with patch.dict(os.environ, {TOKEN_ENV_VAR: "wrong"}):
+            runs = self._execute([address])
+        for run in runs:
+            self.assertTrue(run.is_failed)
+            self.assertEqual(0, run.get_number_of_data_points())
+
+    def test_unavailable_worker_is_skipped(self):
+        runs = self._execute(["unix:/nonexistent/worker.sock", _WORKER])
+        self._assert_runs_completed(runs)
+
+    def test_runs_of_lost_worker_are_continued(self):
+        lost = "%s %s/distributed_lost_worker.py" % (sys.executable, self._path)
+        # the lost worker reports data for any run, so it should not be one that fails
+        runs = self._execute([lost, _WORKER], with_failing=False)
+        self._assert_runs_completed(runs)
+
+    def test_without_workers_runs_are_not_executed(self):
+        runs = self._execute(["unix:/nonexistent/worker.sock"])
+        for run in runs:
+            self.assertTrue(run.is_failed)
+            self.assertEqual(0, run.get_number_of_data_points())
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# simple script emulating an executor, executed by a worker
+import sys
+
+if sys.argv[1] == "Failing":
+    print("FAILED: as intended")
+    sys.exit(1)
+
+for i in range(1, 4):
+    print("RESULT-total: ", 10.0 * i)
@@ -0,0 +1,58 @@
+# Copyright (c) 2009-2014 Stefan Marr <http://www.stefan-marr.de/>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+from time import time
+
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...persistence import DataStore
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+class FailFastTest(ReBenchTestCase):
+    """
+    The fail_fast_vm.py reports a segmentation fault and then hangs.
+    The run is expected to be aborted right away, instead of timing out.
+    """
+
+    def setUp(self):
+        super(FailFastTest, self).setUp()
+        self._set_path(__file__)
+
+    def _create_runs(self):
+        data_store = DataStore(self.ui)
+        cnf = Configurator(
+            load_config(self._path + "/fail_fast.conf"),
+            data_store,
+            self.ui,
+            data_file=self._tmp_file,
+        )
+        data_store.load_data(None, False)
+        return cnf.get_runs()
+
+    def test_run_is_aborted_when_error_is_reported(self):
+        runs = self._create_runs()
+        start = time()
+        Executor(runs, False, self.ui).execute()
+
+        self.assertLess(time() - start, 30)
+        run = list(runs)[0]
+        self.assertTrue(run.is_failed)
+        self.assertEqual(0, run.get_number_of_data_points())
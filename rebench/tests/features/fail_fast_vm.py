@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+# simple script emulating an executor that reports an error and then hangs
+import sys
+import time
+
+print("RESULT-total: ", 100.0, flush=True)
+print("Segmentation fault", flush=True)
+time.sleep(int(sys.argv[1]))
+print("RESULT-total: ", 100.0)
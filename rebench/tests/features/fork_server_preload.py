@@ -0,0 +1,4 @@
+# imported by the fork server, before it forks the benchmarks
+import os
+
+LOADED_BY = os.getpid()
@@ -0,0 +1,91 @@
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+from time import time
+from unittest import skipUnless
+
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...fork_server import ForkServer
+from ...persistence import DataStore
+from ...subprocess_with_timeout import run_forked
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+class ForkServerTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(ForkServerTest, self).setUp()
+        self._set_path(__file__)
+
+    def _create_runs(self, exp_name, benchmark):
+        cnf = Configurator(
+            load_config(self._path + "/fork_server.conf"),
+            DataStore(self.ui),
+            self.ui,
+            data_file=self._tmp_file,
+            exp_name=exp_name,
+        )
+        runs = [run for run in cnf.get_runs() if run.benchmark.name == benchmark]
+        return cnf, runs
+
+    def test_invocations_are_forked_from_fork_server(self):
+        _, runs = self._create_runs("Forked", "Bench1")
+        self.assertTrue(Executor(runs, False, self.ui).execute())
+
+        self.assertFalse(runs[0].is_failed)
+        self.assertEqual(3, runs[0].completed_invocations)
+        self.assertEqual(3, runs[0].get_number_of_data_points())
+
+    def test_timeout_kills_forked_invocation(self):
+        _, runs = self._create_runs("Forked", "Sleep")
+        start = time()
+        Executor(runs, False, self.ui).execute()
+
+        self.assertTrue(runs[0].is_failed)
+        self.assertLess(time() - start, 8)
+
+    @skipUnless(
+        hasattr(os, "sched_setaffinity"),
+        "setting the CPU affinity is not supported on this platform",
+    )
+    def test_forked_child_is_pinned_before_it_executes(self):
+        cpu_set = {max(os.sched_getaffinity(0))}
+        server = ForkServer(
+            "Forked",
+            "python3 ../../zygote.py --preload fork_server_preload",
+            self._path,
+            None,
+        )
+        server.start()
+        try:
+            return_code, output, _ = run_forked(
+                server,
+                ["fork_server_vm.py", "Affinity"],
+                dict(os.environ),
+                self._path,
+                timeout=10,
+                cpu_set=cpu_set,
+            )
+        finally:
+            server.stop()
+
+        self.assertEqual(0, return_code)
+        self.assertIn("AFFINITY: %s\n" % sorted(cpu_set), str(output))
+
+    def test_terminated_fork_server_fails_run(self):
+        _, runs = self._create_runs("Broken", "Bench1")
+        self.assertFalse(Executor(runs, False, self.ui).execute())
+        self.assertTrue(runs[0].is_failed)
+        self.assertEqual(0, runs[0].get_number_of_data_points())
+
+    def test_execution_plan_shows_fork_server(self):
+        _, runs = self._create_runs("Forked", "Bench1")
+        output = StringIO()
+        with redirect_stdout(output):
+            Executor(runs, False, self.ui, print_execution_plan=True).execute()
+        self.assertIn(
+            "# forked from: python3 ../../zygote.py --preload fork_server_preload",
+            output.getvalue(),
+        )
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# simple script emulating an executor, which is forked from a fork server
+import os
+import sys
+from time import sleep
+
+import fork_server_preload  # type: ignore  # pylint: disable=import-error
+
+if fork_server_preload.LOADED_BY == os.getpid():
+    print("FAILED: the benchmark was not forked from the fork server")
+    sys.exit(1)
+
+if sys.argv[1] == "Sleep":
+    sleep(10)
+
+if sys.argv[1] == "Affinity":
+    print("AFFINITY:", sorted(os.sched_getaffinity(0)))
+
+print("RESULT-total: ", 10.0)
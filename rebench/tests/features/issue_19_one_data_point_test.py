@@ -18,7 +18,8 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 from ...configurator     import Configurator, load_config
-from ...executor         import Executor, RoundRobinScheduler
+from ...executor         import Executor
+from ...scheduler        import RoundRobinScheduler
 from ...persistence      import DataStore
 from ...reporter         import Reporter
 from ..rebench_test_case import ReBenchTestCase
@@ -47,6 +47,7 @@ class Issue42SupportForEnvironmentVariables(ReBenchTestCase):
         self._cleanup_log()
 
     def tearDown(self):
+        super(Issue42SupportForEnvironmentVariables, self).tearDown()
         self._cleanup_log()
 
     def _cleanup_log(self):
@@ -100,21 +101,21 @@ class Issue42SupportForEnvironmentVariables(ReBenchTestCase):
         ex.execute()
 
         log = self._read_log()
-        parts = log.split("|", 2)
-        self.assertEqual("E:exe-with-build-and-env", parts[0])
-
-        env_parts = parts[1].split(":")
-        env = sorted(env_parts[1].split("\n"))
-        self.assertEqual("", env[0])
-        self.assertTrue(env[1].startswith("PWD="))
-        if env[2].startswith("SHLVL"):  # Platform differences
-            self.assertEqual("SHLVL=1", env[2])
-            self.assertEqual("VAR1=test", env[3])
-            self.assertEqual("VAR3=another test", env[4])
-            self.assertTrue(env[5].startswith("_="))
-        else:
+        prefix = "E:exe-with-build-and-env|STD:"
+        lines = log.strip().split("\n")
+        for line in lines:
+            self.assertTrue(line.startswith(prefix))
+
+        env = sorted(line[len(prefix):] for line in lines)
+        self.assertTrue(env[0].startswith("PWD="))
+        if env[1].startswith("SHLVL"):  # Platform differences
+            self.assertEqual("SHLVL=1", env[1])
             self.assertEqual("VAR1=test", env[2])
             self.assertEqual("VAR3=another test", env[3])
+            self.assertTrue(env[4].startswith("_="))
+        else:
+            self.assertEqual("VAR1=test", env[1])
+            self.assertEqual("VAR3=another test", env[2])
 
     def test_build_and_run_without_env_should_have_empty_env(self):
         cnf = Configurator(load_config(self._path + '/issue_42.conf'), DataStore(self.ui),
@@ -30,6 +30,15 @@ class Issue59BuildSuite(ReBenchTestCase):
     def setUp(self):
         super(Issue59BuildSuite, self).setUp()
         self._set_path(__file__)
+        self._cleanup_log()
+
+    def tearDown(self):
+        super(Issue59BuildSuite, self).tearDown()
+        self._cleanup_log()
+
+    def _cleanup_log(self):
+        if os.path.isfile(self._path + "/build.log"):
+            os.remove(self._path + "/build.log")
 
     def test_build_suite1(self):
         cnf = Configurator(load_config(self._path + '/issue_59.conf'), DataStore(self.ui),
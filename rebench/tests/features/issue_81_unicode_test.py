@@ -30,6 +30,13 @@ class Issue81UnicodeSuite(ReBenchTestCase):
     def setUp(self):
         super(Issue81UnicodeSuite, self).setUp()
         self._set_path(__file__)
+        self._cleanup_log()
+
+    def tearDown(self):
+        super(Issue81UnicodeSuite, self).tearDown()
+        self._cleanup_log()
+
+    def _cleanup_log(self):
         if os.path.exists(self._path + "/build.log"):
             os.remove(self._path + "/build.log")
 
@@ -57,6 +64,3 @@ class Issue81UnicodeSuite(ReBenchTestCase):
 
         self.assertGreaterEqual(log.find(unicode_char, 42), 61)  # S:Suite1|STD:
         self.assertGreaterEqual(log.find(unicode_char, 70), 86)  # S:Suite1|ERR:
-
-        if os.path.exists(self._path + "/build.log"):
-            os.remove(self._path + "/build.log")
@@ -0,0 +1,90 @@
+# Copyright (c) 2009-2014 Stefan Marr <http://www.stefan-marr.de/>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+import os
+from time import time
+
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...persistence import DataStore
+
+from ..rebench_test_case import ReBenchTestCase
+
+
+class ParallelBuildTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(ParallelBuildTest, self).setUp()
+        self._set_path(__file__)
+        self._cleanup()
+
+    def tearDown(self):
+        super(ParallelBuildTest, self).tearDown()
+        self._cleanup()
+
+    def _cleanup(self):
+        for name in ["parallel_build.log", "parallel_build_suite.marker"]:
+            if os.path.isfile(self._path + "/" + name):
+                os.remove(self._path + "/" + name)
+
+    def _create_runs(self, exp_name):
+        cnf = Configurator(
+            load_config(self._path + "/parallel_build.conf"),
+            DataStore(self.ui),
+            self.ui,
+            data_file=self._tmp_file,
+            exp_name=exp_name,
+        )
+        return cnf, list(cnf.get_runs())
+
+    def _read_log_lines(self):
+        with open(self._path + "/parallel_build.log", "r", encoding="utf-8") as log:
+            return log.read().splitlines()
+
+    def test_independent_builds_execute_concurrently(self):
+        cnf, runs = self._create_runs("Parallel")
+        ex = Executor(runs, True, self.ui, build_log=cnf.build_log, num_build_workers=2)
+
+        start = time()
+        self.assertTrue(ex.execute())
+        elapsed = time() - start
+
+        # each executor build takes 2 seconds
+        self.assertLess(elapsed, 3.5)
+        for run in runs:
+            self.assertEqual(1, run.get_number_of_data_points())
+
+    def test_suite_is_built_after_its_executors(self):
+        cnf, runs = self._create_runs("Parallel")
+        ex = Executor(runs, True, self.ui, build_log=cnf.build_log, num_build_workers=2)
+        ex.execute()
+
+        lines = self._read_log_lines()
+        self.assertEqual(["E:SlowA|STD:a", "E:SlowB|STD:b"], sorted(lines[:2]))
+        self.assertEqual(["S:Suite|STD:suite"], lines[2:])
+
+    def test_failed_build_skips_dependent_builds_and_runs(self):
+        cnf, runs = self._create_runs("Broken")
+        ex = Executor(runs, True, self.ui, build_log=cnf.build_log)
+        self.assertFalse(ex.execute())
+
+        self.assertFalse(os.path.isfile(self._path + "/parallel_build_suite.marker"))
+        for run in runs:
+            self.assertTrue(run.is_failed)
+            self.assertEqual(0, run.get_number_of_data_points())
@@ -0,0 +1,3 @@
+#!/usr/bin/env python3
+# simple script emulating an executor that reports a single result
+print("RESULT-total: ", 10.0)
@@ -0,0 +1,94 @@
+# Copyright (c) 2009-2014 Stefan Marr <http://www.stefan-marr.de/>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+from ...configurator import Configurator, load_config
+from ...executor import Executor
+from ...persistence import DataStore
+
+from ..persistence import TestPersistence
+from ..rebench_test_case import ReBenchTestCase
+
+
+class WarmupDetectionTest(ReBenchTestCase):
+    """
+    The warmup_detection_vm.py reaches its steady state after 4 iterations,
+    which should be detected and recorded for each invocation.
+    """
+
+    def setUp(self):
+        super(WarmupDetectionTest, self).setUp()
+        self._set_path(__file__)
+
+    def _execute(self, yaml=None):
+        if yaml is None:
+            yaml = load_config(self._path + "/warmup_detection.conf")
+        data_store = DataStore(self.ui)
+        cnf = Configurator(yaml, data_store, self.ui, data_file=self._tmp_file)
+        data_store.load_data(None, False)
+        runs = cnf.get_runs()
+        persistence = TestPersistence()
+        persistence.use_on(runs)
+
+        Executor(runs, False, self.ui).execute()
+        return list(runs)[0], persistence.get_data_points()
+
+    def test_warmup_iterations_are_excluded_from_statistics(self):
+        run, _ = self._execute()
+        self.assertEqual(3 * 16, run.get_number_of_data_points())
+        self.assertEqual(100, run.get_mean_of_totals())
+
+    def test_detected_warmup_is_recorded_per_invocation(self):
+        run, data_points = self._execute()
+        self.assertEqual({1: 4, 2: 4, 3: 4}, run.detected_warmups())
+        self.assertNotIn(
+            "warmup",
+            {m.criterion for dp in data_points for m in dp.get_measurements()},
+        )
+
+        with open(self._tmp_file, "r", encoding="utf-8") as data_file:
+            warmup = [line for line in data_file if line.startswith("# warmup: ")]
+        self.assertEqual(
+            ["# warmup: 0 1 4\n", "# warmup: 0 2 4\n", "# warmup: 0 3 4\n"], warmup
+        )
+
+    def test_detected_warmup_is_used_when_loading_data(self):
+        self._execute()
+
+        data_store = DataStore(self.ui)
+        cnf = Configurator(
+            load_config(self._path + "/warmup_detection.conf"),
+            data_store,
+            self.ui,
+            data_file=self._tmp_file,
+        )
+        data_store.load_data(None, False)
+        run = list(cnf.get_runs())[0]
+        self.assertEqual(3, run.completed_invocations)
+        self.assertEqual(3 * 16, run.get_number_of_data_points())
+
+    def test_iterations_shrink_once_warmup_is_short(self):
+        yaml = load_config(self._path + "/warmup_detection.conf")
+        yaml["runs"]["invocations"] = 5
+        yaml["runs"]["shrink_iterations"] = True
+        run, _ = self._execute(yaml)
+
+        # after 3 invocations, half of the 20 iterations suffice
+        self.assertEqual(10, run.iterations_for_next_invocation)
+        self.assertTrue(run.cmdline_for_next_invocation().endswith(" 10"))
+        self.assertEqual(3 * 16 + 2 * 6, run.get_number_of_data_points())
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# simple script emulating an executor that reaches a steady state after 4 iterations
+import sys
+
+print(sys.argv)
+
+print("Harness Name: ", sys.argv[1])
+print("Bench Name:", sys.argv[2])
+print("Iterations: ", sys.argv[3])
+
+ITERATIONS = int(sys.argv[3])
+
+for i in range(0, ITERATIONS):
+    if i < 4:
+        print("RESULT-total: ", 2000.0 - i * 400)
+    else:
+        print("RESULT-total: ", 100.0)
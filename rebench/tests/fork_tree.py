@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# Forks processes that keep running until killed, and try to escape:
+# the leaves of a tree of processes start their own session, and thus leave
+# the process group, while the root keeps creating orphans, which get
+# reparented, and thus are no longer descendants of the root.
+import os
+import sys
+import time
+
+
+def run_forever():
+    print(os.getpid(), flush=True)
+    time.sleep(60)
+    os._exit(0)
+
+
+def create_orphan():
+    pid = os.fork()
+    if pid == 0:
+        if os.fork() == 0:
+            run_forever()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def create_tree(depth):
+    for _ in range(2):
+        if os.fork() == 0:
+            if depth == 1:
+                os.setsid()
+                run_forever()
+            create_tree(depth - 1)
+            run_forever()
+
+
+create_tree(int(sys.argv[1]))
+for _ in range(int(sys.argv[2])):
+    create_orphan()
+    time.sleep(0.01)
+run_forever()
@@ -1,5 +1,6 @@
+from os.path import dirname, join, realpath
 from unittest import TestCase
-from ...interop.adapter import instantiate_adapter
+from ...interop.adapter import instantiate_adapter, OutputNotParseable
 
 
 class AdapterTest(TestCase):
@@ -20,3 +21,70 @@ class AdapterTest(TestCase):
         self.assertIsNotNone(instantiate_adapter("ReBenchLog", False, None))
         self.assertIsNotNone(instantiate_adapter("rebenchlog", False, None))
         self.assertIsNotNone(instantiate_adapter("REBENCHLOG", False, None))
+
+    def test_adapter_classes_are_indexed_once(self):
+        first = instantiate_adapter("RebenchLog", False, None)
+        second = instantiate_adapter("RebenchLog", False, None)
+        self.assertIsNot(first, second)
+        self.assertIs(type(first), type(second))
+
+    def test_unknown_adapter_gives_none(self):
+        self.assertIsNone(instantiate_adapter("DoesNotExist", False, None))
+
+    def test_unparseable_output_keeps_tail_of_output(self):
+        adapter = instantiate_adapter("RebenchLog", False, None)
+        parser = adapter.create_parser(None, 1)
+        for i in range(100):
+            parser.feed_line("line %d" % i)
+
+        with self.assertRaises(OutputNotParseable) as ctx:
+            parser.finish()
+        message = ctx.exception.get_message()
+        self.assertIn("line 99", message)
+        self.assertNotIn("line 0\n", message)
+
+
+class _ExecutorWithConfigDir:
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+
+
+class CustomAdapterRegistryTest(TestCase):
+    def setUp(self):
+        self._executor = _ExecutorWithConfigDir(
+            join(dirname(realpath(__file__)), "..", "features")
+        )
+
+    def test_custom_adapter_module_is_compiled_once(self):
+        cfg = {"MyTestAdapter": "issue_209_adapter.py"}
+        first = instantiate_adapter(cfg, False, self._executor)
+        second = instantiate_adapter(cfg, False, self._executor)
+        self.assertIsNot(first, second)
+        self.assertIs(type(first), type(second))
+
+    def test_custom_adapters_from_different_files_are_distinct(self):
+        adapter1 = instantiate_adapter(
+            {"MyTestAdapter": "issue_209_adapter.py"}, False, self._executor
+        )
+        adapter2 = instantiate_adapter(
+            {"MyTestAdapter": "issue_209_adapter2.py"}, False, self._executor
+        )
+        self.assertIsNot(type(adapter1), type(adapter2))
+
+    def test_custom_adapter_without_parser_gets_buffered_output(self):
+        adapter = instantiate_adapter(
+            {"MyTestAdapter": "issue_209_adapter.py"}, False, self._executor
+        )
+        parser = adapter.create_parser(None, 1)
+        parser.feed_line("RESULT-total: 1.5")
+        parser.feed_line("RESULT-total: 2.5")
+
+        data = parser.finish()
+        self.assertEqual([1.5, 2.5], [d.get_total_value() for d in data])
+
+    def test_unknown_custom_adapter_gives_none(self):
+        self.assertIsNone(
+            instantiate_adapter(
+                {"NonExisting": "issue_209_adapter2.py"}, False, self._executor
+            )
+        )
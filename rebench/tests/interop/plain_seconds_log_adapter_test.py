@@ -19,7 +19,7 @@
 # IN THE SOFTWARE.
 from unittest import TestCase
 
-from ...interop.adapter      import OutputNotParseable
+from ...interop.adapter      import OutputNotParseable, ResultsIndicatedAsInvalid
 from ...interop.plain_seconds_log_adapter import PlainSecondsLogAdapter
 
 
@@ -53,3 +53,20 @@ class PlainSecondsAdapterTest(TestCase):
     def test_parse_no_data(self):
         adapter = PlainSecondsLogAdapter(False, None)
         self.assertRaises(OutputNotParseable, adapter.parse_data, "", None, 1)
+
+    def test_parser_produces_data_points_while_fed(self):
+        adapter = PlainSecondsLogAdapter(False, None)
+        parser = adapter.create_parser(None, 1)
+        parser.feed_line("0.1")
+        parser.feed_line("some other output")
+        parser.feed_line("0.2")
+
+        data = parser.finish()
+        self.assertEqual([100, 200], [d.get_total_value() for d in data])
+        self.assertEqual([1, 2], [d.get_measurements()[0].iteration for d in data])
+
+    def test_parser_indicates_error_on_the_erroneous_line(self):
+        adapter = PlainSecondsLogAdapter(False, None)
+        parser = adapter.create_parser(None, 1)
+        parser.feed_line("0.1")
+        self.assertRaises(ResultsIndicatedAsInvalid, parser.feed_line, "an error occurred")
@@ -0,0 +1,118 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from ..journal import (
+    DataFileIndex,
+    InvocationJournal,
+    read_journal,
+    read_summary,
+    write_summary,
+)
+
+
+class InvocationJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self._path = os.path.join(self._dir.name, "data.journal")
+        self._data_file = os.path.join(self._dir.name, "data")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _append_data(self, size):
+        with open(self._data_file, "ab") as data_file:
+            data_file.write(b"x" * size)
+        return os.path.getsize(self._data_file)
+
+    def test_missing_journal(self):
+        self.assertEqual((None, 0), read_journal(self._path, self._data_file))
+
+    def test_committed_invocations_are_complete(self):
+        journal = InvocationJournal(self._path, self._data_file)
+        offset = self._append_data(10)
+        journal.opened(offset)
+        journal.started(offset, "bench a", 1)
+        journal.started(offset, "bench b", 1)
+        offset = self._append_data(40)
+        journal.committed(offset, "bench a", 1)
+        journal.started(offset, "bench a", 2)
+        journal.close()
+        # partially written data of an invocation
+        self._append_data(5)
+
+        self.assertEqual((50, 2), read_journal(self._path, self._data_file))
+
+    def test_incomplete_last_record_is_ignored(self):
+        journal = InvocationJournal(self._path, self._data_file)
+        journal.started(0, "bench", 1)
+        journal.committed(self._append_data(50), "bench", 1)
+        journal.close()
+        with open(self._path, "a", encoding="utf-8") as journal_file:
+            journal_file.write("write 9")
+
+        self.assertEqual((50, 0), read_journal(self._path, self._data_file))
+
+        InvocationJournal(self._path, self._data_file).clear()
+        self.assertFalse(os.path.exists(self._path))
+
+    def test_journal_of_other_data_is_ignored(self):
+        journal = InvocationJournal(self._path, self._data_file)
+        journal.started(self._append_data(50), "bench", 1)
+        journal.close()
+
+        # the data file was replaced
+        os.remove(self._data_file)
+        with open(self._data_file, "wb") as data_file:
+            data_file.write(b"y" * 80)
+        self.assertEqual((None, 0), read_journal(self._path, self._data_file))
+
+        # the data file became smaller than the recorded size
+        os.truncate(self._data_file, 20)
+        self.assertEqual((None, 0), read_journal(self._path, self._data_file))
+
+
+class SummaryTest(unittest.TestCase):
+
+    def test_summary_of_other_data_is_rejected(self):
+        with TemporaryDirectory() as tmp:
+            data_file = os.path.join(tmp, "data")
+            summary_file = os.path.join(tmp, "data.summary")
+            with open(data_file, "w", encoding="utf-8") as data:
+                data.write("1\t1\t2.0\tms\ttotal\n")
+
+            write_summary(summary_file, data_file, 10, [], [])
+            self.assertEqual(10, read_summary(summary_file, data_file)["offset"])
+
+            with open(data_file, "r+", encoding="utf-8") as data:
+                data.write("2")
+            self.assertIsNone(read_summary(summary_file, data_file))
+
+            write_summary(summary_file, data_file, 10, [], [])
+            os.truncate(data_file, 5)
+            self.assertIsNone(read_summary(summary_file, data_file))
+
+
+class DataFileIndexTest(unittest.TestCase):
+
+    def test_ranges_leave_out_data_before_tombstone(self):
+        before = b"# run_id: 0=x\n1\t1\t1.0\tms\ttotal\t0\n# discarded: 0 2025-01-01\n"
+        after = b"2\t1\t2.0\tms\ttotal\t0\n"
+        with TemporaryDirectory() as tmp:
+            data_file = os.path.join(tmp, "data")
+            with open(data_file, "wb") as data:
+                data.write(before + after)
+            index = DataFileIndex()
+            with open(data_file, "rb") as data:
+                index.scan(data)
+
+        end = len(before) + len(after)
+        self.assertEqual({0}, index.discarded_since(0))
+        self.assertEqual(set(), index.discarded_since(len(before)))
+        self.assertEqual([[len(before), end]], index.ranges([0], 0))
+        # the metadata is kept, the discarded measurement is left out
+        metadata, discarded = len(b"# run_id: 0=x\n"), len(b"1\t1\t1.0\tms\ttotal\t0\n")
+        self.assertEqual(
+            [[0, metadata], [metadata + discarded, end]], index.ranges([0, None], 0)
+        )
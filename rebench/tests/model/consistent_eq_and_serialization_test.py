@@ -107,6 +107,14 @@ _SAME_FIELD_TEST_CASES = [
             "parallel_interference_factor",
             "execute_exclusively",
             "retries_after_failure",
+            "target_relative_ci",
+            "min_invocations",
+            "max_invocations",
+            "detect_warmup",
+            "shrink_iterations",
+            "calibrate",
+            "record_resource_usage",
+            "cgroup",
             "invocations_override",
             "iterations_override",
         },
@@ -159,6 +167,14 @@ _EXP_RUN_DETAILS_DATA = {
     "warmup": 1,
     "maxInvocationTime": 2,
     "minIterationTime": 3,
+    "target_relative_ci": 0.01,
+    "min_invocations": 3,
+    "max_invocations": 30,
+    "detect_warmup": True,
+    "shrink_iterations": True,
+    "calibrate": "iterations",
+    "record_resource_usage": True,
+    "cgroup": {"cpu_max": "50000 100000", "memory_max": "1G"},
 }
 
 _PROF_DATA = [
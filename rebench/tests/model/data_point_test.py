@@ -0,0 +1,101 @@
+from ...configurator import Configurator, load_config
+from ...model.data_point import DataPoint, criterion_of
+from ...model.measurement import Measurement
+from ...output import UIError
+from ...persistence import DataStore
+from ..rebench_test_case import ReBenchTestCase
+
+
+class DataPointTest(ReBenchTestCase):
+
+    def setUp(self):
+        super(DataPointTest, self).setUp()
+        cnf = Configurator(
+            load_config(self._path + "/small.conf"),
+            DataStore(self.ui),
+            self.ui,
+            None,
+            data_file=self._tmp_file,
+        )
+        self._run = list(cnf.get_runs())[0]
+
+    def _data_point(self):
+        point = DataPoint(self._run)
+        point.add_value(2, 3, 1.5, "ms", "compile")
+        point.add_value(2, 3, 7, "count", "gc")
+        point.add_value(2, 3, 10.25, "ms")
+        return point
+
+    def test_measurements_are_stored_in_columns(self):
+        point = self._data_point()
+        self.assertEqual(3, point.number_of_measurements())
+        self.assertEqual([1.5, 7.0, 10.25], list(point.values))
+        self.assertEqual(
+            [("compile", "ms"), ("gc", "count"), ("total", "ms")],
+            [criterion_of(i) for i in point.criterion_indexes],
+        )
+        self.assertEqual(10.25, point.get_total_value())
+        self.assertEqual("ms", point.get_total_unit())
+
+    def test_integer_values_remain_integers(self):
+        point = self._data_point()
+        self.assertEqual(
+            [("compile", "ms", 1.5), ("gc", "count", 7), ("total", "ms", 10.25)],
+            list(point.measurements()),
+        )
+        self.assertIsInstance(list(point.measurements())[1][2], int)
+        self.assertEqual(["2", "3", "7", "count", "gc"], point.as_str_lists(0)[1][:5])
+
+    def test_get_measurements_matches_added_measurements(self):
+        point = DataPoint(self._run)
+        point.add_measurement(Measurement(1, 4, 3.0, "ms", self._run, "total"))
+        measurement = point.get_measurements()[0]
+        self.assertEqual(
+            (1, 4, 3.0, "ms", "total"),
+            (
+                measurement.invocation,
+                measurement.iteration,
+                measurement.value,
+                measurement.unit,
+                measurement.criterion,
+            ),
+        )
+        self.assertIs(self._run, measurement.run_id)
+
+    def test_prepended_value_is_first_and_total_is_kept(self):
+        point = self._data_point()
+        point.prepend_value(2, "iterations", "warmup")
+        self.assertEqual(
+            ["warmup", "compile", "gc", "total"],
+            [criterion for criterion, _, _ in point.measurements()],
+        )
+        self.assertEqual(10.25, point.get_total_value())
+        self.assertEqual(2, next(point.measurements())[2])
+        self.assertIsInstance(next(point.measurements())[2], int)
+
+    def test_measurements_of_other_iteration_are_rejected(self):
+        point = self._data_point()
+        with self.assertRaises(UIError):
+            point.add_value(2, 4, 1.0, "ms", "compile")
+        with self.assertRaises(UIError):
+            point.add_value(3, 3, 1.0, "ms", "compile")
+
+    def test_second_total_is_rejected(self):
+        point = self._data_point()
+        with self.assertRaises(ValueError):
+            point.add_value(2, 3, 1.0, "ms")
+
+    def test_measurements_as_dict_for_rebenchdb(self):
+        criteria = {}
+        data = self._data_point().measurements_as_dict(criteria)
+        self.assertEqual(
+            {("compile", "ms"): 0, ("gc", "count"): 1, ("total", "ms"): 2}, criteria
+        )
+        self.assertEqual(
+            {
+                "in": 2,
+                "it": 3,
+                "m": [{"v": 1.5, "c": 0}, {"v": 7, "c": 1}, {"v": 10.25, "c": 2}],
+            },
+            data,
+        )
@@ -2,6 +2,8 @@ from os.path import expanduser
 import pytest
 
 from ...configurator import Configurator, load_config
+from ...model.data_point import DataPoint
+from ...model.measurement import Measurement
 from ...model.run_id import expand_user
 from ...persistence import DataStore
 from ..rebench_test_case import ReBenchTestCase
@@ -138,6 +140,32 @@ class RunIdTest(ReBenchTestCase):
         self.assertEqual(run_profile.benchmark.suite.executor.action, "profile")
         self.assertEqual(run_benchmark.benchmark.suite.executor.action, "benchmark")
 
+    def test_invocation_statistics_are_based_on_means_of_invocations(self):
+        run = next(run for run in self._runs if not run.is_profiling())
+        for invocation, base in ((1, 100.0), (2, 110.0)):
+            for iteration in range(1, 21):
+                data_point = DataPoint(run)
+                data_point.add_measurement(
+                    Measurement(
+                        invocation,
+                        iteration,
+                        base + iteration / 100.0,
+                        "ms",
+                        run,
+                        "total",
+                    )
+                )
+                run.add_data_point(data_point, iteration == 1)
+
+            # the iterations of a single invocation do not give a confidence interval
+            if invocation == 1:
+                self.assertLess(run.statistics.relative_ci_half_width(), 0.001)
+                self.assertIsNone(run.invocation_statistics().relative_ci_half_width())
+
+        means = run.invocation_statistics()
+        self.assertEqual(2, means.num_samples)
+        self.assertAlmostEqual(105.11, means.mean)
+
     def test_as_dict(self):
         """Check that as_dict returns the expected information. This is only a very basic test."""
         self.assertEqual(
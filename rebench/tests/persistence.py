@@ -16,6 +16,15 @@ class TestPersistence(object):
     def persist_data_point(self, data_point):
         self._data_points.append(data_point)
 
+    def invocation_started(self, run_id, invocation):
+        pass
+
+    def invocation_completed(self, run_id, invocation, invocation_time):
+        pass
+
+    def run_calibrated(self, run_id, kind, value):
+        pass
+
     def close(self):
         pass
 
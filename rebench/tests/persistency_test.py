@@ -17,6 +17,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
+import os
 import subprocess
 import json
 import sys
@@ -26,9 +27,12 @@ from .mock_http_server import MockHTTPServer
 from .rebench_test_case import ReBenchTestCase
 from .persistence import TestPersistence
 
+from ..journal import DISCARDED, DataFileIndex, InvocationJournal, index_path, journal_path, \
+    read_index, summary_path
 from ..persistence import DataStore, _ReBenchDB
 from ..rebenchdb import ReBenchDB
 
+from ..compact import compact
 from ..configurator import Configurator, load_config
 from ..environment import git_not_available, git_repo_not_initialized
 from ..executor import Executor
@@ -39,6 +43,15 @@ from ..model.exp_run_details import ExpRunDetails
 from ..model.measurement import Measurement
 from ..model.run_id import RunId
 from ..rebench import ReBench
+from ..ui import TestDummyUI
+
+
+class _RecordingUI(TestDummyUI):
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, text, run_id=None, cmd=None, cwd=None, env=None, **kw):
+        self.warnings.append(text)
 
 
 class PersistencyTest(ReBenchTestCase):
@@ -259,6 +272,261 @@ class PersistencyTest(ReBenchTestCase):
         invocation_lines = [line for line in lines if line.startswith("invocation")]
         self.assertEqual(len(invocation_lines), 1)
 
+    def _load_data(self, args=None, ui=None):
+        ds = DataStore(ui or self.ui)
+        cnf = Configurator(load_config(self._path + '/persistency.conf'),
+                           ds, ui or self.ui, args, data_file=self._tmp_file)
+        ds.load_data(None, False)
+        return list(cnf.get_runs())[0]
+
+    def test_summary_restores_runs(self):
+        self._load_config_and_run()
+        self.assertTrue(os.path.exists(summary_path(self._tmp_file)))
+        self.assertFalse(os.path.exists(journal_path(self._tmp_file)))
+
+        from_summary = self._load_data()
+        os.remove(summary_path(self._tmp_file))
+        from_data = self._load_data()
+
+        # the summary is based on the measurements before they were serialized
+        self.assertEqual(10, from_summary.completed_invocations)
+        for summarized, loaded in zip(from_summary.statistics.as_tuple(),
+                                      from_data.statistics.as_tuple()):
+            self.assertAlmostEqual(loaded, summarized, places=5)
+        self.assertAlmostEqual(from_data.invocation_statistics().mean,
+                               from_summary.invocation_statistics().mean, places=5)
+        self.assertEqual(10, from_summary.invocation_statistics().num_samples)
+        self.assertEqual(from_data.total_unit, from_summary.total_unit)
+
+    def test_summary_keeps_only_aggregates(self):
+        self._load_config_and_run()
+        with open(summary_path(self._tmp_file), "r", encoding="utf-8") as summary_file:
+            state = json.load(summary_file)["runs"][0]["state"]
+        self.assertEqual({"invocations", "unit", "statistics", "invocation_means",
+                          "invocation_times"}, set(state))
+        self.assertEqual(10, state["invocations"])
+        self.assertEqual(6, len(state["statistics"]))
+
+    def test_invocation_time_is_persisted(self):
+        self._load_config_and_run()
+        with open(self._tmp_file, "r", encoding="utf-8") as data_file:
+            time_lines = [line for line in data_file if line.startswith("# invocation_time: ")]
+        self.assertEqual(10, len(time_lines))
+
+        os.remove(summary_path(self._tmp_file))
+        run = self._load_data()
+        self.assertGreater(run.expected_invocation_time(), 0)
+        self.assertLess(run.expected_invocation_time(), 10)
+
+    def test_data_after_summary_is_loaded(self):
+        self._load_config_and_run()
+        with open(summary_path(self._tmp_file), "r", encoding="utf-8") as summary_file:
+            summary = summary_file.read()
+
+        args = ReBench().shell_options().parse_args(
+            ["-in", "20", "-R", self._path + "/persistency.conf"])
+        self._load_config_and_run(args)
+
+        # the old summary covers only the first ten invocations
+        with open(summary_path(self._tmp_file), "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary)
+
+        run = self._load_data(args)
+        self.assertEqual(20, run.completed_invocations)
+        self.assertEqual(20, run.get_number_of_data_points())
+        self.assertEqual(20, run.invocation_statistics().num_samples)
+
+    def test_interrupted_invocation_is_recovered(self):
+        self._load_config_and_run()
+
+        # an interrupted execution wrote only part of the 10th invocation
+        with open(self._tmp_file, "r", encoding="utf-8") as data_file:
+            lines = [line for line in data_file if not line.startswith("10\t")]
+        with open(self._tmp_file, "w", encoding="utf-8") as data_file:
+            data_file.writelines(lines)
+        size = os.path.getsize(self._tmp_file)
+        journal = InvocationJournal(journal_path(self._tmp_file), self._tmp_file)
+        journal.opened(size)
+        journal.started(size, "TestBench", 10)
+        journal.close()
+        with open(self._tmp_file, "a", encoding="utf-8") as data_file:
+            data_file.write(lines[-1][:20])
+
+        ui = _RecordingUI()
+        run = self._load_data(ui=ui)
+
+        self.assertEqual(size, os.path.getsize(self._tmp_file))
+        self.assertEqual(9, run.completed_invocations)
+        self.assertIn("Recovered 1 incomplete invocations", "".join(ui.warnings))
+
+        ex = Executor([run], False, ui)
+        ex.execute()
+        self.assertEqual(10, self._load_data().completed_invocations)
+
+    def test_journal_of_other_data_file_is_discarded(self):
+        self._load_config_and_run()
+        journal = InvocationJournal(journal_path(self._tmp_file), self._tmp_file)
+        journal.started(os.path.getsize(self._tmp_file) // 2, "TestBench", 10)
+        journal.close()
+
+        # the data file was edited by hand
+        with open(self._tmp_file, "r", encoding="utf-8") as data_file:
+            lines = data_file.readlines()
+        with open(self._tmp_file, "w", encoding="utf-8") as data_file:
+            data_file.writelines(lines[:1] + ["# edited by hand\n"] + lines[1:])
+        size = os.path.getsize(self._tmp_file)
+
+        ui = _RecordingUI()
+        run = self._load_data(ui=ui)
+        self.assertEqual(size, os.path.getsize(self._tmp_file))
+        self.assertFalse(os.path.exists(journal_path(self._tmp_file)))
+        self.assertEqual(10, run.completed_invocations)
+        self.assertEqual([], ui.warnings)
+
+    def _indexed_runs(self, run_filter=None, discard_run_data=False):
+        ds = DataStore(self.ui)
+        cnf = Configurator(load_config(self._path + '/persistency.conf'), ds, self.ui,
+                           exp_name="Indexed", data_file=self._tmp_file,
+                           run_filter=run_filter)
+        runs = list(cnf.get_runs())
+        ds.load_data(runs, discard_run_data)
+        return ds, runs
+
+    def _execute_indexed(self, run_filter=None, discard_run_data=False):
+        _, runs = self._indexed_runs(run_filter, discard_run_data)
+        Executor(runs, False, self.ui).execute()
+
+    def _assert_index_matches_data_file(self):
+        index = read_index(index_path(self._tmp_file), self._tmp_file)
+        self.assertIsNotNone(index)
+        rebuilt = DataFileIndex()
+        with open(self._tmp_file, "rb") as data_file:
+            rebuilt.scan(data_file)
+        self.assertEqual(rebuilt.offset, index.offset)
+        self.assertEqual(rebuilt.entries(), index.entries())
+        self.assertEqual(rebuilt.discarded_entries(), index.discarded_entries())
+
+    def test_index_is_maintained_on_append(self):
+        self._execute_indexed(["s:IndexedSuite:Bench1"])
+        self._assert_index_matches_data_file()
+
+        self._execute_indexed()
+        self._assert_index_matches_data_file()
+
+    def test_only_selected_runs_are_loaded(self):
+        self._execute_indexed()
+        os.remove(summary_path(self._tmp_file))
+
+        ds, runs = self._indexed_runs(["s:IndexedSuite:Bench2"])
+        self.assertEqual(["Bench2"], [run.benchmark.name for run in runs])
+        self.assertEqual(3, runs[0].get_number_of_data_points())
+        for run in ds._run_ids:
+            if run is not runs[0]:
+                self.assertEqual(0, run.get_number_of_data_points())
+
+        # the summary would lack the data of the other runs
+        self.assertFalse(os.path.exists(summary_path(self._tmp_file)))
+        _, runs = self._indexed_runs()
+        for run in runs:
+            self.assertEqual(3, run.get_number_of_data_points())
+
+    def test_stale_index_is_updated(self):
+        self._execute_indexed(["s:IndexedSuite:Bench1"])
+        with open(index_path(self._tmp_file), "r", encoding="utf-8") as index_file:
+            index = index_file.read()
+        self._execute_indexed(["s:IndexedSuite:Bench2"])
+        os.remove(summary_path(self._tmp_file))
+
+        # the old index covers only the data of Bench1
+        with open(index_path(self._tmp_file), "w", encoding="utf-8") as index_file:
+            index_file.write(index)
+        _, runs = self._indexed_runs(["s:IndexedSuite:Bench2"])
+        self.assertEqual(3, runs[0].get_number_of_data_points())
+        self._assert_index_matches_data_file()
+
+    def test_index_of_other_data_is_rebuilt(self):
+        self._execute_indexed()
+        os.remove(summary_path(self._tmp_file))
+        with open(index_path(self._tmp_file), "w", encoding="utf-8") as index_file:
+            json.dump({"version": 1, "offset": 10, "fingerprint": "", "ranges": []},
+                      index_file)
+
+        _, runs = self._indexed_runs(["s:IndexedSuite:Bench3"])
+        self.assertEqual(3, runs[0].get_number_of_data_points())
+        self._assert_index_matches_data_file()
+
+    def _assert_data_points(self, expected):
+        _, runs = self._indexed_runs()
+        runs.sort(key=lambda run: run.benchmark.name)
+        self.assertEqual(expected, [run.get_number_of_data_points() for run in runs])
+
+    def test_rerun_appends_tombstone_instead_of_rewriting(self):
+        self._execute_indexed()
+        with open(self._tmp_file, "r", encoding="utf-8") as data_file:
+            data = data_file.read()
+
+        _, runs = self._indexed_runs(["s:IndexedSuite:Bench2"], discard_run_data=True)
+        self.assertEqual(0, runs[0].get_number_of_data_points())
+        with open(self._tmp_file, "r", encoding="utf-8") as data_file:
+            self.assertTrue(data_file.read().startswith(data))
+        self._assert_index_matches_data_file()
+
+        # from the summary, from the data file, and only the selected run
+        self._assert_data_points([3, 0, 3])
+        os.remove(summary_path(self._tmp_file))
+        self._assert_data_points([3, 0, 3])
+        os.remove(summary_path(self._tmp_file))
+        _, runs = self._indexed_runs(["s:IndexedSuite:Bench2"])
+        self.assertEqual(0, runs[0].get_number_of_data_points())
+
+    def test_data_after_tombstone_is_loaded(self):
+        self._execute_indexed()
+        self._execute_indexed(["s:IndexedSuite:Bench2"], discard_run_data=True)
+
+        self._assert_data_points([3, 3, 3])
+        os.remove(summary_path(self._tmp_file))
+        self._assert_data_points([3, 3, 3])
+
+    def _bench2_after_discarding_calibrated_run(self):
+        _, runs = self._indexed_runs(["s:IndexedSuite:Bench2"])
+        self.assertIsNotNone(runs[0].expected_invocation_time())
+        runs[0].calibrated("iterations", 5)
+        runs[0].close_files()
+        self._indexed_runs(["s:IndexedSuite:Bench2"], discard_run_data=True)
+        os.remove(summary_path(self._tmp_file))
+        _, runs = self._indexed_runs(["s:IndexedSuite:Bench2"])
+        return runs[0]
+
+    def test_metadata_of_run_is_discarded_with_its_data(self):
+        self._execute_indexed()
+        run = self._bench2_after_discarding_calibrated_run()
+        self.assertIsNone(run.calibration)
+        self.assertIsNone(run.expected_invocation_time())
+
+        # also when all runs are loaded
+        _, runs = self._indexed_runs()
+        runs.sort(key=lambda run: run.benchmark.name)
+        self.assertEqual([False, True, False],
+                         [run.expected_invocation_time() is None for run in runs])
+        self.assertIsNone(runs[1].calibration)
+        self._assert_index_matches_data_file()
+
+    def test_compaction_removes_discarded_data(self):
+        self._execute_indexed()
+        self._execute_indexed(["s:IndexedSuite:Bench2"], discard_run_data=True)
+        size = os.path.getsize(self._tmp_file)
+
+        self.assertTrue(compact(self._tmp_file))
+        self.assertLess(os.path.getsize(self._tmp_file), size)
+        with open(self._tmp_file, "rb") as data_file:
+            self.assertFalse(
+                any(line.startswith(DISCARDED) for line in data_file))
+        self.assertFalse(os.path.exists(summary_path(self._tmp_file)))
+
+        self._assert_data_points([3, 3, 3])
+        self._assert_index_matches_data_file()
+        self.assertFalse(compact(self._tmp_file))
+
     def _create_dummy_rebench_db_persistence(self):
         class _Cfg(object):
             @staticmethod
@@ -25,6 +25,7 @@ import sys
 from unittest import TestCase
 from tempfile import mkstemp
 from ..environment import init_env_for_test
+from ..journal import index_path, journal_path, summary_path
 from ..ui  import TestDummyUI
 
 
@@ -46,6 +47,13 @@ class ReBenchTestCase(TestCase):
 
     def tearDown(self):
         os.remove(self._tmp_file)
+        for sidecar in (journal_path(self._tmp_file), summary_path(self._tmp_file),
+                        index_path(self._tmp_file)):
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        # the payload that is sent to ReBenchDB is also written to the working directory
+        if os.path.exists(self._path + "/payload.json"):
+            os.remove(self._path + "/payload.json")
         sys.exit = self._sys_exit
 
     def _assert_runs(self, cnf, num_runs, num_dps, num_invocations):
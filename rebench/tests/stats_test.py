@@ -19,7 +19,7 @@
 # IN THE SOFTWARE.
 
 import unittest
-from ..statistics import StatisticProperties
+from ..statistics import StatisticProperties, t_value_95, detect_warmup
 
 
 class StatsTest(unittest.TestCase):
@@ -68,3 +68,56 @@ class StatsTest(unittest.TestCase):
         stats.add(self._mixed)
         self.assertAlmostEqual(27.295918367, stats.mean)
         self._assert(stats, 27.295918367, 22.245044799, 2, 53.5, 14.319929870761944)
+
+    def test_ci_needs_two_samples(self):
+        stats = StatisticProperties()
+        stats.add([1])
+        self.assertIsNone(stats.ci_half_width())
+        self.assertIsNone(stats.relative_ci_half_width())
+
+    def test_ci_123(self):
+        stats = StatisticProperties()
+        stats.add([1, 2, 3])
+        # sample standard deviation is 1, t-value for 2 degrees of freedom is 4.303
+        self.assertAlmostEqual(4.303 / 3 ** 0.5, stats.ci_half_width())
+        self.assertAlmostEqual(4.303 / 3 ** 0.5 / 2, stats.relative_ci_half_width())
+
+    def test_t_value_approaches_normal_distribution(self):
+        self.assertAlmostEqual(2.021, t_value_95(40), places=3)
+        self.assertAlmostEqual(1.980, t_value_95(120), places=3)
+        self.assertAlmostEqual(1.960, t_value_95(100000), places=3)
+
+    def test_detect_warmup_of_steady_series(self):
+        self.assertEqual(0, detect_warmup([10.0] * 20))
+
+    def test_detect_warmup(self):
+        self.assertEqual(4, detect_warmup([100, 80, 60, 40] + [10] * 20))
+
+    def test_detect_warmup_of_at_most_half_the_samples(self):
+        self.assertEqual(5, detect_warmup(list(range(100, 0, -10))))
+
+    def test_detect_warmup_needs_enough_samples(self):
+        self.assertEqual(0, detect_warmup([100, 10, 10, 10]))
+
+    def test_merge(self):
+        stats = StatisticProperties()
+        stats.add(self._mixed[:20])
+        other = StatisticProperties()
+        other.add(self._mixed[20:])
+        stats.merge(other)
+        self._assert(stats, 27.295918367, 22.245044799, 2, 53.5, 14.319929870761944)
+        self.assertEqual(49, stats.num_samples)
+
+    def test_merge_into_empty(self):
+        stats = StatisticProperties()
+        other = StatisticProperties()
+        other.add([1, 2, 3])
+        stats.merge(other)
+        stats.merge(StatisticProperties())
+        self._assert(stats, 2, 1.817120592, 1, 3, 0.816496580927726)
+
+    def test_from_aggregates(self):
+        stats = StatisticProperties.from_aggregates(3, 2.0, 2.0, 6.0, 1.0, 3.0)
+        self._assert(stats, 2, 1.817120592, 1.0, 3.0, 0.816496580927726)
+        stats.add_sample(4.0)
+        self.assertAlmostEqual(2.5, stats.mean)
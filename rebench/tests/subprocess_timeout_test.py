@@ -19,8 +19,13 @@
 # THE SOFTWARE.
 import os
 import subprocess
+import sys
 import unittest
+from threading import Thread
+from time import time
+from unittest.mock import patch
 
+from .. import subprocess_engine
 from .. import subprocess_with_timeout as sub
 
 
@@ -63,6 +68,185 @@ class SubprocessTimeoutTest(unittest.TestCase):
         self.assertEqual("", output)
         self.assertEqual(None, err)
 
+    def test_exec_with_stdin_input(self):
+        (return_code, output, err) = sub.run("/bin/sh", {}, cwd=self._path,
+                                             stdin_input=b"echo from-stdin",
+                                             timeout=10)
+        self.assertEqual(0, return_code)
+        self.assertEqual("from-stdin\n", output)
+        self.assertEqual("", err)
+
+    def test_exec_separates_stdout_and_stderr(self):
+        (return_code, output, err) = sub.run("echo out; echo err 1>&2; exit 3", {},
+                                             cwd=self._path, shell=True)
+        self.assertEqual(3, return_code)
+        self.assertEqual("out\n", output)
+        self.assertEqual("err\n", err)
+
+    def test_concurrent_invocations_share_one_event_loop(self):
+        results = {}
+
+        def execute(i):
+            results[i] = sub.run("sleep 1; echo %d" % i, {}, cwd=self._path,
+                                 stderr=subprocess.STDOUT, shell=True, timeout=10)
+
+        threads = [Thread(target=execute, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i in range(8):
+            self.assertEqual((0, "%d\n" % i, None), results[i])
+
+    def test_keep_alive_is_reported_while_waiting(self):
+        reports = []
+        old_interval = subprocess_engine._KEEP_ALIVE_INTERVAL
+        subprocess_engine._KEEP_ALIVE_INTERVAL = 0.3
+        try:
+            (return_code, output, _) = sub.run("sleep 1; echo Done", {}, cwd=self._path,
+                                               shell=True, timeout=10,
+                                               keep_alive_output=reports.append)
+        finally:
+            subprocess_engine._KEEP_ALIVE_INTERVAL = old_interval
+
+        self.assertEqual(0, return_code)
+        self.assertEqual("Done\n", output)
+        self.assertGreaterEqual(len(reports), 2)
+
+    def test_stdout_lines_are_fed_to_consumer(self):
+        lines = []
+        (return_code, output, _) = sub.run("echo first; echo second; printf third", {},
+                                           cwd=self._path, shell=True,
+                                           stdout_line_consumer=lines.append)
+        self.assertEqual(0, return_code)
+        self.assertEqual("first\nsecond\nthird", output)
+        self.assertEqual(["first", "second", "third"], lines)
+
+    def test_consumer_aborts_process_tree(self):
+        def abort_on_error(line):
+            if line == "Error":
+                raise sub.AbortProcess()
+
+        start = time()
+        (return_code, output, _) = sub.run("echo Error; sleep 100; echo Done", {},
+                                           cwd=self._path, shell=True, timeout=50,
+                                           stdout_line_consumer=abort_on_error)
+        self.assertLess(time() - start, 10)
+        self.assertEqual(sub.E_TIMEOUT, return_code)
+        self.assertEqual("Error\n", output)
+
+    def test_consumer_exception_kills_process_and_is_raised(self):
+        start = time()
+        with self.assertRaises(ValueError):
+            sub.run("echo not-a-number; yes; echo Done", {},
+                    cwd=self._path, shell=True, stdout_line_consumer=float)
+        self.assertLess(time() - start, 10)
+
+    def test_output_beyond_limit_is_spilled_to_file(self):
+        (return_code, output, _) = sub.run("seq 1 1000", {}, cwd=self._path, shell=True,
+                                           output_limit=100, as_output_capture=True)
+        try:
+            self.assertEqual(0, return_code)
+            self.assertTrue(output.spilled)
+            expected = "".join("%d\n" % i for i in range(1, 1001))
+            self.assertEqual(len(expected), output.size)
+            self.assertEqual(expected, output.text())
+            self.assertEqual("[... %d bytes of output omitted ...]\n999\n1000\n"
+                             % (len(expected) - 9), output.text(9))
+        finally:
+            output.close()
+
+    def test_output_within_limit_stays_in_memory(self):
+        capture = subprocess_engine.OutputCapture(10)
+        capture.write(b"12345")
+        capture.write(b"6789")
+        self.assertFalse(capture.spilled)
+        self.assertEqual("123456789", capture.text())
+        self.assertEqual("[... 5 bytes of output omitted ...]\n6789", capture.text(4))
+
+        capture.write(b"abc")
+        self.assertTrue(capture.spilled)
+        self.assertEqual("123456789abc", str(capture))
+        capture.close()
+
+    def test_long_lines_are_truncated_for_consumer(self):
+        lines = []
+        tee = subprocess_engine._Tee(subprocess_engine.OutputCapture(), None,
+                                     lines.append, line_limit=10)
+        tee.append(b"first\nprogress")
+        for _ in range(10000):
+            tee.append(b"\r" + b"=" * 100)
+        tee.append(b"\rdone\nsecond\n" + b"x" * 20 + b"\nlast")
+        self.assertLessEqual(len(tee._partial_line), 10)
+        tee.close()
+        tee.capture.close()
+
+        self.assertEqual(["first", "progress\r=", "second", "x" * 10, "last"], lines)
+
+    def _run_with_resource_usage(self):
+        usage = []
+        (return_code, output, _) = sub.run(
+            "python3 -c \"print(sum(range(1000000)))\"", os.environ, cwd=self._path,
+            shell=True, resource_usage_consumer=usage.append)
+        self.assertEqual(0, return_code)
+        self.assertEqual("499999500000\n", output)
+        self.assertEqual(1, len(usage))
+        self.assertGreater(usage[0].ru_maxrss, 0)
+        self.assertGreater(usage[0].ru_utime + usage[0].ru_stime, 0)
+
+    def test_resource_usage_is_reported(self):
+        self._run_with_resource_usage()
+
+    def test_resource_usage_is_reported_without_pidfd(self):
+        with patch.object(os, "pidfd_open", side_effect=OSError, create=True):
+            self._run_with_resource_usage()
+
+    def test_timeout_kills_forking_process_tree(self):
+        start = time()
+        (return_code, output, _) = sub.run([sys.executable, "fork_tree.py", "4", "20"], {},
+                                           cwd=self._path, timeout=2)
+        elapsed = time() - start
+
+        self.assertEqual(sub.E_TIMEOUT, return_code)
+        # orphans are killed with the process group, the leaves of the tree
+        # left the group, but are found in the process table
+        self.assertLess(elapsed, 6)
+        pids = [int(pid) for pid in output.split()]
+        self.assertGreater(len(pids), 1)
+        for pid in pids:
+            self.assertFalse(_is_running(pid), "process %d survived" % pid)
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"),
+                         "setting the CPU affinity is not supported on this platform")
+    def test_cpu_set_restricts_process_and_its_children(self):
+        available = os.sched_getaffinity(0)
+        cpu_set = {max(available)}
+        cmdline = "%s -c 'import os; print(sorted(os.sched_getaffinity(0)))'" % sys.executable
+
+        (return_code, output, _) = sub.run(cmdline, {}, shell=True, cpu_set=cpu_set)
+        self.assertEqual(0, return_code)
+        self.assertEqual("%s\n" % sorted(cpu_set), output)
+
+        # the event loop thread is not restricted for later processes
+        (_, output, _) = sub.run(cmdline, {}, shell=True)
+        self.assertEqual("%s\n" % sorted(available), output)
+
+    def test_missing_executable_raises_os_error(self):
+        with self.assertRaises(OSError):
+            sub.run("/does/not/exist", {}, cwd=self._path)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # a zombie is terminated, but may not have been reaped yet
+    state = subprocess.run(["ps", "-o", "stat=", "-p", str(pid)], stdout=subprocess.PIPE,
+                           check=False).stdout.decode().strip()
+    return state != "" and not state.startswith("Z")
+
 
 def test_suite():
     unittest.defaultTestLoader.loadTestsFromTestCase(SubprocessTimeoutTest)
@@ -0,0 +1,247 @@
+"""
+A worker that executes runs for a ReBench coordinator.
+
+Started without arguments, for instance via `ssh host rebench-worker`, the
+worker serves a single coordinator on its standard input and output.
+With `--listen unix:PATH` or `--listen tcp:HOST:PORT`, it accepts
+coordinators on the socket, one after another.
+
+The worker executes the commands of the configuration a coordinator sends.
+With a token in the `REBENCH_WORKER_TOKEN` environment variable, it accepts
+only coordinators with the same token. Listening on TCP requires a token,
+and the worker should only be reachable via a trusted network, or for
+instance via an SSH tunnel, because the connection is not encrypted.
+
+The protocol is described in `rebench/distributed.py`.
+"""
+
+import os
+import socket
+import sys
+from argparse import ArgumentParser
+
+from .configurator import Configurator
+from .distributed import (
+    PROTOCOL_VERSION,
+    TOKEN_ENV_VAR,
+    Connection,
+    WorkerError,
+    format_address,
+    is_valid_token,
+    listen,
+    socket_connection,
+    worker_token,
+)
+from .executor import Executor
+from .model.run_id import RunId
+from .output import UIError
+from .persistence import AbstractPersistence, DataStore
+from .rebench import ReBench
+from .ui import UI, escape_braces
+
+
+class _StreamingPersistence(AbstractPersistence):
+    """Sends the data of the runs to the coordinator instead of a data file."""
+
+    def __init__(self, connection: Connection):
+        self._connection = connection
+
+    def persist_data_point(self, data_point):
+        self._connection.send(
+            {
+                "type": "data",
+                "measurements": data_point.measurement_dicts(),
+            }
+        )
+
+    def invocation_completed(self, run_id, invocation, invocation_time):
+        self._connection.send(
+            {
+                "type": "invocation",
+                "invocation": invocation,
+                "time": invocation_time,
+                "warmup": run_id.detected_warmup(invocation),
+            }
+        )
+
+
+class _WorkerDataStore(DataStore):
+    """Uses the streaming persistence for all runs."""
+
+    def __init__(self, ui, persistence):
+        super().__init__(ui)
+        self._persistence = persistence
+
+    def get(self, filename, configurator, action, data_format="tsv"):
+        if action == "profile":
+            raise UIError("Profiling is not supported by workers.\n", None)
+        return self._persistence
+
+
+class _Session(object):
+
+    def __init__(self, connection: Connection, ui: UI, token=None):
+        self._connection = connection
+        self.ui = ui
+        self._token = token
+        self._data_store = _WorkerDataStore(ui, _StreamingPersistence(connection))
+        self._configurator = None
+        self._runs: set = set()
+        self._use_nice = False
+        self._use_shielding = False
+
+    def _setup(self, message):
+        if message["type"] != "setup" or message.get("version") != PROTOCOL_VERSION:
+            raise WorkerError(
+                "Expected the setup for protocol version %d" % PROTOCOL_VERSION
+            )
+        if not is_valid_token(message.get("token"), self._token):
+            raise WorkerError("The coordinator did not send the token of the worker")
+
+        # relative paths in the configuration are resolved as on the coordinator
+        os.chdir(message["cwd"])
+        args = ReBench().shell_options().parse_args(message["args"])
+        # data is reported by the coordinator
+        args.use_data_reporting = False
+        exp_name, exp_filter = ReBench.determine_exp_name_and_filters(args.exp_filter)
+        self._configurator = Configurator(
+            message["config"],
+            self._data_store,
+            self.ui,
+            args,
+            None,
+            exp_name,
+            None,
+            args.build_log,
+            exp_filter,
+            args.machine,
+        )
+        self._runs = self._configurator.get_runs()
+        # denoise settings, as determined on the coordinator
+        self._use_nice = bool(message.get("use_nice"))
+        self._use_shielding = bool(message.get("use_shielding"))
+
+    def _find_run(self, run_dict) -> RunId:
+        benchmark = self._data_store.create_benchmark_from_dict(run_dict["benchmark"])
+        run = self._data_store.create_run_id_from_dict(run_dict, benchmark)
+        if run not in self._runs:
+            raise WorkerError(
+                "The run %s is not part of the configuration of the worker"
+                % run.as_simple_string()
+            )
+        return run
+
+    def _execute(self, message):
+        run = self._find_run(message["run"])
+        run.load_summary(message["state"])
+
+        options = self._configurator.options
+        executor = Executor(
+            [run],
+            self._configurator.do_builds,
+            self.ui,
+            options.include_faulty,
+            options.debug,
+            build_log=self._configurator.build_log,
+            artifact_review=self._configurator.artifact_review,
+            use_nice=self._use_nice,
+            use_shielding=self._use_shielding,
+            config_dir=self._configurator.config_dir,
+            use_denoise=options.use_denoise,
+            output_limit=options.output_limit,
+            cgroup_root=options.cgroup_root,
+            force_build=options.force_build,
+            calibrate=False,
+        )
+        executor.execute()
+        self._connection.send({"type": "completed", "failed": run.is_failed})
+
+    def serve(self):
+        try:
+            self._setup(self._connection.receive())
+        except (UIError, WorkerError, KeyError, ValueError, OSError) as err:
+            self._report_error(err)
+            return
+        self._connection.send({"type": "ready"})
+
+        while True:
+            try:
+                message = self._connection.receive()
+            except WorkerError:
+                # the coordinator closed the connection
+                return
+            try:
+                if message["type"] != "run":
+                    raise WorkerError("Expected a run, but got %s" % message["type"])
+                self._execute(message)
+            except (UIError, WorkerError, KeyError, ValueError) as err:
+                self._report_error(err)
+
+    def _report_error(self, err):
+        message = getattr(err, "message", None) or str(err)
+        self.ui.error("{ind}%s\n" % escape_braces(message.strip()))
+        self._connection.send({"type": "error", "message": message.strip()})
+
+
+def serve_stdio(ui: UI):
+    # the standard input and output are used for the protocol,
+    # and any other output goes to the standard error
+    control_in = os.dup(0)
+    control_out = os.dup(1)
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    os.close(null)
+    os.dup2(2, 1)
+
+    with Connection(os.fdopen(control_in, "rb"), os.fdopen(control_out, "wb")) as conn:
+        _Session(conn, ui, worker_token()).serve()
+
+
+def serve_socket(address: str, ui: UI):
+    token = worker_token()
+    server = listen(address)
+    with server:
+        if server.family != socket.AF_UNIX and token is None:
+            raise WorkerError(
+                "Listening on TCP requires a token in %s, which coordinators "
+                "need to have as well" % TOKEN_ENV_VAR
+            )
+        print("Listening on " + format_address(server), file=sys.stderr, flush=True)
+
+        while True:
+            sock, _ = server.accept()
+            with socket_connection(sock) as connection:
+                try:
+                    _Session(connection, ui, token).serve()
+                except OSError as err:
+                    ui.warning("Lost the connection to the coordinator: %s\n" % err)
+
+
+def main_func():
+    arg_parser = ArgumentParser(description="Execute runs for a ReBench coordinator.")
+    arg_parser.add_argument(
+        "--listen",
+        metavar="ADDRESS",
+        default=None,
+        help="Accept coordinators on unix:PATH or tcp:HOST:PORT, instead of "
+        "serving a single one on the standard input and output. "
+        "Listening on TCP requires a token in %s." % TOKEN_ENV_VAR,
+    )
+    args = arg_parser.parse_args()
+
+    ui = UI()
+    try:
+        if args.listen:
+            serve_socket(args.listen, ui)
+        else:
+            serve_stdio(ui)
+    except KeyboardInterrupt:
+        return 2
+    except (OSError, WorkerError) as err:
+        ui.error("%s\n" % escape_braces(str(err)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+A fork server for Python benchmark harnesses.
+
+The server imports the given modules once, and then forks a child for each
+invocation requested by ReBench, which executes the harness in the already
+initialized interpreter. It is started for instance with:
+
+    python3 -m rebench.zygote --preload json --preload my_harness
+
+or by giving the path of this file, in which case it does not need ReBench
+to be installed for the Python executing the benchmarks.
+
+The protocol is described in `rebench/fork_server.py`.
+Requests are read from the standard input, and responses are written to the
+standard output. Output of the preloaded modules goes to the standard error.
+"""
+
+import importlib
+import json
+import os
+import runpy
+import selectors
+import signal
+import sys
+import traceback
+from argparse import ArgumentParser
+
+
+def _parse_python_args(argv):
+    """
+    Return how to execute the command line, i.e., `("path", script)`,
+    `("module", name)`, or `("code", source)`, and the arguments for `sys.argv`.
+    """
+    if argv and argv[0].endswith(".py"):
+        return "path", argv[0], argv
+
+    # the first argument is the Python interpreter
+    args = argv[1:]
+    while args and args[0] in ("-u", "-B", "-E", "-s", "-S"):
+        # these options have no effect on an already initialized interpreter
+        args = args[1:]
+
+    if not args:
+        raise ValueError("No script, module, or code to execute given")
+    if args[0] == "-m" and len(args) > 1:
+        return "module", args[1], args[1:]
+    if args[0] == "-c" and len(args) > 1:
+        return "code", args[1], ["-c"] + args[2:]
+    if args[0].startswith("-"):
+        raise ValueError("Unsupported interpreter option: " + args[0])
+    return "path", args[0], args
+
+
+def _execute(kind, target, argv):
+    sys.argv = list(argv)
+    if kind == "path":
+        sys.path[0] = os.path.dirname(os.path.abspath(target))
+        runpy.run_path(target, run_name="__main__")
+    elif kind == "module":
+        sys.path[0] = os.getcwd()
+        runpy.run_module(target, run_name="__main__", alter_sys=True)
+    else:
+        sys.path[0] = ""
+        # pylint: disable-next=exec-used
+        exec(compile(target, "<string>", "exec"), {"__name__": "__main__"})
+
+
+def _exit_code(exit_exception):
+    code = exit_exception.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_child(request, control_fds):
+    """Execute the request in the forked child. Does not return."""
+    code = 1
+    try:
+        os.setsid()
+        if request.get("cpu_set"):
+            os.sched_setaffinity(0, request["cpu_set"])
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for fd in control_fds:
+            os.close(fd)
+
+        output = os.open(request["output"], os.O_WRONLY)
+        os.dup2(output, 1)
+        os.dup2(output, 2)
+        os.close(output)
+
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        kind, target, argv = _parse_python_args(request["argv"])
+        _execute(kind, target, argv)
+        code = 0
+    except SystemExit as exit_exception:
+        code = _exit_code(exit_exception)
+    except BaseException:  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)  # pylint: disable=protected-access
+
+
+class _Server(object):
+
+    def __init__(self, control_in, control_out):
+        self._control_in = control_in
+        self._control_out = control_out
+        self._pending = b""
+        self._children = {}
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_write, False)
+
+    def _respond(self, response):
+        data = (json.dumps(response) + "\n").encode("utf-8")
+        while data:
+            data = data[os.write(self._control_out, data) :]
+
+    def _fork(self, request):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            _run_child(
+                request,
+                [
+                    self._control_in,
+                    self._control_out,
+                    self._wakeup_read,
+                    self._wakeup_write,
+                ],
+            )
+        self._children[pid] = request["id"]
+        self._respond({"id": request["id"], "pid": pid})
+
+    def _handle_requests(self):
+        data = os.read(self._control_in, 64 * 1024)
+        if not data:
+            return False
+
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            request = json.loads(line)
+            try:
+                self._fork(request)
+            except OSError as err:
+                self._respond({"id": request["id"], "error": str(err)})
+        return True
+
+    def _reap_children(self):
+        try:
+            while os.read(self._wakeup_read, 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            request_id = self._children.pop(pid, None)
+            if request_id is not None:
+                self._respond(
+                    {"id": request_id, "exit": os.waitstatus_to_exitcode(status)}
+                )
+
+    def serve(self):
+        os.set_blocking(self._wakeup_read, False)
+        signal.signal(signal.SIGCHLD, lambda _signum, _frame: None)
+        signal.set_wakeup_fd(self._wakeup_write)
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._control_in, selectors.EVENT_READ)
+            selector.register(self._wakeup_read, selectors.EVENT_READ)
+            while True:
+                for key, _ in selector.select():
+                    if key.fd == self._wakeup_read:
+                        self._reap_children()
+                    elif not self._handle_requests():
+                        # ReBench closed the connection
+                        return
+
+
+def main_func():
+    arg_parser = ArgumentParser(
+        description="Fork server for Python benchmark harnesses."
+    )
+    arg_parser.add_argument(
+        "--preload",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="Import the module before forking the invocations.",
+    )
+    args = arg_parser.parse_args()
+
+    # the standard input and output are used for the protocol
+    control_in = os.dup(0)
+    control_out = os.dup(1)
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    os.close(null)
+    os.dup2(2, 1)
+
+    # modules are found relative to the working directory, as for `python3 -m`
+    sys.path.insert(0, os.getcwd())
+    for module in args.preload:
+        importlib.import_module(module)
+
+    _Server(control_in, control_out).serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -55,13 +55,20 @@ setup(name='ReBench',
           'py-cpuinfo==9.0.0',
           'psutil>=5.9.5'
       ],
+      extras_require={
+          # loads large data files in bulk
+          'bulk': ['numpy>=1.22']
+      },
       test_require=[
           'pytest>=7.2.2'
       ],
       entry_points={
           'console_scripts': [
               'rebench = rebench.rebench:main_func',
-              'rebench-denoise = rebench.denoise:main_func'
+              'rebench-denoise = rebench.denoise:main_func',
+              'rebench-worker = rebench.worker:main_func',
+              'rebench-convert = rebench.binary_data:main_func',
+              'rebench-compact = rebench.compact:main_func'
           ]
       },
       scripts=['rebench/denoise.py'],